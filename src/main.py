@@ -126,15 +126,21 @@ def start_translation(config):
     from modless_chat_trans.logger import logger
     from modless_chat_trans.i18n import _
     from modless_chat_trans.config import ServiceType
-    from modless_chat_trans.context_buffer import ContextBuffer, ContextEntry, extract_log_time
-    from modless_chat_trans.web_display import start_httpserver_thread, display_message, allocate_slot, fill_slot
+    from modless_chat_trans.context_buffer import ChannelContextBuffers, ContextEntry, extract_log_time
+    from modless_chat_trans.web_display import (
+        start_httpserver_thread, display_message, allocate_slot, fill_slot, update_slot,
+    )
     from modless_chat_trans.log_monitor import start_log_monitor
     from modless_chat_trans import message_processor
+    from modless_chat_trans.file_utils import init_translation_cache
+    from modless_chat_trans.cache_maintenance import start_periodic_maintenance
+    from modless_chat_trans.http_pool import init_http_pool
+    from modless_chat_trans.llm_connections import init_llm_connections
     from modless_chat_trans.message_processor import (
         init_processor, init_blacklist, process_message, parse_message,
-        is_user_in_blacklist, is_message_blocked, sanitize_hypixel_name,
+        is_user_in_blacklist, is_message_blocked, sanitize_hypixel_name, detect_channel,
     )
-    from modless_chat_trans.translator import Translator, MessageType
+    from modless_chat_trans.translator import Translator, MessageType, metrics_snapshot
     from modless_chat_trans.clipboard_monitor import monitor_clipboard, modify_clipboard
     try:
         from modless_chat_trans.tts_engine import TTSEngine, TTS_AVAILABLE
@@ -145,11 +151,14 @@ def start_translation(config):
 
     # 初始化上下文缓冲区
     ctx_cfg = config.context
-    context_buffer = ContextBuffer(
+    context_buffer = ChannelContextBuffers(
         strategy=ctx_cfg.strategy,
         context_length=ctx_cfg.context_length,
         context_timeout=ctx_cfg.context_timeout,
         block_truncation_size=ctx_cfg.block_truncation_size,
+        per_channel=ctx_cfg.per_channel,
+        max_channels=ctx_cfg.max_channels,
+        context_tokens=ctx_cfg.context_tokens,
     )
 
     # 初始化 TTS 朗读引擎（若依赖库不可用则使用 no-op stub）
@@ -192,19 +201,23 @@ def start_translation(config):
 
         if data_type == "log":
             # 提取日志时间或用行到达时间
+            if "[CHAT]" not in line:
+                if slot_id is not None:
+                    fill_slot(slot_id, "", "", {})
+                return
+
             try:
                 log_time = extract_log_time(line, arrival_time)
-                ctx_messages = context_buffer.get_context_messages()
+                parsed_name, _content, parsed_type = parse_message(
+                    line, "log", config.message_capture.replace_garbled_chars,
+                )
+                channel = detect_channel(parsed_name, parsed_type)
+                ctx_messages = context_buffer.get_context_messages(channel)
             except Exception as error:
                 logger.exception(f"[Log] Failed to prepare translation context: {error}")
                 report_error(f"{_('翻译失败，错误：')} {error}")
                 return
 
-            if "[CHAT]" not in line:
-                if slot_id is not None:
-                    fill_slot(slot_id, "", "", {})
-                return
-
             chat_content = line.split("[CHAT]")[1].strip()
             if config.message_capture.replace_garbled_chars:
                 chat_content = chat_content.replace("\ufffd\ufffd", "\u00A7")
@@ -216,6 +229,10 @@ def start_translation(config):
                     source_language=config.message_capture.source_language,
                     target_language=config.message_capture.target_language,
                     context_messages=ctx_messages,
+                    on_partial=(
+                        (lambda text: update_slot(slot_id, text))
+                        if slot_id is not None and config.message_presentation.stream_translations else None
+                    ),
                 )
             except Exception as error:
                 logger.exception(f"[Log] Unexpected translation failure: {error}")
@@ -244,9 +261,9 @@ def start_translation(config):
             if translated and chat_content:
                 context_buffer.push(ContextEntry(
                     original=chat_content,
-                    translated=translated,
                     timestamp=log_time,
                     player_name=name or "",
+                    channel=channel,
                 ))
             # TTS 朗读
             if tts_engine.enabled and translated:
@@ -309,6 +326,7 @@ def start_translation(config):
         # Step 1: 解析每条，过滤非聊天行
         # parsed: [(i_in_items, line, arrival_time, slot_id, chat_content, log_time, player_name)]
         parsed = []
+        channels = []  # 与 parsed 一一对应的聊天频道
         dismiss_slots = []
 
         for i, (line, arrival_time, slot_id) in enumerate(items):
@@ -338,6 +356,7 @@ def start_translation(config):
 
             log_time = extract_log_time(line, arrival_time)
             parsed.append((i, line, arrival_time, slot_id, chat_content, log_time, name))
+            channels.append(detect_channel(name, msg_type))
 
         # 移除被过滤的 slot 的占位符
         for sid in dismiss_slots:
@@ -347,27 +366,45 @@ def start_translation(config):
             return
 
         # Step 2: 逐条检查缓存和术语表
-        from modless_chat_trans.file_utils import cache as trans_cache
-        from modless_chat_trans.message_processor import match_and_translate
+        from modless_chat_trans.file_utils import translation_cache
+        from modless_chat_trans.format_codes import normalize_formatting
+        from modless_chat_trans.message_processor import (
+            match_and_translate, is_untranslatable, is_negative_cached,
+            detect_skip_language, language_skip_stats,
+        )
 
         need_translate_indices = []
         cached_results = {}
+        infos = {}
+        namespace = player_translator.cache_namespace(
+            config.message_capture.source_language, config.message_capture.target_language,
+        )
+        # 格式化代码抽取为占位符，缓存与批量翻译均使用占位符形式
+        formatted_list = [normalize_formatting(entry[4]) for entry in parsed]
 
         for i, (item_i, line, arrival_time, slot_id, chat_content, log_time, player_name) in enumerate(parsed):
+            formatted = formatted_list[i]
             if glossary_result := match_and_translate(chat_content):
                 cached_results[i] = glossary_result
-            elif chat_content in trans_cache:
-                cached_results[i] = trans_cache[chat_content]
+            elif not formatted.text or is_untranslatable(chat_content) or is_negative_cached(chat_content):
+                cached_results[i] = chat_content
+            elif infos.setdefault(i, detect_skip_language(player_name, chat_content)).get("skip_src_lang"):
+                # 与单条路径一致：已是目标语言（或跳过语言）的消息原样显示
+                cached_results[i] = chat_content
+            elif (cached := translation_cache.get(namespace, formatted.text)) is not None:
+                cached_results[i] = formatted.restore(cached)
             else:
                 need_translate_indices.append(i)
 
         # Step 3: 批量翻译未命中的条目
-        ctx_messages = context_buffer.get_context_messages()
+        # 整批共用一份上下文：全部来自同一频道时用该频道的历史，否则用公屏
+        batch_channel = channels[0] if len(set(channels)) == 1 else "public"
+        ctx_messages = context_buffer.get_context_messages(batch_channel)
         batch_results = {}
         fallback_to_single = False
 
         if need_translate_indices:
-            texts_to_translate = [parsed[i][4] for i in need_translate_indices]
+            texts_to_translate = [formatted_list[i].text for i in need_translate_indices]
 
             translations = player_translator.translate_batch_with_context(
                 texts=texts_to_translate,
@@ -378,10 +415,14 @@ def start_translation(config):
 
             if translations is not None:
                 for j, pi in enumerate(need_translate_indices):
-                    batch_results[pi] = translations[j]
-                    chat_content = parsed[pi][4]
+                    formatted = formatted_list[pi]
+                    batch_results[pi] = formatted.restore(translations[j]) if translations[j] else ""
+                    if infos.get(pi, {}).get("language_audit"):
+                        language_skip_stats.record_audit(
+                            bool(translations[j]) and translations[j].strip() == formatted.text.strip()
+                        )
                     if translations[j]:
-                        trans_cache[chat_content] = translations[j]
+                        translation_cache.set(namespace, formatted.text, translations[j])
             else:
                 fallback_to_single = True
 
@@ -398,14 +439,15 @@ def start_translation(config):
         for i, (item_i, line, arrival_time, slot_id, chat_content, log_time, player_name) in enumerate(parsed):
             translated = cached_results.get(i) or batch_results.get(i, "")
 
-            fill_slot(slot_id, player_name, translated or "", {}, duration=duration / len(parsed), original=chat_content)
+            fill_slot(slot_id, player_name, translated or "", infos.get(i, {}), duration=duration / len(parsed),
+                      original=chat_content)
 
             if translated:
                 batch_entries.append(ContextEntry(
                     original=chat_content,
-                    translated=translated,
                     timestamp=log_time,
                     player_name=player_name,
+                    channel=channels[i],
                 ))
 
         if batch_entries:
@@ -419,6 +461,8 @@ def start_translation(config):
                     config.message_capture.target_language
                 )
 
+    http_pool = init_http_pool(config.network)
+    llm_connections = init_llm_connections(config.network)
     player_translator = Translator(
         config.player_translation,
         config.glossary,
@@ -434,19 +478,56 @@ def start_translation(config):
         )
     else:
         send_translator = player_translator
+    llm_endpoints = list(dict.fromkeys(player_translator.llm_endpoints() + send_translator.llm_endpoints()))
+    if llm_endpoints:
+        llm_connections.prewarm(llm_endpoints)
+
+    if ctx_cfg.summary and ctx_cfg.strategy != "disabled":
+        if config.player_translation.service_type == ServiceType.LLM:
+            from modless_chat_trans.context_summarizer import ContextSummarizer
+            context_summarizer = ContextSummarizer(
+                lambda previous, lines: player_translator.summarize_context(
+                    previous, lines, ctx_cfg.summary_max_tokens,
+                ),
+                min_interval=ctx_cfg.summary_interval,
+                idle_seconds=ctx_cfg.summary_idle,
+            )
+            context_buffer.set_on_push(context_summarizer.observe)
+        else:
+            logger.warning("[Context] Context summaries require an LLM translation service, disabled.")
 
     start_httpserver_thread(
         http_port=config.message_presentation.web_port,
         callback=lambda data, data_type="webui", rage_mode=False: callback(
             data, time.time(), slot_id=allocate_slot(name="[INFO]", arrival_time=time.time()), data_type=data_type, rage_mode=rage_mode
         ),
-        tts_engine=tts_engine
+        tts_engine=tts_engine,
+        metrics=lambda: {
+            **metrics_snapshot(),
+            "http_rate_limits": http_pool.snapshot(),
+            "language_skip": message_processor.language_skip_stats.snapshot(),
+        },
     )
 
     init_processor(
         config.message_capture,
-        config.glossary
+        config.glossary,
+        negative_namespace=player_translator.cache_namespace(
+            config.message_capture.source_language, config.message_capture.target_language,
+        ),
+    )
+    init_translation_cache(
+        config.cache,
+        player_translator.cache_namespace(
+            config.message_capture.source_language, config.message_capture.target_language,
+        ),
     )
+    start_periodic_maintenance(config.cache)
+    if config.cache.shared_server_port:
+        from modless_chat_trans.file_utils import cache, translation_cache
+        from modless_chat_trans.shared_cache import start_shared_cache_server
+        start_shared_cache_server(cache, config.cache.shared_server_port, config.cache.shared_token,
+                                  decode=translation_cache.codec.decode, memory_tier=translation_cache)
     init_blacklist(config.blacklist)
 
     monitor_thread = threading.Thread(
@@ -461,6 +542,7 @@ def start_translation(config):
             config.message_capture.target_language,
             config.message_capture.replace_garbled_chars,
             tts_engine,
+            config.message_presentation.stream_translations,
         )
     )
     monitor_thread.daemon = True
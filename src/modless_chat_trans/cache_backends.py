@@ -0,0 +1,200 @@
+# Copyright (C) 2025 LiJiaHua1024
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+翻译缓存磁盘层的存储后端。
+
+- "diskcache"（默认）：SQLite 数据库，支持清理规则、导出导入、Pre-TTS 排名等按 SQL 扫描的功能；
+  SQLite 参数由调优方案（profile）给出，可用 sqlite-pragmas 逐项覆盖。
+- "dbm"：标准库 dbm 哈希文件（需要 gdbm/ndbm，或 Python 3.13+ 的 dbm.sqlite3），
+  只提供按键读写，上述依赖 SQL 的功能不可用。只有纯 Python 的 dbm.dumb 时改用 diskcache：
+  dbm.dumb 每次写入都追加数据文件并重写索引，不适合作为翻译缓存。
+
+存储设置在程序启动、读取完整配置之前生效（file_utils 导入时打开缓存），修改后需重启。
+"""
+
+import dbm
+import importlib
+import os
+import threading
+from contextlib import contextmanager
+from typing import Optional
+
+from diskcache import Cache
+
+from modless_chat_trans.logger import logger
+from modless_chat_trans.translation_cache import NAMESPACE_SEPARATOR
+
+DEFAULT_DIRECTORY = "mct-cache"
+BACKENDS = ("diskcache", "dbm")
+EVICTION_POLICIES = ("least-frequently-used", "least-recently-used", "least-recently-stored", "none")
+
+# SQLite 调优方案（diskcache 的 sqlite_* 设置）；balanced 即 diskcache 默认值：
+# WAL、synchronous = NORMAL、64 MB mmap、8192 页缓存
+PROFILES = {
+    "balanced": {},
+    # 机械硬盘/慢盘：更大的 mmap 与页缓存减少随机读，synchronous = OFF 省去提交时的 fsync
+    # （断电时可能丢失最近几秒写入的缓存，不会损坏数据库）
+    "fast": {"synchronous": 0, "mmap_size": 2 ** 28, "cache_size": 2 ** 15},
+    # 每次提交都 fsync
+    "safe": {"synchronous": 2},
+    # 内存受限：关闭 mmap，缩小页缓存
+    "low-memory": {"mmap_size": 0, "cache_size": 2 ** 10},
+}
+_PRAGMAS = ("journal_mode", "synchronous", "mmap_size", "cache_size")
+
+
+def resolve_directory(directory: str) -> str:
+    """缓存目录：空字符串为当前工作目录下的 mct-cache；支持 ~ 与环境变量"""
+    if not directory:
+        return DEFAULT_DIRECTORY
+    return os.path.expandvars(os.path.expanduser(directory))
+
+
+def native_dbm_module() -> Optional[str]:
+    """可用的原生 dbm 实现（按标准库 dbm 的优先顺序），只有 dbm.dumb 时返回 None"""
+    for name in ("dbm.sqlite3", "dbm.gnu", "dbm.ndbm"):
+        try:
+            importlib.import_module(name)
+        except ImportError:
+            continue
+        return name
+    return None
+
+
+def sqlite_settings(profile: str, overrides: Optional[dict] = None) -> dict:
+    """
+    由调优方案与逐项覆盖生成 diskcache 的 sqlite_* 参数
+
+    :param profile:   PROFILES 中的方案名，未知方案按 balanced 处理
+    :param overrides: {"synchronous": 0, "mmap-size": ...}，键可用短横线或下划线
+    """
+    if profile not in PROFILES:
+        logger.warning(f"Unknown cache profile '{profile}', using 'balanced'")
+    pragmas = dict(PROFILES.get(profile, {}))
+    for name, value in (overrides or {}).items():
+        name = name.replace("-", "_")
+        if name not in _PRAGMAS:
+            logger.warning(f"Ignoring unsupported cache SQLite setting '{name}'")
+            continue
+        pragmas[name] = value
+    return {f"sqlite_{name}": value for name, value in pragmas.items()}
+
+
+def open_cache_backend(backend: str = "diskcache", directory: str = "", profile: str = "balanced",
+                       eviction_policy: str = "least-frequently-used", size_limit_mb: int = 1024,
+                       sqlite_pragmas: Optional[dict] = None):
+    """
+    打开翻译缓存的磁盘层
+
+    :return: diskcache.Cache 或 DbmCache
+    """
+    directory = resolve_directory(directory)
+    if backend == "dbm":
+        if native_dbm_module() is not None:
+            return DbmCache(directory)
+        logger.warning("Cache backend 'dbm' needs gdbm or ndbm, but only dbm.dumb is available; using 'diskcache'")
+    elif backend != "diskcache":
+        logger.warning(f"Unknown cache backend '{backend}', using 'diskcache'")
+    if eviction_policy not in EVICTION_POLICIES:
+        logger.warning(f"Unknown eviction policy '{eviction_policy}', using 'least-frequently-used'")
+        eviction_policy = "least-frequently-used"
+    return Cache(
+        directory,
+        eviction_policy=eviction_policy,
+        size_limit=size_limit_mb * 1024 * 1024,
+        # auto_vacuum = INCREMENTAL：删除后的空闲页由 cache_maintenance 分步回收，避免每次提交时整理页面
+        sqlite_auto_vacuum=2,
+        **sqlite_settings(profile, sqlite_pragmas),
+    )
+
+
+class DbmCache:
+    """
+    基于 dbm 哈希文件的磁盘层，提供 TranslationCache 与共享缓存服务所需的 diskcache 接口子集。
+    dbm 对象本身不是线程安全的，所有操作串行执行。
+    """
+
+    def __init__(self, directory: str):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self._db = dbm.open(os.path.join(directory, "translations.dbm"), "c")
+        self._lock = threading.RLock()
+        logger.info(f"Translation cache using dbm backend ({dbm.whichdb(os.path.join(directory, 'translations.dbm'))})")
+
+    def get(self, key: str, default=None):
+        with self._lock:
+            value = self._db.get(key.encode("utf-8"))
+        return default if value is None else value.decode("utf-8")
+
+    def set(self, key: str, value: str, tag: Optional[str] = None) -> bool:
+        """tag 由键中的命名空间前缀体现，不单独保存"""
+        with self._lock:
+            self._db[key.encode("utf-8")] = value.encode("utf-8")
+        return True
+
+    def __getitem__(self, key: str) -> str:
+        value = self.get(key)
+        if value is None:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key: str, value: str) -> None:
+        self.set(key, value)
+
+    def __contains__(self, key: str) -> bool:
+        with self._lock:
+            return key.encode("utf-8") in self._db
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._db)
+
+    @contextmanager
+    def transact(self):
+        with self._lock:
+            yield
+
+    def iterkeys(self):
+        with self._lock:
+            keys = list(self._db.keys())
+        for key in keys:
+            yield key.decode("utf-8")
+
+    def evict(self, tag: str) -> int:
+        """删除某个命名空间的全部条目"""
+        prefix = f"{tag}{NAMESPACE_SEPARATOR}".encode("utf-8")
+        with self._lock:
+            keys = [key for key in self._db.keys() if key.startswith(prefix)]
+            for key in keys:
+                del self._db[key]
+        return len(keys)
+
+    def clear(self) -> int:
+        with self._lock:
+            keys = list(self._db.keys())
+            for key in keys:
+                del self._db[key]
+        return len(keys)
+
+    def create_tag_index(self) -> None:
+        pass
+
+    def cull(self) -> int:
+        return 0
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
@@ -0,0 +1,339 @@
+# Copyright (C) 2025 LiJiaHua1024
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+翻译缓存维护：按规则批量清理条目并回收数据库空间。
+
+- 删除以 SQL 分块执行，每块一个事务（块之间释放数据库锁，翻译线程不会被长时间阻塞）；
+- 规则：从未被读取的条目（可附加最短存在天数）、写入超过 N 天的条目、总条目数上限；
+- 启用值压缩时，用当前字典分块压缩尚未压缩的旧条目；
+- 清理后按页执行增量 VACUUM；
+- 在后台线程运行，界面通过 running / progress / last_result 轮询状态，可随时停止。
+"""
+
+import threading
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+from diskcache import Cache
+
+from modless_chat_trans.logger import logger
+from modless_chat_trans.translation_cache import supports_sql
+
+# 每个删除事务处理的条目数
+MAINTENANCE_CHUNK = 5000
+# SQLite 单条语句的参数上限较低（旧版本为 999），按组拼接 rowid
+_DELETE_GROUP = 500
+# 每步增量 VACUUM 回收的页数
+VACUUM_PAGES = 2000
+# 自动维护：启动后首次运行的延迟（秒）
+MAINTENANCE_STARTUP_DELAY = 60.0
+
+
+@dataclass(frozen=True)
+class MaintenancePlan:
+    """一次维护要执行的规则（0 表示不启用对应规则）"""
+    unread: bool = False             # 删除从未被读取（access_count == 0）的条目
+    unread_min_age_days: float = 0   # 仅删除写入超过该天数的未读条目
+    max_age_days: float = 0          # 删除写入超过该天数的条目
+    max_entries: int = 0             # 总条目数上限，超出部分按读取次数最少、写入最早的顺序删除
+    recompress: bool = False         # 压缩尚未压缩的条目（需已启用值压缩）
+    vacuum: bool = True              # 清理后执行增量 VACUUM
+
+
+def plan_from_config(cache_config) -> MaintenancePlan:
+    """
+    由配置生成自动维护计划
+
+    :param cache_config: config.CacheConfig
+    """
+    return MaintenancePlan(
+        unread=cache_config.unread_ttl_days > 0,
+        unread_min_age_days=cache_config.unread_ttl_days,
+        max_age_days=cache_config.max_age_days,
+        max_entries=cache_config.max_entries,
+        recompress=cache_config.compression != "off",
+    )
+
+
+class CacheMaintenance:
+    """
+    缓存维护引擎（一次只运行一轮）。
+
+    进度按阶段报告：phase 为 "counting" / "deleting" / "compressing" / "vacuum"，
+    progress 为 (已完成, 总数)，deleting 与 compressing 阶段单位为条目，vacuum 阶段单位为页。
+    """
+
+    def __init__(self, disk: Cache, memory_tier=None):
+        """
+        :param disk:        diskcache.Cache
+        :param memory_tier: TranslationCache（可选），删除的条目同步移出内存层
+        """
+        self.disk = disk
+        self.memory_tier = memory_tier
+        self.last_result: dict = {}
+        self._running = False
+        self._stop_requested = False
+        self._phase = ""
+        self._progress_done = 0
+        self._progress_total = 0
+        self._lock = threading.Lock()
+
+    @property
+    def running(self) -> bool:
+        with self._lock:
+            return self._running
+
+    @property
+    def phase(self) -> str:
+        with self._lock:
+            return self._phase
+
+    @property
+    def progress(self) -> tuple:
+        """返回 (已完成, 总数)"""
+        with self._lock:
+            return self._progress_done, self._progress_total
+
+    def start(self, plan: MaintenancePlan) -> bool:
+        """在后台线程执行一轮维护；已在运行时返回 False"""
+        if not self._begin():
+            return False
+        threading.Thread(target=self._worker, args=(plan,), daemon=True, name="cache-maintenance").start()
+        return True
+
+    def run(self, plan: MaintenancePlan) -> dict:
+        """在当前线程同步执行一轮维护；已在运行时返回 {"error": "busy"}"""
+        if not self._begin():
+            return {"error": "busy"}
+        return self._worker(plan)
+
+    def stop(self) -> None:
+        """请求停止：当前分块提交后退出，已删除的条目不会恢复"""
+        with self._lock:
+            self._stop_requested = True
+
+    def _begin(self) -> bool:
+        with self._lock:
+            if self._running:
+                return False
+            self._running = True
+            self._stop_requested = False
+            self._phase = ""
+            self._progress_done = self._progress_total = 0
+        return True
+
+    def _set_phase(self, phase: str, total: int) -> None:
+        with self._lock:
+            self._phase = phase
+            self._progress_done = 0
+            self._progress_total = total
+
+    def _advance(self, amount: int) -> bool:
+        """推进进度；返回是否应继续"""
+        with self._lock:
+            self._progress_done += amount
+            return not self._stop_requested
+
+    def _worker(self, plan: MaintenancePlan) -> dict:
+        started = time.monotonic()
+        try:
+            result = self._run(plan)
+        except Exception as e:
+            logger.error(f"Cache maintenance failed: {e}")
+            result = {"error": str(e)}
+        result["seconds"] = round(time.monotonic() - started, 2)
+        with self._lock:
+            self._running = False
+            self.last_result = result
+        logger.info(f"Cache maintenance finished: {result}")
+        return result
+
+    # ------------------------------------------------------------------
+    # 规则
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _rules(plan: MaintenancePlan, now: float) -> list:
+        """返回 [(名称, WHERE 子句, 参数)]"""
+        rules = []
+        if plan.unread:
+            if plan.unread_min_age_days > 0:
+                rules.append(("unread", "access_count = 0 AND store_time < ?",
+                              (now - plan.unread_min_age_days * 86400,)))
+            else:
+                rules.append(("unread", "access_count = 0", ()))
+        if plan.max_age_days > 0:
+            rules.append(("expired", "store_time < ?", (now - plan.max_age_days * 86400,)))
+        return rules
+
+    def count(self, plan: MaintenancePlan) -> tuple[int, int]:
+        """
+        统计按计划将被删除的条目数（不删除）。
+
+        :return: (待删除数, 当前总数)；多条规则重叠的条目只计一次
+        """
+        if not supports_sql(self.disk):
+            raise RuntimeError("Cache maintenance requires the diskcache backend")
+        if self.memory_tier is not None:
+            self.memory_tier.flush_access_counts()
+        total = self.disk._sql('SELECT COUNT(*) FROM Cache').fetchone()[0]
+        rules = self._rules(plan, time.time())
+        matched = 0
+        if rules:
+            where = " OR ".join(f"({clause})" for _, clause, _ in rules)
+            params = tuple(p for _, _, rule_params in rules for p in rule_params)
+            matched = self.disk._sql(f'SELECT COUNT(*) FROM Cache WHERE {where}', params).fetchone()[0]
+        if plan.max_entries > 0:
+            matched += max(0, total - matched - plan.max_entries)
+        return matched, total
+
+    def _run(self, plan: MaintenancePlan) -> dict:
+        self._set_phase("counting", 0)
+        to_delete, total_before = self.count(plan)
+        result = {"deleted": 0, "total_before": total_before}
+
+        self._set_phase("deleting", to_delete)
+        for name, where, params in self._rules(plan, time.time()):
+            deleted = self._delete(where, params)
+            result[name] = deleted
+            result["deleted"] += deleted
+            if deleted:
+                logger.info(f"Cache maintenance: removed {deleted} entries by rule '{name}'")
+        if plan.max_entries > 0:
+            excess = self.disk._sql('SELECT COUNT(*) FROM Cache').fetchone()[0] - plan.max_entries
+            if excess > 0:
+                deleted = self._delete("1", (), order="ORDER BY access_count, store_time", limit=excess)
+                result["over_limit"] = deleted
+                result["deleted"] += deleted
+
+        if plan.recompress and self.memory_tier is not None and not self._stop_requested:
+            result["recompressed"] = self._recompress()
+        if plan.vacuum and not self._stop_requested:
+            result["vacuumed_pages"] = self._incremental_vacuum()
+        result["stopped"] = self._stop_requested
+        return result
+
+    def _delete(self, where: str, params: tuple, order: str = "", limit: Optional[int] = None) -> int:
+        """分块删除满足条件的条目：每块一个事务，块之间检查停止请求"""
+        deleted = 0
+        while not self._stop_requested:
+            chunk = MAINTENANCE_CHUNK if limit is None else min(MAINTENANCE_CHUNK, limit - deleted)
+            if chunk <= 0:
+                break
+            with self.disk.transact():
+                rows = self.disk._sql(
+                    f'SELECT rowid, key, filename FROM Cache WHERE {where} {order} LIMIT ?',
+                    (*params, chunk),
+                ).fetchall()
+                for start in range(0, len(rows), _DELETE_GROUP):
+                    group = [row[0] for row in rows[start:start + _DELETE_GROUP]]
+                    placeholders = ",".join("?" * len(group))
+                    self.disk._sql(f'DELETE FROM Cache WHERE rowid IN ({placeholders})', group)
+            # 事务提交后再删除文件型条目对应的文件
+            for _, _, filename in rows:
+                if filename:
+                    self.disk._disk.remove(filename)
+            if self.memory_tier is not None:
+                self.memory_tier.invalidate(key for _, key, _ in rows if isinstance(key, str))
+            deleted += len(rows)
+            if not self._advance(len(rows)) or len(rows) < chunk:
+                break
+        return deleted
+
+    def _recompress(self) -> int:
+        """分块压缩尚未压缩的条目；返回改写数"""
+        if self.memory_tier.codec.method is None:
+            return 0
+        total = self.disk._sql(
+            "SELECT COUNT(*) FROM Cache WHERE raw = 1 AND mode = 1 AND typeof(value) = 'text' AND tag IS NOT NULL"
+        ).fetchone()[0]
+        self._set_phase("compressing", total)
+        rowid = 0
+        rewritten = 0
+        while True:
+            rowid, scanned, changed = self.memory_tier.recompress(rowid, MAINTENANCE_CHUNK)
+            rewritten += changed
+            if not scanned or not self._advance(scanned):
+                break
+        if rewritten:
+            logger.info(f"Cache maintenance: compressed {rewritten} entries")
+        return rewritten
+
+    def _incremental_vacuum(self) -> int:
+        """按页回收空闲页（仅 auto_vacuum = INCREMENTAL 的数据库有效）；返回回收页数"""
+        mode = self.disk._sql('PRAGMA auto_vacuum').fetchone()[0]
+        free_pages = self.disk._sql('PRAGMA freelist_count').fetchone()[0]
+        if mode != 2 or not free_pages:
+            return 0
+        self._set_phase("vacuum", free_pages)
+        reclaimed = 0
+        while reclaimed < free_pages:
+            # incremental_vacuum 每回收一页产生一行结果，需完整取回才会执行完毕
+            self.disk._sql(f'PRAGMA incremental_vacuum({VACUUM_PAGES})').fetchall()
+            remaining = self.disk._sql('PRAGMA freelist_count').fetchone()[0]
+            step = free_pages - reclaimed - remaining
+            if step <= 0:
+                break
+            reclaimed += step
+            if not self._advance(step):
+                break
+        return reclaimed
+
+
+_maintenance: Optional[CacheMaintenance] = None
+_timer_thread: Optional[threading.Thread] = None
+_maintenance_lock = threading.Lock()
+
+
+def get_cache_maintenance() -> CacheMaintenance:
+    """获取翻译缓存的全局维护引擎单例"""
+    global _maintenance
+    if _maintenance is None:
+        with _maintenance_lock:
+            if _maintenance is None:
+                from modless_chat_trans.file_utils import cache, translation_cache
+                _maintenance = CacheMaintenance(cache, translation_cache)
+    return _maintenance
+
+
+def start_periodic_maintenance(cache_config) -> Optional[threading.Thread]:
+    """
+    按配置定期执行自动维护（启动后延迟 MAINTENANCE_STARTUP_DELAY 秒首次运行）。
+
+    :param cache_config: config.CacheConfig
+    :return: 后台线程；maintenance-interval-hours 为 0 时不启动，返回 None；重复调用返回已启动的线程
+    """
+    global _timer_thread
+    if _timer_thread is not None:
+        return _timer_thread
+    interval = cache_config.maintenance_interval_hours * 3600
+    if interval <= 0 or not supports_sql(get_cache_maintenance().disk):
+        return None
+    plan = plan_from_config(cache_config)
+
+    def loop():
+        delay = MAINTENANCE_STARTUP_DELAY
+        while True:
+            time.sleep(delay)
+            delay = interval
+            maintenance = get_cache_maintenance()
+            if not maintenance.start(plan):
+                logger.debug("Cache maintenance already running, skipping scheduled run")
+
+    _timer_thread = threading.Thread(target=loop, daemon=True, name="cache-maintenance-timer")
+    _timer_thread.start()
+    return _timer_thread
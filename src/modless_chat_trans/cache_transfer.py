@@ -0,0 +1,289 @@
+# Copyright (C) 2025 LiJiaHua1024
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+翻译缓存导出 / 导入（在多台电脑之间共享已预热的缓存）。
+
+文件格式：压缩的 JSON Lines，流式读写，内存占用与缓存大小无关。
+- 第一行为文件头：{"format": "mct-cache", "version": 1, "namespaces": {命名空间: 条目数}, ...}
+- 之后每行一个条目：{"n": 命名空间, "k": 原文, "v": 译文, "t": 写入时间, "a": 读取次数}，
+  按磁盘键排序（同一命名空间的条目相邻，压缩率更高）
+- 压缩：安装了 zstandard 时使用 zstd，否则使用 gzip；导入时按文件魔数自动识别
+
+导入按批次在事务中批量写入，键冲突时按合并策略决定保留哪一条。
+"""
+
+import gzip
+import io
+import json
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Optional
+
+from diskcache import Cache
+
+from modless_chat_trans.logger import logger
+from modless_chat_trans.translation_cache import NAMESPACE_SEPARATOR, make_key, split_key, supports_sql
+
+EXPORT_FORMAT = "mct-cache"
+EXPORT_VERSION = 1
+# 每个导入事务写入的条目数
+IMPORT_BATCH = 2000
+
+# 合并策略：键已存在时
+MERGE_NEWEST = "newest"          # 保留写入时间较新的一条
+MERGE_MOST_READ = "most-read"    # 保留读取次数较多的一条
+MERGE_POLICIES = (MERGE_NEWEST, MERGE_MOST_READ)
+
+_ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+_GZIP_MAGIC = b"\x1f\x8b"
+
+# diskcache 中短字符串以原样存储的模式
+_MODE_RAW = 1
+
+_MERGE_CONDITIONS = {
+    MERGE_NEWEST: "excluded.store_time > Cache.store_time",
+    MERGE_MOST_READ: "excluded.access_count > Cache.access_count",
+}
+
+
+@dataclass
+class TransferResult:
+    """一次导出/导入的统计"""
+    rows: int = 0                   # 导出条数 / 导入文件中的条数
+    inserted: int = 0               # 新增条数（仅导入）
+    replaced: int = 0               # 按合并策略覆盖的条数（仅导入）
+    skipped: int = 0                # 被命名空间过滤或合并策略保留原值的条数（仅导入）
+    seconds: float = 0.0
+    namespaces: dict = field(default_factory=dict)
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows / self.seconds if self.seconds else 0.0
+
+
+def _zstd():
+    """zstandard 为可选依赖"""
+    try:
+        import zstandard
+    except ImportError:
+        return None
+    return zstandard
+
+
+def preferred_compression() -> str:
+    """默认压缩方式：安装了 zstandard 时为 zstd，否则为 gzip"""
+    return "zstd" if _zstd() is not None else "gzip"
+
+
+def _open_writer(path: str, compression: Optional[str]):
+    """返回 (文本写入流, 实际使用的压缩方式)"""
+    zstandard = _zstd()
+    if compression is None:
+        compression = preferred_compression()
+    if compression == "zstd":
+        if zstandard is None:
+            raise RuntimeError("zstandard is not installed")
+        raw = open(path, "wb")
+        writer = zstandard.ZstdCompressor(level=10, threads=-1).stream_writer(raw, closefd=True)
+        return io.TextIOWrapper(writer, encoding="utf-8", newline="\n"), compression
+    if compression == "gzip":
+        return io.TextIOWrapper(gzip.open(path, "wb", compresslevel=6), encoding="utf-8", newline="\n"), compression
+    raise ValueError(f"Unsupported compression: {compression}")
+
+
+def _open_reader(path: str):
+    """按文件魔数识别压缩方式，返回文本读取流"""
+    with open(path, "rb") as f:
+        magic = f.read(4)
+    if magic.startswith(_ZSTD_MAGIC):
+        zstandard = _zstd()
+        if zstandard is None:
+            raise RuntimeError("This cache file is zstd-compressed, install zstandard to import it")
+        reader = zstandard.ZstdDecompressor().stream_reader(open(path, "rb"), closefd=True)
+        return io.TextIOWrapper(reader, encoding="utf-8")
+    if magic.startswith(_GZIP_MAGIC):
+        return io.TextIOWrapper(gzip.open(path, "rb"), encoding="utf-8")
+    raise ValueError("Not a ModlessChatTrans cache export file")
+
+
+def _namespace_filter_sql(namespaces: Optional[list]) -> tuple[str, tuple]:
+    if not namespaces:
+        return "tag IS NOT NULL", ()
+    return f"tag IN ({','.join('?' * len(namespaces))})", tuple(namespaces)
+
+
+def export_cache(disk: Cache, path: str, namespaces: Optional[list] = None, compression: Optional[str] = None,
+                 progress: Optional[Callable[[int, int], None]] = None, memory_tier=None) -> TransferResult:
+    """
+    导出带命名空间的翻译缓存条目（旧版无命名空间的条目不导出）。
+
+    :param disk:        diskcache.Cache
+    :param path:        导出文件路径
+    :param namespaces:  只导出这些命名空间，None 表示全部
+    :param compression: "zstd" / "gzip"，None 时优先 zstd
+    :param progress:    进度回调 (已完成, 总数)
+    :param memory_tier: TranslationCache（可选），导出前把待写入条目落盘，并用其解码压缩存储的译文
+    """
+    if not supports_sql(disk):
+        raise RuntimeError("Cache export requires the diskcache backend")
+    started = time.monotonic()
+    if memory_tier is not None:
+        memory_tier.flush_access_counts()
+
+    where, params = _namespace_filter_sql(namespaces)
+    counts = dict(disk._sql(
+        f'SELECT tag, COUNT(*) FROM Cache WHERE {where} AND raw = 1 GROUP BY tag', params
+    ).fetchall())
+    total = sum(counts.values())
+
+    result = TransferResult(namespaces=counts)
+    writer, compression = _open_writer(path, compression)
+    with writer:
+        writer.write(json.dumps({
+            "format": EXPORT_FORMAT,
+            "version": EXPORT_VERSION,
+            "created": time.time(),
+            "namespaces": counts,
+        }, ensure_ascii=False) + "\n")
+
+        cursor = disk._sql(
+            f'SELECT key, store_time, access_count, mode, filename, value FROM Cache'
+            f' WHERE {where} AND raw = 1 ORDER BY key',
+            params,
+        )
+        while rows := cursor.fetchmany(1000):
+            for key, store_time, access_count, mode, filename, value in rows:
+                if NAMESPACE_SEPARATOR not in key:
+                    continue
+                if mode != _MODE_RAW:
+                    value = disk._disk.fetch(mode, filename, value, False)
+                if isinstance(value, bytes) and memory_tier is not None:
+                    # 压缩存储的译文以明文导出，导入方无需相同的字典
+                    value = memory_tier.codec.decode(value)
+                if not isinstance(value, str):
+                    continue
+                namespace, text = split_key(key)
+                writer.write(json.dumps(
+                    {"n": namespace, "k": text, "v": value, "t": round(store_time, 3), "a": access_count},
+                    ensure_ascii=False,
+                ) + "\n")
+                result.rows += 1
+            if progress is not None:
+                progress(result.rows, total)
+
+    result.seconds = time.monotonic() - started
+    logger.info(f"Cache exported: {result.rows} entries in {len(counts)} namespaces to {path} "
+                f"({compression}, {result.rows_per_second:.0f} rows/s)")
+    return result
+
+
+def read_export_header(path: str) -> dict:
+    """读取导出文件头（命名空间和条目数），用于导入前确认"""
+    with _open_reader(path) as reader:
+        header = json.loads(reader.readline())
+    if header.get("format") != EXPORT_FORMAT:
+        raise ValueError("Not a ModlessChatTrans cache export file")
+    if header.get("version", 0) > EXPORT_VERSION:
+        raise ValueError(f"Unsupported cache export version: {header.get('version')}")
+    return header
+
+
+def import_cache(disk: Cache, path: str, policy: str = MERGE_NEWEST, namespaces: Optional[list] = None,
+                 progress: Optional[Callable[[int, int], None]] = None, memory_tier=None) -> TransferResult:
+    """
+    导入缓存导出文件。
+
+    :param disk:        diskcache.Cache
+    :param path:        导出文件路径
+    :param policy:      键冲突时的合并策略，见 MERGE_POLICIES
+    :param namespaces:  只导入这些命名空间，None 表示全部
+    :param progress:    进度回调 (已完成, 总数)
+    :param memory_tier: TranslationCache（可选），被覆盖的键同步移出内存层
+    """
+    if policy not in _MERGE_CONDITIONS:
+        raise ValueError(f"Unknown merge policy: {policy}")
+    if not supports_sql(disk):
+        raise RuntimeError("Cache import requires the diskcache backend")
+    started = time.monotonic()
+    header = read_export_header(path)
+    total = sum(header.get("namespaces", {}).values())
+    wanted = set(namespaces) if namespaces else None
+
+    # UPSERT：不存在时插入，存在时仅在新条目胜出时覆盖；读取次数保留两者中较大的值
+    statement = (
+        'INSERT INTO Cache(key, raw, store_time, expire_time, access_time, access_count,'
+        ' tag, size, mode, filename, value)'
+        ' VALUES (?, 1, ?, NULL, ?, ?, ?, 0, 1, NULL, ?)'
+        ' ON CONFLICT(key, raw) DO UPDATE SET'
+        ' store_time = excluded.store_time, access_time = excluded.access_time,'
+        ' access_count = MAX(Cache.access_count, excluded.access_count),'
+        ' tag = excluded.tag, value = excluded.value'
+        f' WHERE {_MERGE_CONDITIONS[policy]}'
+    )
+
+    result = TransferResult()
+    seen = 0
+    batch = []
+
+    def entry_count():
+        # diskcache 的触发器在 Settings 中维护条目数，读取为常数开销（COUNT(*) 需要扫描整张表）
+        return disk._sql('SELECT value FROM Settings WHERE key = "count"').fetchone()[0]
+
+    def write_batch():
+        with disk.transact():
+            count_before = entry_count()
+            # rowcount 不含触发器的改动：插入和覆盖各计 1，合并策略保留原值时为 0
+            changed = sum(disk._sql(statement, row).rowcount for row in batch)
+            inserted = entry_count() - count_before
+        replaced = changed - inserted
+        result.inserted += inserted
+        result.replaced += replaced
+        result.skipped += len(batch) - inserted - replaced
+        if memory_tier is not None and replaced:
+            memory_tier.invalidate(row[0] for row in batch)
+        batch.clear()
+
+    with _open_reader(path) as reader:
+        reader.readline()
+        for line in reader:
+            if not line.strip():
+                continue
+            entry = json.loads(line)
+            seen += 1
+            namespace = entry["n"]
+            if wanted is not None and namespace not in wanted:
+                result.skipped += 1
+                continue
+            result.namespaces[namespace] = result.namespaces.get(namespace, 0) + 1
+            store_time = entry.get("t", 0.0)
+            batch.append((make_key(namespace, entry["k"]), store_time, store_time,
+                          entry.get("a", 0), namespace, entry["v"]))
+            if len(batch) >= IMPORT_BATCH:
+                write_batch()
+                if progress is not None:
+                    progress(seen, total)
+        if batch:
+            write_batch()
+    if progress is not None:
+        progress(seen, total)
+
+    # 导入后可能超出缓存容量上限，按淘汰策略裁剪
+    disk.cull()
+    result.rows = seen
+    result.seconds = time.monotonic() - started
+    logger.info(f"Cache imported from {path}: {result.inserted} new, {result.replaced} replaced, "
+                f"{result.skipped} kept/skipped ({policy}, {result.rows_per_second:.0f} rows/s)")
+    return result
@@ -0,0 +1,169 @@
+# Copyright (C) 2025 LiJiaHua1024
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+按服务商/模型划分的熔断器。
+
+- CLOSED：正常请求，记录最近 WINDOW 次结果；失败率达到 FAILURE_RATE，或连续 TIMEOUT_STREAK 次超时时熔断；
+- OPEN：有备用模型时直接使用备用模型，不再为每条消息耗费一半的翻译预算等待主模型；
+- HALF_OPEN：冷却 OPEN_SECONDS 后放行一次探测请求（有备用模型时在后台与备用模型并行，
+  否则冷却后发出的第一次请求即为探测），成功则恢复 CLOSED，失败则重新熔断并将冷却时间加倍（最长 MAX_OPEN_SECONDS）。
+"""
+
+import threading
+import time
+from collections import deque
+from enum import Enum
+from typing import Callable, Optional
+
+from modless_chat_trans.logger import logger
+
+
+class CircuitState(str, Enum):
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half-open"
+
+
+def is_timeout(error: BaseException) -> bool:
+    """请求超时（包括 litellm / httpx 的超时异常）"""
+    return isinstance(error, TimeoutError) or "timeout" in type(error).__name__.lower()
+
+
+class CircuitBreaker:
+    """单个服务商/模型的熔断器（线程安全）"""
+
+    WINDOW = 20
+    MIN_REQUESTS = 5  # 窗口内请求少于此数时不按失败率熔断
+    FAILURE_RATE = 0.5
+    TIMEOUT_STREAK = 3
+    OPEN_SECONDS = 30.0
+    MAX_OPEN_SECONDS = 300.0
+
+    def __init__(self, name: str, clock: Callable[[], float] = time.monotonic):
+        self.name = name
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._outcomes: deque[bool] = deque(maxlen=self.WINDOW)  # True 表示失败
+        self._timeout_streak = 0
+        self._state = CircuitState.CLOSED
+        self._open_seconds = self.OPEN_SECONDS
+        self._opened_at = 0.0
+        self._probe_started: Optional[float] = None
+        self.trips = 0
+        self.short_circuited = 0
+
+    @property
+    def state(self) -> CircuitState:
+        with self._lock:
+            return self._state
+
+    def allow_request(self) -> bool:
+        """CLOSED 时放行；否则记为一次短路，调用方应直接使用备用模型"""
+        with self._lock:
+            if self._state == CircuitState.CLOSED:
+                return True
+            self.short_circuited += 1
+            return False
+
+    def acquire_probe(self) -> bool:
+        """
+        熔断冷却结束后返回 True（每个冷却周期一次），调用方应发送一次探测请求。
+        探测请求长时间没有结果（例如被取消）时允许重新探测。
+        """
+        with self._lock:
+            now = self._clock()
+            if self._state == CircuitState.OPEN and now - self._opened_at >= self._open_seconds:
+                self._transition(CircuitState.HALF_OPEN, "cool-down elapsed, probing")
+            elif not (self._state == CircuitState.HALF_OPEN
+                      and self._probe_started is not None
+                      and now - self._probe_started >= self._open_seconds):
+                return False
+            self._probe_started = now
+            return True
+
+    def record_success(self) -> None:
+        with self._lock:
+            if self._state == CircuitState.OPEN:
+                return  # 熔断前发出的请求迟到的成功，不代表服务已恢复，等待探测结果
+            self._timeout_streak = 0
+            if self._state == CircuitState.HALF_OPEN:
+                self._outcomes.clear()
+                self._open_seconds = self.OPEN_SECONDS
+                self._probe_started = None
+                self._transition(CircuitState.CLOSED, "probe succeeded")
+                return
+            self._outcomes.append(False)
+
+    def record_failure(self, timeout: bool = False) -> None:
+        with self._lock:
+            self._timeout_streak = self._timeout_streak + 1 if timeout else 0
+            if self._state == CircuitState.HALF_OPEN:
+                self._open_seconds = min(self._open_seconds * 2, self.MAX_OPEN_SECONDS)
+                self._trip("probe failed")
+                return
+            if self._state == CircuitState.OPEN:
+                return  # 熔断前发出的请求迟到的失败，不延长冷却
+            self._outcomes.append(True)
+            if self._timeout_streak >= self.TIMEOUT_STREAK:
+                self._trip(f"{self._timeout_streak} consecutive timeouts")
+                return
+            failures = sum(self._outcomes)
+            if len(self._outcomes) >= self.MIN_REQUESTS and failures / len(self._outcomes) >= self.FAILURE_RATE:
+                self._trip(f"{failures} of the last {len(self._outcomes)} requests failed")
+
+    def _trip(self, reason: str) -> None:
+        self.trips += 1
+        self._opened_at = self._clock()
+        self._probe_started = None
+        self._transition(CircuitState.OPEN, f"{reason}; retrying in {self._open_seconds:g}s")
+
+    def _transition(self, state: CircuitState, reason: str) -> None:
+        previous, self._state = self._state, state
+        log = logger.info if state == CircuitState.CLOSED else logger.warning
+        log(f"[CircuitBreaker] {self.name}: {previous.value} -> {state.value} ({reason})")
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            failures = sum(self._outcomes)
+            return {
+                "state": self._state.value,
+                "requests": len(self._outcomes),
+                "failure_rate": failures / len(self._outcomes) if self._outcomes else None,
+                "timeout_streak": self._timeout_streak,
+                "open_seconds": self._open_seconds if self._state != CircuitState.CLOSED else None,
+                "trips": self.trips,
+                "short_circuited": self.short_circuited,
+            }
+
+
+class CircuitBreakers:
+    """按服务商/模型划分的熔断器集合"""
+
+    def __init__(self):
+        self._breakers: dict[str, CircuitBreaker] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> CircuitBreaker:
+        with self._lock:
+            breaker = self._breakers.get(key)
+            if breaker is None:
+                breaker = self._breakers[key] = CircuitBreaker(key)
+            return breaker
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            breakers = dict(self._breakers)
+        return {key: breaker.snapshot() for key, breaker in breakers.items()}
@@ -61,6 +61,7 @@ class FallbackStrategy(str, Enum):
     RETRY_EXHAUSTED = "retry_exhausted"   # 主模型重试全部失败 → 再用备用
     RACE_ON_FAILURE = "race_on_failure"   # 主模型首次失败 → 并发竞速两者
     ALWAYS_RACE = "always_race"           # 始终并发竞速，取最快结果
+    HEDGED = "hedged"                     # 主模型超过其 p90 延迟仍未返回 → 加发备用，取最快结果
 
 
 class LLMServiceConfig(BaseConfigModel):
@@ -70,6 +71,9 @@ class LLMServiceConfig(BaseConfigModel):
     model: str
     deep_translate: bool
     max_tokens: int
+    # 客户端限流：每分钟请求数与 token 数（按服务商 + API Key 计算，0 = 不限制，仍遵循服务商的限流响应头）
+    rpm: int = 0
+    tpm: int = 0
 
 
 class TraditionalServiceConfig(BaseConfigModel):
@@ -96,10 +100,19 @@ class MessageCaptureConfig(BaseConfigModel):
     replace_garbled_chars: bool
     source_language: str
     target_language: str
+    # 系统消息模板学习：同一骨架（数字/坐标/玩家名遮蔽后）重复出现后只翻译一次
+    template_learning: bool = True
+    template_min_occurrences: int = 3
+    # 源语言识别：跳过已是目标语言或 skip_languages 中语言的消息（ISO 639-1 代码或语言名）
+    language_detection: bool = True
+    skip_languages: List[str] = []
+    language_audit_interval: int = 50
 
 
 class MessagePresentationConfig(BaseConfigModel):
     web_port: int
+    # 流式翻译：LLM 生成译文的同时在网页上逐步显示（Deep 模式与竞速策略除外）
+    stream_translations: bool = True
 
 
 class MessageSendConfig(BaseConfigModel):
@@ -144,6 +157,21 @@ class ContextConfig(BaseConfigModel):
     # 分块截断大小: "disabled"（传统逐条滑动窗口）, "auto"（自动计算为 context-length 的一半）,
     # 或正整数字符串（如 "5"）。仅在 context-length > 0 且 strategy != "disabled" 时生效
     block_truncation_size: str = "disabled"
+    # 历史的 token 预算（本地估算，0 = 不限制）；超出时从开头剔除，启用分块截断时按整块剔除
+    context_tokens: int = 0
+    # 滚动摘要：被剔除的历史由后台（优先使用备用模型）合并为简短摘要，放在最近历史之前（仅 LLM 服务）
+    summary: bool = False
+    # 摘要的最大 token 数
+    summary_max_tokens: int = 120
+    # 同一频道两次刷新摘要的最小间隔（秒）
+    summary_interval: float = 60.0
+    # 距最近一条消息至少这么久（秒）才生成摘要，避免与翻译请求争抢
+    summary_idle: float = 3.0
+    # 按聊天频道（公屏/组队/公会/私信对象）分别维护上下文，每条消息只带本频道的历史；
+    # context_length 与 context_tokens 为每个频道各自的上限
+    per_channel: bool = True
+    # 同时保留上下文的频道数上限（超出时淘汰最久没有消息的频道）
+    max_channels: int = 16
 
 
 class TTSConfig(BaseConfigModel):
@@ -157,6 +185,44 @@ class TTSConfig(BaseConfigModel):
     mute_users: List[str] = []     # 不朗读的用户列表
 
 
+class CacheConfig(BaseConfigModel):
+    """翻译缓存配置"""
+    # 存储（启动时读取，修改后需重启）
+    backend: str = "diskcache"                    # 磁盘层后端：diskcache（SQLite）/ dbm（哈希文件，无清理与导出功能）
+    directory: str = ""                           # 缓存目录，空 = 当前工作目录下的 mct-cache；支持 ~ 与环境变量
+    profile: str = "balanced"                     # SQLite 调优方案：balanced / fast / safe / low-memory
+    eviction_policy: str = "least-frequently-used"  # 超出容量时的淘汰策略
+    size_limit_mb: int = 1024                     # 磁盘层容量上限（MB）
+    sqlite_pragmas: Dict[str, Union[int, str]] = {}  # 逐项覆盖调优方案：journal-mode / synchronous / mmap-size / cache-size
+    memory_size: int = 4096  # 内存层（LRU）最多保留的条目数，0 = 禁用内存层
+    warm_size: int = 1024    # 启动时按读取次数预热到内存层的条目数
+    # 自动维护规则（0 = 不启用）
+    max_entries: int = 0                     # 条目数上限，超出时按读取次数最少、写入最早的顺序删除
+    max_age_days: float = 0                  # 删除写入超过该天数的条目
+    unread_ttl_days: float = 0               # 删除从未被读取且写入超过该天数的条目
+    maintenance_interval_hours: float = 24   # 自动维护间隔（小时），0 = 关闭自动维护
+    # 值压缩
+    compression: str = "off"            # off / auto / zstd / zlib
+    compression_dict_size_kb: int = 16  # 由缓存内容训练的字典大小（KB）
+    compression_min_samples: int = 1000  # 训练字典所需的最少条目数
+    # 局域网共享缓存
+    shared_url: str = ""           # 共享缓存服务地址（如 http://192.168.1.10:5050），空 = 不使用
+    shared_token: str = ""         # 访问令牌（服务端与客户端需一致）
+    shared_timeout: float = 0.5    # 单次请求超时（秒）
+    shared_server_port: int = 0    # 在本机提供共享缓存服务的端口，0 = 不提供
+
+
+class NetworkConfig(BaseConfigModel):
+    """翻译服务的 HTTP 连接配置"""
+    keep_alive: bool = True     # 复用连接（连接池），关闭后每次请求重新建立 TCP/TLS 连接
+    pool_size: int = 10         # 每个服务商保持的最大连接数
+    retries: int = 1            # 连接失败或 502/503/504 时的重试次数
+    retry_backoff: float = 0.2  # 重试退避系数（秒）
+    # LLM 服务（常驻连接，开始翻译时预连接）
+    llm_http2: bool = True                # 使用 HTTP/2（需要 h2）
+    llm_keepalive_interval: float = 30.0  # 空闲时发送保活请求的间隔（秒），0 = 不保活
+
+
 class ConfigV3FromInit(BaseSettings):
     model_config = SettingsConfigDict(
         alias_generator=snake_to_kebab,
@@ -174,6 +240,8 @@ class ConfigV3FromInit(BaseSettings):
     blacklist: BlacklistConfig = BlacklistConfig()
     context: ContextConfig = ContextConfig()
     tts: TTSConfig = TTSConfig()
+    cache: CacheConfig = CacheConfig()
+    network: NetworkConfig = NetworkConfig()
 
 
 class ConfigV3(ConfigV3FromInit):
@@ -259,6 +327,7 @@ def convert_v2_to_v3(config_v2: ConfigV2) -> ConfigV3FromInit:
             "replace-garbled-chars": config_v2.replace_garbled_character,
             "source-language": config_v2.op_src_lang,
             "target-language": config_v2.op_tgt_lang,
+            "skip-languages": list(config_v2.skip_src_lang or []),
         },
         "message-presentation": {
             "web-port": config_v2.http_port,
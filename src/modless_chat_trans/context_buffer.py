@@ -14,12 +14,18 @@
 # along with this program.  If not, see <https://www.gnu.org/licenses/>.
 
 import re
-from collections import deque
-from dataclasses import dataclass
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
 from datetime import datetime, time as dt_time
-from typing import Optional
+from itertools import count
+from typing import Callable, Optional
 
 from modless_chat_trans.logger import logger
+from modless_chat_trans.token_estimator import estimate_tokens
+
+# 快照版本号在全进程内递增：频道被淘汰后重建（或清空后重建）的缓冲区不会与旧缓冲区的快照重号
+_versions = count(1)
 
 # 支持 Vanilla / Forge / Fabric / BungeeCord 等常见 MC 日志时间格式
 # 匹配 [HH:MM:SS] 或行首 HH:MM:SS
@@ -61,6 +67,42 @@ class ContextEntry:
     original: str           # 原文（单条聊天内容）
     timestamp: float        # epoch 秒（日志时间或行到达系统时间）
     player_name: str = ""   # 发送者玩家名（可为空，系统消息等）
+    channel: str = "public"  # 聊天频道（message_processor.detect_channel），分频道维护上下文时使用
+    line: str = field(default="", init=False, repr=False, compare=False)  # push 时渲染的历史行
+    tokens: int = field(default=0, init=False, repr=False, compare=False)  # 历史行（含换行）的估算 token 数
+
+    def render(self) -> str:
+        """渲染为历史行：HH:MM | [玩家名] 原文"""
+        time_str = datetime.fromtimestamp(self.timestamp).strftime("%H:%M")
+        name = self.player_name if self.player_name else "[SYSTEM]"
+        return f"{time_str} | [{name}] {self.original}"
+
+
+@dataclass(frozen=True)
+class ContextSnapshot:
+    """
+    某一时刻的上下文历史句柄（不可变，O(1) 获取）。
+
+    引用缓冲区内部只追加的记录列表及 [start, end) 区间：之后的添加、截断和清空
+    只移动缓冲区自己的区间或换用新列表，不会修改快照可见的部分。
+    """
+    version: int
+    _entries: list = field(repr=False, compare=False)
+    _start: int = 0
+    _end: int = 0
+    channel: str = "public"
+    summary: str = ""
+
+    def entries(self) -> list[ContextEntry]:
+        return self._entries[self._start:self._end]
+
+    def __len__(self) -> int:
+        return self._end - self._start
+
+
+def render_summary(summary: str) -> str:
+    """渲染摘要行（放在历史行之前）"""
+    return f"[Summary of earlier messages] {summary}"
 
 
 class ContextBuffer:
@@ -73,23 +115,45 @@ class ContextBuffer:
     - "time_based": 同时检测时间跨度，超过 context_timeout 秒则清空缓冲区
 
     支持分块截断（Block Truncation）以提升 LLM prefix-cache 命中率：
-    当 block_truncation_size 非 "disabled" 且 context_length > 0 时，使用 list
-    代替 deque，在缓冲达到 context_length 时一次性剔除开头 block_size 条，
+    当 block_truncation_size 非 "disabled" 且 context_length > 0 时，
+    不再逐条滑动，而是在缓冲达到 context_length 时一次性剔除开头 block_size 条，
     使前缀在后续 block_size 条消息中保持稳定，从而被 LLM 缓存命中。
+
+    context_tokens > 0 时另按 token 预算截断（token 数由 token_estimator 本地估算）：
+    历史超出预算时从开头剔除，启用分块截断时同样按整块剔除，前缀稳定性不变；最新一条总是保留。
+
+    可选的滚动摘要（context_summarizer）：on_push 在每次添加后收到被剔除的记录，
+    摘要由后台生成后通过 set_summary 写回，渲染时放在历史行之前。时间跨度重置和清空会丢弃摘要。
+
+    每条记录在 push 时渲染一次历史行；拼接后的上下文消息在下一次变更（添加、截断、清空）前
+    一直复用，期间 get_context_messages 返回同一个对象（调用方不得修改）。
+
+    线程安全：push 在顺序处理线程执行，翻译线程并发读取。顺序处理线程在 push 后立即取
+    snapshot()，翻译线程用 render(snapshot) 渲染，看到的历史恰好截至该消息，
+    与翻译完成的先后无关（提示词确定，前缀稳定，便于服务端提示词缓存命中）。
     """
 
+    # 区间起点超过该值时把仍在窗口内的记录复制到新列表，释放已移出窗口的记录
+    COMPACT_THRESHOLD = 1024
+    # 保留的渲染结果数（并发翻译的消息通常对应最近几个快照）
+    RENDER_CACHE_SIZE = 16
+
     def __init__(
         self,
         strategy: str = "time_based",
         context_length: int = 10,
         context_timeout: float = 120.0,
         block_truncation_size: str = "disabled",
+        channel: str = "public",
+        context_tokens: int = 0,
     ):
         """
         :param strategy:              "disabled", "fixed" 或 "time_based"
         :param context_length:        最多保留的历史条数（0 = 无限制）
         :param context_timeout:       时间跨度阈值（秒），仅 time_based 策略生效
         :param block_truncation_size: "disabled", "auto", 或正整数字符串（如 "5"）
+        :param context_tokens:        历史的 token 预算（0 = 无限制）
+        :param channel:               所属频道（由 ChannelContextBuffers 创建时传入）
         """
         if strategy not in ("disabled", "fixed", "time_based"):
             logger.warning(
@@ -98,24 +162,34 @@ class ContextBuffer:
             strategy = "time_based"
 
         self.strategy = strategy
+        self.channel = channel
         self.context_length = context_length       # 0 = 无限制
         self.context_timeout = max(0.0, context_timeout)
+        self.context_tokens = max(0, context_tokens)  # 0 = 无限制
 
         # 解析分块截断大小
         self._block_size: Optional[int] = None
-        if strategy != "disabled" and context_length > 0:
+        if strategy != "disabled" and (context_length > 0 or self.context_tokens > 0):
             self._block_size = self._resolve_block_size(block_truncation_size)
         self._use_block_truncation = self._block_size is not None
 
-        # 选择底层存储
-        if self._use_block_truncation:
-            self._history: list[ContextEntry] = []                # list 用于分块截断
-        elif context_length > 0:
-            self._history: deque[ContextEntry] = deque(maxlen=context_length)  # 传统滑动窗口
-        else:
-            self._history: deque[ContextEntry] = deque()          # 无限制
+        # 只追加的记录列表，当前历史为 _entries[_start:]；
+        # 分块截断、滑动窗口（context_length > 0）和清空都只移动 _start
+        self._entries: list[ContextEntry] = []
+        self._start = 0
+        # token 前缀和：_token_prefix[i] 为 _entries[:i] 的 token 总数，当前历史的 token 数为两端之差
+        self._token_prefix: list[int] = [0]
 
         self._last_timestamp: Optional[float] = None
+        # 滚动摘要；_generation 在时间跨度重置和清空时加一，用于丢弃基于旧对话生成的摘要
+        self._summary = ""
+        self._generation = 0
+        # 添加记录后的回调 (缓冲区, 本次被剔除的记录)，在锁外调用
+        self.on_push: Optional[Callable[["ContextBuffer", list[ContextEntry]], None]] = None
+        # 每次变更从 _versions 取新的版本号；渲染结果按版本缓存
+        self._version = next(_versions)
+        self._rendered: OrderedDict[int, list[dict]] = OrderedDict()
+        self._lock = threading.Lock()
 
     # ------------------------------------------------------------------
     # 内部辅助
@@ -131,6 +205,7 @@ class ContextBuffer:
         if value == "disabled":
             return None
         if value == "auto":
+            # 仅设置 token 预算时没有条数上限可折半，按逐条截断处理
             return max(1, self.context_length // 2)
         try:
             size = int(value)
@@ -148,6 +223,57 @@ class ContextBuffer:
             )
             return None
 
+    def _append(self, entry: ContextEntry) -> None:
+        """调用方需持有 _lock"""
+        entry.line = entry.render()
+        entry.tokens = estimate_tokens(entry.line) + 1
+        self._entries.append(entry)
+        self._token_prefix.append(self._token_prefix[-1] + entry.tokens)
+        # 滑动窗口（未启用分块截断时）：只保留最近 context_length 条
+        if self.context_length > 0 and not self._use_block_truncation:
+            self._start = max(self._start, len(self._entries) - self.context_length)
+
+    def _window_tokens(self) -> int:
+        """当前历史的估算 token 数（调用方需持有 _lock）"""
+        return self._token_prefix[-1] - self._token_prefix[self._start]
+
+    def _truncate_block(self) -> None:
+        """
+        分块截断：达到条数阈值时一次性剔除开头 block_size 条；
+        超出 token 预算时按同样的步长继续剔除，直到回到预算内（调用方需持有 _lock）
+        """
+        if (self._use_block_truncation and self.context_length > 0
+                and len(self._entries) - self._start >= self.context_length):
+            self._start = min(len(self._entries), self._start + self._block_size)
+        if self.context_tokens > 0:
+            step = self._block_size or 1
+            while self._window_tokens() > self.context_tokens and len(self._entries) - self._start > 1:
+                self._start = min(len(self._entries) - 1, self._start + step)
+
+    def _mutated(self) -> None:
+        """调用方需持有 _lock"""
+        self._version = next(_versions)
+        if self._start >= self.COMPACT_THRESHOLD:
+            # 换用新列表；已发出的快照仍引用旧列表，不受影响
+            base = self._token_prefix[self._start]
+            self._entries = self._entries[self._start:]
+            self._token_prefix = [total - base for total in self._token_prefix[self._start:]]
+            self._start = 0
+
+    def _reset(self) -> None:
+        """开始新对话：丢弃历史与摘要（调用方需持有 _lock）"""
+        self._start = len(self._entries)
+        self._summary = ""
+        self._generation += 1
+
+    def _notify(self, evicted: list[ContextEntry]) -> None:
+        callback = self.on_push
+        if callback is not None:
+            try:
+                callback(self, evicted)
+            except Exception as error:
+                logger.warning(f"[ContextBuffer] on_push callback failed: {error}")
+
     @property
     def block_size(self) -> Optional[int]:
         """已解析的分块截断大小，None 表示未启用"""
@@ -168,20 +294,22 @@ class ContextBuffer:
         if self.strategy == "disabled":
             return
 
-        if self.strategy == "time_based" and self.should_reset(entry.timestamp):
-            logger.debug(
-                f"[ContextBuffer] Time gap detected "
-                f"({entry.timestamp - (self._last_timestamp or 0):.1f}s > "
-                f"{self.context_timeout}s), resetting context."
-            )
-            self.clear()
-
-        self._history.append(entry)
-        self._last_timestamp = entry.timestamp
+        with self._lock:
+            if self.strategy == "time_based" and self.should_reset(entry.timestamp):
+                logger.debug(
+                    f"[ContextBuffer] Time gap detected "
+                    f"({entry.timestamp - (self._last_timestamp or 0):.1f}s > "
+                    f"{self.context_timeout}s), resetting context."
+                )
+                self._reset()
 
-        # 分块截断：达到阈值时一次性剔除开头 block_size 条
-        if self._use_block_truncation and len(self._history) >= self.context_length:
-            del self._history[:self._block_size]
+            evict_from = self._start
+            self._append(entry)
+            self._last_timestamp = entry.timestamp
+            self._truncate_block()
+            evicted = self._entries[evict_from:self._start]
+            self._mutated()
+        self._notify(evicted)
 
     def push_batch(self, entries: list[ContextEntry]) -> None:
         """
@@ -195,45 +323,89 @@ class ContextBuffer:
 
         if not entries:
             return
-        # 仅对批次第一条做时间重置判断
-        first = entries[0]
-        if self.strategy == "time_based" and self.should_reset(first.timestamp):
-            logger.debug(
-                "[ContextBuffer] Time gap detected at batch start, resetting context."
-            )
-            self.clear()
+        with self._lock:
+            # 仅对批次第一条做时间重置判断
+            first = entries[0]
+            if self.strategy == "time_based" and self.should_reset(first.timestamp):
+                logger.debug(
+                    "[ContextBuffer] Time gap detected at batch start, resetting context."
+                )
+                self._reset()
 
-        for entry in entries:
-            self._history.append(entry)
-        self._last_timestamp = entries[-1].timestamp
+            evict_from = self._start
+            for entry in entries:
+                self._append(entry)
+            self._last_timestamp = entries[-1].timestamp
 
-        # 分块截断：整批添加后统一检查
-        if self._use_block_truncation and len(self._history) >= self.context_length:
-            del self._history[:self._block_size]
+            # 分块截断：整批添加后统一检查
+            self._truncate_block()
+            evicted = self._entries[evict_from:self._start]
+            self._mutated()
+        self._notify(evicted)
 
     # ------------------------------------------------------------------
     # 读取
     # ------------------------------------------------------------------
 
-    def get_context_messages(self) -> list[dict]:
+    def snapshot(self) -> ContextSnapshot:
+        """当前历史的不可变句柄（O(1)）"""
+        with self._lock:
+            return ContextSnapshot(self._version, self._entries, self._start, len(self._entries),
+                                   self.channel, self._summary)
+
+    def render(self, snapshot: ContextSnapshot) -> list[dict]:
         """
-        返回一条汇总的 user 消息，包含最近聊天历史。
+        把快照渲染为一条汇总的 user 消息。
         格式：[{"role": "user", "content": "14:30 | [PlayerA] 你好\n14:31 | [SYSTEM] 服务器消息"}]
         无历史时返回空列表。
 
-        注意：此返回值会被 translator 注入到 user message 中。
+        注意：此返回值会被 translator 注入到 user message 中；同一快照返回同一对象，调用方不得修改。
         """
-        if self.strategy == "disabled" or not self._history:
+        if self.strategy == "disabled" or not (len(snapshot) or snapshot.summary):
             return []
 
-        lines = []
-        for entry in self._history:
-            time_str = datetime.fromtimestamp(entry.timestamp).strftime("%H:%M")
-            name = entry.player_name if entry.player_name else "[SYSTEM]"
-            lines.append(f"{time_str} | [{name}] {entry.original}")
-
+        with self._lock:
+            cached = self._rendered.get(snapshot.version)
+        if cached is not None:
+            return cached
+        # 拼接在锁外进行：快照区间内的记录不会再被修改
+        lines = [entry.line for entry in snapshot.entries()]
+        if snapshot.summary:
+            lines.insert(0, render_summary(snapshot.summary))
         content = "\n".join(lines)
-        return [{"role": "user", "content": content}]
+        messages = [{"role": "user", "content": content}]
+        with self._lock:
+            messages = self._rendered.setdefault(snapshot.version, messages)
+            while len(self._rendered) > self.RENDER_CACHE_SIZE:
+                self._rendered.popitem(last=False)
+        return messages
+
+    def get_context_messages(self) -> list[dict]:
+        """返回当前历史渲染的上下文消息（等价于 render(snapshot())）"""
+        return self.render(self.snapshot())
+
+    # ------------------------------------------------------------------
+    # 滚动摘要
+    # ------------------------------------------------------------------
+
+    def summary_state(self) -> tuple[int, str]:
+        """返回 (对话代数, 当前摘要)"""
+        with self._lock:
+            return self._generation, self._summary
+
+    def set_summary(self, summary: str, generation: int) -> bool:
+        """
+        写回后台生成的摘要
+
+        :param generation: 生成摘要时的对话代数；其间发生过重置或清空时丢弃该摘要
+        :return: 是否已写入
+        """
+        with self._lock:
+            if generation != self._generation:
+                return False
+            self._summary = summary.strip()
+            self._mutated()
+            return True
 
     # ------------------------------------------------------------------
     # 控制
@@ -254,8 +426,117 @@ class ContextBuffer:
 
     def clear(self) -> None:
         """清空上下文缓冲区"""
-        self._history.clear()
-        self._last_timestamp = None
+        with self._lock:
+            self._reset()
+            self._last_timestamp = None
+            self._mutated()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries) - self._start
+
+
+class ChannelContextBuffers:
+    """
+    按聊天频道（公屏、组队、公会、与每位玩家的私信……）分开维护的上下文历史。
+    每条消息只带上本频道的历史，避免大厅刷屏挤占组队/私信的上下文。
+
+    接口与 ContextBuffer 相同：push / push_batch 按 ContextEntry.channel 分流，
+    snapshot / get_context_messages 按 channel 参数选择频道。各频道共用同一套长度、超时和分块截断设置，
+    context_length 与 context_tokens 是每个频道各自的上限（每次请求只带一个频道的历史，单次请求的开销不变）；
+    总量由 max_channels 限制：频道数超过 max_channels 时淘汰最久没有消息的频道（私信对象可能很多）。
+    per_channel=False 时所有消息共用一个频道（与单个 ContextBuffer 相同）。
+    """
+
+    def __init__(
+        self,
+        strategy: str = "time_based",
+        context_length: int = 10,
+        context_timeout: float = 120.0,
+        block_truncation_size: str = "disabled",
+        per_channel: bool = True,
+        max_channels: int = 16,
+        context_tokens: int = 0,
+    ):
+        self.strategy = strategy
+        self.per_channel = per_channel
+        self.max_channels = max(1, max_channels)
+        self._settings = dict(
+            strategy=strategy,
+            context_length=context_length,
+            context_timeout=context_timeout,
+            block_truncation_size=block_truncation_size,
+            context_tokens=context_tokens,
+        )
+        # 各频道设置相同，分块大小在此解析一次；读取时不创建或触碰频道
+        self._block_size = ContextBuffer(**self._settings).block_size
+        self._buffers: OrderedDict[str, ContextBuffer] = OrderedDict()
+        self._on_push: Optional[Callable[[ContextBuffer, list[ContextEntry]], None]] = None
+        self._lock = threading.Lock()
+
+    def set_on_push(self, callback: Optional[Callable[[ContextBuffer, list[ContextEntry]], None]]) -> None:
+        """为全部频道（含之后创建的频道）设置 ContextBuffer.on_push（如滚动摘要）"""
+        with self._lock:
+            self._on_push = callback
+            for buffer in self._buffers.values():
+                buffer.on_push = callback
+
+    def _key(self, channel: str) -> str:
+        return channel if self.per_channel else "public"
+
+    def buffer(self, channel: str = "public") -> ContextBuffer:
+        """获取（必要时创建）频道的缓冲区，并标记为最近活跃"""
+        key = self._key(channel)
+        with self._lock:
+            buffer = self._buffers.get(key)
+            if buffer is None:
+                buffer = self._buffers[key] = ContextBuffer(**self._settings, channel=key)
+                buffer.on_push = self._on_push
+                while len(self._buffers) > self.max_channels:
+                    evicted, _ = self._buffers.popitem(last=False)
+                    logger.debug(f"[ContextBuffer] Channel '{evicted}' evicted")
+            else:
+                self._buffers.move_to_end(key)
+            return buffer
+
+    @property
+    def block_size(self) -> Optional[int]:
+        return self._block_size
+
+    def channels(self) -> list[str]:
+        with self._lock:
+            return list(self._buffers)
+
+    def push(self, entry: ContextEntry) -> None:
+        self.buffer(entry.channel).push(entry)
+
+    def push_batch(self, entries: list[ContextEntry]) -> None:
+        """按频道分组后批量添加（组内保持原有顺序）"""
+        groups: dict[str, list[ContextEntry]] = {}
+        for entry in entries:
+            groups.setdefault(self._key(entry.channel), []).append(entry)
+        for channel, group in groups.items():
+            self.buffer(channel).push_batch(group)
+
+    def snapshot(self, channel: str = "public") -> ContextSnapshot:
+        return self.buffer(channel).snapshot()
+
+    def render(self, snapshot: ContextSnapshot) -> list[dict]:
+        with self._lock:
+            buffer = self._buffers.get(snapshot.channel)
+        if buffer is None:
+            # 频道已被淘汰：快照仍持有记录，直接渲染
+            buffer = ContextBuffer(**self._settings, channel=snapshot.channel)
+        return buffer.render(snapshot)
+
+    def get_context_messages(self, channel: str = "public") -> list[dict]:
+        return self.buffer(channel).get_context_messages()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._buffers.clear()
 
     def __len__(self) -> int:
-        return len(self._history)
+        with self._lock:
+            buffers = list(self._buffers.values())
+        return sum(len(buffer) for buffer in buffers)
@@ -0,0 +1,136 @@
+# Copyright (C) 2025 LiJiaHua1024
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+上下文滚动摘要。
+
+历史超出 context-length / context-tokens 被剔除的记录不再直接丢弃，而是交给后台线程
+与已有摘要合并成一段简短摘要，渲染在最近历史之前：长对话保持连贯，提示词只多出几十个 token。
+
+- 摘要在翻译热路径之外生成：只在一段时间没有新消息（空闲）时调用模型；
+- 每个上下文（频道）的摘要刷新间隔不小于 min_interval 秒，期间剔除的记录累积到下一次一起合并；
+- 时间跨度重置或清空上下文后，基于旧对话生成中的摘要被丢弃。
+"""
+
+import threading
+import time
+import weakref
+from collections import deque
+from typing import Callable, Optional
+
+from modless_chat_trans.context_buffer import ContextBuffer, ContextEntry
+from modless_chat_trans.logger import logger
+
+
+class _PendingSummary:
+    __slots__ = ("generation", "lines", "refreshed_at")
+
+    def __init__(self, generation: int, max_lines: int):
+        self.generation = generation
+        self.lines: deque[str] = deque(maxlen=max_lines)
+        self.refreshed_at = 0.0
+
+
+class ContextSummarizer:
+    """
+    后台摘要器。通过 ChannelContextBuffers.set_on_push(summarizer.observe)（或 ContextBuffer.on_push）接入。
+    """
+
+    def __init__(
+        self,
+        summarize: Callable[[str, list[str]], str],
+        min_interval: float = 60.0,
+        idle_seconds: float = 3.0,
+        max_pending_lines: int = 200,
+    ):
+        """
+        :param summarize:         (已有摘要, 新剔除的历史行) -> 新摘要；在后台线程调用，可以阻塞
+        :param min_interval:      同一上下文两次刷新摘要的最小间隔（秒）
+        :param idle_seconds:      距最近一条消息至少这么久才生成摘要（秒）
+        :param max_pending_lines: 每个上下文最多累积的待合并历史行（超出时丢弃最早的）
+        """
+        self._summarize = summarize
+        self.min_interval = max(0.0, min_interval)
+        self.idle_seconds = max(0.0, idle_seconds)
+        self.max_pending_lines = max(1, max_pending_lines)
+        # 以缓冲区为键：频道被淘汰后待合并的记录随之释放
+        self._pending: weakref.WeakKeyDictionary[ContextBuffer, _PendingSummary] = weakref.WeakKeyDictionary()
+        self._last_activity = 0.0
+        self._condition = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._closed = False
+        self.refreshes = 0
+
+    def observe(self, buffer: ContextBuffer, evicted: list[ContextEntry]) -> None:
+        """ContextBuffer.on_push 回调：记录活动时间，收集被剔除的历史行（不阻塞）"""
+        with self._condition:
+            self._last_activity = time.monotonic()
+            if not evicted or self._closed:
+                return
+            generation, _ = buffer.summary_state()
+            pending = self._pending.get(buffer)
+            if pending is None or pending.generation != generation:
+                pending = self._pending[buffer] = _PendingSummary(generation, self.max_pending_lines)
+            pending.lines.extend(entry.line for entry in evicted)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, daemon=True, name="context-summarizer")
+                self._thread.start()
+            self._condition.notify_all()
+
+    def _next_job(self) -> Optional[tuple[ContextBuffer, int, list[str]]]:
+        """等待到空闲且有上下文可以刷新，取出任务（调用方需持有 _condition）"""
+        while not self._closed:
+            now = time.monotonic()
+            waits = []
+            idle_wait = self._last_activity + self.idle_seconds - now
+            for buffer, pending in list(self._pending.items()):
+                if not pending.lines:
+                    continue
+                interval_wait = pending.refreshed_at + self.min_interval - now
+                wait = max(idle_wait, interval_wait)
+                if wait <= 0:
+                    lines = list(pending.lines)
+                    pending.lines.clear()
+                    pending.refreshed_at = now
+                    return buffer, pending.generation, lines
+                waits.append(wait)
+            self._condition.wait(min(waits) if waits else None)
+        return None
+
+    def _run(self) -> None:
+        while True:
+            with self._condition:
+                job = self._next_job()
+            if job is None:
+                return
+            buffer, generation, lines = job
+            current_generation, previous = buffer.summary_state()
+            if current_generation != generation:
+                continue
+            try:
+                summary = self._summarize(previous, lines)
+            except Exception as error:
+                logger.warning(f"[ContextSummarizer] Failed to summarise context history: {error}")
+                continue
+            if summary and buffer.set_summary(summary, generation):
+                self.refreshes += 1
+                logger.debug(f"[ContextSummarizer] Summary for channel '{buffer.channel}' refreshed "
+                             f"from {len(lines)} evicted lines")
+
+    def close(self) -> None:
+        """停止后台线程（尚未合并的记录被丢弃）"""
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
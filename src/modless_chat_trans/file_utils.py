@@ -14,17 +14,90 @@
 # along with this program.  If not, see <https://www.gnu.org/licenses/>.
 
 import os
+import atexit
 import glob
 import json
 import importlib
 import threading
+import tomllib
 from dataclasses import dataclass
 from typing import Optional
 from diskcache import Cache
 from modless_chat_trans.logger import logger
+from modless_chat_trans.cache_backends import open_cache_backend
+from modless_chat_trans.translation_cache import TranslationCache
 
 base_path = os.path.dirname(os.path.dirname(__file__))
-cache = Cache("mct-cache", eviction_policy="least-frequently-used")
+
+# [cache] 中决定缓存如何打开的设置；缓存在读取完整配置之前打开，因此单独读取
+_CACHE_STORAGE_KEYS = ("backend", "directory", "profile", "eviction_policy", "size_limit_mb", "sqlite_pragmas")
+
+
+def _load_cache_storage_settings() -> dict:
+    """从默认配置与用户配置文件读取缓存存储设置（用户配置优先），读取失败时使用默认值"""
+    settings = {}
+    for path in (os.path.join(base_path, "modless-chat-trans.default.toml"), "modless-chat-trans.toml"):
+        try:
+            with open(path, "rb") as f:
+                section = tomllib.load(f).get("cache", {})
+        except FileNotFoundError:
+            continue
+        except Exception as e:
+            logger.warning(f"Failed to read cache settings from {path}: {e}")
+            continue
+        for key, value in section.items():
+            key = key.replace("-", "_")
+            if key in _CACHE_STORAGE_KEYS:
+                settings[key] = value
+    return settings
+
+
+def _open_cache() -> Cache:
+    settings = _load_cache_storage_settings()
+    try:
+        return open_cache_backend(**settings)
+    except Exception as e:
+        logger.error(f"Failed to open translation cache with {settings}, falling back to defaults: {e}")
+        return open_cache_backend()
+
+
+cache = _open_cache()
+atexit.register(cache.close)
+# 翻译读写统一经由两级缓存（内存 LRU + cache），直接访问 cache 仅用于批量扫描与清理
+translation_cache = TranslationCache(cache)
+atexit.register(translation_cache.close)
+
+
+def init_translation_cache(cache_config, namespace: str):
+    """
+    按配置调整内存层容量，归入旧版无命名空间的条目，并预热当前命名空间
+
+    :param cache_config: config.CacheConfig
+    :param namespace: 玩家消息翻译的缓存命名空间（Translator.cache_namespace）
+    """
+    translation_cache.configure(cache_config.memory_size)
+    try:
+        translation_cache.enable_compression(
+            cache_config.compression, cache_config.compression_dict_size_kb * 1024, cache_config.compression_min_samples,
+        )
+    except Exception as e:
+        logger.warning(f"Failed to enable translation cache compression: {e}")
+    try:
+        cache.create_tag_index()
+        translation_cache.adopt_legacy_entries(namespace)
+        translation_cache.warm(cache_config.warm_size, namespace)
+    except Exception as e:
+        logger.warning(f"Failed to warm translation cache: {e}")
+
+    if translation_cache.shared is not None:
+        translation_cache.shared.close()
+        translation_cache.shared = None
+    if cache_config.shared_url:
+        from modless_chat_trans.shared_cache import SharedCacheClient
+        translation_cache.shared = SharedCacheClient(
+            cache_config.shared_url, cache_config.shared_token, cache_config.shared_timeout
+        )
+        logger.info(f"Using shared translation cache at {cache_config.shared_url}")
 
 # Pre-TTS 音频缓存：懒创建，仅当手动触发 Pre-TTS 时才建立目录。
 # 固定 4 MB 限额，LRU 驱逐（新写入的条目最安全，长期未播放的旧音频先被淘汰）。
@@ -73,6 +146,26 @@ def clear_pre_tts_cache() -> int:
         return -1
 
 
+# 负缓存：服务商原样返回（无需翻译）的原文，懒创建，固定 16 MB 限额。
+_NEGATIVE_CACHE_SIZE_LIMIT = 16 * 1024 * 1024
+_negative_cache: Optional[Cache] = None
+_negative_cache_lock = threading.Lock()
+
+
+def get_negative_cache() -> Cache:
+    """获取负缓存；首次调用时创建缓存目录"""
+    global _negative_cache
+    if _negative_cache is None:
+        with _negative_cache_lock:
+            if _negative_cache is None:
+                _negative_cache = Cache(
+                    "mct-negative-cache",
+                    eviction_policy="least-recently-stored",
+                    size_limit=_NEGATIVE_CACHE_SIZE_LIMIT,
+                )
+    return _negative_cache
+
+
 def get_path(path: str, temp_path=True) -> str:
     if temp_path:
         return os.path.join(base_path, path)
@@ -90,7 +183,8 @@ def get_platform() -> int:
 
 def prune_stale_cache(*, dry_run: bool = False) -> tuple[int, int]:
     """
-    清理缓存中从未被读取过的条目（access_count == 0）。
+    清理缓存中从未被读取过的条目（access_count == 0），分块事务删除。
+    大缓存请在后台线程调用（或使用 cache_maintenance.get_cache_maintenance().start）。
 
     Args:
         dry_run: 为 True 时只统计不删除，返回 (stale_count, total)。
@@ -99,27 +193,22 @@ def prune_stale_cache(*, dry_run: bool = False) -> tuple[int, int]:
         (stale_count, total): dry_run 模式返回待清理数和总数；
                               实际删除后返回已清理数和清理前总数。
     """
-    rows = cache._sql('SELECT key FROM Cache WHERE access_count = 0')
-    stale_keys = [row[0] for row in rows]
+    from modless_chat_trans.cache_maintenance import MaintenancePlan, get_cache_maintenance
 
-    if dry_run or not stale_keys:
-        total = len(cache)
-        if not stale_keys:
+    maintenance = get_cache_maintenance()
+    plan = MaintenancePlan(unread=True)
+    if dry_run:
+        stale_count, total = maintenance.count(plan)
+        if not stale_count:
             logger.debug(f"Cache prune: no stale entries found (total={total})")
-        return len(stale_keys), total
-
-    total_before = len(cache)
-    deleted = 0
-    for key in stale_keys:
-        try:
-            del cache[key]
-            deleted += 1
-        except KeyError:
-            pass
-
-    logger.info(f"Cache pruned: deleted {deleted} stale entries (access_count=0), "
-                f"{len(cache)} remaining (was {total_before})")
-    return deleted, total_before
+        return stale_count, total
+
+    result = maintenance.run(plan)
+    if "error" in result:
+        raise RuntimeError(result["error"])
+    logger.info(f"Cache pruned: deleted {result['deleted']} stale entries (access_count=0), "
+                f"was {result['total_before']}")
+    return result["deleted"], result["total_before"]
 
 
 def find_latest_log(directory: str) -> str:
@@ -0,0 +1,116 @@
+# Copyright (C) 2025 LiJiaHua1024
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+格式化代码归一化：翻译前把 § 格式化代码与 [MVP++] 等头衔标签抽取为紧凑占位符，
+翻译后再按位置注回。
+
+- 行首/行尾的格式化代码与标签直接剥离，不发送给模型，翻译后原样拼回；
+- 行内的格式化片段替换为 {0}、{1} ... 占位符；
+- 缓存以占位符形式（FormattedText.text）为键，颜色变化不会拆分缓存条目；
+- 模型丢失的占位符对应片段被确定性地丢弃，模型凭空生成的占位符被移除。
+"""
+
+import re
+from dataclasses import dataclass, field
+
+from modless_chat_trans.token_estimator import estimate_tokens
+
+# 连续的格式化代码视为一个片段（包括 §x§r§r§g§g§b§b 形式的十六进制颜色）
+_FORMAT_RUN = r'(?:§.)+'
+# 头衔标签：方括号内仅含大写字母、数字、符号与格式化代码，如 [MVP§c++§b]、[1✫]
+_RANK_TAG = r'\[(?:§.|[A-Z0-9+_\-✫✪⚝★☆✦✿❤ ])*[A-Z0-9+✫✪⚝★☆✦✿❤](?:§.|[A-Z0-9+_\-✫✪⚝★☆✦✿❤ ])*\]'
+
+_RE_SPAN = re.compile(f'{_RANK_TAG}|{_FORMAT_RUN}')
+_RE_LEADING = re.compile(rf'^(?:\s*(?:{_RANK_TAG}|{_FORMAT_RUN}))+\s*')
+_RE_TRAILING = re.compile(rf'(?:{_FORMAT_RUN}\s*)+$')
+_RE_PLACEHOLDER = re.compile(r'\{(\d{1,2})\}')
+
+
+@dataclass(frozen=True)
+class FormattedText:
+    """归一化后的消息：text 为发送给模型（及作为缓存键）的占位符形式"""
+    text: str
+    prefix: str = ""
+    suffix: str = ""
+    spans: tuple = field(default_factory=tuple)
+
+    @property
+    def has_formatting(self) -> bool:
+        return bool(self.prefix or self.suffix or self.spans)
+
+    @property
+    def saved_tokens(self) -> int:
+        """归一化节省的估算 token 数（原文 - 占位符形式）"""
+        if not self.has_formatting:
+            return 0
+        original = self.prefix + self._fill(self.text) + self.suffix
+        return max(0, estimate_tokens(original) - estimate_tokens(self.text))
+
+    def _fill(self, text: str) -> str:
+        used = set()
+
+        def replace(match: re.Match) -> str:
+            index = int(match.group(1))
+            if index >= len(self.spans) or index in used:
+                return ""
+            used.add(index)
+            return self.spans[index]
+
+        return _RE_PLACEHOLDER.sub(replace, text)
+
+    def restore(self, translated: str) -> str:
+        """
+        把占位符形式的译文还原为带格式化代码的完整消息。
+        缺失的占位符对应的片段被丢弃；越界或重复的占位符被移除。
+        """
+        if not self.has_formatting:
+            return translated
+        body = self._fill(translated) if self.spans else translated
+        return f"{self.prefix}{body}{self.suffix}"
+
+
+def normalize_formatting(message: str) -> FormattedText:
+    """
+    抽取消息中的格式化代码与头衔标签。
+
+    原文中已含有 {数字} 形式文本时不做行内替换（避免与占位符冲突），
+    仅剥离首尾的格式化片段。
+
+    :param message: 原始消息
+    :return: FormattedText
+    """
+    if not message or ("§" not in message and "[" not in message):
+        return FormattedText(text=message)
+
+    prefix = ""
+    if m := _RE_LEADING.match(message):
+        prefix = m.group(0)
+        message = message[m.end():]
+
+    suffix = ""
+    if m := _RE_TRAILING.search(message):
+        suffix = m.group(0)
+        message = message[:m.start()]
+
+    spans = []
+    if not _RE_PLACEHOLDER.search(message):
+        def replace(match: re.Match) -> str:
+            spans.append(match.group(0))
+            return f"{{{len(spans) - 1}}}"
+
+        message = _RE_SPAN.sub(replace, message)
+
+    return FormattedText(text=message.strip(), prefix=prefix, suffix=suffix, spans=tuple(spans))
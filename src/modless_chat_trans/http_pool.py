@@ -0,0 +1,172 @@
+# Copyright (C) 2025 LiJiaHua1024
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+传统翻译服务的 HTTP 连接池。
+
+直接调用 requests.post 时每条消息都要重新建立 TCP 与 TLS 连接（常见 100~300ms）；
+这里为每个服务商（按主机名区分）维护一个保持连接的连接池，后续请求复用已建立的连接。
+
+- 每个主机一个 HTTPAdapter（urllib3 连接池线程安全），翻译线程各自持有轻量的 Session 并挂载同一个 adapter，
+  避免多线程共用 Session 时的 Cookie 等状态竞争；
+- 连接失败与 502/503/504 按配置自动重试（退避递增）；读取超时不重试，以免超出翻译时限；
+- 每个主机一个限流器（见 rate_limiter）：429 的 Retry-After 期间，该主机的请求在各自的超时时间内排队，而不是继续请求。
+
+接口与 requests 模块相同（get / post / request），translator._http() 返回本模块的连接池。
+"""
+
+import threading
+import time
+from typing import Optional
+from urllib.parse import urlsplit
+
+from modless_chat_trans.logger import logger
+from modless_chat_trans.rate_limiter import RateLimiter
+
+# 自动重试的状态码（限流 429 不在此重试）
+RETRY_STATUSES = (502, 503, 504)
+# 请求没有指定数值超时时，在限流队列中最多等待的秒数
+DEFAULT_QUEUE_TIMEOUT = 10.0
+
+
+class HttpPool:
+    """
+    按主机名划分的连接池（线程安全）。
+    """
+
+    def __init__(self, pool_size: int = 10, retries: int = 1, retry_backoff: float = 0.2, keep_alive: bool = True):
+        """
+        :param pool_size:     每个主机保持的最大连接数（通常不小于翻译线程数）
+        :param retries:       连接失败或 502/503/504 时的重试次数
+        :param retry_backoff: 重试退避系数（秒），第 n 次重试前等待约 retry_backoff * 2^(n-1)
+        :param keep_alive:    False 时不复用连接（每次请求新建连接，与 requests.post 相同）
+        """
+        self.pool_size = max(1, pool_size)
+        self.retries = max(0, retries)
+        self.retry_backoff = max(0.0, retry_backoff)
+        self.keep_alive = keep_alive
+        self._adapters: dict[str, object] = {}
+        self._limiters: dict[str, RateLimiter] = {}
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def _adapter(self, prefix: str):
+        with self._lock:
+            adapter = self._adapters.get(prefix)
+            if adapter is None:
+                from requests.adapters import HTTPAdapter
+                from urllib3.util.retry import Retry
+
+                retry = Retry(
+                    total=self.retries,
+                    connect=self.retries,
+                    read=0,
+                    status=self.retries,
+                    status_forcelist=RETRY_STATUSES,
+                    allowed_methods=None,
+                    backoff_factor=self.retry_backoff,
+                    raise_on_status=False,
+                )
+                adapter = self._adapters[prefix] = HTTPAdapter(
+                    pool_connections=1, pool_maxsize=self.pool_size, max_retries=retry,
+                )
+                logger.debug(f"[HttpPool] Connection pool created for {prefix}")
+            return adapter
+
+    def _session(self, prefix: str):
+        """当前线程访问该主机使用的 Session（挂载共享的 adapter）"""
+        sessions = self._local.__dict__.setdefault("sessions", {})
+        session = sessions.get(prefix)
+        if session is None:
+            import requests
+
+            session = sessions[prefix] = requests.Session()
+            session.mount(prefix, self._adapter(prefix))
+        return session
+
+    def limiter(self, prefix: str) -> RateLimiter:
+        """该主机的限流器（只按响应头与 Retry-After 调整，不限制 RPM）"""
+        with self._lock:
+            limiter = self._limiters.get(prefix)
+            if limiter is None:
+                limiter = self._limiters[prefix] = RateLimiter(prefix)
+            return limiter
+
+    def request(self, method: str, url: str, **kwargs):
+        parts = urlsplit(url)
+        prefix = f"{parts.scheme}://{parts.netloc}/"
+        limiter = self.limiter(prefix)
+        timeout = kwargs.get("timeout")
+        limiter.acquire(deadline=time.monotonic() + (
+            timeout if isinstance(timeout, (int, float)) else DEFAULT_QUEUE_TIMEOUT
+        ))
+        if not self.keep_alive:
+            import requests
+            response = requests.request(method, url, **kwargs)
+        else:
+            response = self._session(prefix).request(method, url, **kwargs)
+        limiter.observe(response.headers, rate_limited=response.status_code == 429)
+        return response
+
+    def get(self, url: str, **kwargs):
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url: str, **kwargs):
+        return self.request("POST", url, **kwargs)
+
+    def snapshot(self) -> dict:
+        """各主机限流器的统计"""
+        with self._lock:
+            limiters = dict(self._limiters)
+        return {prefix: limiter.snapshot() for prefix, limiter in limiters.items()}
+
+    def close(self) -> None:
+        """关闭全部连接（之后的请求会重新建立连接池）"""
+        with self._lock:
+            adapters = list(self._adapters.values())
+            self._adapters.clear()
+        for adapter in adapters:
+            adapter.close()
+        self._local = threading.local()
+
+
+_pool: Optional[HttpPool] = None
+_pool_lock = threading.Lock()
+
+
+def init_http_pool(network_config) -> HttpPool:
+    """按 [network] 配置创建连接池（替换已有的连接池）"""
+    global _pool
+    pool = HttpPool(
+        pool_size=network_config.pool_size,
+        retries=network_config.retries,
+        retry_backoff=network_config.retry_backoff,
+        keep_alive=network_config.keep_alive,
+    )
+    with _pool_lock:
+        previous, _pool = _pool, pool
+    if previous is not None:
+        previous.close()
+    return pool
+
+
+def get_http_pool() -> HttpPool:
+    """当前连接池；未初始化时使用默认设置创建"""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = HttpPool()
+    return _pool
@@ -38,7 +38,8 @@ from qfluentwidgets import (
     TransparentToolButton
 )
 
-from modless_chat_trans.file_utils import get_path, cache, prune_stale_cache
+from modless_chat_trans.file_utils import get_path, cache, translation_cache
+from modless_chat_trans.cache_maintenance import MaintenancePlan, get_cache_maintenance
 from modless_chat_trans.i18n import supported_languages, _
 from modless_chat_trans.logger import logger
 from modless_chat_trans.config import (
@@ -238,6 +239,41 @@ class LanguageLoaderThread(QThread):
             self.error_occurred.emit(str(e))
 
 
+class CacheCountThread(QThread):
+    """用于异步统计待清理缓存条目的线程（大缓存的全表扫描不阻塞界面）"""
+    count_finished = Signal(int, int)  # (待清理数, 总数)
+    error_occurred = Signal(str)
+
+    def __init__(self, plan: MaintenancePlan):
+        super().__init__()
+        self.plan = plan
+
+    def run(self):
+        try:
+            stale_count, total = get_cache_maintenance().count(self.plan)
+            self.count_finished.emit(stale_count, total)
+        except Exception as e:
+            self.error_occurred.emit(str(e))
+
+
+class CacheTransferThread(QThread):
+    """用于异步导出/导入翻译缓存的线程"""
+    transfer_finished = Signal(object)  # cache_transfer.TransferResult
+    error_occurred = Signal(str)
+
+    def __init__(self, action, *args, **kwargs):
+        super().__init__()
+        self.action = action
+        self.args = args
+        self.kwargs = kwargs
+
+    def run(self):
+        try:
+            self.transfer_finished.emit(self.action(*self.args, **self.kwargs))
+        except Exception as e:
+            self.error_occurred.emit(str(e))
+
+
 class StartWorkerThread(QThread):
     """用于异步启动翻译服务的线程"""
     start_finished = Signal(object)  # 传递配置对象
@@ -824,8 +860,29 @@ class TranslationServiceInterface(QFrame):
         grid.addWidget(max_tokens_label, 5, 0, Qt.AlignmentFlag.AlignRight)
         grid.addWidget(max_tokens_spin, 5, 1)
 
+        # 客户端限流：每分钟请求数 / Token 数（0 = 不限制，仍遵循服务商返回的限流信息）
+        rpm_label = BodyLabel(_('每分钟请求数上限：'), parent)
+        rpm_spin = SpinBox(parent)
+        rpm_spin.setRange(0, 1000000)
+        rpm_spin.setSpecialValueText(_("不限制"))
+        rpm_spin.setFixedWidth(300)
+        rpm_spin.setValue(getattr(config_section, "rpm", 0) if config_section else 0)
+
+        grid.addWidget(rpm_label, 6, 0, Qt.AlignmentFlag.AlignRight)
+        grid.addWidget(rpm_spin, 6, 1)
+
+        tpm_label = BodyLabel(_('每分钟Token数上限：'), parent)
+        tpm_spin = SpinBox(parent)
+        tpm_spin.setRange(0, 100000000)
+        tpm_spin.setSpecialValueText(_("不限制"))
+        tpm_spin.setFixedWidth(300)
+        tpm_spin.setValue(getattr(config_section, "tpm", 0) if config_section else 0)
+
+        grid.addWidget(tpm_label, 7, 0, Qt.AlignmentFlag.AlignRight)
+        grid.addWidget(tpm_spin, 7, 1)
+
         grid.setColumnStretch(2, 1)
-        grid.setRowStretch(6, 1)
+        grid.setRowStretch(8, 1)
 
         fields['service_combo'] = service_combo
         fields['api_key_edit'] = api_key_edit
@@ -833,6 +890,8 @@ class TranslationServiceInterface(QFrame):
         fields['model_edit'] = model_edit
         fields['optimization_switch'] = optimization_switch
         fields['max_tokens_spin'] = max_tokens_spin
+        fields['rpm_spin'] = rpm_spin
+        fields['tpm_spin'] = tpm_spin
         fields['grid'] = grid
 
         return fields
@@ -896,6 +955,7 @@ class TranslationServiceInterface(QFrame):
             (_('重试耗尽后切换（主模型重试全部失败后使用备用）'), FallbackStrategy.RETRY_EXHAUSTED),
             (_('首次失败竞速（主模型首次失败后并发竞速）'), FallbackStrategy.RACE_ON_FAILURE),
             (_('始终竞速（始终并发请求两者取最快）'), FallbackStrategy.ALWAYS_RACE),
+            (_('延迟对冲（主模型慢于平时 90% 的请求时加发备用，取最快）'), FallbackStrategy.HEDGED),
         ]
         for label, value in strategy_items:
             strategy_combo.addItem(label, userData=value)
@@ -1271,6 +1331,20 @@ class MessagePresentationInterface(QFrame):
         self.grid_layout.addWidget(self.web_port_label, 0, 0)
         self.grid_layout.addWidget(self.web_port_spin, 0, 1)
 
+        # 流式显示译文
+        self.stream_label = BodyLabel(_('流式显示译文：'), self)
+        self.stream_switch = SwitchButton(self)
+        self.stream_switch.setOffText(_("关闭"))
+        self.stream_switch.setOnText(_("开启"))
+        if self.config and hasattr(self.config, 'message_presentation'):
+            self.stream_switch.setChecked(self.config.message_presentation.stream_translations)
+        else:
+            self.stream_switch.setChecked(True)
+        set_tool_tip(self.stream_switch, _("LLM 生成译文的同时在网页上逐步显示"))
+
+        self.grid_layout.addWidget(self.stream_label, 1, 0)
+        self.grid_layout.addWidget(self.stream_switch, 1, 1)
+
         self.main_layout.addLayout(self.grid_layout)
         self.main_layout.addStretch()
 
@@ -2075,6 +2149,27 @@ class ContextTranslationInterface(QFrame):
         self.grid_layout.addWidget(timeout_label, 2, 0)
         self.grid_layout.addLayout(timeout_layout, 2, 1)
 
+        # 3.5 token 预算
+        tokens_label = BodyLabel(_('历史 token 预算：'), self)
+        self.context_tokens_spin = SpinBox(self)
+        self.context_tokens_spin.setRange(0, 100000)
+        self.context_tokens_spin.setSingleStep(50)
+
+        help_button_tokens = create_help_button(
+            self,
+            _("历史记录的 token 数上限（本地估算，0 表示无限制）。\n与最大保留历史条数同时生效，长消息较多时按 token 截断。"),
+            self.context_tokens_spin
+        )
+
+        tokens_layout = QHBoxLayout()
+        tokens_layout.setSpacing(5)
+        tokens_layout.addWidget(self.context_tokens_spin)
+        tokens_layout.addWidget(help_button_tokens)
+        tokens_layout.addStretch()
+
+        self.grid_layout.addWidget(tokens_label, 3, 0)
+        self.grid_layout.addLayout(tokens_layout, 3, 1)
+
         # 4. 分块截断大小
         truncation_label = BodyLabel(_('分块截断大小：'), self)
         
@@ -2102,8 +2197,8 @@ class ContextTranslationInterface(QFrame):
         trunc_layout.addWidget(help_button_trunc)
         trunc_layout.addStretch()
 
-        self.grid_layout.addWidget(truncation_label, 3, 0)
-        self.grid_layout.addLayout(trunc_layout, 3, 1)
+        self.grid_layout.addWidget(truncation_label, 4, 0)
+        self.grid_layout.addLayout(trunc_layout, 4, 1)
 
         self.main_layout.addLayout(self.grid_layout)
         self.main_layout.addStretch()
@@ -2122,6 +2217,9 @@ class ContextTranslationInterface(QFrame):
             
             # context_timeout
             self.context_timeout_spin.setValue(ctx.context_timeout)
+
+            # context_tokens
+            self.context_tokens_spin.setValue(ctx.context_tokens)
             
             # block_truncation_size
             trunc_val = str(ctx.block_truncation_size)
@@ -3458,7 +3556,9 @@ class StartInterface(QFrame):
                 else player_widget.main_fields['api_url_edit'].currentText(),
                 model=player_widget.main_fields['model_edit'].text(),
                 deep_translate=player_widget.main_fields['optimization_switch'].isChecked(),
-                max_tokens=player_widget.main_fields['max_tokens_spin'].value()
+                max_tokens=player_widget.main_fields['max_tokens_spin'].value(),
+                rpm=player_widget.main_fields['rpm_spin'].value(),
+                tpm=player_widget.main_fields['tpm_spin'].value(),
             )
             # 备用模型只要求模型代号；本地/OpenAI 兼容端点可能不需要 API Key。
             fallback_llm = None
@@ -3471,7 +3571,9 @@ class StartInterface(QFrame):
                     else fb_fields['api_url_edit'].currentText(),
                     model=fb_fields['model_edit'].text(),
                     deep_translate=fb_fields['optimization_switch'].isChecked(),
-                    max_tokens=fb_fields['max_tokens_spin'].value()
+                    max_tokens=fb_fields['max_tokens_spin'].value(),
+                    rpm=fb_fields['rpm_spin'].value(),
+                    tpm=fb_fields['tpm_spin'].value(),
                 )
             cfg.player_translation = TranslationServiceConfig(
                 service_type=ServiceType.LLM,
@@ -3506,7 +3608,9 @@ class StartInterface(QFrame):
                     else send_widget.main_fields['api_url_edit'].currentText(),
                     model=send_widget.main_fields['model_edit'].text(),
                     deep_translate=send_widget.main_fields['optimization_switch'].isChecked(),
-                    max_tokens=send_widget.main_fields['max_tokens_spin'].value()
+                    max_tokens=send_widget.main_fields['max_tokens_spin'].value(),
+                    rpm=send_widget.main_fields['rpm_spin'].value(),
+                    tpm=send_widget.main_fields['tpm_spin'].value(),
                 )
                 # 备用模型只要求模型代号；本地/OpenAI 兼容端点可能不需要 API Key。
                 fallback_llm = None
@@ -3519,7 +3623,9 @@ class StartInterface(QFrame):
                         else fb_fields['api_url_edit'].currentText(),
                         model=fb_fields['model_edit'].text(),
                         deep_translate=fb_fields['optimization_switch'].isChecked(),
-                        max_tokens=fb_fields['max_tokens_spin'].value()
+                        max_tokens=fb_fields['max_tokens_spin'].value(),
+                        rpm=fb_fields['rpm_spin'].value(),
+                        tpm=fb_fields['tpm_spin'].value(),
                     )
                 cfg.send_translation = TranslationServiceConfig(
                     service_type=ServiceType.LLM,
@@ -3546,6 +3652,7 @@ class StartInterface(QFrame):
 
         # 3) 翻译结果呈现
         cfg.message_presentation.web_port = msg_present.web_port_spin.value()
+        cfg.message_presentation.stream_translations = msg_present.stream_switch.isChecked()
 
         # 4) 消息发送
         cfg.message_send.monitor_clipboard = msg_send.clipboard_monitor_check.isChecked()
@@ -3560,6 +3667,7 @@ class StartInterface(QFrame):
         cfg.context.strategy = context.strategy_combo.currentData()
         cfg.context.context_length = context.context_length_spin.value()
         cfg.context.context_timeout = context.context_timeout_spin.value()
+        cfg.context.context_tokens = context.context_tokens_spin.value()
         trunc_mode = context.block_truncation_combo.currentData()
         if trunc_mode == "custom":
             cfg.context.block_truncation_size = str(context.block_truncation_spin.value())
@@ -4406,33 +4514,71 @@ class SettingInterface(QFrame):
         self.clear_cache_button = PushButton(_('清理不常用缓存'), content_frame)
         self.clear_cache_button.clicked.connect(self.clear_cache)
 
+        # 导出 / 导入缓存
+        transfer_label = BodyLabel(_('共享缓存：'), content_frame)
+        self.export_cache_button = PushButton(_('导出缓存'), content_frame)
+        self.export_cache_button.clicked.connect(self.export_cache)
+        self.import_cache_button = PushButton(_('导入缓存'), content_frame)
+        self.import_cache_button.clicked.connect(self.import_cache)
+        self.merge_policy_combo = ComboBox(content_frame)
+        self.merge_policy_combo.addItem(_('冲突时保留较新的译文'), userData="newest")
+        self.merge_policy_combo.addItem(_('冲突时保留读取次数多的译文'), userData="most-read")
+
+        # 清理进度
+        self.cache_status_label = CaptionLabel('', content_frame)
+        self.cache_status_label.setStyleSheet("color: #888888;")
+
         content_layout.addWidget(clear_label, 0, 0, Qt.AlignmentFlag.AlignRight)
         content_layout.addWidget(self.clear_cache_button, 0, 1)
+        content_layout.addWidget(transfer_label, 1, 0, Qt.AlignmentFlag.AlignRight)
+        content_layout.addWidget(self.export_cache_button, 1, 1)
+        content_layout.addWidget(self.import_cache_button, 1, 2)
+        content_layout.addWidget(self.merge_policy_combo, 1, 3)
+        content_layout.addWidget(self.cache_status_label, 2, 1, 1, 3)
+
+        self._cache_count_thread = None
+        self._cache_transfer_thread = None
+        self._cache_maintenance_timer = QTimer(self)
+        self._cache_maintenance_timer.setInterval(300)
+        self._cache_maintenance_timer.timeout.connect(self._update_cache_maintenance_status)
 
         # 设置列拉伸
-        content_layout.setColumnStretch(2, 1)
+        content_layout.setColumnStretch(4, 1)
 
         card_layout.addWidget(content_frame)
         return card
 
     def clear_cache(self):
         """清理不常用缓存条目（access_count == 0，即从未被读取过的条目）"""
-        try:
-            stale_count, total_before = prune_stale_cache(dry_run=True)
-        except Exception as e:
-            logger.error(f"Failed to query cache: {e}")
-            InfoBar.error(
-                title=_('清理失败'),
-                content=_('查询缓存时出错：{}').format(str(e)),
-                orient=Qt.Orientation.Horizontal,
-                isClosable=True,
-                position=InfoBarPosition.TOP,
-                duration=3000,
-                parent=self
-            )
+        if get_cache_maintenance().running:
             return
+        self.clear_cache_button.setEnabled(False)
+        self.cache_status_label.setText(_('正在统计缓存条目...'))
+        self._cache_count_thread = CacheCountThread(MaintenancePlan(unread=True))
+        self._cache_count_thread.count_finished.connect(self._on_cache_counted)
+        self._cache_count_thread.error_occurred.connect(self._on_cache_count_error)
+        self._cache_count_thread.start()
+
+    def _on_cache_count_error(self, error: str):
+        """统计待清理缓存出错"""
+        logger.error(f"Failed to query cache: {error}")
+        self.clear_cache_button.setEnabled(True)
+        self.cache_status_label.setText('')
+        InfoBar.error(
+            title=_('清理失败'),
+            content=_('查询缓存时出错：{}').format(error),
+            orient=Qt.Orientation.Horizontal,
+            isClosable=True,
+            position=InfoBarPosition.TOP,
+            duration=3000,
+            parent=self
+        )
 
+    def _on_cache_counted(self, stale_count: int, total_before: int):
+        """统计完成后确认并在后台执行清理"""
+        self.cache_status_label.setText('')
         if stale_count == 0:
+            self.clear_cache_button.setEnabled(True)
             InfoBar.info(
                 title=_('无需清理'),
                 content=_('没有不常用的缓存条目，所有缓存都曾被使用过。'),
@@ -4454,17 +4600,132 @@ class SettingInterface(QFrame):
             self.window()
         )
 
-        if w.exec():
-            prune_stale_cache()
-            InfoBar.success(
-                title=_('清理成功'),
-                content=_('已清理 {} 条不常用缓存条目').format(stale_count),
+        if not w.exec() or not get_cache_maintenance().start(MaintenancePlan(unread=True)):
+            self.clear_cache_button.setEnabled(True)
+            return
+        self._cache_maintenance_timer.start()
+        self._update_cache_maintenance_status()
+
+    def _update_cache_maintenance_status(self):
+        """定时刷新缓存清理进度；完成后恢复按钮并提示结果"""
+        maintenance = get_cache_maintenance()
+        if maintenance.running:
+            done, total = maintenance.progress
+            phase_text = {
+                "counting": _('正在统计'),
+                "deleting": _('正在清理'),
+                "compressing": _('正在压缩'),
+                "vacuum": _('正在回收空间'),
+            }.get(maintenance.phase, _('正在清理'))
+            self.cache_status_label.setText(f"{phase_text} {done}/{total}" if total else phase_text)
+            return
+
+        self._cache_maintenance_timer.stop()
+        self.clear_cache_button.setEnabled(True)
+        self.cache_status_label.setText('')
+        result = maintenance.last_result
+        if "error" in result:
+            InfoBar.error(
+                title=_('清理失败'),
+                content=_('清理缓存时出错：{}').format(result["error"]),
                 orient=Qt.Orientation.Horizontal,
                 isClosable=True,
                 position=InfoBarPosition.TOP,
                 duration=3000,
                 parent=self
             )
+            return
+        InfoBar.success(
+            title=_('清理成功'),
+            content=_('已清理 {} 条不常用缓存条目').format(result.get("deleted", 0)),
+            orient=Qt.Orientation.Horizontal,
+            isClosable=True,
+            position=InfoBarPosition.TOP,
+            duration=3000,
+            parent=self
+        )
+
+    def _set_cache_buttons_enabled(self, enabled: bool):
+        for button in (self.export_cache_button, self.import_cache_button, self.clear_cache_button):
+            button.setEnabled(enabled)
+
+    def _run_cache_transfer(self, action, *args, **kwargs):
+        """在后台线程执行导出/导入，进度显示在状态标签中"""
+        self._set_cache_buttons_enabled(False)
+        self.cache_status_label.setText(_('正在处理...'))
+        self._cache_transfer_thread = CacheTransferThread(action, cache, *args, memory_tier=translation_cache, **kwargs)
+        self._cache_transfer_thread.transfer_finished.connect(self._on_cache_transfer_finished)
+        self._cache_transfer_thread.error_occurred.connect(self._on_cache_transfer_error)
+        self._cache_transfer_thread.start()
+
+    def export_cache(self):
+        """导出翻译缓存到文件"""
+        from modless_chat_trans.cache_transfer import export_cache, preferred_compression
+
+        compression = preferred_compression()
+        suffix = ".zst" if compression == "zstd" else ".gz"
+        path, _filter = QFileDialog.getSaveFileName(
+            self, _('导出缓存'), f"mct-cache.jsonl{suffix}", _('缓存导出文件 (*.zst *.gz);;所有文件 (*)')
+        )
+        if path:
+            self._run_cache_transfer(export_cache, path, compression=compression)
+
+    def import_cache(self):
+        """从导出文件导入翻译缓存"""
+        from modless_chat_trans.cache_transfer import import_cache, read_export_header
+
+        path, _filter = QFileDialog.getOpenFileName(
+            self, _('导入缓存'), "", _('缓存导出文件 (*.zst *.gz);;所有文件 (*)')
+        )
+        if not path:
+            return
+        try:
+            header = read_export_header(path)
+        except Exception as e:
+            self._on_cache_transfer_error(str(e))
+            return
+        w = MessageBox(
+            _("确认导入"),
+            _("将导入 {} 个语言/服务组合中的 {} 条缓存条目。").format(
+                len(header.get("namespaces", {})), sum(header.get("namespaces", {}).values())
+            ),
+            self.window()
+        )
+        if w.exec():
+            self._run_cache_transfer(import_cache, path, policy=self.merge_policy_combo.currentData())
+
+    def _on_cache_transfer_finished(self, result):
+        self._set_cache_buttons_enabled(True)
+        self.cache_status_label.setText('')
+        if result.inserted or result.replaced:
+            content = _('已导入 {} 条，覆盖 {} 条，保留原有 {} 条').format(
+                result.inserted, result.replaced, result.skipped
+            )
+        else:
+            content = _('已处理 {} 条缓存条目').format(result.rows)
+        InfoBar.success(
+            title=_('完成'),
+            content=content,
+            orient=Qt.Orientation.Horizontal,
+            isClosable=True,
+            position=InfoBarPosition.TOP,
+            duration=3000,
+            parent=self
+        )
+
+    def _on_cache_transfer_error(self, error: str):
+        logger.error(f"Cache transfer failed: {error}")
+        self._set_cache_buttons_enabled(True)
+        self.cache_status_label.setText('')
+        InfoBar.error(
+            title=_('操作失败'),
+            content=error,
+            orient=Qt.Orientation.Horizontal,
+            isClosable=True,
+            position=InfoBarPosition.TOP,
+            duration=3000,
+            parent=self
+        )
 
     def apply_language_setting(self):
         """应用语言设置"""
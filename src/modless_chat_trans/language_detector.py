@@ -0,0 +1,376 @@
+# Copyright (C) 2025 LiJiaHua1024
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+离线源语言识别（纯 CPU，无外部依赖），用于跳过已是目标语言的消息。
+
+- 非拉丁文字（中日韩、西里尔、阿拉伯等）按 Unicode 区段直接判定；
+- 拉丁文字按常用词与字符三元组（trigram）打分；
+- 短消息证据不足时参考该玩家最近的语言（按玩家记忆）；
+- 语言画像在首次检测时才构建。
+
+语言代码使用 ISO 639-1（中文区分 zh-CN / zh-TW）。
+"""
+
+import re
+import threading
+from collections import Counter, OrderedDict, deque
+from dataclasses import dataclass
+from typing import Optional
+
+from modless_chat_trans.logger import logger
+
+_RE_NOISE = re.compile(r'§.|https?://\S+|www\.\S+|[\d_]+')
+_RE_WORD = re.compile(r"[^\W\d_]+(?:'[^\W\d_]+)?")
+
+# 配置中的语言名称（界面显示名、本地化名称、区域代码）→ 语言代码
+_LANGUAGE_ALIASES = {
+    "en": ("english", "英语", "英文"),
+    "zh-CN": ("simplified chinese", "chinese", "chinese simplified", "zh", "zh-cn", "zh-hans", "zh-sg",
+              "简体中文", "中文", "汉语"),
+    "zh-TW": ("traditional chinese", "chinese traditional", "zh-tw", "zh-hant", "zh-hk", "zh-mo",
+              "繁體中文", "繁体中文"),
+    "ja": ("japanese", "日本語", "日语", "日文"),
+    "ko": ("korean", "한국어", "韩语"),
+    "fr": ("french", "français", "法语"),
+    "de": ("german", "deutsch", "德语"),
+    "es": ("spanish", "español", "西班牙语"),
+    "pt": ("portuguese", "português", "葡萄牙语"),
+    "it": ("italian", "italiano", "意大利语"),
+    "nl": ("dutch", "nederlands", "荷兰语"),
+    "pl": ("polish", "polski", "波兰语"),
+    "tr": ("turkish", "türkçe", "土耳其语"),
+    "id": ("indonesian", "bahasa indonesia", "印尼语"),
+    "ru": ("russian", "русский", "俄语"),
+    "uk": ("ukrainian", "українська", "乌克兰语"),
+    "ar": ("arabic", "العربية", "阿拉伯语"),
+    "he": ("hebrew", "עברית", "希伯来语"),
+    "el": ("greek", "ελληνικά", "希腊语"),
+    "th": ("thai", "ไทย", "泰语"),
+    "hi": ("hindi", "हिन्दी", "印地语"),
+    "vi": ("vietnamese", "tiếng việt", "越南语"),
+}
+
+# 拉丁文字语言的常用词（含游戏聊天常见缩写）
+_STOPWORDS = {
+    "en": "the be to of and a in that have i it for not on with he as you do at this but his by from they "
+          "we say her she or an will my one all would there their what so up out if about who get which go me "
+          "when make can like time no just him know take people into year your good some could them see other "
+          "than then now look only come its over think also back after use two how our work first well way even "
+          "new want because any these give day most us is are was were has had been does did am don't im i'm "
+          "it's can't won't didn't doesn't isn't you're what's where why yes yeah yea hello hi hey thanks thank "
+          "please sorry lol lmao gg wp ez afk brb idk ty np pls plz omg bro guys anyone someone here play playing "
+          "game team win lost kill killed noob nice too very really",
+    "es": "de la que el en y a los se del las un por con no una su para es al lo como más pero sus le ya o "
+          "este sí porque esta entre cuando muy sin sobre también me hasta hay donde quien desde todo nos "
+          "durante todos uno les ni contra otros ese eso ante ellos e esto mí antes algunos qué unos yo otro "
+          "otras otra él tanto esa estos mucho quienes nada muchos cual poco ella estar estas algunas algo "
+          "nosotros tengo tiene hola gracias bueno vamos quiero puedo está estoy jaja xd alguien aquí soy eres",
+    "fr": "de la le et les des en un du une que est pour qui dans par sur pas plus ne au avec se il ce sont "
+          "mais nous comme ou si leur je tu vous on elle ils elles été être avoir fait aussi bien très tout "
+          "tous cette ces son sa ses mon ma mes ton ta tes moi toi lui y ça c'est j'ai suis es oui non merci "
+          "salut bonjour quoi pourquoi alors donc peut veux vais mdr ptdr",
+    "de": "der die und in den von zu das mit sich des auf für ist im dem nicht ein eine als auch es an werden "
+          "aus er hat dass sie nach wird bei einer um am sind noch wie einem über einen so zum war haben nur "
+          "oder aber vor zur bis mehr durch man sein wurde sei ich du wir ihr mich dich mir dir ja nein nicht "
+          "kein keine hallo danke bitte was warum wer wo jetzt schon gut bin bist hab habe gibt kann mal",
+    "pt": "de a o que e do da em um para é com não uma os no se na por mais as dos como mas foi ao ele das "
+          "tem à seu sua ou ser quando muito há nos já está eu também só pelo pela até isso ela entre era "
+          "depois sem mesmo aos ter seus quem nas me esse eles estão você vocês tinha foram essa num nem "
+          "suas meu minha obrigado obrigada olá oi sim tudo bem kkk kkkk vamos alguém aqui sou",
+    "it": "di e il la che a per in un è non una sono del con si da le i al lo gli della come mi ma ha anche "
+          "ho se questo più io tu lui lei noi voi loro ci ti mio mia tuo tua suo sua nel alla dei delle "
+          "sei siamo ciao grazie perché cosa dove quando sì bene molto tutto tutti adesso ancora",
+    "nl": "de en van het een in is dat op te zijn met voor niet aan er die hij ook als maar om dan zo bij "
+          "nog wat was ik je jij we wij jullie ze zij mijn jouw geen wel heb hebt heeft kan kun hoe waarom "
+          "hallo hoi dank bedankt ja nee goed graag",
+    "pl": "i w nie na się z do to że jest o jak ale co po tak za od jego już tylko czy ja ty on ona my wy "
+          "oni mnie mi cię ci jestem jesteś są był była było może dla tym też gdzie kiedy dlaczego cześć "
+          "dzięki dziękuję tak nie dobrze bardzo wszystko",
+    "tr": "bir ve bu da de için ile ne çok mi mı ben sen o biz siz onlar var yok değil gibi daha ama en "
+          "şey her kadar sonra nasıl neden evet hayır merhaba selam teşekkürler tamam iyi benim senin",
+    "id": "yang dan di ini itu dengan untuk dari ke tidak ada saya kamu aku dia kami kita mereka akan bisa "
+          "sudah belum juga atau karena pada apa siapa bagaimana kenapa ya tidak halo terima kasih bagus "
+          "mau sini sana gak nggak dong deh sih",
+    "vi": "và của là có không được cho người này một những các trong với đã để tôi bạn anh em chị nó "
+          "chúng mình rồi thì như khi vì nhưng cũng đi làm gì sao ừ vâng chào cảm ơn",
+}
+
+# 各语言最常见的字符三元组（"|" 分隔，词首尾以空格标记）
+_TRIGRAMS = {
+    "en": " th|the|he | an|and|nd |ing|ng | of|of | to|to | in|in | is|is |ion|tio|at |er |re | yo|you|ou |hat| wh",
+    "es": " de|de | la|la | el|el | qu|que|ue | en|en | lo|los|os |ión|ció|ent| co| es|es |ar |ado|ada| po|ero",
+    "fr": " de|de | le|le | la| et|et |les|es |ent|nt |ion| qu|que| pa| co| ne|ne |ai | ou|our|eur|ous| je|ais",
+    "de": " di|die|ie | de|der|er | un|und|nd |ein|ich|ch | sc|sch|en | ge| zu|den| ni|cht|ung| be|ist|ht ",
+    "pt": " de|de | qu|que|ue | do|do | da|da |ão | co| pa| se|ent| em|em | nã|não|ado|ada|os |ção|ões| vo",
+    "it": " di|di | ch|che|he | la|la | il|il | co| pe| no|no | un|ell|lla| de|to |ion|zio|ere|are|gli|re ",
+    "nl": " de|de | en|en | he|het|et | va|van|an | ee|een|ij |ijn| te| ge| in| is|aar| da| ni| wa|oor",
+    "pl": " pr| ni|nie|ie | w | sz| na| po|ego|ch | cz| je|rze| to|wa |się|ię | dz|ani| ja| do|ać |ść ",
+    "tr": " bi|bir|ir | ve|ve | ya|lar|ler| de| da|ın | ol| ka| ge|ini| ne|iyo|yor|ım |ış |dır|mak",
+    "id": " ya|yan|ang|ng | da|dan|an | di| me|men|kan| ke| se| it|itu| ba|ah | pe|ter|aka|nya|ada",
+    "vi": " và|và | củ|của| là|là | có|có | kh|khô|ông|ng | đư|ngư|ười| nh| mộ|một| tr| th|ời |ược",
+}
+
+# 带变音符号的特征字符
+_MARKER_CHARS = {
+    "es": "ñ¿¡",
+    "fr": "çœêëîï",
+    "de": "ßäöü",
+    "pt": "ãõ",
+    "pl": "łśźżćńąę",
+    "tr": "ığşİ",
+    "vi": "ơưđạảấầẩẫậắằẳẵặẹẻẽếềểễệỉịọỏốồổỗộớờởỡợụủứừửữựỳỵỷỹ",
+}
+
+# 繁简中文特有字（各取一批高频字）
+_SIMPLIFIED_ONLY = set("这们个说来时会对还为国过当后发么里应动问题请没边经开关头见让现点实话样长门车书东马鸟钱见写买卖")
+_TRADITIONAL_ONLY = set("這們個說來時會對還為國過當後發麼裡應動問題請沒邊經開關頭見讓現點實話樣長門車書東馬鳥錢見寫買賣")
+
+# 非拉丁文字区段 → 语言
+_SCRIPT_RANGES = (
+    ((0xAC00, 0xD7AF), "ko"), ((0x1100, 0x11FF), "ko"), ((0x3130, 0x318F), "ko"),
+    ((0x3040, 0x30FF), "ja"),
+    ((0x4E00, 0x9FFF), "zh"), ((0x3400, 0x4DBF), "zh"),
+    ((0x0400, 0x04FF), "cyrillic"),
+    ((0x0600, 0x06FF), "ar"), ((0x0750, 0x077F), "ar"),
+    ((0x0590, 0x05FF), "he"),
+    ((0x0370, 0x03FF), "el"),
+    ((0x0E00, 0x0E7F), "th"),
+    ((0x0900, 0x097F), "hi"),
+)
+_UKRAINIAN_CHARS = set("іїєґІЇЄҐ")
+# 现代日文中不使用的汉字（简体字、日文未采用的繁体字与中文语气词）：
+# 没有假名时，只有出现这些字才判定为中文，否则可能是全汉字的日文（如「東京駅到着」）
+_CHINESE_ONLY = set("这们个说时对还为过发么应动问题请边经开关头见让现实话样长门车书东马鸟钱写买卖"
+                    "這們說對發麼裡應邊經關讓實樣錢寫賣吗嗎呢吧啊你她很哪")
+
+MIN_CONFIDENCE = 0.6
+
+
+@dataclass(frozen=True)
+class Detection:
+    """单条消息的语言识别结果"""
+    language: str        # 语言代码，未能识别时为空字符串
+    confidence: float    # 0~1
+    from_memory: bool = False  # 是否来自玩家语言记忆
+
+
+_profiles: Optional[dict] = None
+_profiles_lock = threading.Lock()
+
+
+def _load_profiles() -> dict:
+    """首次检测时构建语言画像（常用词集合、三元组权重、特征字符）"""
+    global _profiles
+    if _profiles is not None:
+        return _profiles
+    with _profiles_lock:
+        if _profiles is None:
+            profiles = {}
+            for language, words in _STOPWORDS.items():
+                grams = [gram for gram in _TRIGRAMS.get(language, "").split("|") if len(gram) == 3]
+                profiles[language] = (
+                    frozenset(words.split()),
+                    {gram: 1.0 - index / (len(grams) + 1) for index, gram in enumerate(grams)},
+                    frozenset(_MARKER_CHARS.get(language, "")),
+                )
+            _profiles = profiles
+            logger.debug(f"[LanguageDetector] Loaded {len(profiles)} Latin-script profiles")
+    return _profiles
+
+
+def normalize_language(language: str) -> str:
+    """把配置中的语言名（如 "Simplified Chinese"、"en-US"、"日本語"）规范化为语言代码；无法识别时返回小写原文"""
+    cleaned = (language or "").strip()
+    lowered = cleaned.lower()
+    for code, aliases in _LANGUAGE_ALIASES.items():
+        if lowered == code.lower() or lowered in aliases:
+            return code
+    # 区域代码（en-US、pt-BR）取主语言
+    primary = lowered.split("-")[0].split("_")[0]
+    if primary in _LANGUAGE_ALIASES and primary != "zh":
+        return primary
+    return lowered
+
+
+def language_matches(detected: str, wanted: str) -> bool:
+    """detected 是否属于 wanted（"zh" 同时匹配 zh-CN 与 zh-TW）"""
+    if not detected or not wanted:
+        return False
+    return detected == wanted or detected.split("-")[0] == wanted
+
+
+def _script_of(char: str) -> Optional[str]:
+    code = ord(char)
+    for (start, end), script in _SCRIPT_RANGES:
+        if start <= code <= end:
+            return script
+    return None
+
+
+def detect_language(text: str) -> Detection:
+    """
+    识别单条文本的语言。
+
+    :param text: 消息文本（可含格式化代码、URL）
+    :return: Detection；证据不足时 confidence 较低，language 可能为空
+    """
+    cleaned = _RE_NOISE.sub(" ", text)
+    letters = [c for c in cleaned if c.isalpha()]
+    if not letters:
+        return Detection("", 0.0)
+
+    scripts = Counter(_script_of(c) for c in letters)
+    latin = scripts.pop(None, 0)
+    if scripts:
+        script, count = scripts.most_common(1)[0]
+        # 日文常夹杂汉字：出现假名即视为日文
+        if scripts.get("ja") and script in ("ja", "zh"):
+            script, count = "ja", scripts["ja"] + scripts.get("zh", 0)
+        share = count / len(letters)
+        if share >= 0.5:
+            confidence = min(1.0, share * min(1.0, count / 2))
+            if script == "zh" and not any(c in _CHINESE_ONLY for c in cleaned):
+                # 只有汉字、没有中文特有的字：无法与日文区分，置信度压到阈值以下（交由玩家语言记忆判断）
+                confidence = min(confidence, MIN_CONFIDENCE / 2)
+            return Detection(_resolve_script(script, cleaned), round(confidence, 3))
+        if latin == 0:
+            return Detection("", 0.0)
+
+    return _detect_latin(cleaned.lower())
+
+
+def _resolve_script(script: str, text: str) -> str:
+    if script == "zh":
+        simplified = sum(c in _SIMPLIFIED_ONLY for c in text)
+        traditional = sum(c in _TRADITIONAL_ONLY for c in text)
+        return "zh-TW" if traditional > simplified else "zh-CN"
+    if script == "cyrillic":
+        return "uk" if any(c in _UKRAINIAN_CHARS for c in text) else "ru"
+    return script
+
+
+def _detect_latin(text: str) -> Detection:
+    words = _RE_WORD.findall(text)
+    if not words:
+        return Detection("", 0.0)
+    profiles = _load_profiles()
+    padded = f" {' '.join(words)} "
+    text_trigrams = Counter(padded[i:i + 3] for i in range(len(padded) - 2))
+
+    scores = {}
+    for language, (stopwords, trigrams, markers) in profiles.items():
+        score = 2.0 * sum(word in stopwords for word in words)
+        score += sum(weight * text_trigrams[gram] for gram, weight in trigrams.items()) * 0.5
+        score += 3.0 * sum(c in markers for c in text)
+        scores[language] = score
+
+    ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+    (best, best_score), (_, second_score) = ranked[0], ranked[1]
+    if best_score <= 0:
+        return Detection("", 0.0)
+    # 置信度：领先幅度 × 证据量（短消息证据不足时自然偏低）
+    margin = (best_score - second_score) / best_score
+    evidence = min(1.0, best_score / 6.0)
+    return Detection(best, round(margin * evidence, 3))
+
+
+class LanguageMemory:
+    """
+    按玩家记忆最近的语言：短消息识别不确定时，沿用该玩家近期一致的语言。
+    线程安全。
+    """
+
+    MAX_PLAYERS = 2000
+    WINDOW = 5          # 每位玩家记忆最近几条高置信识别结果
+    MIN_AGREEMENT = 3   # 至少几条一致才沿用
+
+    def __init__(self):
+        self._players: OrderedDict[str, deque] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def detect(self, player: str, text: str) -> Detection:
+        """识别语言，并用玩家记忆补全低置信结果"""
+        detection = detect_language(text)
+        if not player:
+            return detection
+        key = player.lower()
+        with self._lock:
+            history = self._players.get(key)
+            if detection.confidence >= MIN_CONFIDENCE:
+                if history is None:
+                    history = self._players[key] = deque(maxlen=self.WINDOW)
+                history.append(detection.language)
+                self._players.move_to_end(key)
+                if len(self._players) > self.MAX_PLAYERS:
+                    self._players.popitem(last=False)
+                return detection
+            if history:
+                language, count = Counter(history).most_common(1)[0]
+                if count >= self.MIN_AGREEMENT and detection.language in ("", language):
+                    return Detection(language, MIN_CONFIDENCE, from_memory=True)
+        return detection
+
+
+class LanguageSkipStats:
+    """
+    跳过统计：节省的请求数与估算 token，以及抽样复核得到的跳过精确率。
+    复核时被抽中的消息照常翻译，若服务商原样返回则判定跳过正确。
+    """
+
+    REPORT_INTERVAL = 50
+
+    def __init__(self):
+        self.skipped = 0
+        self.tokens_saved = 0
+        self.audited = 0
+        self.audit_correct = 0
+        self._lock = threading.Lock()
+
+    def record_skip(self, estimated_tokens: int) -> None:
+        with self._lock:
+            self.skipped += 1
+            self.tokens_saved += estimated_tokens
+            should_report = self.skipped % self.REPORT_INTERVAL == 0
+        if should_report:
+            logger.info(f"[LanguageDetector] {self.summary()}")
+
+    def record_audit(self, correct: bool) -> None:
+        with self._lock:
+            self.audited += 1
+            self.audit_correct += int(correct)
+
+    @property
+    def precision(self) -> Optional[float]:
+        """抽样复核的跳过精确率；尚无复核样本时为 None"""
+        with self._lock:
+            return self.audit_correct / self.audited if self.audited else None
+
+    def snapshot(self) -> dict:
+        precision = self.precision
+        with self._lock:
+            return {
+                "skipped": self.skipped,
+                "tokens_saved": self.tokens_saved,
+                "audited": self.audited,
+                "precision": precision,
+            }
+
+    def summary(self) -> str:
+        stats = self.snapshot()
+        precision = "n/a" if stats["precision"] is None else f"{stats['precision']:.1%}"
+        return (f"Skipped {stats['skipped']} messages already in a skip language, "
+                f"~{stats['tokens_saved']} tokens saved, precision {precision} "
+                f"({stats['audited']} audited)")
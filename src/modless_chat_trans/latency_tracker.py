@@ -0,0 +1,156 @@
+# Copyright (C) 2025 LiJiaHua1024
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+LLM 请求延迟统计与对冲（hedged）请求的时机。
+
+- 每个服务商/模型保留最近 WINDOW 次成功请求的延迟，计算分位数；
+- HEDGED 策略在主模型超过其 p90 延迟（限制在 HEDGE_MIN_DELAY ~ HEDGE_MAX_DELAY 之间）仍未返回时
+  再请求备用模型，取先返回的结果：慢但没有失败的主模型不再拖慢整条消息，又不像 ALWAYS_RACE 那样让请求数翻倍；
+- HedgeStats 记录对冲比例，以及对冲前（主模型自身）与对冲后（实际返回）的 p99 延迟。
+"""
+
+import math
+import threading
+from collections import deque
+from typing import Optional
+
+from modless_chat_trans.logger import logger
+
+# 对冲时机：主模型延迟的分位数，以及等待时间的上下限（秒）
+HEDGE_PERCENTILE = 0.9
+HEDGE_MIN_DELAY = 0.3
+HEDGE_MAX_DELAY = 3.0
+
+
+class LatencyWindow:
+    """最近 size 个延迟样本（线程安全）"""
+
+    def __init__(self, size: int = 200):
+        self._samples: deque[float] = deque(maxlen=size)
+        self._lock = threading.Lock()
+
+    def add(self, seconds: float) -> None:
+        with self._lock:
+            self._samples.append(seconds)
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def percentile(self, q: float) -> Optional[float]:
+        """分位数（最近邻法，q 为 0~1）；没有样本时为 None"""
+        with self._lock:
+            samples = sorted(self._samples)
+        if not samples:
+            return None
+        return samples[min(len(samples) - 1, max(0, math.ceil(q * len(samples)) - 1))]
+
+
+class LatencyTracker:
+    """按服务商/模型划分的延迟窗口"""
+
+    WINDOW = 200
+    MIN_SAMPLES = 20  # 样本少于此数时不估计分位数
+
+    def __init__(self):
+        self._windows: dict[str, LatencyWindow] = {}
+        self._lock = threading.Lock()
+
+    def _window(self, key: str) -> LatencyWindow:
+        with self._lock:
+            window = self._windows.get(key)
+            if window is None:
+                window = self._windows[key] = LatencyWindow(self.WINDOW)
+            return window
+
+    def record(self, key: str, seconds: float) -> None:
+        self._window(key).add(seconds)
+
+    def percentile(self, key: str, q: float) -> Optional[float]:
+        window = self._window(key)
+        if len(window) < self.MIN_SAMPLES:
+            return None
+        return window.percentile(q)
+
+    def hedge_delay(self, key: str) -> float:
+        """主模型超过多久仍未返回时发出对冲请求（样本不足时使用上限）"""
+        p = self.percentile(key, HEDGE_PERCENTILE)
+        if p is None:
+            return HEDGE_MAX_DELAY
+        return min(HEDGE_MAX_DELAY, max(HEDGE_MIN_DELAY, p))
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            keys = list(self._windows)
+        return {
+            key: {"samples": len(self._window(key)),
+                  "p50": self._window(key).percentile(0.5),
+                  "p90": self._window(key).percentile(0.9),
+                  "p99": self._window(key).percentile(0.99)}
+            for key in keys
+        }
+
+
+class HedgeStats:
+    """
+    对冲统计：发出备用请求的比例、备用模型胜出的次数，
+    以及主模型自身的 p99 延迟与实际返回结果的 p99 延迟（两者之差即对冲带来的改善）。
+    """
+
+    REPORT_INTERVAL = 100
+
+    def __init__(self):
+        self.requests = 0
+        self.hedged = 0
+        self.fallback_wins = 0
+        self.primary = LatencyWindow(1000)
+        self.served = LatencyWindow(1000)
+        self._lock = threading.Lock()
+
+    def record(self, served_seconds: float, hedged: bool, fallback_won: bool) -> None:
+        self.served.add(served_seconds)
+        with self._lock:
+            self.requests += 1
+            self.hedged += int(hedged)
+            self.fallback_wins += int(fallback_won)
+            should_report = self.requests % self.REPORT_INTERVAL == 0
+        if should_report:
+            logger.info(f"[Hedge] {self.summary()}")
+
+    def record_primary(self, seconds: float) -> None:
+        """主模型请求完成（包括对冲后落败、在后台完成的请求）"""
+        self.primary.add(seconds)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            requests, hedged, fallback_wins = self.requests, self.hedged, self.fallback_wins
+        return {
+            "requests": requests,
+            "hedged": hedged,
+            "fallback_wins": fallback_wins,
+            "hedge_rate": hedged / requests if requests else None,
+            "primary_p99": self.primary.percentile(0.99),
+            "served_p99": self.served.percentile(0.99),
+        }
+
+    def summary(self) -> str:
+        stats = self.snapshot()
+        rate = "n/a" if stats["hedge_rate"] is None else f"{stats['hedge_rate']:.1%}"
+        if stats["primary_p99"] is not None and stats["served_p99"] is not None:
+            p99 = f"p99 {stats['primary_p99']:.2f}s -> {stats['served_p99']:.2f}s"
+        else:
+            p99 = "p99 n/a"
+        return (f"Hedged {stats['hedged']} of {stats['requests']} requests ({rate}), "
+                f"fallback won {stats['fallback_wins']}, {p99}")
@@ -0,0 +1,217 @@
+# Copyright (C) 2025 LiJiaHua1024
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+LLM 服务的持久 HTTP 连接。
+
+- 每个服务商 + API 地址一个常驻的 httpx.Client（安装了 h2 时启用 HTTP/2），通过 litellm 的 client 参数传入；
+  使用 OpenAI SDK 的服务商（OpenAI、Azure）由 litellm.client_session 共用一个常驻客户端；
+- 开始翻译时在后台预先建立连接（DNS + TCP + TLS），第一条消息不再等待握手；
+- 空闲期间定时发送轻量的 HEAD 请求保持连接，长时间无消息后的第一条也能直接复用连接。
+"""
+
+import threading
+import time
+from typing import Optional
+
+from modless_chat_trans.logger import logger
+
+# 服务商默认的 API 地址（未填写 API URL 时用于预连接与保活；只需协议与主机名）
+DEFAULT_ENDPOINTS = {
+    "OpenAI": "https://api.openai.com",
+    "Anthropic": "https://api.anthropic.com",
+    "DeepSeek": "https://api.deepseek.com",
+    "Gemini": "https://generativelanguage.googleapis.com",
+    "OpenRouter": "https://openrouter.ai",
+    "xAI": "https://api.x.ai",
+    "Mistral AI": "https://api.mistral.ai",
+}
+# litellm 通过自带 HTTP 处理器（接受 client=HTTPHandler）调用的服务商；
+# 其余服务商（OpenAI SDK 路径等）传入 HTTPHandler 会出错，只能使用 litellm.client_session
+HTTP_HANDLER_PROVIDERS = frozenset({"Anthropic", "DeepSeek", "Gemini", "OpenRouter", "xAI", "Mistral AI"})
+OPENAI_SDK_PROVIDERS = frozenset({"OpenAI", "Azure"})
+
+
+def _http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+class _Endpoint:
+    __slots__ = ("origin", "client", "handler", "last_used")
+
+    def __init__(self, origin: Optional[str], client, handler):
+        self.origin = origin
+        self.client = client
+        self.handler = handler
+        self.last_used = 0.0
+
+
+class LLMConnections:
+    """
+    常驻的 LLM HTTP 客户端（线程安全）。
+    """
+
+    def __init__(self, pool_size: int = 10, http2: bool = True, keepalive_interval: float = 30.0):
+        """
+        :param pool_size:          每个地址保持的最大连接数
+        :param http2:              是否启用 HTTP/2（需要 h2）
+        :param keepalive_interval: 空闲时发送保活请求的间隔（秒），0 = 不保活
+        """
+        self.pool_size = max(1, pool_size)
+        self.http2 = http2 and _http2_available()
+        self.keepalive_interval = max(0.0, keepalive_interval)
+        self._endpoints: dict[tuple[str, str], _Endpoint] = {}
+        self._sdk_client = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._keepalive_thread: Optional[threading.Thread] = None
+
+    def _new_client(self):
+        import httpx
+
+        # 连接在客户端侧的保留时间需长于保活间隔，否则空闲连接会先被本地关闭
+        expiry = max(60.0, self.keepalive_interval * 3)
+        return httpx.Client(
+            http2=self.http2,
+            limits=httpx.Limits(max_connections=self.pool_size, max_keepalive_connections=self.pool_size,
+                                keepalive_expiry=expiry),
+            follow_redirects=True,
+        )
+
+    def _endpoint(self, provider: str, api_base: Optional[str]) -> _Endpoint:
+        provider = provider or "OpenAI"
+        key = (provider, api_base or "")
+        with self._lock:
+            endpoint = self._endpoints.get(key)
+            if endpoint is None:
+                handler = None
+                if provider in OPENAI_SDK_PROVIDERS:
+                    # OpenAI SDK 只能通过 litellm.client_session 共用一个客户端（httpx 按主机分别保持连接）
+                    if self._sdk_client is None:
+                        import litellm
+                        self._sdk_client = litellm.client_session = self._new_client()
+                    client = self._sdk_client
+                elif provider in HTTP_HANDLER_PROVIDERS:
+                    from litellm.llms.custom_httpx.http_handler import HTTPHandler
+                    client = self._new_client()
+                    handler = HTTPHandler(client=client)
+                else:
+                    # 其他服务商使用 litellm 自己的客户端，无法预连接
+                    client = None
+                origin = api_base or DEFAULT_ENDPOINTS.get(provider)
+                endpoint = self._endpoints[key] = _Endpoint(origin, client, handler)
+                logger.debug(f"[LLMConnections] Persistent client created for {provider} "
+                             f"({origin or 'default endpoint'}, http2={self.http2})")
+            return endpoint
+
+    def client_kwargs(self, provider: str, api_base: Optional[str] = None) -> dict:
+        """
+        litellm.completion 的额外参数（client=...），并记录最近使用时间
+
+        :return: {"client": HTTPHandler} 或 {}（OpenAI SDK 路径已通过 litellm.client_session 生效）
+        """
+        endpoint = self._endpoint(provider, api_base)
+        endpoint.last_used = time.monotonic()
+        return {"client": endpoint.handler} if endpoint.handler is not None else {}
+
+    def warm(self, provider: str, api_base: Optional[str] = None) -> bool:
+        """预先建立到该服务的连接；返回是否成功（任何 HTTP 响应都说明连接已建立）"""
+        endpoint = self._endpoint(provider, api_base)
+        return self._ping(endpoint)
+
+    def _ping(self, endpoint: _Endpoint) -> bool:
+        if endpoint.client is None or not endpoint.origin:
+            return False
+        try:
+            endpoint.client.head(endpoint.origin, timeout=5.0)
+            return True
+        except Exception as error:
+            logger.debug(f"[LLMConnections] Could not reach {endpoint.origin}: {error}")
+            return False
+
+    def prewarm(self, endpoints: list[tuple[str, Optional[str]]]) -> None:
+        """在后台线程预连接全部地址，并启动保活线程"""
+        def run():
+            for provider, api_base in endpoints:
+                started = time.perf_counter()
+                if self.warm(provider, api_base):
+                    logger.info(f"[LLMConnections] Connection to {provider} pre-opened "
+                                f"in {(time.perf_counter() - started) * 1000:.0f} ms")
+
+        threading.Thread(target=run, daemon=True, name="llm-prewarm").start()
+        self.start_keepalive()
+
+    def start_keepalive(self) -> None:
+        if self.keepalive_interval <= 0 or self._keepalive_thread is not None:
+            return
+        self._keepalive_thread = threading.Thread(target=self._keepalive_loop, daemon=True, name="llm-keepalive")
+        self._keepalive_thread.start()
+
+    def _keepalive_loop(self) -> None:
+        while not self._stop.wait(self.keepalive_interval):
+            now = time.monotonic()
+            with self._lock:
+                endpoints = list(self._endpoints.values())
+            for endpoint in endpoints:
+                # 最近有请求的连接本身就是活跃的，只对空闲的连接发送保活请求
+                if now - endpoint.last_used >= self.keepalive_interval:
+                    self._ping(endpoint)
+
+    def close(self) -> None:
+        self._stop.set()
+        with self._lock:
+            clients = {id(endpoint.client): endpoint.client for endpoint in self._endpoints.values()
+                       if endpoint.client is not None}
+            self._endpoints.clear()
+            if self._sdk_client is not None:
+                import litellm
+                if litellm.client_session is self._sdk_client:
+                    litellm.client_session = None
+                self._sdk_client = None
+        for client in clients.values():
+            client.close()
+
+
+_connections: Optional[LLMConnections] = None
+_connections_lock = threading.Lock()
+
+
+def init_llm_connections(network_config) -> LLMConnections:
+    """按 [network] 配置创建常驻 LLM 客户端（替换已有的客户端）"""
+    global _connections
+    connections = LLMConnections(
+        pool_size=network_config.pool_size,
+        http2=network_config.llm_http2,
+        keepalive_interval=network_config.llm_keepalive_interval,
+    )
+    with _connections_lock:
+        previous, _connections = _connections, connections
+    if previous is not None:
+        previous.close()
+    return connections
+
+
+def get_llm_connections() -> LLMConnections:
+    """当前常驻 LLM 客户端；未初始化时使用默认设置创建"""
+    global _connections
+    if _connections is None:
+        with _connections_lock:
+            if _connections is None:
+                _connections = LLMConnections()
+    return _connections
@@ -56,8 +56,8 @@ class OrderedProcessor:
     工作原理（两阶段）：
     1. 阻塞等待第一条消息（零额外延迟）
     2. 非阻塞排空队列（零等待机会性打包）
-    3. 阶段1（单线程）：prepare → allocate_slot → context_buffer.push
-    4. 阶段2（多线程）：translate_prepared → fill_slot
+    3. 阶段1（单线程）：prepare → allocate_slot → context_buffer.push → 取上下文快照
+    4. 阶段2（多线程）：按快照渲染上下文 → translate_prepared → fill_slot
     """
 
     MAX_BATCH_SIZE = 20
@@ -74,6 +74,7 @@ class OrderedProcessor:
         target_language: str = "",
         replace_garbled_chars: bool = False,
         tts_engine=None,
+        stream_translations: bool = False,
     ):
         """
         :param line_queue:      生产者写入的队列，元素为 (line: str, arrival_time: float)
@@ -85,6 +86,7 @@ class OrderedProcessor:
         :param target_language: 目标语言
         :param replace_garbled_chars: 是否替换乱码
         :param tts_engine:      TTS 引擎（可选）
+        :param stream_translations: 是否把流式生成中的部分译文推送到网页（update_slot）
         """
         self._queue = line_queue
         self._callback = callback
@@ -95,6 +97,7 @@ class OrderedProcessor:
         self._target_language = target_language
         self._replace_garbled_chars = replace_garbled_chars
         self._tts_engine = tts_engine
+        self._stream_translations = stream_translations
         self._stop = False
         self._executor = ThreadPoolExecutor(
             max_workers=self.MAX_WORKERS,
@@ -140,7 +143,7 @@ class OrderedProcessor:
             # ========== 阶段1：单线程 prepare + allocate_slot + push ==========
             # 顺序执行，保证 context_buffer 顺序更新
             # 后面的消息必须等前面的消息 push 完才能动
-            items = []  # [(prepared, slot_id, log_time)]
+            items = []  # [(prepared, slot_id, log_time, context_snapshot)]
             for line, arrival_time in batch:
                 # 非 CHAT 行直接提交
                 if "[CHAT]" not in line:
@@ -157,47 +160,58 @@ class OrderedProcessor:
 
                 # 分配 slot（保证顺序）
                 slot_id = allocate_slot(name=prepared.name, arrival_time=arrival_time)
+                snapshot = None
                 try:
                     log_time = extract_log_time(line, arrival_time)
 
                     # 立即 push 原文到 context_buffer（翻译前）
-                    # 这样后续消息的 context_messages 就能看到这条原文
+                    # 这样后续消息的 context_messages 就能看到这条原文；
+                    # 随后取快照：翻译线程看到的历史恰好截至这条消息，与其他消息的处理进度无关
                     if self._context_buffer:
                         self._context_buffer.push(ContextEntry(
                             original=prepared.original,
                             timestamp=log_time,
                             player_name=prepared.name or "",
+                            channel=prepared.channel,
                         ))
+                        snapshot = self._context_buffer.snapshot(prepared.channel)
                 except Exception as error:
                     logger.exception(f"[Log] Failed to prepare message context: {error}")
                     fill_slot(slot_id, "[ERROR]", f"翻译失败，错误： {error}", {}, original=prepared.original)
                     continue
 
-                items.append((prepared, slot_id, log_time))
+                # 无需翻译的消息（表情/数字/URL/乱敲/负缓存命中/已是目标语言）直接原文直通，不占用翻译线程
+                if prepared.passthrough:
+                    fill_slot(slot_id, prepared.name or "", prepared.original,
+                              {"passthrough": True, **prepared.info},
+                              duration=0, original=prepared.original)
+                    continue
+
+                items.append((prepared, slot_id, log_time, snapshot))
 
             if not items:
                 continue
 
             # ========== 阶段2：多线程 translate + fill_slot ==========
-            for prepared, slot_id, log_time in items:
+            for prepared, slot_id, log_time, snapshot in items:
                 self._executor.submit(
                     self._translate_and_fill,
-                    prepared, slot_id, log_time,
+                    prepared, slot_id, log_time, snapshot,
                 )
 
-    def _translate_and_fill(self, prepared, slot_id, log_time):
+    def _translate_and_fill(self, prepared, slot_id, log_time, snapshot=None):
         """在线程池中执行：翻译 + fill_slot + TTS"""
-        from modless_chat_trans.web_display import fill_slot
+        from modless_chat_trans.web_display import fill_slot, update_slot
         from modless_chat_trans.message_processor import translate_prepared
 
         start_time = time.time()
 
         # 重试/备用模型策略由 Translator 统一处理，避免调用层重复放大请求次数。
         try:
-            # 获取上下文（此时 context_buffer 已包含所有 prepare 阶段 push 的原文）
+            # 按阶段1取得的快照渲染上下文（截至本条消息的历史）
             ctx_messages = []
-            if self._context_buffer:
-                ctx_messages = self._context_buffer.get_context_messages()
+            if self._context_buffer and snapshot is not None:
+                ctx_messages = self._context_buffer.render(snapshot)
 
             name, translated, info = translate_prepared(
                 prepared,
@@ -205,6 +219,7 @@ class OrderedProcessor:
                 source_language=self._source_language,
                 target_language=self._target_language,
                 context_messages=ctx_messages,
+                on_partial=(lambda text: update_slot(slot_id, text)) if self._stream_translations else None,
             )
         except Exception as error:
             logger.exception(f"[Log] Unexpected translation failure: {error}")
@@ -695,6 +710,7 @@ def start_log_monitor(
     target_language: str = "",
     replace_garbled_chars: bool = False,
     tts_engine=None,
+    stream_translations: bool = False,
 ):
     """
     启动日志监控。
@@ -709,6 +725,7 @@ def start_log_monitor(
     - source_language / target_language: 翻译语言
     - replace_garbled_chars: 是否替换乱码
     - tts_engine:     TTS 引擎
+    - stream_translations: 是否在网页上逐步显示流式生成中的译文
     """
 
     mode = config.monitor_mode
@@ -743,6 +760,7 @@ def start_log_monitor(
         target_language=target_language,
         replace_garbled_chars=replace_garbled_chars,
         tts_engine=tts_engine,
+        stream_translations=stream_translations,
     )
     processor.start()
     logger.info("[OrderedProcessor] Started ordered consumer thread.")
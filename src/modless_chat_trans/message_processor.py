@@ -14,12 +14,23 @@
 # along with this program.  If not, see <https://www.gnu.org/licenses/>.
 import re
 import threading
+import time
+from collections import OrderedDict
 from json import JSONDecodeError
+from typing import Callable
 from requests.exceptions import HTTPError
 from modless_chat_trans.i18n import _
-from modless_chat_trans.file_utils import cache
-from dataclasses import dataclass
-from modless_chat_trans.translator import MessageType
+from modless_chat_trans.file_utils import translation_cache
+from modless_chat_trans.format_codes import normalize_formatting
+from modless_chat_trans.language_detector import (
+    MIN_CONFIDENCE, LanguageMemory, LanguageSkipStats, language_matches, normalize_language,
+)
+from modless_chat_trans.rate_limiter import RateLimitTimeout
+from modless_chat_trans.template_miner import TemplateMiner, fill_template
+from modless_chat_trans.token_estimator import estimate_tokens
+from modless_chat_trans.translation_cache import supports_sql
+from dataclasses import dataclass, field
+from modless_chat_trans.translator import MessageType, cached_token_share
 from modless_chat_trans.logger import logger
 
 # 预编译的正则表达式常量
@@ -27,9 +38,16 @@ _RE_FORMAT_CODE = re.compile(r'§.')
 _RE_BRACKETS = re.compile(r'\[.*?\]')
 _RE_ORG_PREFIX = re.compile(r'\w+\s*>\s*')
 _RE_MSG_PREFIX = re.compile(r'(?:From|To)\s+')
+_RE_CHANNEL_PREFIX = re.compile(r'^([\w-]+)\s*>\s*')
+_RE_DM_PREFIX = re.compile(r'^(?:From|To)\s+')
 _RE_MINECRAFT_NAME = re.compile(r'^[a-zA-Z0-9_]{3,16}$')
 _RE_VARIABLE_PATTERN = re.compile(r"\{\{([a-zA-Z0-9_-]+)(?::([^}]+))?\}\}")
 _RE_VALUE_VARIABLE = re.compile(r"\{\{([a-zA-Z0-9_-]+)\}\}")
+_RE_URL = re.compile(r'^(?:(?:https?://|www\.)\S+|[\w-]+(?:\.[\w-]+)*\.(?:com|net|org|io|gg|me|cn|ru|de|uk|tv|co)(?:/\S*)?)$',
+                     re.IGNORECASE)
+_RE_WHITESPACE = re.compile(r'\s+')
+_KEYBOARD_ROWS = ("qwertyuiop", "asdfghjkl", "zxcvbnm")
+_VOWELS = frozenset("aeiouy")
 
 filter_server_messages = True
 glossary = {}
@@ -42,17 +60,205 @@ user_blacklist_set = set()  # 预构建的用户黑名单集合（用于O(1)查
 message_blacklist = []
 _compiled_message_patterns = []  # 预编译的消息黑名单正则
 _keyword_pattern = None  # 预编译的关键词黑名单正则（合并为单个模式）
+template_miner: TemplateMiner | None = None  # 系统消息模板学习（init_processor 中按配置创建）
 
+# 聊天中出现过的玩家名（小写），用于本地直通判断与模板学习
+MAX_KNOWN_PLAYERS = 2000
+_known_players: OrderedDict[str, None] = OrderedDict()
+_known_players_lock = threading.Lock()
 
-def init_processor(message_capture_config, _glossary):
+# 负缓存：服务商原样返回的原文（按翻译缓存命名空间区分，即语言对 + 服务/模型 + 提示词版本），
+# 命中则在 prepare 阶段直接直通；条目 NEGATIVE_CACHE_TTL 秒后过期，服务商改进后会重新尝试翻译
+NEGATIVE_CACHE_TTL = 7 * 24 * 3600
+_negative_keys: dict[str, float] = {}  # 键 -> 过期时刻（time.time()）
+_negative_lock = threading.Lock()
+_negative_namespace = ""
+
+# 源语言识别：已是目标语言（或配置的跳过语言）的消息直接直通
+language_memory: LanguageMemory | None = None  # 未启用语言识别时为 None
+_skip_languages: set[str] = set()
+_language_audit_interval = 0  # 每 N 条待跳过消息抽取 1 条照常翻译以复核精确率（0 = 不复核）
+_language_skip_candidates = 0
+language_skip_stats = LanguageSkipStats()
+
+
+def init_processor(message_capture_config, _glossary, negative_namespace: str = ""):
     """
     :param message_capture_config: config.MessageCaptureConfig
     :param _glossary: 自定义术语表
+    :param negative_namespace: 负缓存命名空间（玩家消息翻译的 Translator.cache_namespace），空则按目标语言
     """
-    global filter_server_messages, replace_garbled_character, glossary
+    global filter_server_messages, replace_garbled_character, glossary, template_miner
+    global language_memory, _skip_languages, _language_audit_interval
     filter_server_messages = message_capture_config.filter_server_messages
     replace_garbled_character = message_capture_config.replace_garbled_chars
     glossary = _glossary
+    if message_capture_config.template_learning:
+        template_miner = TemplateMiner(
+            message_capture_config.template_min_occurrences,
+            is_known_name=is_known_player,
+        )
+    else:
+        template_miner = None
+    _load_negative_cache(negative_namespace or message_capture_config.target_language)
+    if message_capture_config.language_detection:
+        language_memory = LanguageMemory()
+        _skip_languages = {
+            normalize_language(language)
+            for language in [message_capture_config.target_language, *message_capture_config.skip_languages]
+            if language
+        }
+        _language_audit_interval = max(0, message_capture_config.language_audit_interval)
+        logger.info(f"Language detection enabled, skipping: {sorted(_skip_languages)}")
+    else:
+        language_memory = None
+        _skip_languages = set()
+
+
+def detect_skip_language(name: str, original: str) -> dict:
+    """
+    识别消息语言；属于跳过语言时返回应附加到 info 的标记，否则返回空字典。
+    被抽中复核的消息标记 language_audit，照常翻译。
+    """
+    global _language_skip_candidates
+    if language_memory is None or not _skip_languages:
+        return {}
+    detection = language_memory.detect(sanitize_hypixel_name(name) if name else "", original)
+    if detection.confidence < MIN_CONFIDENCE:
+        return {}
+    if not any(language_matches(detection.language, language) for language in _skip_languages):
+        return {}
+
+    _language_skip_candidates += 1
+    if _language_audit_interval and _language_skip_candidates % _language_audit_interval == 0:
+        return {"detected_language": detection.language, "language_audit": True}
+    # 节省量按输入 + 输出各约等于原文估算（不含系统提示与上下文）
+    language_skip_stats.record_skip(estimate_tokens(original) * 2)
+    return {"detected_language": detection.language, "skip_src_lang": True}
+
+
+def remember_player(name: str) -> None:
+    """记录聊天中出现过的玩家名（净化后）"""
+    if not name:
+        return
+    key = name.lower()
+    with _known_players_lock:
+        _known_players[key] = None
+        _known_players.move_to_end(key)
+        if len(_known_players) > MAX_KNOWN_PLAYERS:
+            _known_players.popitem(last=False)
+
+
+def is_known_player(name: str) -> bool:
+    return name.lower() in _known_players
+
+
+def _is_keyboard_mash(token: str) -> bool:
+    """
+    键盘乱敲判断：无元音的长字母串（如 "sdfghj"），
+    或由键盘同一行连续字母（可重复）组成（如 "asdasd"、"qwerty"、"jkjkjk"）。
+    """
+    word = token.lower()
+    if len(word) < 4 or not (word.isascii() and word.isalpha()):
+        return False
+    if len(word) >= 5 and not _VOWELS.intersection(word):
+        return True
+    # 最小周期单元
+    unit = word
+    for period in range(2, len(word) // 2 + 1):
+        if (word[:period] * (len(word) // period + 1))[:len(word)] == word:
+            unit = word[:period]
+            break
+    if len(unit) < 3 and unit != word:
+        # "jkjk" 之类的两字母重复，仍需在同一行相邻
+        return len(word) >= 6 and any(unit in row or unit[::-1] in row for row in _KEYBOARD_ROWS)
+    return len(unit) >= 3 and any(unit in row or unit[::-1] in row for row in _KEYBOARD_ROWS)
+
+
+def _is_name_mention(token: str) -> bool:
+    """
+    单独一个玩家名是否可以直通：带 @ 前缀，或含数字/下划线。
+    玩家名也可能是普通单词（"Hello"、"Thanks"），只有一个这样的词时仍需翻译。
+    """
+    return token.startswith("@") or any(c.isdigit() or c == "_" for c in token.strip(".,!?:;@"))
+
+
+def is_untranslatable(text: str) -> bool:
+    """
+    本地快速判断消息是否无需翻译：仅含表情/数字/坐标/符号、仅为 URL、
+    键盘乱敲，或仅由已知玩家名组成（单个玩家名需满足 _is_name_mention）。
+    """
+    stripped = _RE_FORMAT_CODE.sub('', text).strip()
+    if not stripped:
+        return True
+    # 无任何字母（表情、数字、坐标、标点）
+    if not any(c.isalpha() for c in stripped):
+        return True
+    tokens = stripped.split()
+    if all(_RE_URL.match(t) for t in tokens):
+        return True
+    if (len(tokens) > 1 or _is_name_mention(tokens[0])) and all(is_known_player(t.strip(".,!?:;@")) for t in tokens):
+        return True
+    return len(tokens) == 1 and _is_keyboard_mash(tokens[0])
+
+
+def _negative_key(text: str) -> str:
+    return f"{_negative_namespace}\x1f{_RE_WHITESPACE.sub(' ', text).strip().casefold()}"
+
+
+def _load_negative_cache(namespace: str) -> None:
+    """从磁盘载入当前命名空间中尚未过期的负缓存条目"""
+    global _negative_namespace
+    from modless_chat_trans.file_utils import get_negative_cache
+    _negative_namespace = namespace or ""
+    prefix = f"{_negative_namespace}\x1f"
+    now = time.time()
+    try:
+        negative_cache = get_negative_cache()
+        if supports_sql(negative_cache):
+            negative_cache.expire()
+            # 没有过期时刻的条目来自旧版本（永不过期），载入时按现在起算
+            rows = negative_cache._sql(
+                'SELECT key, expire_time FROM Cache WHERE raw = 1 AND (expire_time IS NULL OR expire_time > ?)',
+                (now,),
+            ).fetchall()
+        else:
+            # 只支持按键读写的后端不记录过期时刻，载入时按现在起算
+            rows = [(key, None) for key in negative_cache.iterkeys()]
+        entries = {key: expire_time or now + NEGATIVE_CACHE_TTL
+                   for key, expire_time in rows if isinstance(key, str) and key.startswith(prefix)}
+    except Exception as e:
+        logger.warning(f"Failed to load negative cache: {e}")
+        entries = {}
+    with _negative_lock:
+        _negative_keys.clear()
+        _negative_keys.update(entries)
+    logger.debug(f"Negative cache loaded: {len(entries)} entries for '{_negative_namespace}'")
+
+
+def is_negative_cached(text: str) -> bool:
+    """该原文此前（NEGATIVE_CACHE_TTL 内）是否被当前翻译服务原样返回"""
+    expires = _negative_keys.get(_negative_key(text))
+    return expires is not None and expires > time.time()
+
+
+def remember_untranslatable(text: str) -> None:
+    """记录服务商原样返回的原文，之后在 prepare 阶段直接直通"""
+    key = _negative_key(text)
+    now = time.time()
+    with _negative_lock:
+        if _negative_keys.get(key, 0) > now:
+            return
+        _negative_keys[key] = now + NEGATIVE_CACHE_TTL
+    try:
+        from modless_chat_trans.file_utils import get_negative_cache
+        negative_cache = get_negative_cache()
+        if supports_sql(negative_cache):
+            negative_cache.set(key, True, expire=NEGATIVE_CACHE_TTL)
+        else:
+            negative_cache.set(key, "1")
+    except Exception as e:
+        logger.warning(f"Failed to persist negative cache entry: {e}")
 
 
 def init_blacklist(blacklist_config):
@@ -141,6 +347,24 @@ def sanitize_hypixel_name(name: str) -> str:
     return sanitized.strip()
 
 
+def detect_channel(name: str, message_type: MessageType) -> str:
+    """
+    根据玩家名前缀判断消息所在的聊天频道（用于分频道维护上下文）
+
+    :return: "dm:<对方玩家名>"（私信 From/To）、"party" / "guild" / "officer" 等（"频道 > " 前缀）
+             或 "public"（公屏聊天与系统消息）
+    """
+    if message_type != MessageType.PLAYER:
+        return "public"
+    stripped = _RE_FORMAT_CODE.sub('', name).strip()
+    if _RE_DM_PREFIX.match(stripped):
+        return f"dm:{sanitize_hypixel_name(name).lower()}"
+    match = _RE_CHANNEL_PREFIX.match(stripped)
+    if match:
+        return match.group(1).lower()
+    return "public"
+
+
 def _is_valid_minecraft_name(name: str) -> bool:
     """Minecraft 玩家名称验证规则: 3-16个字符,只能包含字母、数字、下划线"""
     return _RE_MINECRAFT_NAME.match(name) is not None
@@ -335,6 +559,9 @@ class PreparedMessage:
     name: str                    # 玩家名（可为空）
     original: str                # 原文
     message_type: MessageType    # 消息类型
+    passthrough: bool = False    # 无需翻译，原文直通
+    info: dict = field(default_factory=dict)  # 随结果返回的附加信息（如语言识别结果）
+    channel: str = "public"      # 聊天频道（见 detect_channel）
 
 
 def prepare(data: str, data_type: str, replace_garbled: bool = False) -> PreparedMessage | None:
@@ -350,7 +577,15 @@ def prepare(data: str, data_type: str, replace_garbled: bool = False) -> Prepare
     if should_skip_message(name, original, msg_type, data_type):
         return None
 
-    return PreparedMessage(name=name, original=original, message_type=msg_type)
+    if msg_type == MessageType.PLAYER:
+        remember_player(sanitize_hypixel_name(name))
+
+    passthrough = is_untranslatable(original) or is_negative_cached(original)
+    info = {} if passthrough else detect_skip_language(name, original)
+    if info.get("skip_src_lang"):
+        passthrough = True
+    return PreparedMessage(name=name, original=original, message_type=msg_type, passthrough=passthrough, info=info,
+                           channel=detect_channel(name, msg_type))
 
 
 def translate_prepared(
@@ -360,10 +595,16 @@ def translate_prepared(
     target_language: str,
     context_messages: list[dict] | None = None,
     rage_mode: bool = False,
+    on_partial: Callable[[str], None] | None = None,
 ) -> tuple[str, str, dict]:
     """
     纯翻译，返回 (name, translated, info)。
     调用前应已通过 prepare() 过滤。
+
+    格式化代码与头衔标签在翻译前被抽取为占位符（见 format_codes），
+    缓存以占位符形式为键，译文在返回前注回格式化代码。
+
+    on_partial：流式翻译时以注回格式化代码后的部分译文调用（仅实际请求服务商时，缓存/术语表命中不调用）。
     """
     name = prepared.name
     original = prepared.original
@@ -371,39 +612,76 @@ def translate_prepared(
     context_messages = context_messages or []
 
     translated: str = ""
-    info: dict = {}
+    info: dict = dict(prepared.info)
+
+    if prepared.passthrough:
+        info["passthrough"] = True
+        return name or "", original, info
+
+    formatted = normalize_formatting(original)
+    cache_key = formatted.text
+    namespace = translator.cache_namespace(source_language, target_language)
 
     # 术语表匹配
     if matched := match_and_translate(original):
         logger.debug(f"Using custom glossary: {original} -> {matched}")
         translated = matched
         info["glossary_match"] = True
-    elif not rage_mode and original in cache:
-        logger.debug(f"Translation cache hit: {original}")
-        translated = cache[original]
+    elif not cache_key:
+        # 仅由格式化代码/标签组成，无可翻译内容
+        translated = original
+    elif not rage_mode and (cached := translation_cache.get(namespace, cache_key)) is not None:
+        logger.debug(f"Translation cache hit: {cache_key}")
+        translated = formatted.restore(cached)
         info["cache_hit"] = True
     else:
-        try:
-            if rage_mode:
-                result = translator.translate_with_profanity(
-                    original,
-                    source_language=source_language,
-                    target_language=target_language,
-                    message_type=msg_type,
-                )
-            else:
-                result = translator.translate_with_context(
-                    original,
-                    source_language=source_language,
-                    target_language=target_language,
-                    message_type=msg_type,
-                    context_messages=context_messages,
+        # 系统消息模板：骨架已翻译过则在本地代入变量，否则记录一次出现
+        template = None
+        if template_miner is not None and msg_type == MessageType.SYSTEM and not rage_mode:
+            template = template_miner.observe(cache_key)
+            cached_template = translation_cache.get(namespace, template.skeleton) if template is not None else None
+            if cached_template is not None:
+                filled = fill_template(cached_template, template.values)
+                if filled is not None:
+                    logger.debug(f"Template cache hit: {template.skeleton} <- {template.values}")
+                    info["cache_hit"] = True
+                    info["template_match"] = True
+                    return name or "", formatted.restore(filled), info
+
+        # 骨架重复出现达到阈值：整体翻译一次骨架并写入缓存，之后的变体直接本地代入；
+        # 骨架翻译失败时拒绝该骨架，本条消息照常整句翻译
+        if template is not None and template_miner.is_ready(template):
+            try:
+                result = _request_translation(
+                    translator, template.skeleton, source_language, target_language,
+                    msg_type, context_messages, rage_mode,
                 )
+            except Exception as e:
+                logger.warning(f"[TemplateMiner] Template translation failed, translating the message instead: {e}")
+                result = None
+            translated_template = (result or {}).get("result") or ""
+            filled = fill_template(translated_template, template.values) if translated_template else None
+            if filled is not None:
+                logger.info(f"[TemplateMiner] Learned template: {template.skeleton} -> {translated_template}")
+                translation_cache.set(namespace, template.skeleton, translated_template)
+                info["template_learned"] = True
+                info["usage"] = result.get("usage")
+                return name or "", formatted.restore(filled), info
+            template_miner.reject(template.skeleton)
+
+        try:
+            result = _request_translation(
+                translator, cache_key, source_language, target_language,
+                msg_type, context_messages, rage_mode,
+                on_partial=(lambda text: on_partial(formatted.restore(text))) if on_partial else None,
+            )
             if result:
                 translated = result.get("result") or ""
                 if not translated:
                     return "[ERROR]", _("翻译失败：服务器响应无效，请检查网络连接。"), info
                 info["usage"] = result.get("usage")
+                if (share := cached_token_share(info["usage"])) is not None:
+                    info["cached_token_share"] = round(share, 3)
             else:
                 return "[ERROR]", _("翻译失败：服务器响应无效，请检查网络连接。"), info
         except HTTPError as http_err:
@@ -420,8 +698,23 @@ def translate_prepared(
         except JSONDecodeError:
             return "[ERROR]", _("翻译失败：服务器响应无效，请检查网络连接。"), info
         except Exception as e:
+            if isinstance(e, RateLimitTimeout) or getattr(e, "status_code", None) == 429:
+                return "[ERROR]", _("翻译失败：请求次数过多，请稍后重试。"), info
             return "[ERROR]", f"{_('翻译失败，错误：')} {e}", info
 
+        if formatted.has_formatting:
+            info["format_tokens_saved"] = formatted.saved_tokens
+
+        unchanged = bool(translated) and translated.strip() == cache_key.strip()
+        if info.get("language_audit"):
+            # 复核：本应跳过的消息被服务商原样返回，说明跳过判断正确
+            language_skip_stats.record_audit(unchanged)
+
+        if unchanged and msg_type != MessageType.SEND:
+            # 服务商原样返回：记入负缓存，之后同样的原文不再请求
+            remember_untranslatable(original)
+            info["passthrough"] = True
+
         if translated:
             if rage_mode:
                 logger.debug(
@@ -431,20 +724,41 @@ def translate_prepared(
             else:
                 logger.debug(
                     f"Translation successful, caching result:"
-                    f" {original} -> {translated}"
+                    f" {cache_key} -> {translated}"
                 )
-                cache[original] = translated
+                translation_cache.set(namespace, cache_key, translated)
+            translated = formatted.restore(translated)
 
     return name or "", translated, info
 
 
+def _request_translation(translator, text, source_language, target_language,
+                         message_type, context_messages, rage_mode, on_partial=None) -> dict | None:
+    """调用翻译器（红温模式不带上下文、不流式），返回 {"result": ..., "usage": ...} 或 None"""
+    if rage_mode:
+        return translator.translate_with_profanity(
+            text,
+            source_language=source_language,
+            target_language=target_language,
+            message_type=message_type,
+        )
+    return translator.translate_with_context(
+        text,
+        source_language=source_language,
+        target_language=target_language,
+        message_type=message_type,
+        context_messages=context_messages,
+        on_partial=on_partial,
+    )
+
+
 def process_decorator(function):
     """
     为process_message添加翻译步骤
     """
 
     def wrapper(data, data_type, translator, source_language, target_language,
-                rage_mode=False, context_messages=None):
+                rage_mode=False, context_messages=None, on_partial=None):
         """
         处理日志文件中的一行（包括翻译）
 
@@ -455,6 +769,7 @@ def process_decorator(function):
         :param target_language: 目标语言
         :param rage_mode: 是否启用红温模式
         :param context_messages: 历史上下文 messages 列表（可直接拼入 litellm）
+        :param on_partial: 流式翻译回调，参数为当前已生成的译文（见 translate_prepared）
         :return:
             - None：应被丢弃的数据（可能是不包含[CHAT]的日志行，也可能是系统消息且filter_server_messages为True）
             - 长度为3的元组：
@@ -469,91 +784,30 @@ def process_decorator(function):
         """
 
         name, original_chat_message, message_type = function(data, data_type, replace_garbled_character)
-        translated_chat_message: str = ""
-        info: dict = {}
-        context_messages = context_messages or []
 
         # 使用过滤函数检查是否跳过消息
         if should_skip_message(name, original_chat_message, message_type, data_type):
             return None
-        if original_chat_message:
-            if matched_translated_message := match_and_translate(original_chat_message):
-                logger.debug(f"Using custom glossary: {original_chat_message} -> {matched_translated_message}")
-                translated_chat_message = matched_translated_message
-                info["glossary_match"] = True
-            elif not rage_mode and original_chat_message in cache:
-                logger.debug(f"Translation cache hit: {original_chat_message}")
-                translated_chat_message = cache[original_chat_message]
-                info["cache_hit"] = True
-            else:
-                try:
-                    if rage_mode:
-                        translate_fn = translator.translate_with_profanity
-                        if result := translate_fn(
-                                original_chat_message,
-                                source_language=source_language,
-                                target_language=target_language,
-                                message_type=message_type
-                        ):
-                            translated_chat_message = result.get("result") or ""
-                            if not translated_chat_message:
-                                return "[ERROR]", _("翻译失败：服务器响应无效，请检查网络连接。"), info
-                            info["usage"] = result.get("usage")
-                        else:
-                            return "[ERROR]", _("翻译失败：服务器响应无效，请检查网络连接。"), info
-                    else:
-                        if result := translator.translate_with_context(
-                                original_chat_message,
-                                source_language=source_language,
-                                target_language=target_language,
-                                message_type=message_type,
-                                context_messages=context_messages,
-                        ):
-                            translated_chat_message = result.get("result") or ""
-                            if not translated_chat_message:
-                                return "[ERROR]", _("翻译失败：服务器响应无效，请检查网络连接。"), info
-                            info["usage"] = result.get("usage")
-                        else:
-                            return "[ERROR]", _("翻译失败：服务器响应无效，请检查网络连接。"), info
-                except HTTPError as http_err:
-                    response = getattr(http_err, "response", None)
-                    if response is not None:
-                        if response.status_code == 429:
-                            # 请求过多
-                            return "[ERROR]", _("翻译失败：请求次数过多，请稍后重试。"), info
-                        elif 500 <= response.status_code < 600:
-                            # 服务器错误
-                            return "[ERROR]", _("翻译失败：服务器错误，请稍后重试。"), info
-                        else:
-                            # 其他 HTTP 错误
-                            return "[ERROR]", _("翻译失败：发生HTTP错误。"), info
-                    else:
-                        # 无法获取响应对象，可能是网络问题
-                        return "[ERROR]", _("翻译失败：网络问题或发生HTTP错误。"), info
-                except JSONDecodeError:
-                    # JSON 解码错误，可能是网络问题或服务器返回了非 JSON 数据
-                    return "[ERROR]", _("翻译失败：服务器响应无效，请检查网络连接。"), info
-                except Exception as e:
-                    # 捕获其他未知错误
-                    return "[ERROR]", f"{_('翻译失败，错误：')} {e}", info
-
-                if translated_chat_message:
-                    if rage_mode:
-                        logger.debug(
-                            f"Rage translation generated (skipping cache): "
-                            f"'{original_chat_message}' -> '{translated_chat_message}'"
-                        )
-                    else:
-                        logger.debug(
-                            f"Translation successful, caching result:"
-                            f" {original_chat_message} -> {translated_chat_message}"
-                        )
-                        cache[original_chat_message] = translated_chat_message
-
-            if data_type == "log":
-                return name or "", translated_chat_message, info
-            elif data_type in ("clipboard", "webui"):
-                return False, translated_chat_message, info
+        if not original_chat_message:
+            return None
+
+        prepared = PreparedMessage(name=name, original=original_chat_message, message_type=message_type)
+        name, translated_chat_message, info = translate_prepared(
+            prepared,
+            translator,
+            source_language=source_language,
+            target_language=target_language,
+            context_messages=context_messages,
+            rage_mode=rage_mode,
+            on_partial=on_partial,
+        )
+        if name == "[ERROR]":
+            return name, translated_chat_message, info
+
+        if data_type == "log":
+            return name, translated_chat_message, info
+        elif data_type in ("clipboard", "webui"):
+            return False, translated_chat_message, info
 
         return None
 
@@ -20,7 +20,8 @@ import threading
 import time
 from typing import Optional
 
-from modless_chat_trans.file_utils import cache as trans_cache, get_pre_tts_cache
+from modless_chat_trans.file_utils import cache as trans_cache, get_pre_tts_cache, translation_cache
+from modless_chat_trans.translation_cache import namespace_target, supports_sql
 from modless_chat_trans.logger import logger
 from modless_chat_trans.tts_engine import TTS_AVAILABLE, infer_voice, preprocess_for_tts
 
@@ -136,16 +137,27 @@ class PreTTSEngine:
         with self._lock:
             self._progress_done += 1
 
-    def _scan_and_rank(self, now: float) -> list:
-        """扫描翻译缓存，按译文聚合热度（count / age）降序返回前 PRE_TTS_BUDGET 条"""
+    def _scan_and_rank(self, now: float, target_language: str) -> list:
+        """
+        扫描翻译缓存中目标语言为 target_language 的命名空间，
+        按译文聚合热度（count / age）降序返回前 PRE_TTS_BUDGET 条
+        """
         # 解码规则（diskcache 存储格式）：
         # - key 列：str/int/float 键原样存储（raw 标记为 1），其余类型为 pickle（raw 标记为 0）
         # - value 列：mode=1 原样存储，mode=4 为 pickle，其余（文件型，≥32KB）跳过
+        translation_cache.flush_access_counts()
+        if not supports_sql(trans_cache):
+            logger.warning("Pre-TTS ranking requires the diskcache translation cache backend")
+            return []
+        target = target_language.strip().lower()
         rows = trans_cache._sql(
-            'SELECT key, value, store_time, access_count, raw, mode FROM Cache'
+            'SELECT key, value, store_time, access_count, raw, mode, tag FROM Cache'
         )
         agg: dict = {}
-        for key_blob, value_blob, store_time, access_count, raw_flag, mode in rows:
+        for key_blob, value_blob, store_time, access_count, raw_flag, mode, tag in rows:
+            # 其他目标语言的译文不适用于当前语音
+            if not isinstance(tag, str) or namespace_target(tag) != target:
+                continue
             if raw_flag == 1:
                 original = key_blob
             else:
@@ -155,8 +167,8 @@ class PreTTSEngine:
                     continue
             if not isinstance(original, str):
                 continue
-            if mode == 1:  # MODE_RAW
-                translated = value_blob
+            if mode == 1:  # MODE_RAW（压缩存储的译文为 bytes）
+                translated = translation_cache.codec.decode(value_blob)
             elif mode == 4:  # MODE_PICKLE
                 try:
                     translated = pickle.loads(value_blob)
@@ -206,7 +218,7 @@ class PreTTSEngine:
         speed = tts_cfg.speed
         pitch = tts_cfg.pitch
 
-        candidates = self._scan_and_rank(time.time())
+        candidates = self._scan_and_rank(time.time(), target_language)
         if not candidates:
             logger.debug("[Pre-TTS] No candidates from translation cache")
             return {"synthesized": 0, "skipped": 0, "total": 0, "size_bytes": 0}
@@ -0,0 +1,308 @@
+# Copyright (C) 2025 LiJiaHua1024
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+客户端限流。
+
+服务商返回 429 后，其它翻译线程若继续请求，只会让一次突发变成持续一分钟的失败。
+这里为每个服务商 + API Key 维护令牌桶（每分钟请求数 RPM 与 token 数 TPM），请求在翻译时限内排队等待，而不是直接失败：
+
+- RPM / TPM 可配置（0 = 不限制；同一服务商 + API Key 多处配置时取最严格的非零值），服务商返回的限额响应头（x-ratelimit-limit-*）低于配置值时按响应头收紧；
+- 响应头中的剩余额度（x-ratelimit-remaining-* / anthropic-ratelimit-*-remaining）为 0 时，暂停到额度重置；
+- 429 响应的 Retry-After（秒数或 HTTP 日期，以及 retry-after-ms）期间暂停全部请求；
+- 排队时间超出请求的截止时刻时抛出 RateLimitTimeout，不占用额度；
+- 记录排队等待时间（p50 / p99）、被限流与超时放弃的次数。
+"""
+
+import re
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from hashlib import sha256
+from typing import Callable, Mapping, Optional
+
+from modless_chat_trans.latency_tracker import LatencyWindow
+from modless_chat_trans.logger import logger
+
+# 429 没有附带 Retry-After 时的暂停时间（秒）
+DEFAULT_RETRY_AFTER = 2.0
+# 单次暂停的上限（秒），避免异常的响应头让翻译长时间停滞
+MAX_BLOCK_SECONDS = 120.0
+
+_RE_DURATION_PART = re.compile(r"(\d+(?:\.\d+)?)(ms|h|m|s)")
+
+
+class RateLimitTimeout(TimeoutError):
+    """在截止时刻之前无法获得请求额度"""
+
+
+def parse_reset(value: str, now: Optional[float] = None) -> Optional[float]:
+    """
+    把重置时间解析为距现在的秒数：支持秒数（"1.5"）、OpenAI 的时长（"6m0s"、"20ms"）、
+    RFC 3339 时间（Anthropic）与 HTTP 日期（Retry-After）；无法解析时返回 None。
+    """
+    value = (value or "").strip()
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    parts = _RE_DURATION_PART.findall(value)
+    if parts and "".join(number + unit for number, unit in parts) == value:
+        scale = {"ms": 0.001, "s": 1, "m": 60, "h": 3600}
+        return sum(float(number) * scale[unit] for number, unit in parts)
+    try:
+        moment = datetime.fromisoformat(value)
+    except ValueError:
+        try:
+            moment = parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return None
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    now = time.time() if now is None else now
+    return max(0.0, moment.timestamp() - now)
+
+
+def normalize_headers(headers: Optional[Mapping]) -> dict[str, str]:
+    """响应头转为小写键；litellm 转发的服务商响应头带有 llm_provider- 前缀"""
+    normalized = {}
+    for key, value in (headers or {}).items():
+        key = str(key).lower()
+        normalized[key.removeprefix("llm_provider-")] = str(value)
+    return normalized
+
+
+class TokenBucket:
+    """
+    每分钟 per_minute 个令牌的令牌桶（容量为一分钟的额度）。
+    取令牌时可以透支：余额为负表示已有请求在排队，后来的请求等待更久（先到先得）。
+    """
+
+    def __init__(self, per_minute: float, now: float):
+        self.per_minute = per_minute
+        self.level = float(per_minute)
+        self._updated = now
+
+    def refill(self, now: float) -> None:
+        self.level = min(self.per_minute, self.level + (now - self._updated) * self.per_minute / 60)
+        self._updated = now
+
+    def wait_time(self, amount: float) -> float:
+        """余额足够 amount（不超过容量）之前需要等待的秒数（调用前先 refill）"""
+        amount = min(amount, self.per_minute)
+        return max(0.0, amount - self.level) * 60 / self.per_minute
+
+    def resize(self, per_minute: float) -> None:
+        self.level = min(self.level, per_minute)
+        self.per_minute = per_minute
+
+
+class RateLimiter:
+    """单个服务商 + API Key 的限流器（线程安全）"""
+
+    REPORT_INTERVAL = 100
+
+    def __init__(self, name: str, rpm: int = 0, tpm: int = 0, clock: Callable[[], float] = time.monotonic):
+        self.name = name
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._configured = {"requests": rpm, "tokens": tpm}
+        self._learned: dict[str, int] = {}
+        self._buckets: dict[str, TokenBucket] = {}
+        self._blocked_until = 0.0
+        self.requests = 0
+        self.queued = 0
+        self.rate_limited = 0
+        self.timed_out = 0
+        self.waits = LatencyWindow(1000)
+        now = clock()
+        for kind in ("requests", "tokens"):
+            self._apply_limit(kind, now)
+
+    def tighten(self, rpm: int, tpm: int) -> None:
+        """
+        合并另一处配置的限额：每项取最严格的非零值，0 不放宽已有限额。
+        同一服务商 + API Key 由主模型、备用模型与上下文摘要共用，各处配置不同时不会反复重建令牌桶。
+        """
+        requested = {"requests": rpm, "tokens": tpm}
+        with self._lock:
+            merged = {
+                kind: min((limit for limit in (self._configured.get(kind), requested[kind]) if limit and limit > 0),
+                          default=0)
+                for kind in requested
+            }
+            if merged == self._configured:
+                return
+            self._configured = merged
+            now = self._clock()
+            for kind in ("requests", "tokens"):
+                self._apply_limit(kind, now)
+
+    def _apply_limit(self, kind: str, now: float) -> None:
+        """配置值与响应头限额中较小的一个（0 = 不限制）"""
+        limits = [limit for limit in (self._configured.get(kind), self._learned.get(kind)) if limit and limit > 0]
+        bucket = self._buckets.get(kind)
+        if not limits:
+            self._buckets.pop(kind, None)
+        elif bucket is None:
+            self._buckets[kind] = TokenBucket(min(limits), now)
+        elif bucket.per_minute != min(limits):
+            bucket.refill(now)
+            bucket.resize(min(limits))
+
+    def acquire(self, tokens: int = 0, deadline: Optional[float] = None) -> float:
+        """
+        在 deadline（time.monotonic）之前获得一次请求额度，需要时排队等待；返回等待的秒数。
+
+        :param tokens: 本次请求预计消耗的 token 数（输入 + max_tokens），请求完成后用 settle 校正
+        :raises RateLimitTimeout: 截止时刻之前无法获得额度
+        """
+        with self._lock:
+            now = self._clock()
+            amounts = {"requests": 1, "tokens": tokens}
+            wait = max(0.0, self._blocked_until - now)
+            for kind, bucket in self._buckets.items():
+                bucket.refill(now)
+                wait = max(wait, bucket.wait_time(amounts[kind]))
+            self.requests += 1
+            if deadline is not None and now + wait > deadline:
+                self.timed_out += 1
+                raise RateLimitTimeout(
+                    f"{self.name} is rate limited; the next slot is {wait:.1f}s away, past the request deadline"
+                )
+            for kind, bucket in self._buckets.items():
+                bucket.level -= amounts[kind]
+            self.queued += int(wait > 0)
+            should_report = self.requests % self.REPORT_INTERVAL == 0
+        self.waits.add(wait)
+        if wait > 0:
+            logger.debug(f"[RateLimit] {self.name}: queued for {wait:.2f}s")
+            time.sleep(wait)
+        if should_report:
+            logger.info(f"[RateLimit] {self.summary()}")
+        return wait
+
+    def settle(self, reserved: int, used: Optional[int]) -> None:
+        """请求完成后按实际消耗的 token 数退还（或补扣）预估的差额"""
+        if used is None:
+            return
+        with self._lock:
+            bucket = self._buckets.get("tokens")
+            if bucket is not None:
+                bucket.level = min(bucket.per_minute, bucket.level + reserved - used)
+
+    def observe(self, headers: Optional[Mapping], rate_limited: bool = False) -> None:
+        """
+        根据响应头调整：限额、剩余额度与重置时间、Retry-After。
+
+        :param rate_limited: 响应为 429（没有 Retry-After 时暂停 DEFAULT_RETRY_AFTER 秒）
+        """
+        headers = normalize_headers(headers)
+        with self._lock:
+            now = self._clock()
+            pause = 0.0
+            if rate_limited:
+                self.rate_limited += 1
+                if "retry-after-ms" in headers:
+                    pause = (parse_reset(headers["retry-after-ms"]) or 0) / 1000
+                else:
+                    pause = parse_reset(headers.get("retry-after", "")) or DEFAULT_RETRY_AFTER
+
+            for kind in ("requests", "tokens"):
+                limit = self._header(headers, kind, "limit")
+                if limit is not None and limit > 0 and limit != self._learned.get(kind):
+                    self._learned[kind] = int(limit)
+                    self._apply_limit(kind, now)
+                remaining = self._header(headers, kind, "remaining")
+                if remaining is None:
+                    continue
+                bucket = self._buckets.get(kind)
+                if bucket is not None:
+                    bucket.refill(now)
+                    bucket.level = min(bucket.level, remaining)
+                if remaining <= 0:
+                    reset = next((parse_reset(value) for value in self._header_values(headers, kind, "reset")), None)
+                    pause = max(pause, reset or DEFAULT_RETRY_AFTER)
+
+            if pause > 0:
+                pause = min(pause, MAX_BLOCK_SECONDS)
+                if now + pause > self._blocked_until:
+                    self._blocked_until = now + pause
+                    logger.warning(f"[RateLimit] {self.name}: pausing requests for {pause:.1f}s")
+
+    @staticmethod
+    def _header_values(headers: dict[str, str], kind: str, field: str) -> list[str]:
+        # OpenAI 等：x-ratelimit-remaining-requests；Anthropic：anthropic-ratelimit-requests-remaining
+        names = [f"x-ratelimit-{field}-{kind}", f"anthropic-ratelimit-{kind}-{field}"]
+        return [headers[name] for name in names if name in headers]
+
+    @classmethod
+    def _header(cls, headers: dict[str, str], kind: str, field: str) -> Optional[float]:
+        for value in cls._header_values(headers, kind, field):
+            try:
+                return float(value)
+            except ValueError:
+                continue
+        return None
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            now = self._clock()
+            stats = {
+                "rpm": self._buckets["requests"].per_minute if "requests" in self._buckets else None,
+                "tpm": self._buckets["tokens"].per_minute if "tokens" in self._buckets else None,
+                "paused_for": max(0.0, self._blocked_until - now),
+                "requests": self.requests,
+                "queued": self.queued,
+                "rate_limited": self.rate_limited,
+                "timed_out": self.timed_out,
+            }
+        stats["wait_p50"] = self.waits.percentile(0.5)
+        stats["wait_p99"] = self.waits.percentile(0.99)
+        return stats
+
+    def summary(self) -> str:
+        stats = self.snapshot()
+        p99 = "n/a" if stats["wait_p99"] is None else f"{stats['wait_p99']:.2f}s"
+        return (f"{self.name}: {stats['queued']} of {stats['requests']} requests queued (wait p99 {p99}), "
+                f"{stats['rate_limited']} rate limited by the provider, {stats['timed_out']} gave up at the deadline")
+
+
+class RateLimiters:
+    """按服务商 + API Key 划分的限流器集合"""
+
+    def __init__(self):
+        self._limiters: dict[str, RateLimiter] = {}
+        self._lock = threading.Lock()
+
+    def get(self, provider: str, api_key: Optional[str] = None, rpm: int = 0, tpm: int = 0) -> RateLimiter:
+        # 同一服务商的不同 API Key 分别计算额度；名称中只保留 Key 的摘要
+        key_id = sha256((api_key or "").encode()).hexdigest()[:8] if api_key else "-"
+        name = f"{provider}#{key_id}"
+        with self._lock:
+            limiter = self._limiters.get(name)
+            if limiter is None:
+                limiter = self._limiters[name] = RateLimiter(name, rpm, tpm)
+                return limiter
+        limiter.tighten(rpm, tpm)
+        return limiter
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            limiters = dict(self._limiters)
+        return {name: limiter.snapshot() for name, limiter in limiters.items()}
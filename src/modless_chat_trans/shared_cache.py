@@ -0,0 +1,305 @@
+# Copyright (C) 2025 LiJiaHua1024
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+局域网共享翻译缓存。
+
+一起游玩的多台电脑可以指向同一个共享缓存服务：队友刚翻译过的消息，其他人直接命中。
+- 服务端：小型 HTTP 服务，可由某个实例在程序内启动（直接使用本机的翻译缓存），
+  也可单独运行：python -m modless_chat_trans.shared_cache --port 5050 --directory mct-shared-cache
+- 客户端：作为 TranslationCache 的第三层，本地内存层和磁盘层均未命中时才查询；
+  并发的查询在短时间窗口内合并为一次批量请求，写入在后台批量上传。
+- 服务不可用时客户端暂停访问一段时间，期间只使用本地缓存，未上传的写入保留在内存中，恢复后补传。
+- 键带有命名空间（语言对 + 翻译服务 + 提示词版本），不同配置的实例互不干扰。
+
+接口（JSON）：
+- GET  /health                                   -> {"ok": true}
+- POST /lookup {"keys": [[命名空间, 原文], ...]}  -> {"values": [译文或 null, ...]}
+- POST /store  {"entries": [[命名空间, 原文, 译文], ...]} -> {"stored": 新写入的条数}
+设置了令牌时，请求需带 X-MCT-Token 请求头；没有设置令牌时服务只监听本机（127.0.0.1）。
+/store 只写入服务端还没有的条目，不覆盖已有的译文。
+"""
+
+import argparse
+import threading
+import time
+from collections import deque
+from typing import Optional
+
+import requests
+from diskcache import Cache
+
+from modless_chat_trans.logger import logger
+from modless_chat_trans.translation_cache import make_key
+
+TOKEN_HEADER = "X-MCT-Token"
+# 单个请求最多携带的条目数与单条文本的最大长度（服务端拒绝超出的请求）
+MAX_BATCH = 256
+MAX_TEXT_LENGTH = 4096
+
+_server = None
+
+
+# ----------------------------------------------------------------------
+# 服务端
+# ----------------------------------------------------------------------
+
+def create_shared_cache_app(store: Cache, token: str = "", decode=None, memory_tier=None):
+    """
+    创建共享缓存服务的 Flask 应用
+
+    :param store:       存放共享条目的 diskcache.Cache（条目按命名空间打 tag）
+    :param token:       访问令牌，空字符串表示不校验
+    :param decode:      读取值的解码函数（store 为本机翻译缓存时传入 TranslationCache.codec.decode）
+    :param memory_tier: store 为本机翻译缓存时传入 TranslationCache，队友上传的条目经由它写入（内存层与后台写入保持一致）
+    """
+    decode = decode or (lambda value: value if isinstance(value, str) else None)
+    from flask import Flask, abort, jsonify, request
+
+    app = Flask(__name__)
+
+    @app.before_request
+    def check_token():
+        if token and request.headers.get(TOKEN_HEADER) != token:
+            abort(403)
+
+    def read_items(field: str, width: int) -> list:
+        items = (request.get_json(silent=True) or {}).get(field)
+        if not isinstance(items, list) or len(items) > MAX_BATCH:
+            abort(400)
+        for item in items:
+            if (not isinstance(item, list) or len(item) != width
+                    or not all(isinstance(part, str) and len(part) <= MAX_TEXT_LENGTH for part in item)):
+                abort(400)
+        return items
+
+    @app.get("/health")
+    def health():
+        return jsonify(ok=True)
+
+    @app.post("/lookup")
+    def lookup():
+        keys = read_items("keys", 2)
+        return jsonify(values=[decode(store.get(make_key(namespace, text))) for namespace, text in keys])
+
+    @app.post("/store")
+    def store_entries():
+        entries = read_items("entries", 3)
+        # 只补充缺失的条目，不覆盖已有译文
+        if memory_tier is not None:
+            stored = sum(memory_tier.add(namespace, text, value) for namespace, text, value in entries)
+        else:
+            stored = 0
+            with store.transact():
+                for namespace, text, value in entries:
+                    key = make_key(namespace, text)
+                    if key not in store:
+                        store.set(key, value, tag=namespace)
+                        stored += 1
+        return jsonify(stored=stored)
+
+    return app
+
+
+def start_shared_cache_server(store: Cache, port: int, token: str = "", host: str = "0.0.0.0", decode=None,
+                              memory_tier=None):
+    """
+    在后台线程启动共享缓存服务（重复调用返回已启动的服务）。
+    没有设置令牌时只监听本机，避免局域网内任何主机都能写入译文。
+
+    :return: werkzeug 服务器对象（调用 shutdown() 停止）
+    """
+    global _server
+    if _server is not None:
+        return _server
+    from werkzeug.serving import make_server
+
+    if not token and host not in ("127.0.0.1", "localhost", "::1"):
+        logger.warning("Shared translation cache server has no token; listening on 127.0.0.1 only. "
+                       "Set shared-token to share the cache over the LAN.")
+        host = "127.0.0.1"
+    _server = make_server(host, port, create_shared_cache_app(store, token, decode, memory_tier), threaded=True)
+    threading.Thread(target=_server.serve_forever, daemon=True, name="shared-cache-server").start()
+    logger.info(f"Shared translation cache server listening on {host}:{port}")
+    return _server
+
+
+# ----------------------------------------------------------------------
+# 客户端
+# ----------------------------------------------------------------------
+
+class _Lookup:
+    __slots__ = ("namespace", "text", "value", "done")
+
+    def __init__(self, namespace: str, text: str):
+        self.namespace = namespace
+        self.text = text
+        self.value: Optional[str] = None
+        self.done = threading.Event()
+
+
+class SharedCacheClient:
+    """
+    共享缓存客户端（线程安全，由翻译线程池并发调用）。
+    """
+
+    BATCH_WINDOW = 0.005        # 查询合并的等待窗口（秒）
+    STORE_INTERVAL = 0.2        # 写入上传间隔（秒）
+    RETRY_INTERVAL = 30.0       # 服务不可用后暂停访问的时间（秒）
+    MAX_UNSENT = 5000           # 服务不可用期间保留的未上传写入上限
+
+    def __init__(self, url: str, token: str = "", timeout: float = 0.5):
+        """
+        :param url:     服务地址，如 http://192.168.1.10:5050
+        :param token:   访问令牌
+        :param timeout: 单次请求超时（秒），查询等待不会超过该时间太多
+        """
+        self.url = url.rstrip("/")
+        self.timeout = timeout
+        self._session = requests.Session()
+        if token:
+            self._session.headers[TOKEN_HEADER] = token
+        self._down_until = 0.0
+        self._lookups: deque[_Lookup] = deque()
+        self._unsent: deque[tuple] = deque(maxlen=self.MAX_UNSENT)
+        self._condition = threading.Condition()
+        self._closed = False
+        self._threads: list[threading.Thread] = []
+
+    @property
+    def available(self) -> bool:
+        return time.monotonic() >= self._down_until
+
+    def _ensure_threads(self) -> None:
+        """调用方需持有 _condition"""
+        if not self._threads:
+            for target, name in ((self._lookup_loop, "shared-cache-lookup"), (self._store_loop, "shared-cache-store")):
+                thread = threading.Thread(target=target, daemon=True, name=name)
+                thread.start()
+                self._threads.append(thread)
+
+    def _post(self, path: str, payload: dict) -> Optional[dict]:
+        """发送请求；失败时标记服务不可用并返回 None"""
+        try:
+            response = self._session.post(f"{self.url}{path}", json=payload, timeout=self.timeout)
+            response.raise_for_status()
+            return response.json()
+        except (requests.RequestException, ValueError) as e:
+            if self.available:
+                logger.warning(f"Shared cache unavailable, using local cache only for "
+                               f"{self.RETRY_INTERVAL:.0f}s: {e}")
+            self._down_until = time.monotonic() + self.RETRY_INTERVAL
+            return None
+
+    # ------------------------------------------------------------------
+    # 查询
+    # ------------------------------------------------------------------
+
+    def get(self, namespace: str, text: str) -> Optional[str]:
+        """查询共享缓存；未命中、超时或服务不可用时返回 None"""
+        if self._closed or not self.available or len(text) > MAX_TEXT_LENGTH:
+            return None
+        lookup = _Lookup(namespace, text)
+        with self._condition:
+            self._ensure_threads()
+            self._lookups.append(lookup)
+            self._condition.notify_all()
+        lookup.done.wait(self.timeout + self.BATCH_WINDOW + 0.1)
+        return lookup.value
+
+    def _lookup_loop(self) -> None:
+        while True:
+            with self._condition:
+                while not self._lookups and not self._closed:
+                    self._condition.wait()
+                if self._closed:
+                    return
+            # 等待一个短窗口，合并并发翻译线程的查询
+            time.sleep(self.BATCH_WINDOW)
+            with self._condition:
+                batch = [self._lookups.popleft() for _ in range(min(MAX_BATCH, len(self._lookups)))]
+            response = None
+            if self.available:
+                response = self._post("/lookup", {"keys": [[item.namespace, item.text] for item in batch]})
+            values = (response or {}).get("values") or []
+            for item, value in zip(batch, values):
+                if isinstance(value, str):
+                    item.value = value
+            for item in batch:
+                item.done.set()
+
+    # ------------------------------------------------------------------
+    # 写入
+    # ------------------------------------------------------------------
+
+    def put(self, namespace: str, text: str, value: str) -> None:
+        """把新译文加入上传队列（不阻塞调用方）"""
+        if self._closed or len(text) > MAX_TEXT_LENGTH or len(value) > MAX_TEXT_LENGTH:
+            return
+        with self._condition:
+            self._ensure_threads()
+            self._unsent.append((namespace, text, value))
+
+    def _store_loop(self) -> None:
+        while not self._closed:
+            time.sleep(self.STORE_INTERVAL)
+            self.flush()
+
+    def flush(self) -> int:
+        """上传待写入条目；返回上传条数（服务不可用时保留在队列中）"""
+        sent = 0
+        while self.available:
+            with self._condition:
+                batch = [self._unsent.popleft() for _ in range(min(MAX_BATCH, len(self._unsent)))]
+            if not batch:
+                break
+            if self._post("/store", {"entries": [list(entry) for entry in batch]}) is None:
+                with self._condition:
+                    # 放回队首，恢复后补传（超出上限时较新的条目被丢弃）
+                    self._unsent.extendleft(reversed(batch))
+                break
+            sent += len(batch)
+        return sent
+
+    def close(self) -> None:
+        """上传剩余写入并停止后台线程"""
+        self.flush()
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+        for item in list(self._lookups):
+            item.done.set()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ModlessChatTrans shared translation cache server")
+    parser.add_argument("--port", type=int, default=5050)
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--directory", default="mct-shared-cache")
+    parser.add_argument("--token", default="")
+    args = parser.parse_args()
+
+    store = Cache(args.directory, eviction_policy="least-frequently-used")
+    server = start_shared_cache_server(store, args.port, args.token, args.host)
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,220 @@
+# Copyright (C) 2025 LiJiaHua1024
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+系统/游戏消息模板学习。
+
+观察缓存未命中的系统消息，把数字、坐标和玩家名遮蔽为变量，
+把骨架相同的消息聚为一类（同长度 token 序列，仅在玩家名位置不同的行会被合并）。
+同一骨架出现次数达到阈值后，调用方只需把骨架（含 {{v1}} 形式变量）翻译一次并写入缓存，
+之后的变体即可像术语表 {{var}} 模板一样在本地代入变量得到译文。
+"""
+
+import re
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+from modless_chat_trans.logger import logger
+
+_RE_COORDINATES = re.compile(
+    r'(?<![\w.{])-?\d+(?:\.\d+)?,\s*-?\d+(?:\.\d+)?,\s*-?\d+(?:\.\d+)?(?![\w}])'
+)
+_RE_NUMBER = re.compile(r'(?<![\w.§{])-?\d+(?:[.,:]\d+)*(?![\w}])')
+_RE_NAME_LIKE = re.compile(r'^[a-zA-Z0-9_]{3,16}$')
+_RE_TEMPLATE_VARIABLE = re.compile(r"\{\{(v\d+)\}\}")
+
+# 遮蔽后的 token 中用私有区字符标记变量位置，避免与正常文本冲突
+_MASK = "\ue000"
+_TOKEN_PUNCTUATION = ".,!?:;()[]'\""
+
+
+@dataclass(frozen=True)
+class TemplateCandidate:
+    """一条消息对应的模板骨架"""
+    skeleton: str       # 含 {{v1}}、{{v2}} ... 变量的骨架文本
+    values: dict        # 变量名 -> 本条消息中的取值
+    occurrences: int    # 该骨架累计出现次数
+
+
+class _Cluster:
+    """同长度 token 序列的聚类：None 表示通配（玩家名）位置"""
+    __slots__ = ("tokens", "count")
+
+    def __init__(self, tokens: list):
+        self.tokens = tokens
+        self.count = 0
+
+
+def fill_template(translated_template: str, values: dict) -> Optional[str]:
+    """
+    把变量代入已翻译的模板；译文缺少任何变量时返回 None（模板不可用）。
+    """
+    found = set(_RE_TEMPLATE_VARIABLE.findall(translated_template))
+    if found != set(values):
+        return None
+    return _RE_TEMPLATE_VARIABLE.sub(lambda m: values[m.group(1)], translated_template)
+
+
+class TemplateMiner:
+    """
+    线程安全的模板挖掘器（由翻译线程池并发调用）。
+    """
+
+    MAX_CLUSTERS_PER_LENGTH = 200
+    MAX_REJECTED = 2000  # 被拒绝骨架的记忆上限（LRU）
+    MIN_SIMILARITY = 0.6
+
+    def __init__(self, min_occurrences: int = 3, is_known_name: Optional[Callable[[str], bool]] = None):
+        """
+        :param min_occurrences: 骨架出现多少次后整体翻译
+        :param is_known_name:   判断 token 是否为聊天中出现过的玩家名（可选）
+        """
+        self.min_occurrences = max(1, min_occurrences)
+        self._is_known_name = is_known_name or (lambda name: False)
+        self._clusters: dict[int, list[_Cluster]] = {}
+        self._rejected: OrderedDict[str, None] = OrderedDict()
+        self._lock = threading.Lock()
+
+    # ------------------------------------------------------------------
+    # 玩家名判断
+    # ------------------------------------------------------------------
+
+    def _is_name(self, token: str) -> bool:
+        """已知玩家名，或带数字/下划线的类玩家名 token"""
+        stripped = token.strip(_TOKEN_PUNCTUATION)
+        if not _RE_NAME_LIKE.match(stripped):
+            return False
+        return self._is_known_name(stripped) or any(c.isdigit() or c == "_" for c in stripped)
+
+    # ------------------------------------------------------------------
+    # 遮蔽与聚类
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _mask(text: str) -> tuple[list[str], list[str]]:
+        """把坐标和数字替换为掩码，返回 (token 列表, 按出现顺序的取值)"""
+        values = []
+
+        def replace(match: re.Match) -> str:
+            values.append(match.group(0))
+            return _MASK
+
+        # 坐标先于单个数字遮蔽，作为一个整体变量
+        parts = []
+        last = 0
+        for m in _RE_COORDINATES.finditer(text):
+            parts.append(_RE_NUMBER.sub(replace, text[last:m.start()]))
+            values.append(m.group(0))
+            parts.append(_MASK)
+            last = m.end()
+        parts.append(_RE_NUMBER.sub(replace, text[last:]))
+        return "".join(parts).split(), values
+
+    def observe(self, text: str) -> Optional[TemplateCandidate]:
+        """
+        记录一条缓存未命中的消息并返回其骨架。
+        无任何可变部分（不含数字、坐标、玩家名）的消息返回 None。
+        """
+        masked_tokens, masked_values = self._mask(text)
+        if not masked_tokens:
+            return None
+
+        with self._lock:
+            # 已知玩家名（或带数字/下划线的类玩家名 token）直接作为变量
+            tokens = [None if (_MASK not in t and self._is_name(t)) else t for t in masked_tokens]
+            cluster = self._match_cluster(tokens)
+            cluster.count += 1
+            template_tokens = list(cluster.tokens)
+            occurrences = cluster.count
+
+        skeleton_parts = []
+        values = {}
+        masked_iter = iter(masked_values)
+        for index, template_token in enumerate(template_tokens):
+            if template_token is None:
+                # 通配位置整体作为一个变量（还原其中被遮蔽的数字）
+                pieces = masked_tokens[index].split(_MASK)
+                value = pieces[0] + "".join(next(masked_iter, "") + piece for piece in pieces[1:])
+                name = f"v{len(values) + 1}"
+                values[name] = value
+                skeleton_parts.append(f"{{{{{name}}}}}")
+                continue
+            part = []
+            for piece_index, piece in enumerate(template_token.split(_MASK)):
+                if piece_index:
+                    name = f"v{len(values) + 1}"
+                    values[name] = next(masked_iter, "")
+                    part.append(f"{{{{{name}}}}}")
+                part.append(piece)
+            skeleton_parts.append("".join(part))
+
+        if not values:
+            return None
+        return TemplateCandidate(" ".join(skeleton_parts), values, occurrences)
+
+    def _match_cluster(self, tokens: list) -> _Cluster:
+        """查找相似的聚类；仅在类玩家名位置不同时合并，并把该位置改为通配"""
+        group = self._clusters.setdefault(len(tokens), [])
+        for cluster in group:
+            same = 0
+            differing = []
+            for position, (a, b) in enumerate(zip(cluster.tokens, tokens)):
+                if a is None or b is None or a == b:
+                    same += 1
+                else:
+                    differing.append(position)
+            if same / len(tokens) < self.MIN_SIMILARITY:
+                continue
+            # 只在已知玩家名（或带数字/下划线的类玩家名）处合并：首字母大写的普通单词
+            # （如 "Red team wins" 与 "Blue team wins"）需要翻译，不能作为变量原样代入
+            if all(_MASK not in tokens[p] and _MASK not in cluster.tokens[p]
+                   and self._is_name(tokens[p]) and self._is_name(cluster.tokens[p])
+                   for p in differing):
+                for p in differing:
+                    cluster.tokens[p] = None
+                for p, token in enumerate(tokens):
+                    if token is None:
+                        cluster.tokens[p] = None
+                return cluster
+
+        if len(group) >= self.MAX_CLUSTERS_PER_LENGTH:
+            # 淘汰出现次数最少的聚类，防止被一次性消息撑满
+            group.remove(min(group, key=lambda c: c.count))
+        cluster = _Cluster(list(tokens))
+        group.append(cluster)
+        return cluster
+
+    # ------------------------------------------------------------------
+    # 模板状态
+    # ------------------------------------------------------------------
+
+    def is_ready(self, candidate: TemplateCandidate) -> bool:
+        """骨架是否已达到出现阈值且未被拒绝"""
+        with self._lock:
+            rejected = candidate.skeleton in self._rejected
+            if rejected:
+                self._rejected.move_to_end(candidate.skeleton)
+        return not rejected and candidate.occurrences >= self.min_occurrences
+
+    def reject(self, skeleton: str) -> None:
+        """模板翻译丢失变量等情况下拒绝该骨架，之后不再尝试整体翻译"""
+        with self._lock:
+            self._rejected[skeleton] = None
+            self._rejected.move_to_end(skeleton)
+            if len(self._rejected) > self.MAX_REJECTED:
+                self._rejected.popitem(last=False)
+        logger.debug(f"[TemplateMiner] Skeleton rejected: {skeleton}")
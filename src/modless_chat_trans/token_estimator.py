@@ -0,0 +1,171 @@
+# Copyright (C) 2025 LiJiaHua1024
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+本地 token 数估算（无需网络、无需分词表）。
+
+按文字种类分段，用各自的系数估算，系数取常见 BPE 分词器（cl100k / o200k 一类）的典型比例并略偏高，
+用于上下文预算等只需要量级准确的场合：
+- 拉丁字母单词：约 6 个字母 1 个 token（常用短词 1 个）
+- 数字：每 3 位 1 个 token
+- 汉字：每字约 1.2 个 token；假名、谚文：每字约 1 个 token
+- 其他文字（西里尔、希腊、阿拉伯、泰文等）：约 3 个字符 1 个 token
+- 标点符号：每个 1 个 token；BMP 以外的字符（emoji 等）每个 2 个 token
+- 换行：每个 1 个 token；空格并入后面的单词，不单独计数
+
+output_token_budget() 按原文估算译文所需的 max_tokens：原文 token 数 × 目标语言的膨胀系数 × 安全余量。
+"""
+
+import math
+import re
+import threading
+from typing import Optional
+
+from modless_chat_trans.logger import logger
+
+_RE_SEGMENT = re.compile(
+    r"(?P<latin>[A-Za-zÀ-ɏ]+(?:'[A-Za-z]+)?)"
+    r"|(?P<digits>\d+)"
+    r"|(?P<han>[㐀-䶿一-鿿豈-﫿]+)"
+    r"|(?P<kana>[぀-ヿㇰ-ㇿ가-힯ᄀ-ᇿ]+)"
+    r"|(?P<other>[^\W\d_]+)"
+    r"|(?P<newline>\n)"
+    r"|(?P<space>\s+)"
+    r"|(?P<symbol>.)",
+    re.DOTALL,
+)
+
+# 各类文字的 token/字符 系数
+LATIN_CHARS_PER_TOKEN = 6
+DIGITS_PER_TOKEN = 3
+HAN_TOKENS_PER_CHAR = 1.2
+KANA_TOKENS_PER_CHAR = 1.0
+OTHER_CHARS_PER_TOKEN = 3
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    估算文本的 token 数
+
+    :param text: 任意文本
+    :return: 估算的 token 数（空字符串为 0）
+    """
+    if not text:
+        return 0
+    total = 0.0
+    for match in _RE_SEGMENT.finditer(text):
+        kind = match.lastgroup
+        length = match.end() - match.start()
+        if kind == "latin":
+            total += math.ceil(length / LATIN_CHARS_PER_TOKEN)
+        elif kind == "digits":
+            total += math.ceil(length / DIGITS_PER_TOKEN)
+        elif kind == "han":
+            total += length * HAN_TOKENS_PER_CHAR
+        elif kind == "kana":
+            total += length * KANA_TOKENS_PER_CHAR
+        elif kind == "other":
+            total += math.ceil(length / OTHER_CHARS_PER_TOKEN)
+        elif kind == "newline":
+            total += 1
+        elif kind == "symbol":
+            total += 2 if ord(match.group()) > 0xFFFF else 1
+    return math.ceil(total)
+
+
+# 译文 token 数相对原文估算值的膨胀系数（按目标语言；常见分词器对非拉丁文字切分更细）
+TARGET_EXPANSION = (
+    (("chinese", "zh"), 1.5),
+    (("japanese", "ja"), 1.6),
+    (("korean", "ko"), 1.8),
+    (("english", "en"), 1.2),
+    (("russian", "ukrainian", "ru", "uk"), 2.0),
+    (("arabic", "hebrew", "persian", "ar", "he", "fa"), 2.0),
+    (("greek", "vietnamese", "el", "vi"), 2.2),
+    (("thai", "hindi", "bengali", "th", "hi", "bn"), 3.0),
+)
+DEFAULT_EXPANSION = 1.6
+# 估算本身的误差余量，以及每个请求至少允许的输出 token
+SAFETY_MARGIN = 1.5
+MIN_OUTPUT_TOKENS = 32
+
+
+def expansion_ratio(target_language: str) -> float:
+    """目标语言（语言名或 ISO 639-1 代码）的膨胀系数"""
+    language = (target_language or "").strip().lower()
+    for names, ratio in TARGET_EXPANSION:
+        if language in names or any(len(name) > 2 and name in language for name in names):
+            return ratio
+    return DEFAULT_EXPANSION
+
+
+def output_token_budget(text: str, target_language: str, cap: int, overhead: int = 0) -> int:
+    """
+    按原文估算译文的 max_tokens
+
+    :param text: 原文
+    :param target_language: 目标语言
+    :param cap: 上限（用户配置的 max-tokens）
+    :param overhead: 固定的额外输出（JSON 结构、分析字段等）
+    :return: MIN_OUTPUT_TOKENS ~ cap 之间的 token 数
+    """
+    budget = math.ceil(estimate_tokens(text) * expansion_ratio(target_language) * SAFETY_MARGIN)
+    budget += overhead + MIN_OUTPUT_TOKENS
+    return max(1, min(cap, budget))
+
+
+class TruncationStats:
+    """
+    按估算 max_tokens 请求的截断统计：finish_reason 为 length 的比例，以及提高上限重试后恢复的次数。
+    """
+
+    REPORT_INTERVAL = 100
+
+    def __init__(self):
+        self.responses = 0
+        self.truncated = 0
+        self.recovered = 0
+        self._lock = threading.Lock()
+
+    def record(self, truncated: bool = False, recovered: bool = False) -> None:
+        with self._lock:
+            self.responses += 1
+            self.truncated += int(truncated)
+            self.recovered += int(recovered)
+            should_report = self.responses % self.REPORT_INTERVAL == 0
+        if truncated or should_report:
+            logger.info(f"[TokenBudget] {self.summary()}")
+
+    @property
+    def rate(self) -> Optional[float]:
+        """截断比例；尚无请求时为 None"""
+        with self._lock:
+            return self.truncated / self.responses if self.responses else None
+
+    def snapshot(self) -> dict:
+        rate = self.rate
+        with self._lock:
+            return {
+                "responses": self.responses,
+                "truncated": self.truncated,
+                "recovered": self.recovered,
+                "rate": rate,
+            }
+
+    def summary(self) -> str:
+        stats = self.snapshot()
+        rate = "n/a" if stats["rate"] is None else f"{stats['rate']:.1%}"
+        return (f"{stats['truncated']} of {stats['responses']} responses hit the estimated max_tokens "
+                f"(truncation rate {rate}), {stats['recovered']} recovered by retrying with the configured limit")
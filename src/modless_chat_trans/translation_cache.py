@@ -0,0 +1,550 @@
+# Copyright (C) 2025 LiJiaHua1024
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+两级翻译缓存：进程内 LRU（内存层）在前，diskcache SQLite（磁盘层）在后。
+
+- 读取：先查内存层，未命中再以单次查询读取磁盘层，命中后提升到内存层；
+- 写入：立即写入内存层，磁盘写入经有界队列交给后台线程批量提交（write-behind），
+  提交前的条目保留在待写表中，读取始终能看到自己的写入；
+- 启动时按 access_count 把最热的 N 条预热到内存层；
+- 内存层命中不访问 SQLite，对应的 access_count 增量累积后批量写回，
+  保证 LFU 驱逐、不常用缓存清理与 Pre-TTS 排名仍然准确。
+
+条目按命名空间（语言对、服务/模型系列、提示词与术语表版本，见 Translator.cache_namespace）分区：
+磁盘键为 "命名空间\x1f原文"，命名空间同时写入 diskcache 的 tag 列，用于分区统计与整体驱逐。
+"""
+
+import queue
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional
+
+from diskcache import Cache
+
+from modless_chat_trans.logger import logger
+from modless_chat_trans.value_codec import ValueCodec, available_method
+
+NAMESPACE_SEPARATOR = "\x1f"
+
+
+def make_key(namespace: str, text: str) -> str:
+    return f"{namespace}{NAMESPACE_SEPARATOR}{text}"
+
+
+def split_key(key: str) -> tuple[str, str]:
+    """拆分磁盘键为 (命名空间, 原文)；旧版无命名空间的键返回 ("", 键)"""
+    namespace, separator, text = key.partition(NAMESPACE_SEPARATOR)
+    return (namespace, text) if separator else ("", key)
+
+
+def supports_sql(disk) -> bool:
+    """磁盘层是否为 diskcache（SQLite），清理、导出、排名等按 SQL 扫描的功能依赖于此"""
+    return isinstance(disk, Cache)
+
+
+def namespace_target(namespace: str) -> str:
+    """命名空间中的目标语言（小写）"""
+    languages = namespace.split("|", 1)[0]
+    return languages.partition(">")[2]
+
+
+@dataclass
+class TierStats:
+    """单层缓存的命中统计"""
+    hits: int = 0
+    misses: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+class TranslationCache:
+    """
+    线程安全的两级翻译缓存（键为占位符形式的原文，值为译文）。
+    """
+
+    ACCESS_FLUSH_THRESHOLD = 256  # 累积多少次内存层命中后批量写回 access_count
+    WRITE_BATCH_SIZE = 100        # 后台写入线程单个事务最多提交的条目数
+    WRITE_INTERVAL = 0.05         # 批次收集的最长等待时间（秒）
+    WRITE_QUEUE_SIZE = 10000      # 写入队列上限，写满时写入方阻塞等待（背压）
+
+    def __init__(self, disk: Cache, memory_size: int = 4096):
+        """
+        :param disk:        磁盘层（diskcache.Cache）
+        :param memory_size: 内存层最多保留的条目数（0 = 禁用内存层）
+        """
+        self.disk = disk
+        self.memory_size = max(0, memory_size)
+        # 磁盘层的值压缩（默认关闭，见 enable_compression）
+        self.codec = ValueCodec(getattr(disk, "directory", None))
+        self.memory_stats = TierStats()
+        self.disk_stats = TierStats()
+        self.shared_stats = TierStats()
+        # 可选的第三层：局域网共享缓存（shared_cache.SharedCacheClient）
+        self.shared = None
+        self.namespace_stats: dict[str, TierStats] = {}  # 各命名空间的总体命中（任一层）
+        self._memory: OrderedDict[str, str] = OrderedDict()
+        self._pending_access: dict[str, int] = {}
+        self._pending_total = 0
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        # write-behind：已入队但尚未提交到磁盘层的写入（键 -> 值）
+        self._pending_writes: dict[str, str] = {}
+        self._write_queue: queue.Queue = queue.Queue(maxsize=self.WRITE_QUEUE_SIZE)
+        self._writer: Optional[threading.Thread] = None
+        self._writer_lock = threading.Lock()
+
+    # ------------------------------------------------------------------
+    # 读写
+    # ------------------------------------------------------------------
+
+    def get(self, namespace: str, text: str) -> Optional[str]:
+        """读取译文；两级均未命中时返回 None"""
+        key = make_key(namespace, text)
+        flush = False
+        with self._lock:
+            stats = self._stats_for(namespace)
+            value = self._memory.get(key)
+            if value is not None:
+                self._memory.move_to_end(key)
+            elif key in self._pending_writes:
+                # 已被内存层淘汰但尚未落盘的写入
+                value = self._pending_writes[key]
+                self._admit(key, value)
+            if value is not None:
+                self.memory_stats.hits += 1
+                stats.hits += 1
+                self._pending_access[key] = self._pending_access.get(key, 0) + 1
+                self._pending_total += 1
+                flush = self._pending_total >= self.ACCESS_FLUSH_THRESHOLD
+            else:
+                self.memory_stats.misses += 1
+        if value is not None:
+            if flush:
+                self._queue_access_counts()
+            return value
+
+        # 单次查询（diskcache 自身会更新 access_count）
+        value = self.codec.decode(self.disk.get(key))
+        with self._lock:
+            if value is not None:
+                self.disk_stats.hits += 1
+                stats.hits += 1
+                self._admit(key, value)
+                return value
+            self.disk_stats.misses += 1
+            shared = self.shared
+            if shared is None:
+                stats.misses += 1
+                return None
+
+        value = shared.get(namespace, text)
+        with self._lock:
+            if value is None:
+                self.shared_stats.misses += 1
+                stats.misses += 1
+                return None
+            self.shared_stats.hits += 1
+            stats.hits += 1
+        # 队友翻译过的条目保存到本地，不再回传
+        self._store(key, namespace, value)
+        return value
+
+    def set(self, namespace: str, text: str, value: str) -> None:
+        """写入内存层，把磁盘写入交给后台线程，并上传到共享缓存（如已配置）"""
+        key = make_key(namespace, text)
+        self._store(key, namespace, value)
+        shared = self.shared
+        if shared is not None:
+            shared.put(namespace, text, value)
+
+    def add(self, namespace: str, text: str, value: str) -> bool:
+        """仅在本地没有该条目时写入（不上传到共享缓存）；返回是否写入"""
+        key = make_key(namespace, text)
+        with self._lock:
+            if key in self._memory or key in self._pending_writes:
+                return False
+        if key in self.disk:
+            return False
+        self._store(key, namespace, value)
+        return True
+
+    def _store(self, key: str, namespace: str, value: str) -> None:
+        with self._lock:
+            self._admit(key, value)
+            self._pending_writes[key] = value
+        self._ensure_writer()
+        self._write_queue.put((key, namespace, value))
+
+    def invalidate(self, keys=None) -> None:
+        """从内存层移除指定键（磁盘层条目被删除后调用）；keys 为 None 时清空内存层"""
+        with self._lock:
+            if keys is None:
+                self._memory.clear()
+                self._pending_access.clear()
+                self._pending_total = 0
+                return
+            for key in keys:
+                self._memory.pop(key, None)
+                self._pending_total -= self._pending_access.pop(key, 0)
+
+    def _stats_for(self, namespace: str) -> TierStats:
+        """调用方需持有 _lock"""
+        stats = self.namespace_stats.get(namespace)
+        if stats is None:
+            stats = self.namespace_stats[namespace] = TierStats()
+        return stats
+
+    def _admit(self, key: str, value: str) -> None:
+        """调用方需持有 _lock"""
+        if not self.memory_size:
+            return
+        self._memory[key] = value
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_size:
+            self._memory.popitem(last=False)
+
+    # ------------------------------------------------------------------
+    # 后台写入（write-behind）
+    # ------------------------------------------------------------------
+
+    def _ensure_writer(self) -> None:
+        if self._writer is not None and self._writer.is_alive():
+            return
+        with self._writer_lock:
+            if self._writer is None or not self._writer.is_alive():
+                self._writer = threading.Thread(target=self._write_loop, name="cache-writer", daemon=True)
+                self._writer.start()
+
+    def _write_loop(self) -> None:
+        """收集一批写入（最多 WRITE_BATCH_SIZE 条或等待 WRITE_INTERVAL 秒），在单个事务中提交"""
+        while True:
+            item = self._write_queue.get()
+            if item is None:
+                self._write_queue.task_done()
+                return
+            batch = [item]
+            deadline = time.monotonic() + self.WRITE_INTERVAL
+            stop = False
+            while len(batch) < self.WRITE_BATCH_SIZE:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._write_queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is None:
+                    stop = True
+                    break
+                batch.append(item)
+
+            self._commit(batch)
+            for _ in range(len(batch) + stop):
+                self._write_queue.task_done()
+            if stop:
+                return
+
+    def _commit(self, batch: list) -> None:
+        # 队列中的元组为写入 (键, 命名空间, 值)，字典为 access_count 增量（见 _queue_access_counts）
+        writes = [item for item in batch if isinstance(item, tuple)]
+        access_counts = [item for item in batch if isinstance(item, dict)]
+        try:
+            with self.disk.transact():
+                for key, namespace, value in writes:
+                    self.disk.set(key, self.codec.encode(value), tag=namespace)
+                # 写入在前：增量对应的条目可能刚在同一批中写入
+                for pending in access_counts:
+                    self._apply_access_counts(pending)
+        except Exception as e:
+            logger.warning(f"Failed to write {len(writes)} translation cache entries "
+                           f"and {len(access_counts)} access count batches: {e}")
+        with self._lock:
+            for key, _, value in writes:
+                # 同一键在提交期间被再次写入时保留较新的值
+                if self._pending_writes.get(key) == value:
+                    del self._pending_writes[key]
+
+    def flush_writes(self) -> None:
+        """阻塞直到已入队的写入全部提交"""
+        if self._writer is not None:
+            self._write_queue.join()
+
+    def _stop_writer(self) -> None:
+        with self._writer_lock:
+            writer, self._writer = self._writer, None
+        if writer is not None and writer.is_alive():
+            self._write_queue.put(None)
+            writer.join()
+
+    # ------------------------------------------------------------------
+    # 预热与 access_count 写回
+    # ------------------------------------------------------------------
+
+    def configure(self, memory_size: int) -> None:
+        """调整内存层容量（缩小时淘汰最久未使用的条目）"""
+        with self._lock:
+            self.memory_size = max(0, memory_size)
+            while len(self._memory) > self.memory_size:
+                self._memory.popitem(last=False)
+
+    def warm(self, count: int, namespace: str) -> int:
+        """
+        把指定命名空间中 access_count 最高的 count 条预热到内存层（只读取原样存储的字符串条目）。
+
+        :return: 实际预热的条目数
+        """
+        count = min(count, self.memory_size)
+        if count <= 0 or not supports_sql(self.disk):
+            return 0
+        # raw = 1：键原样存储；mode = 1：值原样存储（diskcache 对短字符串的存储方式）
+        rows = self.disk._sql(
+            'SELECT key, value FROM Cache WHERE tag = ? AND raw = 1 AND mode = 1 '
+            'ORDER BY access_count DESC LIMIT ?',
+            (namespace, count),
+        ).fetchall()
+        admitted = 0
+        with self._lock:
+            # 由冷到热依次放入，最热的条目位于 LRU 末尾
+            for key, value in reversed(rows):
+                value = self.codec.decode(value)
+                if isinstance(key, str) and isinstance(value, str):
+                    self._admit(key, value)
+                    admitted += 1
+        logger.info(f"Translation cache warmed: {admitted} entries loaded into memory")
+        return admitted
+
+    # ------------------------------------------------------------------
+    # 值压缩
+    # ------------------------------------------------------------------
+
+    COMPRESSION_SAMPLES = 5000  # 训练字典使用的样本数（按读取次数从高到低）
+
+    def enable_compression(self, method: str, dict_size: int = 16 * 1024, min_samples: int = 1000) -> int:
+        """
+        按配置启用磁盘层值压缩；还没有该方式的字典且缓存条目足够时，用当前缓存内容训练一个。
+
+        :param method:      "off" / "auto" / "zstd" / "zlib"
+        :param dict_size:   训练的字典大小（字节）
+        :param min_samples: 训练字典所需的最少条目数；不足时暂不压缩，下次启动再尝试
+        :return: 使用的字典版本号，未启用压缩时为 0
+        """
+        method = available_method(method)
+        if method is None or not supports_sql(self.disk):
+            self.codec.activate(None)
+            return 0
+        dict_id = self.codec.latest_dictionary(method)
+        if not dict_id:
+            samples = self.sample_values(self.COMPRESSION_SAMPLES)
+            if len(samples) < min_samples:
+                logger.info(f"Translation cache compression waits for {min_samples} entries "
+                            f"to train a dictionary (have {len(samples)})")
+                self.codec.activate(None)
+                return 0
+            dict_id = self.codec.train(samples, method, dict_size)
+        self.codec.activate(method, dict_id)
+        return dict_id
+
+    def sample_values(self, limit: int) -> list:
+        """读取次数最多的 limit 条译文（已解码）"""
+        rows = self.disk._sql(
+            'SELECT value FROM Cache WHERE raw = 1 AND mode = 1 AND tag IS NOT NULL '
+            'ORDER BY access_count DESC LIMIT ?',
+            (limit,),
+        ).fetchall()
+        return [value for value in (self.codec.decode(row[0]) for row in rows) if isinstance(value, str)]
+
+    def recompress(self, after_rowid: int, limit: int) -> tuple[int, int, int]:
+        """
+        用当前字典压缩一批尚未压缩的条目（按 rowid 顺序，一个事务）。
+
+        :param after_rowid: 从该 rowid 之后开始
+        :return: (本批最后的 rowid, 扫描数, 改写数)；扫描数为 0 表示已完成
+        """
+        if self.codec.method is None:
+            return after_rowid, 0, 0
+        with self.disk.transact():
+            rows = self.disk._sql(
+                "SELECT rowid, value FROM Cache WHERE rowid > ? AND raw = 1 AND mode = 1 "
+                "AND typeof(value) = 'text' AND tag IS NOT NULL ORDER BY rowid LIMIT ?",
+                (after_rowid, limit),
+            ).fetchall()
+            rewritten = 0
+            for rowid, value in rows:
+                encoded = self.codec.encode(value)
+                if isinstance(encoded, bytes):
+                    self.disk._sql('UPDATE Cache SET value = ? WHERE rowid = ?', (encoded, rowid))
+                    rewritten += 1
+        last_rowid = rows[-1][0] if rows else after_rowid
+        return last_rowid, len(rows), rewritten
+
+    def _queue_access_counts(self) -> None:
+        """把累积的 access_count 增量交给后台写入线程（读取路径上调用，不等待磁盘写入）"""
+        if not supports_sql(self.disk):
+            return
+        with self._lock:
+            pending = self._pending_access
+            self._pending_access = {}
+            self._pending_total = 0
+        if not pending:
+            return
+        self._ensure_writer()
+        try:
+            self._write_queue.put_nowait(pending)
+        except queue.Full:
+            # 写入队列已满：增量放回，下次再交给写入线程
+            with self._lock:
+                for key, hits in pending.items():
+                    self._pending_access[key] = self._pending_access.get(key, 0) + hits
+                self._pending_total += sum(pending.values())
+
+    def _apply_access_counts(self, pending: dict) -> None:
+        """调用方需在磁盘层事务中调用"""
+        for key, hits in pending.items():
+            self.disk._sql(
+                'UPDATE Cache SET access_count = access_count + ? WHERE key = ? AND raw = 1',
+                (hits, key),
+            )
+
+    def flush_access_counts(self) -> int:
+        """
+        把内存层命中累积的 access_count 增量批量写回磁盘层；返回写回的键数。
+        会等待写入队列清空（维护、导出与退出时调用），读取路径上使用 _queue_access_counts。
+        """
+        self.flush_writes()
+        with self._flush_lock:
+            with self._lock:
+                pending = self._pending_access
+                self._pending_access = {}
+                self._pending_total = 0
+            if not pending or not supports_sql(self.disk):
+                return 0
+            try:
+                with self.disk.transact():
+                    self._apply_access_counts(pending)
+            except Exception as e:
+                logger.warning(f"Failed to flush translation cache access counts: {e}")
+                return 0
+            return len(pending)
+
+    # ------------------------------------------------------------------
+    # 命名空间
+    # ------------------------------------------------------------------
+
+    def adopt_legacy_entries(self, namespace: str) -> int:
+        """
+        把旧版无命名空间的条目归入指定命名空间（就地改写键与 tag，只需执行一次）。
+        旧条目均由升级前的配置生成，因此归入升级后首次启动时的玩家翻译命名空间。
+
+        :return: 归入的条目数
+        """
+        if not supports_sql(self.disk):
+            return 0
+        prefix = make_key(namespace, "")
+        with self.disk.transact():
+            adopted = self.disk._sql(
+                'UPDATE OR IGNORE Cache SET key = ? || key, tag = ? '
+                'WHERE raw = 1 AND tag IS NULL AND instr(key, ?) = 0',
+                (prefix, namespace, NAMESPACE_SEPARATOR),
+            ).rowcount
+            # 与已有命名空间条目冲突而未能改写的旧条目直接删除
+            self.disk._sql(
+                'DELETE FROM Cache WHERE raw = 1 AND tag IS NULL AND mode = 1 AND instr(key, ?) = 0',
+                (NAMESPACE_SEPARATOR,),
+            )
+        if adopted:
+            logger.info(f"Adopted {adopted} legacy translation cache entries into namespace '{namespace}'")
+        return adopted
+
+    def evict_namespace(self, namespace: str) -> int:
+        """删除某个命名空间的全部条目；返回删除数"""
+        self.flush_writes()
+        removed = self.disk.evict(namespace)
+        prefix = make_key(namespace, "")
+        with self._lock:
+            stale = [key for key in self._memory if key.startswith(prefix)]
+        self.invalidate(stale)
+        logger.info(f"Evicted translation cache namespace '{namespace}': {removed} entries")
+        return removed
+
+    def namespaces(self) -> dict:
+        """
+        各命名空间的磁盘条目数、估算占用字节、累计读取次数，以及本次运行的命中统计。
+        """
+        self.flush_access_counts()
+        if not supports_sql(self.disk):
+            return {}
+        rows = self.disk._sql(
+            'SELECT tag, COUNT(*), SUM(size + length(CAST(key AS BLOB)) + COALESCE(length(CAST(value AS BLOB)), 0)), '
+            'SUM(access_count) FROM Cache GROUP BY tag'
+        ).fetchall()
+        result = {}
+        with self._lock:
+            for tag, entries, size, reads in rows:
+                stats = self.namespace_stats.get(tag or "", TierStats())
+                result[tag or ""] = {
+                    "entries": entries,
+                    "size": size or 0,
+                    "reads": reads or 0,
+                    "hits": stats.hits,
+                    "misses": stats.misses,
+                }
+        return result
+
+    # ------------------------------------------------------------------
+    # 统计
+    # ------------------------------------------------------------------
+
+    def stats(self) -> dict:
+        """各层命中统计"""
+        with self._lock:
+            return {
+                "memory": {
+                    "hits": self.memory_stats.hits,
+                    "misses": self.memory_stats.misses,
+                    "hit_rate": self.memory_stats.hit_rate,
+                    "entries": len(self._memory),
+                },
+                "disk": {
+                    "hits": self.disk_stats.hits,
+                    "misses": self.disk_stats.misses,
+                    "hit_rate": self.disk_stats.hit_rate,
+                },
+                "shared": {
+                    "hits": self.shared_stats.hits,
+                    "misses": self.shared_stats.misses,
+                    "hit_rate": self.shared_stats.hit_rate,
+                    "enabled": self.shared is not None,
+                },
+            }
+
+    def close(self) -> None:
+        """提交未落盘的写入与 access_count 并记录统计（退出时调用）"""
+        if self.shared is not None:
+            self.shared.close()
+        self._stop_writer()
+        self.flush_access_counts()
+        stats = self.stats()
+        if stats["memory"]["hits"] or stats["disk"]["hits"] or stats["disk"]["misses"]:
+            logger.info(
+                f"Translation cache stats: memory {stats['memory']['hits']} hits / "
+                f"{stats['memory']['misses']} misses, disk {stats['disk']['hits']} hits / "
+                f"{stats['disk']['misses']} misses"
+            )
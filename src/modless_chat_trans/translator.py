@@ -21,18 +21,24 @@ import hmac
 import base64
 import hashlib
 from email.utils import formatdate
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
 from enum import Enum
 from typing import Dict, Callable, Set
 from urllib.parse import quote
 import lazy_loader as lazy
 from modless_chat_trans.logger import logger
 from modless_chat_trans.config import ServiceType, FallbackStrategy
+from modless_chat_trans.circuit_breaker import CircuitBreakers, CircuitState, is_timeout
+from modless_chat_trans.latency_tracker import HedgeStats, LatencyTracker
+from modless_chat_trans.llm_connections import get_llm_connections
+from modless_chat_trans.rate_limiter import RateLimiters, RateLimitTimeout
+from modless_chat_trans.token_estimator import TruncationStats, estimate_tokens, output_token_budget
 
 
 def _http():
-    """懒加载 requests，避免拖慢程序启动"""
-    import requests
-    return requests
+    """传统翻译服务使用的 HTTP 连接池（接口同 requests 模块；requests 在首次请求时才导入，避免拖慢程序启动）"""
+    from modless_chat_trans.http_pool import get_http_pool
+    return get_http_pool()
 
 
 class MessageType(Enum):
@@ -56,6 +62,77 @@ MESSAGE_TYPE_MODES: Dict[MessageType, Set[TranslationMode]] = {
     MessageType.SEND: {TranslationMode.NORMAL, TranslationMode.DEEP, TranslationMode.RAGE},
 }
 
+# 思考类模型的思考 token 计入 max_tokens，无法按译文长度估算，始终使用配置的上限
+_RE_REASONING_MODEL = re.compile(r"(?:^|/)(?:o\d|gpt-5)|gemini-(?:2\.5|3)|reasoner|thinking|deepseek-r1|qwq", re.IGNORECASE)
+# Deep 模式 JSON 输出中分析字段的额外 token
+DEEP_OUTPUT_OVERHEAD = 400
+# 批量翻译 JSON 数组中每条译文的引号、逗号等
+BATCH_ITEM_OVERHEAD = 4
+
+# 按估算 max_tokens 请求的截断统计
+truncation_stats = TruncationStats()
+# 各服务商/模型成功请求的延迟（HEDGED 策略据此决定对冲时机），以及对冲统计
+llm_latency = LatencyTracker()
+hedge_stats = HedgeStats()
+# 各服务商/模型的熔断器：主模型熔断时直接使用备用模型
+circuit_breakers = CircuitBreakers()
+# 各服务商 + API Key 的客户端限流器（RPM / TPM 与服务商的限流响应头）
+rate_limiters = RateLimiters()
+
+# 通过 litellm 支持 Anthropic cache_control 提示的服务商（模型为 Claude 时显式标记缓存断点）
+_CACHE_CONTROL_PROVIDERS = frozenset({"Anthropic", "OpenRouter", "Amazon Bedrock", "Google Vertex AI"})
+
+
+def cached_token_share(usage: dict | None) -> float | None:
+    """
+    输入 token 中命中服务商提示词缓存的比例（0~1）；usage 中没有输入 token 数时返回 None。
+    litellm 把各服务商的缓存用量统一为 prompt_tokens_details.cached_tokens（Anthropic 另有 cache_read_input_tokens）。
+    """
+    if not usage or not usage.get("prompt_tokens"):
+        return None
+    details = usage.get("prompt_tokens_details") or {}
+    cached = details.get("cached_tokens") or usage.get("cache_read_input_tokens") or 0
+    return min(1.0, cached / usage["prompt_tokens"])
+
+
+def metrics_snapshot() -> dict:
+    """LLM 请求的运行指标：熔断器状态、延迟分位数、对冲与截断统计"""
+    return {
+        "circuit_breakers": circuit_breakers.snapshot(),
+        "latency": llm_latency.snapshot(),
+        "hedge": hedge_stats.snapshot(),
+        "truncation": truncation_stats.snapshot(),
+        "rate_limits": rate_limiters.snapshot(),
+    }
+
+
+def _llm_key(provider: str | None, model: str) -> str:
+    """延迟统计与熔断器使用的服务商/模型键"""
+    return f"{provider or 'OpenAI'}/{model}"
+
+
+def _prompt_tokens(messages: list[dict]) -> int:
+    """请求 messages 的估算输入 token 数（内容可以是字符串或内容块列表）"""
+    total = 0
+    for message in messages:
+        content = message.get("content") or ""
+        if isinstance(content, list):
+            content = "".join(block.get("text", "") for block in content)
+        total += estimate_tokens(content)
+    return total
+
+
+def _is_provider_failure(error: Exception) -> bool:
+    """
+    请求失败是否计入熔断器：请求本身有误（400，如内容审核、上下文超长）与服务商的可用性无关，
+    在客户端限流队列中等到超时的请求也没有发出。
+    """
+    return not isinstance(error, (litellm.BadRequestError, RateLimitTimeout))
+
+
+# 模型版本后缀（日期快照、latest/preview 等），缓存命名空间按去除后缀的模型系列划分
+_RE_MODEL_VERSION_SUFFIX = re.compile(r'[-_@:](?:\d{4}-?\d{2}-?\d{2}|\d{4}|v\d+(?:\.\d+)*|latest|preview|exp)$')
+
 _OPENROUTER_NATIVE_SUFFIXES = frozenset({"nitro", "floor"})
 _OPENROUTER_SORT_KEYWORDS = frozenset({"price", "throughput", "latency"})
 
@@ -168,6 +245,51 @@ _llm_import_lock = threading.Lock()
 _ts_import_lock = threading.Lock()
 
 
+# 竞速与对冲请求共用的常驻线程池。落败的请求在后台运行到超时为止（不阻塞调用方），
+# 因此除了每个翻译线程同时发出的两个请求，还为之前消息遗留的请求预留同样多的线程
+_REQUESTS_PER_WORKER = 2
+_LEFTOVER_HEADROOM = 2
+_request_pool: ThreadPoolExecutor | None = None
+_request_pool_size = 0
+_requests_in_flight = 0
+_request_pool_lock = threading.Lock()
+
+
+def _get_request_pool() -> ThreadPoolExecutor:
+    global _request_pool, _request_pool_size
+    if _request_pool is None:
+        with _request_pool_lock:
+            if _request_pool is None:
+                from modless_chat_trans.log_monitor import OrderedProcessor
+                _request_pool_size = OrderedProcessor.MAX_WORKERS * (_REQUESTS_PER_WORKER + _LEFTOVER_HEADROOM)
+                _request_pool = ThreadPoolExecutor(max_workers=_request_pool_size, thread_name_prefix="llm-request")
+    return _request_pool
+
+
+def _submit_request(fn: Callable, *args) -> Future:
+    """提交到共用线程池并计入进行中的请求数"""
+    global _requests_in_flight
+    pool = _get_request_pool()
+    with _request_pool_lock:
+        _requests_in_flight += 1
+
+    def on_done(_):
+        global _requests_in_flight
+        with _request_pool_lock:
+            _requests_in_flight -= 1
+
+    future = pool.submit(fn, *args)
+    future.add_done_callback(on_done)
+    return future
+
+
+def _request_pool_has_room(needed: int) -> bool:
+    """共用线程池能否立即运行 needed 个请求（否则新请求会排在遗留请求之后，排队时间计入延迟）"""
+    _get_request_pool()
+    with _request_pool_lock:
+        return _requests_in_flight + needed <= _request_pool_size
+
+
 def ensure_ts_loaded():
     """确保传统翻译服务依赖已加载（translators 及其使用的 requests）"""
     with _ts_import_lock:
@@ -206,6 +328,14 @@ def get_supported_languages(service):
     raise ValueError(f"No supported languages found for traditional service '{service}'")
 
 
+def model_family(model: str) -> str:
+    """模型系列：去掉服务商前缀与版本后缀（如 openai/gpt-4o-2024-08-06 -> gpt-4o）"""
+    family = (model or "").strip().lower().rsplit("/", 1)[-1]
+    while (stripped := _RE_MODEL_VERSION_SUFFIX.sub("", family)) != family:
+        family = stripped
+    return family
+
+
 class _LazyLanguageDict(dict):
     def __getitem__(self, key):
         if key not in self:
@@ -275,8 +405,19 @@ class Translator:
                 or "anthropic" in model.lower()
         )
 
-        # 判断是否为 Gemini 3 系列模型
-        self._is_gemini3 = "gemini-3" in model.lower()
+        self._cache_namespaces: dict[tuple[str, str], str] = {}
+
+        # 系统提示词只取决于 (模式, 消息类型, 是否有上下文)，构造时一次性生成，每次请求直接取用；
+        # 服务商之间的差异（Anthropic 的 XML 标签、缓存断点）只体现在 user message 中
+        self._system_prompts: dict[tuple[TranslationMode, MessageType, bool], str] = {
+            (mode, message_type, has_context): self._compose_system_prompt(mode, message_type, has_context)
+            for message_type, modes in MESSAGE_TYPE_MODES.items()
+            for mode in modes
+            for has_context in (False, True)
+        }
+        self._batch_system_prompts = {
+            has_context: self._build_batch_system_prompt(has_context) for has_context in (False, True)
+        }
 
         logger.info(f"Initialized Translator")
         logger.debug(f"Literal glossary terms loaded: {len(self._literal_glossary)}")
@@ -303,6 +444,7 @@ class Translator:
             target_language: str,
             message_type: MessageType = MessageType.PLAYER,
             context_messages: list = None,
+            on_partial: Callable[[str], None] = None,
     ) -> dict | None:
         """
         Public API: 带历史上下文的单条翻译。
@@ -312,6 +454,7 @@ class Translator:
         :param target_language: 目标语言
         :param message_type: 消息类型
         :param context_messages: 历史上下文 messages 列表（可直接拼入 litellm），为 None/[] 则退化为无上下文
+        :param on_partial: 流式翻译回调，参数为当前已生成的译文；仅 LLM 服务的纯文本输出生效（Deep 模式的 JSON 输出不流式）
         """
         context_messages = context_messages or []
         return self._dispatch_translation(
@@ -319,6 +462,7 @@ class Translator:
             mode=TranslationMode.NORMAL,
             message_type=message_type,
             context_messages=context_messages,
+            on_partial=on_partial,
         )
 
     def translate_batch_with_context(
@@ -352,6 +496,12 @@ class Translator:
         if effective_mode == TranslationMode.DEEP:
             return None
 
+        # 主模型已熔断时逐条翻译，由备用模型接管
+        llm_cfg = self.translation_service_config.llm
+        breaker = circuit_breakers.get(_llm_key(llm_cfg.provider, llm_cfg.model))
+        if self._has_fallback() and breaker.state != CircuitState.CLOSED:
+            return None
+
         try:
             return self._execute_llm_batch_translation(
                 texts, source_language, target_language,
@@ -377,8 +527,108 @@ class Translator:
             message_type=message_type
         )
 
+    def llm_endpoints(self) -> list:
+        """主模型与备用模型的 (服务商, API 地址)，用于预连接；非 LLM 服务返回空列表"""
+        if self.translation_service_config.service_type != ServiceType.LLM:
+            return []
+        endpoints = [(self.translation_service_config.llm.provider, self.translation_service_config.llm.api_base)]
+        fallback = self.fallback_llm_config
+        if fallback and (fallback.provider or "").strip() and (fallback.model or "").strip():
+            endpoints.append((fallback.provider, fallback.api_base))
+        return endpoints
+
+    def summarize_context(self, previous_summary: str, lines: list, max_tokens: int = 120) -> str:
+        """
+        Public API: 把被剔除的上下文历史合并进滚动摘要（由 context_summarizer 在后台调用）。
+        配置了备用模型时使用备用模型（通常更便宜），否则使用主模型；仅 LLM 服务可用。
+
+        :param previous_summary: 已有摘要（可为空）
+        :param lines: 新剔除的历史行（"HH:MM | [玩家名] 原文"）
+        :param max_tokens: 摘要的最大输出 token 数
+        :return: 新摘要
+        """
+        if self.translation_service_config.service_type != ServiceType.LLM:
+            raise RuntimeError("Context summaries require an LLM translation service")
+        fallback = self.fallback_llm_config
+        if fallback and (fallback.provider or "").strip() and (fallback.model or "").strip():
+            llm_cfg = fallback
+        else:
+            llm_cfg = self.translation_service_config.llm
+        provider = llm_cfg.provider or "OpenAI"
+
+        words = max(10, max_tokens * 2 // 3)
+        history = "\n".join(lines)
+        user_message = (
+            (f"Current summary:\n{previous_summary}\n\n" if previous_summary else "")
+            + f"Earlier chat lines:\n{history}\n\n"
+            f"Write an updated summary in English of at most {words} words."
+        )
+        messages = [
+            {"role": "system", "content": (
+                "You maintain a running summary of a Minecraft chat conversation. It gives a translator "
+                "background on who is talking and about what. Keep player names, ongoing topics, plans, "
+                "trades and unresolved questions; drop greetings, spam and anything no longer relevant. "
+                "Reply with the summary only."
+            )},
+            {"role": "user", "content": user_message},
+        ]
+        # 推理模型的思考 token 计入 max_tokens，按配置的上限请求，避免摘要被截断为空
+        if _RE_REASONING_MODEL.search(llm_cfg.model):
+            max_tokens = max(max_tokens, llm_cfg.max_tokens)
+        llm_params = self._llm_request_params(llm_cfg, provider, llm_cfg.model, messages, max_tokens, self.timeout)
+
+        # 摘要与翻译共用限流额度与熔断状态：熔断期间不发送后台请求，冷却结束后摘要请求可作为探测
+        breaker = circuit_breakers.get(_llm_key(provider, llm_cfg.model))
+        if breaker.state != CircuitState.CLOSED and not breaker.acquire_probe():
+            raise RuntimeError(f"Skipping the context summary while {breaker.name} is {breaker.state.value}")
+        limiter = rate_limiters.get(provider, llm_cfg.api_key, getattr(llm_cfg, "rpm", 0), getattr(llm_cfg, "tpm", 0))
+        try:
+            response = self._complete_rate_limited(lambda params: litellm.completion(**params), llm_params, limiter)
+        except Exception as e:
+            if _is_provider_failure(e):
+                breaker.record_failure(timeout=is_timeout(e))
+            raise
+        breaker.record_success()
+        return (response.choices[0].message.content or "").strip()
+
+    def cache_namespace(self, source_language: str, target_language: str) -> str:
+        """
+        翻译缓存命名空间：语言对 + 服务/模型系列（含 Deep Translate）+ 提示词与术语表版本。
+        任一项变化都使用独立的缓存分区，切换回原配置时原分区仍可直接命中。
+
+        :return: 形如 "english>simplified chinese|openai:gpt-4o|1a2b3c4d" 的字符串
+        """
+        key = (source_language, target_language)
+        namespace = self._cache_namespaces.get(key)
+        if namespace is not None:
+            return namespace
+
+        config = self.translation_service_config
+        if config.service_type == ServiceType.LLM:
+            service = f"{config.llm.provider.lower()}:{model_family(config.llm.model)}"
+            if config.llm.deep_translate:
+                service += "+deep"
+            prompts = "".join((
+                self._build_system_normal_prompt(),
+                self._build_player_normal_prompt(),
+                self._build_deep_prompt() if config.llm.deep_translate else "",
+                self._build_batch_system_prompt(),
+            ))
+        else:
+            service = config.traditional.provider.lower()
+            prompts = ""
+        glossary = json.dumps(sorted(self._literal_glossary.items()), ensure_ascii=False)
+        version = hashlib.sha1(f"{prompts}\x1f{glossary}".encode("utf-8")).hexdigest()[:8]
+
+        languages = f"{self._clean_language_code(source_language).lower() or 'auto'}>" \
+                    f"{self._clean_language_code(target_language).lower()}"
+        namespace = f"{languages}|{service}|{version}"
+        self._cache_namespaces[key] = namespace
+        return namespace
+
     def _dispatch_translation(self, text, source_language, target_language, mode: TranslationMode,
-                              message_type: MessageType, context_messages: list = None):
+                              message_type: MessageType, context_messages: list = None,
+                              on_partial: Callable[[str], None] = None):
         """
         Internal Dispatcher: Coordinates prompt building and execution.
 
@@ -388,6 +638,7 @@ class Translator:
         :param mode: 请求的翻译模式
         :param message_type: 消息类型，用于验证可用模式并选择正确的prompt
         :param context_messages: 历史上下文 messages（将内嵌入 LLM 请求）
+        :param on_partial: 流式翻译回调（见 translate_with_context）
         """
         context_messages = context_messages or []
         if self.translation_service_config.service_type == ServiceType.LLM:
@@ -417,6 +668,8 @@ class Translator:
                 include_terms,
                 message_type,
                 context_messages=context_messages,  # 传入 user prompt
+                # JSON 输出的部分内容无法展示，Deep 模式不流式
+                on_partial=None if expect_json else on_partial,
             )
 
         elif self.translation_service_config.service_type == ServiceType.TRADITIONAL:
@@ -471,7 +724,8 @@ class Translator:
     def _execute_llm_translation(self, text, model, source_language, target_language, provider, system_prompt,
                                  expect_json, include_terms, message_type: MessageType = MessageType.PLAYER,
                                  context_messages: list = None,
-                                 llm_config_override=None, request_timeout=None):
+                                 llm_config_override=None, request_timeout=None,
+                                 on_partial: Callable[[str], None] = None):
         """
         Execution Engine: Handles API calls and response parsing.
 
@@ -487,6 +741,7 @@ class Translator:
         :param context_messages: 历史上下文 messages
         :param llm_config_override: 可选的 LLMS erviceConfig 覆盖（用于备用模型）
         :param request_timeout: 当前请求剩余的超时时间（秒）
+        :param on_partial: 流式翻译回调；设置后以 stream=True 请求，每收到新内容时以已生成的译文调用
         """
         context_messages = context_messages or []
         # 选择有效的 LLM 配置（备用模型配置或主模型配置）
@@ -511,104 +766,64 @@ class Translator:
 
         is_provider_anthropic = provider == "Anthropic"
 
-        # 构建 user message
-        # 如果有历史上下文，先拼接历史，再拼接翻译指令
-        if context_messages:
-            history_content = context_messages[0].get("content", "")
-            if self._is_anthropic:
-                # Anthropic 使用 XML 标签
-                history_block = f"<recent_chat_history>\n{history_content}\n</recent_chat_history>\n\n"
-            else:
-                history_block = f"=== Recent Chat History ===\n{history_content}\n=== End of History ===\n\n---\n\n"
-        else:
-            history_block = ""
+        # 构建 user message：历史上下文在前（见 _prompt_messages），翻译指令、原文与术语在后
+        history_content = context_messages[0].get("content", "") if context_messages else ""
 
         if is_provider_anthropic:
             base_prompt += f".\n<text_to_translate>{text}</text_to_translate>\n\n"
         else:
             base_prompt += f":\n{text}\n\n"
 
-        message = history_block + base_prompt + self._terminology_block(matched_terms, self._is_anthropic)
+        message = base_prompt + self._terminology_block(matched_terms, self._is_anthropic)
 
         # 使用 litellm 统一调用各类大模型
         try:
             # 针对部分 provider 做模型名前缀映射，保持与旧版调用兼容
             provider = provider or "OpenAI"
 
-            # ── OpenRouter 扩展 Model ID 语法解析 ──────────────────────────
-            # 官方原生后缀: :nitro, :floor -> 保持原样，由 OpenRouter 自行处理
-            # 扩展排序后缀: :price, :throughput, :latency -> 通过 extra_body 传递 provider.sort
-            # 自定义 Provider: :amazon-bedrock 或 :amazon-bedrock,google-vertex -> 通过 extra_body 传递 provider.order
-
-            extra_body = None
-
-            if provider == "OpenRouter" and ":" in model:
-                base_model, suffix = model.split(":", 1)
-                suffix_stripped = suffix.strip()
-                suffix_lower = suffix_stripped.lower()
-
-                if suffix_lower in _OPENROUTER_NATIVE_SUFFIXES:
-                    # 官方原生后缀，保持 model 不变，无需额外处理
-                    pass
-                elif suffix_lower in _OPENROUTER_SORT_KEYWORDS:
-                    # 扩展排序语法 -> provider.sort
-                    model = base_model
-                    extra_body = {"provider": {"sort": suffix_lower}}
-                else:
-                    # 自定义 Provider 指定（支持逗号分隔多个）-> provider.order
-                    model = base_model
-                    provider_order = [s for p in suffix_stripped.split(",") if (s := p.strip())]
-                    extra_body = {"provider": {"order": provider_order}}
-
-            # Gemini 3 系列是原生思考模型，思考无法关闭且默认消耗大量输出 token
-            # 显式降级 reasoning 到 minimal effort，避免译文被思考 token 截断
-            if self._is_gemini3 and provider == "OpenRouter":
-                # OpenRouter 通过 extra_body 透传 reasoning 参数
-                extra_body = {**{"reasoning": {"effort": "minimal"}}, **(extra_body or {})}
-                logger.debug(
-                    f"Gemini 3 model ({model}) detected: capping reasoning to minimal effort"
+            # max_tokens 按原文长度估算，配置的 max-tokens 作为上限
+            max_tokens_cap = llm_cfg.max_tokens * (2 if expect_json else 1)
+            if _RE_REASONING_MODEL.search(model):
+                max_tokens = max_tokens_cap
+            else:
+                max_tokens = output_token_budget(
+                    text, target_language, max_tokens_cap,
+                    overhead=DEEP_OUTPUT_OVERHEAD if expect_json else 0,
                 )
-
-            # 为模型名添加提供商前缀（如果尚未添加）
-            prefix = LLM_PROVIDERS_PREFIXES[provider]
-            mapped_model = (
-                model
-                if model.startswith(prefix)
-                else prefix + model
+            messages = self._prompt_messages(
+                system_prompt, history_content, message,
+                cache_hints=self._prompt_cache_hints(provider, model),
+            )
+            llm_params = self._llm_request_params(
+                llm_cfg, provider, model, messages, max_tokens,
+                request_timeout if request_timeout is not None else self.timeout,
             )
 
-            # GPT-5 系列只接受 temperature=1；其它模型继续使用确定性翻译参数。
-            temperature = 1 if re.match(r"^(?:openai/)?gpt-5(?:[-.]|$)", model.lower()) else 0
-            llm_params = {
-                "model": mapped_model,
-                "messages": [
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": message}
-                ],
-                "temperature": temperature,
-                "max_tokens": llm_cfg.max_tokens * (2 if expect_json else 1),
-                "api_key": llm_cfg.api_key,
-                "num_retries": 0,
-            }
-
-            if self._is_gemini3 and provider != "OpenRouter":
-                llm_params["reasoning_effort"] = "minimal"
-                llm_params["drop_params"] = True
-                logger.debug(
-                    f"Gemini 3 model ({model}) detected: sending reasoning_effort=minimal"
-                )
-
-            # API URL 留空自动
-            if api_base := llm_cfg.api_base:
-                llm_params["api_base"] = api_base
+            limiter = rate_limiters.get(
+                provider, llm_cfg.api_key, getattr(llm_cfg, "rpm", 0), getattr(llm_cfg, "tpm", 0),
+            )
 
-            llm_params["timeout"] = request_timeout if request_timeout is not None else self.timeout
+            def send(params):
+                if on_partial is not None:
+                    return self._stream_completion(params, on_partial)
+                return litellm.completion(**params)
 
-            # 注入 OpenRouter 扩展路由参数
-            if extra_body:
-                llm_params["extra_body"] = extra_body
+            def complete(params):
+                return self._complete_rate_limited(send, params, limiter)
 
-            response = litellm.completion(**llm_params)
+            llm_key = _llm_key(provider, llm_cfg.model)
+            breaker = circuit_breakers.get(llm_key)
+            # 没有备用模型（或本身就是备用模型）时请求照常发出：冷却结束后的第一次请求即为探测
+            breaker.acquire_probe()
+            started = time.monotonic()
+            try:
+                response = self._complete_within_budget(complete, llm_params, max_tokens_cap)
+            except Exception as e:
+                if _is_provider_failure(e):
+                    breaker.record_failure(timeout=is_timeout(e))
+                raise
+            breaker.record_success()
+            llm_latency.record(llm_key, time.monotonic() - started)
 
             # litellm 的返回对象与 OpenAI SDK 高度兼容
             content_str = response.choices[0].message.content or ""
@@ -656,10 +871,193 @@ class Translator:
             "usage": usage_info
         }
 
+    @staticmethod
+    def _llm_request_params(llm_cfg, provider: str, model: str, messages: list, max_tokens: int,
+                            timeout: float) -> dict:
+        """
+        构造 litellm 请求参数（单条翻译、批量翻译与上下文摘要共用）。
+
+        :param llm_cfg: 本次请求使用的 LLM 配置（主模型或备用模型）
+        :param provider: 模型提供商
+        :param model: 模型名称（可含 OpenRouter 扩展后缀）
+        :param messages: 请求 messages
+        :param max_tokens: 最大输出 token 数
+        :param timeout: 请求超时（秒）
+        """
+        # ── OpenRouter 扩展 Model ID 语法解析 ──────────────────────────
+        # 官方原生后缀: :nitro, :floor -> 保持原样，由 OpenRouter 自行处理
+        # 扩展排序后缀: :price, :throughput, :latency -> 通过 extra_body 传递 provider.sort
+        # 自定义 Provider: :amazon-bedrock 或 :amazon-bedrock,google-vertex -> 通过 extra_body 传递 provider.order
+
+        extra_body = None
+
+        if provider == "OpenRouter" and ":" in model:
+            base_model, suffix = model.split(":", 1)
+            suffix_stripped = suffix.strip()
+            suffix_lower = suffix_stripped.lower()
+
+            if suffix_lower in _OPENROUTER_NATIVE_SUFFIXES:
+                # 官方原生后缀，保持 model 不变，无需额外处理
+                pass
+            elif suffix_lower in _OPENROUTER_SORT_KEYWORDS:
+                # 扩展排序语法 -> provider.sort
+                model = base_model
+                extra_body = {"provider": {"sort": suffix_lower}}
+            else:
+                # 自定义 Provider 指定（支持逗号分隔多个）-> provider.order
+                model = base_model
+                provider_order = [s for p in suffix_stripped.split(",") if (s := p.strip())]
+                extra_body = {"provider": {"order": provider_order}}
+
+        # Gemini 3 系列是原生思考模型，思考无法关闭且默认消耗大量输出 token
+        # 显式降级 reasoning 到 minimal effort，避免输出被思考 token 截断
+        is_gemini3 = "gemini-3" in model.lower()
+        if is_gemini3 and provider == "OpenRouter":
+            # OpenRouter 通过 extra_body 透传 reasoning 参数
+            extra_body = {**{"reasoning": {"effort": "minimal"}}, **(extra_body or {})}
+            logger.debug(
+                f"Gemini 3 model ({model}) detected: capping reasoning to minimal effort"
+            )
+
+        # 为模型名添加提供商前缀（如果尚未添加）
+        prefix = LLM_PROVIDERS_PREFIXES[provider]
+        mapped_model = (
+            model
+            if model.startswith(prefix)
+            else prefix + model
+        )
+
+        # GPT-5 系列只接受 temperature=1；其它模型继续使用确定性翻译参数。
+        temperature = 1 if re.match(r"^(?:openai/)?gpt-5(?:[-.]|$)", model.lower()) else 0
+        llm_params = {
+            "model": mapped_model,
+            "messages": messages,
+            "temperature": temperature,
+            "max_tokens": max_tokens,
+            "api_key": llm_cfg.api_key,
+            "num_retries": 0,
+            "timeout": timeout,
+        }
+
+        if is_gemini3 and provider != "OpenRouter":
+            llm_params["reasoning_effort"] = "minimal"
+            llm_params["drop_params"] = True
+            logger.debug(
+                f"Gemini 3 model ({model}) detected: sending reasoning_effort=minimal"
+            )
+
+        # API URL 留空自动
+        if api_base := llm_cfg.api_base:
+            llm_params["api_base"] = api_base
+
+        # 注入 OpenRouter 扩展路由参数
+        if extra_body:
+            llm_params["extra_body"] = extra_body
+
+        # 复用常驻连接
+        llm_params.update(get_llm_connections().client_kwargs(provider, llm_cfg.api_base))
+        return llm_params
+
+    @staticmethod
+    def _complete_rate_limited(send: Callable[[dict], object], llm_params: dict, limiter):
+        """
+        经限流器排队后发送请求（排队时间计入请求超时），并按响应头调整限流器；
+        429 时按 Retry-After 暂停，若仍在请求超时之内则排队重试一次。
+
+        :param send: 发送请求并返回 litellm 响应的函数
+        :param llm_params: litellm 参数（含 messages、max_tokens 与 timeout）
+        :param limiter: 该服务商 + API Key 的 RateLimiter
+        """
+        deadline = time.monotonic() + llm_params["timeout"]
+        reserved = _prompt_tokens(llm_params["messages"]) + llm_params["max_tokens"]
+        for attempt in range(2):
+            limiter.acquire(reserved, deadline)
+            try:
+                response = send(dict(llm_params, timeout=deadline - time.monotonic()))
+            except litellm.RateLimitError as e:
+                limiter.observe(getattr(getattr(e, "response", None), "headers", None), rate_limited=True)
+                limiter.settle(reserved, 0)
+                if attempt:
+                    raise
+                logger.warning(f"Rate limited by {limiter.name}; queueing one retry within the request timeout")
+                continue
+            limiter.observe((getattr(response, "_hidden_params", None) or {}).get("additional_headers"))
+            limiter.settle(reserved, getattr(getattr(response, "usage", None), "total_tokens", None))
+            return response
+
+    @staticmethod
+    def _complete_within_budget(complete: Callable[[dict], object], llm_params: dict, cap: int):
+        """
+        按估算的 max_tokens 请求；finish_reason 为 length（被截断）且估算值低于上限时，
+        在剩余的超时时间内以配置的上限重试一次。
+
+        :param complete: 发送请求并返回 litellm 响应的函数
+        :param llm_params: litellm 参数（含估算的 max_tokens 与 timeout）
+        :param cap: 配置的 max_tokens 上限
+        """
+        started = time.monotonic()
+        response = complete(llm_params)
+        truncated = response.choices[0].finish_reason == "length"
+        if not truncated or llm_params["max_tokens"] >= cap:
+            truncation_stats.record(truncated=truncated)
+            return response
+
+        remaining = llm_params["timeout"] - (time.monotonic() - started)
+        if remaining <= 0:
+            truncation_stats.record(truncated=True)
+            raise TimeoutError("Translation was truncated and no time is left to retry")
+        logger.info(f"Translation truncated at max_tokens={llm_params['max_tokens']}; retrying with {cap}")
+        response = complete(dict(llm_params, max_tokens=cap, timeout=remaining))
+        truncation_stats.record(truncated=True, recovered=response.choices[0].finish_reason != "length")
+        return response
+
+    @staticmethod
+    def _stream_completion(llm_params: dict, on_partial: Callable[[str], None]):
+        """
+        以 stream=True 调用 litellm，逐块把已生成的译文交给 on_partial，
+        结束后把全部分块合并为与非流式调用相同的响应对象（含 usage）。
+        timeout 只限制单次读取，这里额外限制整个生成过程的总时长。
+        """
+        params = dict(llm_params, stream=True)
+        try:
+            provider_params = litellm.get_supported_openai_params(model=params["model"]) or []
+        except Exception:
+            provider_params = []
+        if "stream_options" in provider_params:
+            # 部分服务商只有显式请求才会在最后一个分块中返回 token 用量
+            params["stream_options"] = {"include_usage": True}
+
+        deadline = time.monotonic() + params["timeout"]
+        chunks = []
+        text = ""
+        for chunk in litellm.completion(**params):
+            chunks.append(chunk)
+            delta = chunk.choices[0].delta.content if chunk.choices else None
+            if delta:
+                text += delta
+                try:
+                    on_partial(text)
+                except Exception as callback_error:
+                    logger.debug(f"Streaming callback failed: {callback_error}")
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"Streaming translation exceeded the {params['timeout']:g}-second timeout")
+        if not chunks:
+            raise ValueError("LLM returned an empty stream")
+        return litellm.stream_chunk_builder(chunks, messages=params["messages"])
+
+    def _has_fallback(self) -> bool:
+        """是否配置了可用的备用模型"""
+        return (
+                self.fallback_llm_config is not None
+                and bool((self.fallback_llm_config.provider or "").strip())
+                and bool((self.fallback_llm_config.model or "").strip())
+        )
+
     def _execute_with_fallback(self, text, model, source_language, target_language,
                                provider, system_prompt, expect_json, include_terms,
                                message_type: MessageType = MessageType.PLAYER,
-                               context_messages: list = None):
+                               context_messages: list = None,
+                               on_partial: Callable[[str], None] = None):
         """
         带备用模型策略的 LLM 翻译执行。
 
@@ -668,13 +1066,13 @@ class Translator:
         - RETRY_EXHAUSTED: 主模型重试全部失败 → 使用备用模型
         - RACE_ON_FAILURE: 主模型首次失败 → 并发竞速主模型和备用模型
         - ALWAYS_RACE: 始终并发请求两者，取最快返回结果
+        - HEDGED: 主模型超过其 p90 延迟仍未返回时再请求备用模型，取最快返回结果
+
+        主模型的熔断器打开时（见 circuit_breaker），有备用模型则跳过上述策略直接使用备用模型。
+        流式回调（on_partial）只用于顺序执行的请求；竞速与对冲时两个模型的部分译文会互相覆盖，不流式。
         """
         context_messages = context_messages or []
-        has_fallback = (
-                self.fallback_llm_config is not None
-                and bool((self.fallback_llm_config.provider or "").strip())
-                and bool((self.fallback_llm_config.model or "").strip())
-        )
+        has_fallback = self._has_fallback()
         try:
             strategy = FallbackStrategy(self.fallback_strategy)
         except ValueError:
@@ -693,15 +1091,16 @@ class Translator:
                 )
             return remaining
 
-        def call_primary(request_timeout):
+        def call_primary(request_timeout, stream=True):
             return self._execute_llm_translation(
                 text, model, source_language, target_language, provider,
                 system_prompt, expect_json, include_terms, message_type,
                 context_messages=context_messages,
                 request_timeout=request_timeout,
+                on_partial=on_partial if stream else None,
             )
 
-        def call_fallback(request_timeout):
+        def call_fallback(request_timeout, stream=True):
             return self._execute_llm_translation(
                 text, self.fallback_llm_config.model,
                 source_language, target_language,
@@ -710,6 +1109,26 @@ class Translator:
                 message_type, context_messages=context_messages,
                 llm_config_override=self.fallback_llm_config,
                 request_timeout=request_timeout,
+                on_partial=on_partial if stream else None,
+            )
+
+        # 主模型已熔断：直接使用备用模型，冷却结束后在后台发送一次探测请求
+        primary_key = _llm_key(provider, model)
+        breaker = circuit_breakers.get(primary_key)
+        if has_fallback and not breaker.allow_request():
+            if breaker.acquire_probe():
+                logger.info(f"[CircuitBreaker] Probing {primary_key} in the background")
+                _submit_request(call_primary, min(self.timeout, self.translation_deadline), False)
+            logger.debug(f"[CircuitBreaker] {primary_key} is {breaker.state.value}, using the fallback model")
+            return call_fallback(remaining_time())
+
+        # Strategy E: Hedged — 主模型超过其 p90 延迟仍未返回时加发备用请求
+        if has_fallback and strategy == FallbackStrategy.HEDGED:
+            return self._hedge_primary_fallback(
+                lambda timeout: call_primary(timeout, stream=False),
+                lambda timeout: call_fallback(timeout, stream=False),
+                primary_key,
+                deadline,
             )
 
         # Strategy D: Always race — 始终并发竞速
@@ -793,7 +1212,7 @@ class Translator:
         并发请求主模型和备用模型，返回最先成功的结果。
         如果两者都失败，抛出异常。
         """
-        from concurrent.futures import ThreadPoolExecutor, as_completed, TimeoutError as FuturesTimeoutError
+        from concurrent.futures import as_completed, TimeoutError as FuturesTimeoutError
 
         context_messages = context_messages or []
 
@@ -807,16 +1226,16 @@ class Translator:
 
         request_timeout = min(self.timeout, remaining)
 
-        def call_primary():
+        def call_primary(timeout=request_timeout):
             return self._execute_llm_translation(
                 text, self.translation_service_config.llm.model,
                 source_language, target_language, provider,
                 system_prompt, expect_json, include_terms,
                 message_type, context_messages=context_messages,
-                request_timeout=request_timeout,
+                request_timeout=timeout,
             )
 
-        def call_fallback():
+        def call_fallback(timeout=request_timeout):
             return self._execute_llm_translation(
                 text, self.fallback_llm_config.model,
                 source_language, target_language,
@@ -824,13 +1243,19 @@ class Translator:
                 system_prompt, expect_json, include_terms,
                 message_type, context_messages=context_messages,
                 llm_config_override=self.fallback_llm_config,
-                request_timeout=request_timeout,
+                request_timeout=timeout,
+            )
+
+        if not _request_pool_has_room(2):
+            logger.info("Request pool is saturated by earlier requests; trying primary then fallback in turn")
+            return self._primary_then_fallback(
+                lambda: call_primary(request_timeout / 2),
+                lambda: call_fallback(max(0.001, deadline - time.monotonic())),
             )
 
-        executor = ThreadPoolExecutor(max_workers=2)
         futures = {
-            executor.submit(call_primary): "primary",
-            executor.submit(call_fallback): "fallback",
+            _submit_request(call_primary): "primary",
+            _submit_request(call_fallback): "fallback",
         }
         errors = []
         try:
@@ -850,8 +1275,135 @@ class Translator:
                 f"Primary and fallback models exceeded the {self.translation_deadline:g}-second deadline"
             ) from timeout_error
         finally:
-            # wait=False prevents blocking on the slower model; cancel_futures cancels pending tasks.
-            executor.shutdown(wait=False, cancel_futures=True)
+            # 不等待较慢的模型（在后台运行到超时为止）；尚未开始的请求直接取消
+            for future in futures:
+                future.cancel()
+
+    @staticmethod
+    def _primary_then_fallback(call_primary: Callable[[], dict], call_fallback: Callable[[], dict]) -> dict:
+        """共用线程池已满时不再并发：在调用线程中先请求主模型，失败后请求备用模型"""
+        try:
+            return call_primary()
+        except Exception as primary_error:
+            logger.warning(f"Primary model failed: {primary_error}")
+            try:
+                return call_fallback()
+            except Exception as fallback_error:
+                raise RuntimeError(
+                    f"Primary model failed: {primary_error}; fallback model failed: {fallback_error}"
+                ) from fallback_error
+
+    def _hedge_primary_fallback(self, call_primary: Callable[[float], dict], call_fallback: Callable[[float], dict],
+                                latency_key: str, deadline: float) -> dict:
+        """
+        对冲请求：先只请求主模型；主模型超过其 p90 延迟（见 latency_tracker.hedge_delay）仍未返回，
+        或在此之前失败时，再请求备用模型，返回最先成功的结果。
+
+        :param call_primary: 以请求超时（秒）调用主模型
+        :param call_fallback: 以请求超时（秒）调用备用模型
+        :param latency_key: 主模型的延迟统计键（服务商/模型）
+        :param deadline: 整条翻译的截止时刻（time.monotonic）
+        """
+        def remaining_time():
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise TimeoutError(f"Translation exceeded the {self.translation_deadline:g}-second deadline")
+            return remaining
+
+        if not _request_pool_has_room(2):
+            logger.info("Request pool is saturated by earlier requests; not hedging this message")
+            return self._primary_then_fallback(
+                lambda: call_primary(min(self.timeout, remaining_time() / 2)),
+                lambda: call_fallback(remaining_time()),
+            )
+
+        started = time.monotonic()
+        # 备用模型至少保留一半的剩余时间
+        delay = min(llm_latency.hedge_delay(latency_key), remaining_time() / 2)
+
+        def on_primary_done(future):
+            if not future.cancelled() and future.exception() is None:
+                hedge_stats.record_primary(time.monotonic() - started)
+
+        primary = _submit_request(call_primary, min(self.timeout, remaining_time()))
+        primary.add_done_callback(on_primary_done)
+        done, _ = wait([primary], timeout=delay)
+        if primary in done and primary.exception() is None:
+            hedge_stats.record(time.monotonic() - started, hedged=False, fallback_won=False)
+            return primary.result()
+
+        if primary in done:
+            logger.warning(f"Primary model failed before the hedge delay: {primary.exception()}")
+        else:
+            logger.info(f"Primary model has not answered within {delay:.2f}s; hedging with the fallback model")
+        fallback = _submit_request(call_fallback, remaining_time())
+        contenders = {primary: "primary", fallback: "fallback"}
+        pending = {future for future in contenders if not (future.done() and future.exception() is not None)}
+        errors = [("primary", str(primary.exception()))] if primary not in pending else []
+        try:
+            while pending:
+                done, pending = wait(pending, timeout=remaining_time(), return_when=FIRST_COMPLETED)
+                for future in done:
+                    if future.exception() is None:
+                        hedge_stats.record(time.monotonic() - started, hedged=True,
+                                           fallback_won=future is fallback)
+                        logger.info(f"Hedged request won by: {contenders[future]}")
+                        return future.result()
+                    errors.append((contenders[future], str(future.exception())))
+                    logger.warning(f"Hedged contender {contenders[future]} failed: {future.exception()}")
+        finally:
+            fallback.cancel()
+        error_details = "; ".join(f"{name}: {err}" for name, err in errors)
+        raise Exception(f"Both primary and fallback models failed: {error_details}")
+
+    def _prompt_messages(self, system_prompt: str, history: str, request: str, cache_hints: bool = False) -> list:
+        """
+        组装 LLM messages。跨消息稳定的部分在前：系统提示词（构造时生成）→ 历史上下文
+        （在整块剔除之前只在末尾追加），每条消息都不同的翻译指令、原文与术语在最后，
+        服务商的前缀缓存（OpenAI、DeepSeek、Gemini 等自动生效）可以命中前面的部分。
+
+        :param system_prompt: 系统提示词
+        :param history: 渲染好的历史上下文（可为空）
+        :param request: 翻译指令、原文与术语
+        :param cache_hints: 显式标记缓存断点（Anthropic cache_control）：系统提示词与历史末尾各一个。
+                            历史按行拆为独立的内容块，下一条消息在上一次的断点处即可命中缓存
+        """
+        if self._is_anthropic:
+            # Anthropic 使用 XML 标签
+            opening, closing = "<recent_chat_history>\n", "\n</recent_chat_history>\n\n"
+        else:
+            opening, closing = "=== Recent Chat History ===\n", "\n=== End of History ===\n\n---\n\n"
+
+        if not cache_hints:
+            history_block = f"{opening}{history}{closing}" if history else ""
+            return [
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": history_block + request},
+            ]
+
+        ephemeral = {"type": "ephemeral"}
+        blocks: list[str] = []
+        if history:
+            for index, line in enumerate(history.split("\n")):
+                piece = f"\n{line}" if index else f"{opening}{line}"
+                if blocks and not piece.strip():
+                    # 内容块不能只有空白
+                    blocks[-1] += piece
+                else:
+                    blocks.append(piece)
+        content = [{"type": "text", "text": block} for block in blocks]
+        if content:
+            content[-1]["cache_control"] = ephemeral
+        content.append({"type": "text", "text": (closing if history else "") + request})
+        return [
+            {"role": "system", "content": [{"type": "text", "text": system_prompt, "cache_control": ephemeral}]},
+            {"role": "user", "content": content},
+        ]
+
+    @staticmethod
+    def _prompt_cache_hints(provider: str, model: str) -> bool:
+        """是否为该请求显式标记提示词缓存断点（Claude 模型，且服务商经 litellm 支持 cache_control）"""
+        return provider in _CACHE_CONTROL_PROVIDERS and "claude" in (model or "").lower()
 
     @staticmethod
     def _context_awareness_block() -> str:
@@ -867,7 +1419,23 @@ class Translator:
     def _build_system_prompt(self, mode: TranslationMode, message_type: MessageType,
                              has_context: bool = False) -> str:
         """
-        Prompt Factory: Returns the system prompt for the specified mode and message type.
+        Prompt Factory: Returns the memoised system prompt for the specified mode and message type.
+
+        :param mode: 翻译模式
+        :param message_type: 消息类型
+        :param has_context: 是否有历史上下文
+        :return: 系统提示词
+        """
+        key = (mode, message_type, has_context)
+        prompt = self._system_prompts.get(key)
+        if prompt is None:
+            prompt = self._system_prompts[key] = self._compose_system_prompt(mode, message_type, has_context)
+        return prompt
+
+    def _compose_system_prompt(self, mode: TranslationMode, message_type: MessageType,
+                               has_context: bool = False) -> str:
+        """
+        Builds the system prompt for the specified mode and message type (called once per key).
 
         :param mode: 翻译模式
         :param message_type: 消息类型
@@ -905,8 +1473,8 @@ class Translator:
         prompt += (
             "\nRules:\n"
             "1. Priority: You MUST use mappings from `Custom Terms` if provided.\n"
-            "2. Safety: STRICTLY preserve all formatting codes (e.g., `§a`, `§l`) and "
-            "symbols. Do NOT translate command syntax (e.g., `/help`).\n"
+            "2. Safety: STRICTLY preserve all formatting codes (e.g., `§a`, `§l`), "
+            "placeholders (e.g., `{0}`) and symbols. Do NOT translate command syntax (e.g., `/help`).\n"
             "3. Output: Output ONLY the translation result."
         )
         return prompt
@@ -943,8 +1511,9 @@ class Translator:
             "    - Simulate human conversation characteristics (add appropriate filler words, "
             "reasonable repetition).\n"
             "5. Formatting Code Preservation (CRITICAL): Minecraft formatting codes (e.g., "
-            "`§l`, `§c`, `§1`, `§k`) must be preserved exactly as they appear in the source "
-            "text. These codes must NEVER be translated, modified, or removed.\n"
+            "`§l`, `§c`, `§1`, `§k`) and placeholders (e.g., `{0}`, `{1}`) must be preserved "
+            "exactly as they appear in the source text, next to the words they belong to. "
+            "These codes must NEVER be translated, modified, or removed.\n"
             "6. Proper Nouns and Player Names: Do not translate player IDs, server names, or "
             "non-standard game terms without a widely accepted translation.\n"
             "7. Untranslatable Content: For meaningless keyboard mashing (e.g., \"asdasd\") "
@@ -987,8 +1556,9 @@ class Translator:
             "    - Simulate human conversation characteristics (add appropriate filler words, "
             "reasonable repetition).\n"
             "5. Formatting Code Preservation (CRITICAL): Minecraft formatting codes (e.g., "
-            "`§l`, `§c`, `§1`, `§k`) must be preserved exactly as they appear in the source "
-            "text. These codes must NEVER be translated, modified, or removed.\n"
+            "`§l`, `§c`, `§1`, `§k`) and placeholders (e.g., `{0}`, `{1}`) must be preserved "
+            "exactly as they appear in the source text, next to the words they belong to. "
+            "These codes must NEVER be translated, modified, or removed.\n"
             "6. Proper Nouns and Player Names: Do not translate player IDs, server names, or "
             "non-standard game terms without a widely accepted translation.\n"
             "7. Untranslatable Content: For meaningless keyboard mashing (e.g., \"asdasd\") "
@@ -1178,72 +1748,42 @@ class Translator:
             f"{numbered}"
         )
 
-        # 如果有历史上下文，拼接到 user message 前面
-        if context_messages:
-            history_content = context_messages[0].get("content", "")
-            if self._is_anthropic:
-                user_message = f"<recent_chat_history>\n{history_content}\n</recent_chat_history>\n\n{user_message}"
-            else:
-                user_message = f"=== Recent Chat History ===\n{history_content}\n=== End of History ===\n\n---\n\n{user_message}"
+        # 历史上下文放在 user message 前面（见 _prompt_messages）
+        history_content = context_messages[0].get("content", "") if context_messages else ""
 
-        provider = self.translation_service_config.llm.provider or "OpenAI"
-        model = self.translation_service_config.llm.model
+        llm_cfg = self.translation_service_config.llm
+        provider = llm_cfg.provider or "OpenAI"
+        model = llm_cfg.model
 
-        extra_body = None
-        if provider == "OpenRouter" and ":" in model:
-            base_model, suffix = model.split(":", 1)
-            suffix_stripped = suffix.strip()
-            suffix_lower = suffix_stripped.lower()
-            if suffix_lower in _OPENROUTER_NATIVE_SUFFIXES:
-                pass
-            elif suffix_lower in _OPENROUTER_SORT_KEYWORDS:
-                model = base_model
-                extra_body = {"provider": {"sort": suffix_lower}}
-            else:
-                model = base_model
-                provider_order = [s for p in suffix_stripped.split(",") if (s := p.strip())]
-                extra_body = {"provider": {"order": provider_order}}
+        # system prompt（含上下文指导），构造时已生成
+        system_prompt = self._batch_system_prompts[bool(context_messages)]
 
-        # Gemini 3 系列是原生思考模型，显式降级 reasoning 到 minimal effort，避免思考 token 挤占批量译文输出
-        if self._is_gemini3 and provider == "OpenRouter":
-            extra_body = {**{"reasoning": {"effort": "minimal"}}, **(extra_body or {})}
-            logger.debug(
-                f"Gemini 3 model ({model}) detected: capping reasoning to minimal effort"
+        max_tokens_cap = llm_cfg.max_tokens * n
+        if _RE_REASONING_MODEL.search(model):
+            max_tokens = max_tokens_cap
+        else:
+            max_tokens = output_token_budget(
+                "\n".join(texts), target_language, max_tokens_cap, overhead=BATCH_ITEM_OVERHEAD * n,
             )
+        messages = self._prompt_messages(
+            system_prompt, history_content, user_message,
+            cache_hints=self._prompt_cache_hints(provider, model),
+        )
+        llm_params = self._llm_request_params(llm_cfg, provider, model, messages, max_tokens, self.timeout)
 
-        prefix = LLM_PROVIDERS_PREFIXES[provider]
-        mapped_model = model if model.startswith(prefix) else prefix + model
-
-        # 构建 system prompt（含上下文指导）
-        system_prompt = self._build_batch_system_prompt(has_context=bool(context_messages))
-
-        temperature = 1 if re.match(r"^(?:openai/)?gpt-5(?:[-.]|$)", model.lower()) else 0
-        llm_params = {
-            "model": mapped_model,
-            "messages": [
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_message},
-            ],
-            "temperature": temperature,
-            "max_tokens": self.translation_service_config.llm.max_tokens * n,
-            "api_key": self.translation_service_config.llm.api_key,
-            "num_retries": 0,
-            "timeout": self.timeout,
-        }
-        if api_base := self.translation_service_config.llm.api_base:
-            llm_params["api_base"] = api_base
-
-        if self._is_gemini3 and provider != "OpenRouter":
-            llm_params["reasoning_effort"] = "minimal"
-            llm_params["drop_params"] = True
-            logger.debug(
-                f"Gemini 3 model ({model}) detected: sending reasoning_effort=minimal"
+        breaker = circuit_breakers.get(_llm_key(provider, llm_cfg.model))
+        breaker.acquire_probe()
+        limiter = rate_limiters.get(provider, llm_cfg.api_key, getattr(llm_cfg, "rpm", 0), getattr(llm_cfg, "tpm", 0))
+        try:
+            response = self._complete_within_budget(
+                lambda params: self._complete_rate_limited(lambda p: litellm.completion(**p), params, limiter),
+                llm_params, max_tokens_cap,
             )
-
-        if extra_body:
-            llm_params["extra_body"] = extra_body
-
-        response = litellm.completion(**llm_params)
+        except Exception as e:
+            if _is_provider_failure(e):
+                breaker.record_failure(timeout=is_timeout(e))
+            raise
+        breaker.record_success()
         content_str = (response.choices[0].message.content or "").strip()
 
         # 尝试解析 JSON 数组
@@ -1270,8 +1810,8 @@ class Translator:
         prompt = (
             "You are a Minecraft-specific intelligent translation engine. "
             "You will receive a numbered list of chat messages. "
-            "Translate each message naturally, preserving gaming slang, cultural nuances, "
-            "and Minecraft formatting codes (e.g., §a, §l) exactly.\n"
+            "Translate each message naturally, preserving gaming slang and cultural nuances. Keep "
+            "Minecraft formatting codes (e.g., §a, §l) and placeholders (e.g., {0}) exactly as they are.\n"
         )
 
         if has_context:
@@ -0,0 +1,244 @@
+# Copyright (C) 2025 LiJiaHua1024
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+翻译缓存值压缩（字典压缩）。
+
+译文都是短字符串，单独压缩几乎没有收益；用已有缓存内容训练的字典压缩后，
+常见词组只需几个字节即可表示。
+- zstd：安装了 zstandard 时可用，使用 zstandard.train_dictionary 训练字典；
+- zlib：标准库，以最常见的译文拼接为预置字典（zdict，最常见的放在末尾，距离最短）。
+
+压缩后的值以 bytes 存储：标记字节 + 方法字节 + 2 字节字典版本号 + 压缩数据；
+未压缩的旧条目仍为 str，读取时两种格式均可识别。字典保存在缓存目录的 dictionaries 子目录中，
+每次训练生成新版本号，旧版本保留用于解码已有条目。
+"""
+
+import os
+import struct
+import threading
+import zlib
+from collections import Counter
+from typing import Optional
+
+from modless_chat_trans.logger import logger
+
+METHODS = ("zstd", "zlib")
+_MARKER = 0xFE
+_METHOD_BYTES = {"zstd": b"z", "zlib": b"d"}
+_METHODS_BY_BYTE = {v[0]: k for k, v in _METHOD_BYTES.items()}
+_HEADER = struct.Struct(">BcH")
+_ZLIB_WBITS = -15
+_ZLIB_MAX_DICT = 32 * 1024  # zlib 窗口大小，超出部分无效
+
+
+def _zstd():
+    """zstandard 为可选依赖"""
+    try:
+        import zstandard
+    except ImportError:
+        return None
+    return zstandard
+
+
+def available_method(method: str) -> Optional[str]:
+    """
+    解析配置中的压缩方式
+
+    :param method: "off" / "auto" / "zstd" / "zlib"
+    :return: 实际可用的方式；"off" 或不可用时返回 None（zstd 不可用时 auto 退回 zlib）
+    """
+    if method == "auto":
+        return "zstd" if _zstd() is not None else "zlib"
+    if method == "zstd" and _zstd() is None:
+        logger.warning("zstandard is not installed, translation cache compression falls back to zlib")
+        return "zlib"
+    return method if method in METHODS else None
+
+
+class ValueCodec:
+    """
+    线程安全的值编解码器；未启用压缩时 encode 原样返回。
+    """
+
+    def __init__(self, directory: Optional[str] = None):
+        """
+        :param directory: 缓存目录（字典保存在其下的 dictionaries 子目录），None 时不能训练和加载字典
+        """
+        self.directory = os.path.join(directory, "dictionaries") if directory else None
+        self.method: Optional[str] = None
+        self.active_id = 0
+        self._dictionaries: dict[int, tuple[str, bytes]] = {}
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._loaded = False
+
+    # ------------------------------------------------------------------
+    # 字典
+    # ------------------------------------------------------------------
+
+    def _load_dictionaries(self) -> None:
+        """从磁盘加载全部字典版本（首次需要时执行一次）"""
+        with self._lock:
+            if self._loaded:
+                return
+            self._loaded = True
+            if not self.directory or not os.path.isdir(self.directory):
+                return
+            for filename in os.listdir(self.directory):
+                # 文件名：<版本号>.<方法>.dict
+                parts = filename.split(".")
+                if len(parts) != 3 or parts[2] != "dict" or parts[1] not in METHODS or not parts[0].isdigit():
+                    continue
+                with open(os.path.join(self.directory, filename), "rb") as f:
+                    self._dictionaries[int(parts[0])] = (parts[1], f.read())
+
+    def latest_dictionary(self, method: str) -> int:
+        """指定方式的最新字典版本号，没有时返回 0"""
+        self._load_dictionaries()
+        with self._lock:
+            ids = [dict_id for dict_id, (m, _) in self._dictionaries.items() if m == method]
+        return max(ids, default=0)
+
+    def activate(self, method: Optional[str], dict_id: int = 0) -> None:
+        """设置写入时使用的压缩方式与字典版本；method 为 None 时关闭压缩"""
+        self._load_dictionaries()
+        with self._lock:
+            if method is not None and dict_id and self._dictionaries.get(dict_id, (None,))[0] != method:
+                raise ValueError(f"Dictionary {dict_id} is not a {method} dictionary")
+            self.method = method
+            self.active_id = dict_id if method is not None else 0
+
+    def train(self, samples: list, method: str, size: int = 16 * 1024) -> int:
+        """
+        由样本译文训练新字典并保存，返回新版本号（同时设为写入使用的字典）
+
+        :param samples: 译文样本（建议按读取次数从高到低，数千条即可）
+        :param method:  "zstd" / "zlib"
+        :param size:    字典大小（字节）
+        """
+        if not self.directory:
+            raise RuntimeError("Cache directory is unknown, cannot store a compression dictionary")
+        encoded = [sample.encode("utf-8") for sample in samples if sample]
+        if method == "zstd":
+            data = _zstd().train_dictionary(size, encoded).as_bytes()
+        elif method == "zlib":
+            data = self._build_zdict(encoded, min(size, _ZLIB_MAX_DICT))
+        else:
+            raise ValueError(f"Unsupported compression method: {method}")
+
+        self._load_dictionaries()
+        with self._lock:
+            dict_id = max(self._dictionaries, default=0) + 1
+            if dict_id > 0xFFFF:
+                raise RuntimeError("Too many compression dictionary versions")
+            os.makedirs(self.directory, exist_ok=True)
+            with open(os.path.join(self.directory, f"{dict_id}.{method}.dict"), "wb") as f:
+                f.write(data)
+            self._dictionaries[dict_id] = (method, data)
+        self.activate(method, dict_id)
+        logger.info(f"Trained {method} translation cache dictionary v{dict_id} "
+                    f"({len(data)} bytes from {len(encoded)} samples)")
+        return dict_id
+
+    @staticmethod
+    def _build_zdict(samples: list, size: int) -> bytes:
+        """出现越多的片段越靠近末尾（zlib 预置字典中越靠后的内容引用距离越短）"""
+        counts = Counter(samples)
+        # 单词级片段补充整句：短句集合之外的常见词也能被引用
+        for sample in samples:
+            counts.update(word for word in sample.split(b" ") if len(word) > 3)
+        pieces = []
+        total = 0
+        for piece, _ in counts.most_common():
+            if total + len(piece) > size:
+                continue
+            pieces.append(piece)
+            total += len(piece)
+        return b"".join(reversed(pieces))
+
+    # ------------------------------------------------------------------
+    # 编解码
+    # ------------------------------------------------------------------
+
+    def _zstd_compressor(self, dict_id: int, data: bytes):
+        compressors = self._local.__dict__.setdefault("compressors", {})
+        compressor = compressors.get(dict_id)
+        if compressor is None:
+            zstandard = _zstd()
+            dictionary = zstandard.ZstdCompressionDict(data) if data else None
+            compressor = compressors[dict_id] = zstandard.ZstdCompressor(
+                level=9, dict_data=dictionary, write_checksum=False, write_content_size=True, write_dict_id=False,
+            )
+        return compressor
+
+    def _zstd_decompressor(self, dict_id: int, data: bytes):
+        decompressors = self._local.__dict__.setdefault("decompressors", {})
+        decompressor = decompressors.get(dict_id)
+        if decompressor is None:
+            zstandard = _zstd()
+            dictionary = zstandard.ZstdCompressionDict(data) if data else None
+            decompressor = decompressors[dict_id] = zstandard.ZstdDecompressor(dict_data=dictionary)
+        return decompressor
+
+    def encode(self, value: str):
+        """压缩译文；未启用压缩或压缩后不更小时原样返回 str"""
+        method = self.method
+        if method is None:
+            return value
+        dict_id = self.active_id
+        raw = value.encode("utf-8")
+        data = self._dictionaries.get(dict_id, (method, b""))[1] if dict_id else b""
+        if method == "zstd":
+            payload = self._zstd_compressor(dict_id, data).compress(raw)
+        else:
+            compressor = zlib.compressobj(9, zlib.DEFLATED, _ZLIB_WBITS, zdict=data) if data else \
+                zlib.compressobj(9, zlib.DEFLATED, _ZLIB_WBITS)
+            payload = compressor.compress(raw) + compressor.flush()
+        if len(payload) + _HEADER.size >= len(raw):
+            return value
+        return _HEADER.pack(_MARKER, _METHOD_BYTES[method], dict_id) + payload
+
+    def decode(self, value) -> Optional[str]:
+        """解码磁盘层中的值；str 原样返回，无法解码（未知字典、数据损坏）时返回 None"""
+        if isinstance(value, str) or value is None:
+            return value
+        if not isinstance(value, bytes) or len(value) < _HEADER.size or value[0] != _MARKER:
+            return None
+        _, method_byte, dict_id = _HEADER.unpack_from(value)
+        method = _METHODS_BY_BYTE.get(method_byte[0])
+        if dict_id:
+            if dict_id not in self._dictionaries:
+                self._load_dictionaries()
+            entry = self._dictionaries.get(dict_id)
+            if entry is None or entry[0] != method:
+                return None
+            data = entry[1]
+        else:
+            data = b""
+        payload = value[_HEADER.size:]
+        try:
+            if method == "zstd":
+                if _zstd() is None:
+                    return None
+                raw = self._zstd_decompressor(dict_id, data).decompress(payload)
+            elif method == "zlib":
+                decompressor = zlib.decompressobj(_ZLIB_WBITS, zdict=data) if data else zlib.decompressobj(_ZLIB_WBITS)
+                raw = decompressor.decompress(payload) + decompressor.flush()
+            else:
+                return None
+            return raw.decode("utf-8")
+        except Exception:
+            return None
@@ -30,6 +30,8 @@ message_condition = threading.Condition()
 message_id_counter = count(1)
 MAX_HTTP_MESSAGES = 2000
 PENDING_SLOT_TIMEOUT = 10.0
+# 流式译文推送到网页的最小间隔（秒）：逐 token 更新时合并刷新，避免每个 token 都唤醒全部 SSE 连接
+STREAM_FLUSH_INTERVAL = 0.1
 clear_revision = 0
 sse_clients = []
 
@@ -39,7 +41,7 @@ def start_httpserver_thread(**kwargs):
     try:
         server_thread = threading.Thread(
             target=start_httpserver,
-            args=(kwargs["http_port"], kwargs["callback"], kwargs.get("tts_engine"))
+            args=(kwargs["http_port"], kwargs["callback"], kwargs.get("tts_engine"), kwargs.get("metrics"))
         )
         server_thread.daemon = True
         server_thread.start()
@@ -49,7 +51,7 @@ def start_httpserver_thread(**kwargs):
         raise e
 
 
-def start_httpserver(port, callback, tts_engine=None):
+def start_httpserver(port, callback, tts_engine=None, metrics=None):
     global http_messages, messages_by_id, message_id_counter, clear_revision, sse_clients
     logger.info(f"Starting HTTP server on port {port}")
 
@@ -136,6 +138,13 @@ def start_httpserver(port, callback, tts_engine=None):
                 logger.error(f"Error in /read-aloud: {str(e)}")
                 return jsonify({'success': False, 'error': str(e)}), 500
 
+        @flask_app.route('/metrics')
+        def metrics_endpoint():
+            # 熔断器状态、延迟与各项统计（JSON）
+            if metrics is None:
+                return jsonify({'error': 'Metrics are not available'}), 503
+            return jsonify(metrics())
+
         @flask_app.route('/stream')
         def stream():
             logger.debug("Client connected to SSE stream")
@@ -168,6 +177,9 @@ def start_httpserver(port, callback, tts_engine=None):
                     else:
                         lowest_available_id = None
 
+                # 已推送给本连接的流式译文：(message_id, 版本号)
+                streamed = (None, 0)
+
                 if last_event_id is None:
                     if lowest_available_id is not None:
                         next_event_id = lowest_available_id
@@ -183,6 +195,7 @@ def start_httpserver(port, callback, tts_engine=None):
                     while True:
                         send_clear_signal = False
                         new_messages = []
+                        partial_update = None
                         wait_timeout = heartbeat_interval
 
                         with message_condition:
@@ -220,6 +233,18 @@ def start_httpserver(port, callback, tts_engine=None):
                                             wait_timeout,
                                             max(PENDING_SLOT_TIMEOUT - pending_age, 0.1),
                                         )
+                                        # 正在流式生成：推送最新的部分译文，并按刷新间隔检查被合并的更新
+                                        revision = message.get('partial_revision', 0)
+                                        if revision:
+                                            if streamed != (message['id'], revision):
+                                                streamed = (message['id'], revision)
+                                                partial_update = {
+                                                    "id": message['id'],
+                                                    "name": message['name'],
+                                                    "message": message['partial'],
+                                                    "time": message['time'],
+                                                }
+                                            wait_timeout = min(wait_timeout, STREAM_FLUSH_INTERVAL)
                                         break
 
                                 next_event_id = message['id'] + 1
@@ -229,7 +254,7 @@ def start_httpserver(port, callback, tts_engine=None):
 
                                 new_messages.append(message)
 
-                            if not send_clear_signal and not new_messages:
+                            if not send_clear_signal and not new_messages and partial_update is None:
                                 message_condition.wait(timeout=wait_timeout)
 
                         if send_clear_signal:
@@ -249,6 +274,7 @@ def start_httpserver(port, callback, tts_engine=None):
                                     "skip_src_lang": info_payload.get("skip_src_lang", False),
                                     "cache_hit": info_payload.get("cache_hit", False),
                                     "usage": info_payload.get("usage"),
+                                    "cached_token_share": info_payload.get("cached_token_share"),
                                     "original": message.get("original"),
                                     "send_translation_complete": info_payload.get("send_translation_complete", False)
                                 }
@@ -257,6 +283,12 @@ def start_httpserver(port, callback, tts_engine=None):
                                 yield f"data: {json_message}\n\n"
                             last_heartbeat_sent = time.time()
 
+                        if partial_update is not None:
+                            # 不带 id 字段：断线重连时 Last-Event-ID 只记录已完成的消息
+                            yield "event: update\n"
+                            yield f"data: {json.dumps(partial_update, ensure_ascii=False)}\n\n"
+                            last_heartbeat_sent = time.time()
+
                         if time.time() - last_heartbeat_sent >= heartbeat_interval:
                             heartbeat_payload = json.dumps({"ts": time.time()})
                             yield "event: heartbeat\n"
@@ -367,6 +399,28 @@ def allocate_slot(name="", arrival_time=None):
     return message_id
 
 
+def update_slot(message_id: int, message: str):
+    """
+    更新 pending slot 的部分译文（流式翻译逐 token 调用），网页以 "update" 事件显示。
+    通知 SSE 连接的频率不超过 STREAM_FLUSH_INTERVAL，期间的更新由 SSE 连接按间隔补发。
+
+    :param message_id: allocate_slot() 返回的 id
+    :param message: 当前已生成的译文（完整前缀，而非增量）
+    """
+    if not message:
+        return
+    with message_condition:
+        record = messages_by_id.get(message_id)
+        if record is None or not record.get("pending"):
+            return
+        record["partial"] = message
+        record["partial_revision"] = record.get("partial_revision", 0) + 1
+        now = time.monotonic()
+        if now - record.get("partial_flushed_at", 0.0) >= STREAM_FLUSH_INTERVAL:
+            record["partial_flushed_at"] = now
+            message_condition.notify_all()
+
+
 def fill_slot(message_id: int, name: str, message: str, info: dict, duration=None, original=None):
     """
     填充已预分配的 slot。若 slot 已被淘汰则降级为 display_message。
@@ -15,6 +15,8 @@ var processedMessageIds = new Set();
 var processedIdQueue = [];
 var maxProcessedIds = 4000;
 var translationTimeoutId = null;
+// 流式翻译中的消息预览：message id -> 预览元素（最终结果到达后移除）
+var streamingMessages = new Map();
 
 // 消息过滤状态
 var messageFilters = {
@@ -254,6 +256,48 @@ function trackProcessedMessage(id) {
 function resetProcessedMessages() {
     processedMessageIds.clear();
     processedIdQueue = [];
+    clearStreamingMessages();
+}
+
+function clearStreamingMessages() {
+    streamingMessages.forEach(function(element) {
+        element.remove();
+    });
+    streamingMessages.clear();
+}
+
+// 流式翻译：用部分译文创建或更新该消息的预览
+function handleStreamingUpdate(event) {
+    lastHeartbeat = Date.now();
+    var jsonData;
+    try {
+        jsonData = JSON.parse(event.data);
+    } catch (parseError) {
+        return;
+    }
+    if (processedMessageIds.has(jsonData.id)) return;
+
+    var wasAtBottom = checkIfAtBottom();
+    var element = streamingMessages.get(jsonData.id);
+    if (element) {
+        var textDiv = element.querySelector('.message-text');
+        if (textDiv) textDiv.innerHTML = parseMinecraftText(jsonData.message);
+    } else {
+        element = createMessageElement(jsonData.name, jsonData.message, jsonData.time).element;
+        element.classList.add('streaming');
+        streamingMessages.set(jsonData.id, element);
+        messageList.appendChild(element);
+    }
+    handleMessageScroll(wasAtBottom);
+}
+
+// 最终结果到达：移除预览，之后按普通消息处理（合并、折叠等）
+function finishStreamingMessage(messageId) {
+    var element = streamingMessages.get(messageId);
+    if (element) {
+        element.remove();
+        streamingMessages.delete(messageId);
+    }
 }
 
 // 更新重复消息徽章
@@ -563,6 +607,9 @@ function createMessageElement(name, messageText, messageTime, duration, cacheHit
             var promptTokens = usage.prompt_tokens || 0;
             var completionTokens = usage.completion_tokens || 0;
             usageDetail.textContent = `${promptTokens}+${completionTokens}=${totalTokens} tokens`;
+            if (usage.cached_token_share) {
+                usageDetail.textContent += ` (${Math.round(usage.cached_token_share * 100)}% cached)`;
+            }
 
             usageTag.appendChild(usageIcon);
             usageTag.appendChild(usageTotal);
@@ -805,6 +852,7 @@ function initializeEventSource() {
         }
 
         if (messageId !== null) {
+            finishStreamingMessage(messageId);
             if (processedMessageIds.has(messageId)) {
                 pendingMessages--;
                 return;
@@ -822,6 +870,9 @@ function initializeEventSource() {
         var skipSrcLang = jsonData.skip_src_lang;
         var usage = jsonData.usage;
         var original = jsonData.original;
+        if (usage && typeof jsonData.cached_token_share === "number") {
+            usage.cached_token_share = jsonData.cached_token_share;
+        }
 
         if (isTranslating && jsonData.send_translation_complete) {
             setTimeout(resetTranslationUI, 500);
@@ -984,6 +1035,8 @@ function initializeEventSource() {
         lastHeartbeat = Date.now();
     });
 
+    window.eventSource.addEventListener('update', handleStreamingUpdate);
+
 
     startHeartbeatMonitor();
 }
@@ -0,0 +1,62 @@
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from diskcache import Cache
+
+from modless_chat_trans.cache_backends import DbmCache, open_cache_backend, sqlite_settings
+from modless_chat_trans.translation_cache import TranslationCache
+
+
+class CacheBackendTests(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def test_overrides_replace_profile_values(self):
+        settings = sqlite_settings("fast", {"mmap-size": 0, "page_size": 4096})
+
+        self.assertEqual(settings["sqlite_synchronous"], 0)
+        self.assertEqual(settings["sqlite_mmap_size"], 0)
+        self.assertNotIn("sqlite_page_size", settings)
+
+    def test_profile_pragmas_are_applied(self):
+        cache = open_cache_backend(directory=os.path.join(self.directory, "cache"), profile="safe",
+                                   sqlite_pragmas={"cache-size": 512})
+        try:
+            self.assertEqual(cache._sql("PRAGMA synchronous").fetchone()[0], 2)
+            self.assertEqual(cache._sql("PRAGMA cache_size").fetchone()[0], 512)
+        finally:
+            cache.close()
+
+    def test_translation_cache_on_dbm_backend(self):
+        with mock.patch("modless_chat_trans.cache_backends.native_dbm_module", return_value="dbm.gnu"):
+            disk = open_cache_backend(backend="dbm", directory=self.directory)
+        self.assertIsInstance(disk, DbmCache)
+        cache = TranslationCache(disk, memory_size=0)
+        cache.set("ns", "hello", "你好")
+        cache.set("other", "hello", "こんにちは")
+        cache.flush_writes()
+
+        self.assertEqual(cache.get("ns", "hello"), "你好")
+        self.assertEqual(cache.evict_namespace("ns"), 1)
+        self.assertIsNone(cache.get("ns", "hello"))
+        self.assertEqual(cache.warm(10, "other"), 0)
+        cache.close()
+        disk.close()
+
+    def test_dbm_dumb_is_refused(self):
+        with mock.patch("modless_chat_trans.cache_backends.native_dbm_module", return_value=None):
+            disk = open_cache_backend(backend="dbm", directory=os.path.join(self.directory, "cache"))
+        try:
+            self.assertIsInstance(disk, Cache)
+        finally:
+            disk.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
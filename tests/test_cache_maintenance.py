@@ -0,0 +1,78 @@
+import shutil
+import tempfile
+import time
+import unittest
+
+from diskcache import Cache
+
+from modless_chat_trans.cache_maintenance import CacheMaintenance, MaintenancePlan
+from modless_chat_trans import cache_maintenance
+from modless_chat_trans.translation_cache import TranslationCache
+
+
+class CacheMaintenanceTests(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.disk = Cache(self.directory, eviction_policy="least-frequently-used", sqlite_auto_vacuum=2)
+        self.memory = TranslationCache(self.disk)
+        self.maintenance = CacheMaintenance(self.disk, self.memory)
+
+    def tearDown(self):
+        self.memory.close()
+        self.disk.close()
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def test_unread_entries_are_deleted_in_chunks(self):
+        for i in range(25):
+            self.disk.set(f"key{i}", f"value{i}")
+        for i in range(5):
+            self.disk.get(f"key{i}")
+        original_chunk = cache_maintenance.MAINTENANCE_CHUNK
+        cache_maintenance.MAINTENANCE_CHUNK = 7
+        try:
+            self.assertEqual(self.maintenance.count(MaintenancePlan(unread=True)), (20, 25))
+            result = self.maintenance.run(MaintenancePlan(unread=True))
+        finally:
+            cache_maintenance.MAINTENANCE_CHUNK = original_chunk
+
+        self.assertEqual(result["deleted"], 20)
+        self.assertEqual(len(self.disk), 5)
+        self.assertEqual(self.maintenance.progress, (20, 20))
+
+    def test_max_entries_keeps_most_read_entries(self):
+        for i in range(10):
+            self.disk.set(f"key{i}", "value")
+        for i in range(3):
+            self.disk.get(f"key{i}")
+
+        result = self.maintenance.run(MaintenancePlan(max_entries=3))
+
+        self.assertEqual(result["over_limit"], 7)
+        self.assertEqual(sorted(self.disk.iterkeys()), ["key0", "key1", "key2"])
+
+    def test_unread_age_rule_spares_recent_entries(self):
+        self.disk.set("recent", "value")
+
+        self.assertEqual(self.maintenance.count(MaintenancePlan(unread=True, unread_min_age_days=1)), (0, 1))
+
+    def test_deleted_entries_leave_the_memory_tier(self):
+        self.memory.set("ns", "hello", "你好")
+        self.memory.flush_writes()
+
+        self.maintenance.run(MaintenancePlan(unread=True))
+
+        self.assertIsNone(self.memory.get("ns", "hello"))
+
+    def test_background_run_reports_result(self):
+        self.disk.set("key", "value")
+
+        self.assertTrue(self.maintenance.start(MaintenancePlan(unread=True)))
+        deadline = time.monotonic() + 5
+        while self.maintenance.running and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+        self.assertEqual(self.maintenance.last_result["deleted"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
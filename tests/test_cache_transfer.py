@@ -0,0 +1,68 @@
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+from diskcache import Cache
+
+from modless_chat_trans.cache_transfer import export_cache, import_cache, read_export_header
+from modless_chat_trans.translation_cache import make_key
+
+
+class CacheTransferTests(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.source = Cache(os.path.join(self.directory, "source"), eviction_policy="least-frequently-used")
+        self.target = Cache(os.path.join(self.directory, "target"), eviction_policy="least-frequently-used")
+        self.path = os.path.join(self.directory, "export.jsonl.gz")
+
+    def tearDown(self):
+        self.source.close()
+        self.target.close()
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def test_round_trip_keeps_namespaces_and_skips_legacy_entries(self):
+        self.source.set(make_key("en>zh-cn|a", "hello"), "你好", tag="en>zh-cn|a")
+        self.source.set(make_key("en>ja|a", "hello"), "こんにちは", tag="en>ja|a")
+        self.source.set("legacy", "旧条目")
+
+        exported = export_cache(self.source, self.path, compression="gzip")
+        imported = import_cache(self.target, self.path)
+
+        self.assertEqual(exported.rows, 2)
+        self.assertEqual(read_export_header(self.path)["namespaces"], {"en>ja|a": 1, "en>zh-cn|a": 1})
+        self.assertEqual(imported.inserted, 2)
+        self.assertEqual(self.target.get(make_key("en>zh-cn|a", "hello")), "你好")
+        self.assertIsNone(self.target.get("legacy"))
+
+    def test_merge_policies(self):
+        key = make_key("ns", "hello")
+        self.target.set(key, "old", tag="ns")
+        time.sleep(0.01)
+        self.source.set(key, "new", tag="ns")
+        export_cache(self.source, self.path, compression="gzip")
+        for _ in range(3):
+            self.target.get(key)
+
+        kept = import_cache(self.target, self.path, policy="most-read")
+        self.assertEqual((kept.replaced, kept.skipped), (0, 1))
+        self.assertEqual(self.target.get(key), "old")
+
+        replaced = import_cache(self.target, self.path, policy="newest")
+        self.assertEqual(replaced.replaced, 1)
+        self.assertEqual(self.target.get(key), "new")
+
+    def test_namespace_filter(self):
+        self.source.set(make_key("a", "x"), "1", tag="a")
+        self.source.set(make_key("b", "x"), "2", tag="b")
+        export_cache(self.source, self.path, compression="gzip")
+
+        result = import_cache(self.target, self.path, namespaces=["b"])
+
+        self.assertEqual((result.inserted, result.skipped), (1, 1))
+        self.assertEqual(len(self.target), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
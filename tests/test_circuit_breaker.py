@@ -0,0 +1,196 @@
+import time
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+from modless_chat_trans import translator
+from modless_chat_trans.circuit_breaker import CircuitBreaker, CircuitBreakers, CircuitState, is_timeout
+from modless_chat_trans.config import FallbackStrategy, ServiceType
+from modless_chat_trans.translator import Translator
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class CircuitBreakerTests(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.breaker = CircuitBreaker("OpenAI/gpt-4o-mini", clock=self.clock)
+
+    def test_failure_rate_opens_the_breaker(self):
+        for _ in range(CircuitBreaker.MIN_REQUESTS - 1):
+            self.breaker.record_failure()
+        # 请求数不足，不按失败率熔断
+        self.assertEqual(self.breaker.state, CircuitState.CLOSED)
+        self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, CircuitState.OPEN)
+        self.assertFalse(self.breaker.allow_request())
+        self.assertEqual(self.breaker.snapshot()["short_circuited"], 1)
+
+    def test_successes_keep_the_breaker_closed(self):
+        for _ in range(10):
+            self.breaker.record_success()
+            self.breaker.record_success()
+            self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, CircuitState.CLOSED)
+        self.assertTrue(self.breaker.allow_request())
+
+    def test_consecutive_timeouts_open_the_breaker(self):
+        for _ in range(CircuitBreaker.TIMEOUT_STREAK):
+            self.breaker.record_failure(timeout=True)
+        self.assertEqual(self.breaker.state, CircuitState.OPEN)
+
+    def test_probe_closes_or_reopens_with_backoff(self):
+        for _ in range(CircuitBreaker.TIMEOUT_STREAK):
+            self.breaker.record_failure(timeout=True)
+        self.assertFalse(self.breaker.acquire_probe())
+
+        self.clock.now += CircuitBreaker.OPEN_SECONDS
+        self.assertTrue(self.breaker.acquire_probe())
+        self.assertEqual(self.breaker.state, CircuitState.HALF_OPEN)
+        # 每个冷却周期只探测一次
+        self.assertFalse(self.breaker.acquire_probe())
+
+        self.breaker.record_failure(timeout=True)
+        self.assertEqual(self.breaker.state, CircuitState.OPEN)
+        self.assertEqual(self.breaker.snapshot()["open_seconds"], CircuitBreaker.OPEN_SECONDS * 2)
+        self.clock.now += CircuitBreaker.OPEN_SECONDS
+        self.assertFalse(self.breaker.acquire_probe())
+
+        self.clock.now += CircuitBreaker.OPEN_SECONDS
+        self.assertTrue(self.breaker.acquire_probe())
+        self.breaker.record_success()
+        self.assertEqual(self.breaker.state, CircuitState.CLOSED)
+        self.assertEqual(self.breaker.snapshot()["trips"], 2)
+
+    def test_late_success_does_not_close_an_open_breaker(self):
+        for _ in range(CircuitBreaker.TIMEOUT_STREAK):
+            self.breaker.record_failure(timeout=True)
+        # 熔断前发出的请求迟到的成功不能绕过冷却与探测
+        self.breaker.record_success()
+        self.assertEqual(self.breaker.state, CircuitState.OPEN)
+        self.assertFalse(self.breaker.allow_request())
+
+    def test_is_timeout(self):
+        class APITimeoutError(Exception):
+            pass
+
+        self.assertTrue(is_timeout(TimeoutError()))
+        self.assertTrue(is_timeout(APITimeoutError()))
+        self.assertFalse(is_timeout(RuntimeError("boom")))
+
+
+class FallbackRoutingTests(unittest.TestCase):
+    def setUp(self):
+        self.original = translator.circuit_breakers
+        translator.circuit_breakers = CircuitBreakers()
+        config = SimpleNamespace(
+            service_type=ServiceType.LLM,
+            llm=SimpleNamespace(provider="OpenAI", model="gpt-4o-mini", api_key="key", api_base=None,
+                                deep_translate=False, max_tokens=256),
+            fallback_llm=SimpleNamespace(provider="DeepSeek", model="deepseek-chat", api_key="key", api_base=None,
+                                         max_tokens=256),
+            fallback_strategy=FallbackStrategy.DIRECT,
+        )
+        self.translator = Translator(config, {})
+        self.calls = []
+
+        def fake_execute(text, model, *args, **kwargs):
+            self.calls.append(model)
+            return {"result": model, "usage": {}}
+
+        self.translator._execute_llm_translation = fake_execute
+
+    def tearDown(self):
+        translator.circuit_breakers = self.original
+
+    def translate(self):
+        return self.translator._execute_with_fallback(
+            "hello", "gpt-4o-mini", "English", "Chinese", "OpenAI", "system", False, False,
+        )
+
+    def test_open_breaker_goes_straight_to_the_fallback(self):
+        self.assertEqual(self.translate()["result"], "gpt-4o-mini")
+
+        breaker = translator.circuit_breakers.get("OpenAI/gpt-4o-mini")
+        for _ in range(CircuitBreaker.TIMEOUT_STREAK):
+            breaker.record_failure(timeout=True)
+        self.calls.clear()
+        self.assertEqual(self.translate()["result"], "deepseek-chat")
+        self.assertEqual(self.calls, ["deepseek-chat"])
+
+        # 冷却结束后在后台探测主模型，本条消息仍由备用模型翻译
+        breaker._opened_at -= CircuitBreaker.OPEN_SECONDS
+        self.calls.clear()
+        self.assertEqual(self.translate()["result"], "deepseek-chat")
+        time.sleep(0.1)
+        self.assertCountEqual(self.calls, ["gpt-4o-mini", "deepseek-chat"])
+
+
+class ProbeWithoutFallbackTests(unittest.TestCase):
+    def setUp(self):
+        self.original = translator.circuit_breakers
+        translator.circuit_breakers = CircuitBreakers()
+        self.fallback = SimpleNamespace(provider="DeepSeek", model="deepseek-chat", api_key="key", api_base=None,
+                                        max_tokens=256)
+        config = SimpleNamespace(
+            service_type=ServiceType.LLM,
+            llm=SimpleNamespace(provider="OpenAI", model="gpt-4o-mini", api_key="key", api_base=None,
+                                deep_translate=False, max_tokens=256),
+            fallback_llm=None,
+        )
+        self.translator = Translator(config, {})
+        response = SimpleNamespace(
+            choices=[SimpleNamespace(finish_reason="stop", message=SimpleNamespace(content="你好"))],
+            usage=None, model_dump=lambda: {"usage": {}},
+        )
+        patcher = mock.patch("modless_chat_trans.translator.litellm")
+        patcher.start().completion.return_value = response
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        translator.circuit_breakers = self.original
+
+    def translate(self, model, provider, **kwargs):
+        return self.translator._execute_llm_translation(
+            "hello", model, "English", "Chinese", provider, "system", False, False, **kwargs,
+        )
+
+    def trip(self, key):
+        breaker = translator.circuit_breakers.get(key)
+        for _ in range(CircuitBreaker.TIMEOUT_STREAK):
+            breaker.record_failure(timeout=True)
+        return breaker
+
+    def test_primary_without_a_fallback_recovers_after_the_cool_down(self):
+        breaker = self.trip("OpenAI/gpt-4o-mini")
+        # 冷却期间的成功不关闭熔断器
+        self.translate("gpt-4o-mini", "OpenAI")
+        self.assertEqual(breaker.state, CircuitState.OPEN)
+
+        breaker._opened_at -= CircuitBreaker.OPEN_SECONDS
+        self.translate("gpt-4o-mini", "OpenAI")
+        self.assertEqual(breaker.state, CircuitState.CLOSED)
+
+    def test_fallback_model_breaker_recovers_after_the_cool_down(self):
+        breaker = self.trip("DeepSeek/deepseek-chat")
+        breaker._opened_at -= CircuitBreaker.OPEN_SECONDS
+        self.translate("deepseek-chat", "DeepSeek", llm_config_override=self.fallback)
+        self.assertEqual(breaker.state, CircuitState.CLOSED)
+
+    def test_summaries_probe_after_the_cool_down(self):
+        breaker = self.trip("OpenAI/gpt-4o-mini")
+        with self.assertRaises(RuntimeError):
+            self.translator.summarize_context("", ["12:00 | [Steve] hi"])
+        breaker._opened_at -= CircuitBreaker.OPEN_SECONDS
+        self.assertEqual(self.translator.summarize_context("", ["12:00 | [Steve] hi"]), "你好")
+        self.assertEqual(breaker.state, CircuitState.CLOSED)
+
+
+if __name__ == "__main__":
+    unittest.main()
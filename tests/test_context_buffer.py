@@ -0,0 +1,157 @@
+import unittest
+from datetime import datetime
+
+from modless_chat_trans.context_buffer import ChannelContextBuffers, ContextBuffer, ContextEntry
+
+
+def at(hour: int, minute: int) -> float:
+    return datetime(2025, 1, 1, hour, minute).timestamp()
+
+
+class ContextBufferTests(unittest.TestCase):
+    def test_lines_are_rendered_once_and_result_is_reused(self):
+        buffer = ContextBuffer(strategy="fixed", context_length=10)
+        buffer.push(ContextEntry("hello", at(14, 30), "Alice"))
+        buffer.push(ContextEntry("server restarting", at(14, 31)))
+
+        first = buffer.get_context_messages()
+
+        self.assertEqual(first[0]["content"], "14:30 | [Alice] hello\n14:31 | [[SYSTEM]] server restarting")
+        self.assertIs(buffer.get_context_messages(), first)
+
+    def test_mutations_invalidate_the_cached_result(self):
+        buffer = ContextBuffer(strategy="fixed", context_length=4, block_truncation_size="2")
+        for minute in range(3):
+            buffer.push(ContextEntry(f"m{minute}", at(10, minute), "Bob"))
+        before = buffer.get_context_messages()
+
+        buffer.push(ContextEntry("m3", at(10, 3), "Bob"))
+        after = buffer.get_context_messages()
+
+        self.assertIsNot(after, before)
+        self.assertEqual(after[0]["content"], "10:02 | [Bob] m2\n10:03 | [Bob] m3")
+        buffer.clear()
+        self.assertEqual(buffer.get_context_messages(), [])
+
+    def test_time_based_reset_drops_old_lines(self):
+        buffer = ContextBuffer(strategy="time_based", context_length=10, context_timeout=60)
+        buffer.push(ContextEntry("old", at(9, 0), "Carol"))
+        buffer.get_context_messages()
+
+        buffer.push_batch([ContextEntry("new", at(9, 5), "Carol")])
+
+        self.assertEqual(buffer.get_context_messages()[0]["content"], "09:05 | [Carol] new")
+
+    def test_snapshot_is_unaffected_by_later_pushes(self):
+        buffer = ContextBuffer(strategy="fixed", context_length=3)
+        buffer.push(ContextEntry("first", at(12, 0), "Dan"))
+        snapshot = buffer.snapshot()
+
+        for minute in range(1, 5):
+            buffer.push(ContextEntry(f"later {minute}", at(12, minute), "Dan"))
+        buffer.clear()
+
+        self.assertEqual(buffer.render(snapshot)[0]["content"], "12:00 | [Dan] first")
+        self.assertIs(buffer.render(snapshot), buffer.render(snapshot))
+
+    def test_compaction_keeps_the_window(self):
+        buffer = ContextBuffer(strategy="fixed", context_length=2)
+        buffer.COMPACT_THRESHOLD = 4
+        early = None
+        for minute in range(10):
+            buffer.push(ContextEntry(f"m{minute}", at(8, minute), "Eve"))
+            if minute == 1:
+                early = buffer.snapshot()
+
+        self.assertEqual(len(buffer), 2)
+        self.assertEqual(buffer.get_context_messages()[0]["content"], "08:08 | [Eve] m8\n08:09 | [Eve] m9")
+        self.assertEqual([entry.original for entry in early.entries()], ["m0", "m1"])
+
+    def test_token_budget_trims_long_messages(self):
+        buffer = ContextBuffer(strategy="fixed", context_length=10, context_tokens=60)
+        buffer.push(ContextEntry("gg", at(11, 0), "Ann"))
+        buffer.push(ContextEntry("a very long message " * 10, at(11, 1), "Ben"))
+        buffer.push(ContextEntry("ok", at(11, 2), "Ann"))
+
+        self.assertEqual([entry.original for entry in buffer.snapshot().entries()], ["ok"])
+        buffer.push(ContextEntry("nice", at(11, 3), "Ben"))
+        self.assertEqual(len(buffer), 2)
+
+    def test_token_budget_drops_whole_blocks(self):
+        buffer = ContextBuffer(strategy="fixed", context_length=100, block_truncation_size="2", context_tokens=40)
+        pushed = []
+        for minute in range(8):
+            buffer.push(ContextEntry(f"message {minute}", at(13, minute), "Cid"))
+            pushed.append(buffer.snapshot()._start)
+
+        # 剔除总是整块进行：窗口起点只落在块边界上
+        self.assertTrue(all(start % 2 == 0 for start in pushed))
+        self.assertLess(len(buffer), 8)
+        self.assertGreater(len(buffer), 0)
+
+
+class ChannelContextBuffersTests(unittest.TestCase):
+    def test_channels_keep_separate_histories(self):
+        buffers = ChannelContextBuffers(strategy="fixed", context_length=10)
+        buffers.push(ContextEntry("lobby spam", at(15, 0), "Alice"))
+        buffers.push(ContextEntry("ready?", at(15, 1), "Bob", channel="party"))
+        buffers.push_batch([
+            ContextEntry("more spam", at(15, 2), "Carol"),
+            ContextEntry("yes", at(15, 3), "Dan", channel="party"),
+        ])
+
+        self.assertEqual(buffers.get_context_messages("party")[0]["content"],
+                         "15:01 | [Bob] ready?\n15:03 | [Dan] yes")
+        snapshot = buffers.snapshot("public")
+        self.assertEqual(buffers.render(snapshot)[0]["content"],
+                         "15:00 | [Alice] lobby spam\n15:02 | [Carol] more spam")
+        self.assertEqual(len(buffers), 4)
+
+    def test_least_recent_channel_is_evicted(self):
+        buffers = ChannelContextBuffers(strategy="fixed", context_length=10, max_channels=2)
+        buffers.push(ContextEntry("hi", at(16, 0), "Eve", channel="dm:eve"))
+        snapshot = buffers.snapshot("dm:eve")
+        buffers.push(ContextEntry("gg", at(16, 1), "Frank", channel="party"))
+        buffers.push(ContextEntry("o/", at(16, 2), "Grace", channel="guild"))
+
+        self.assertEqual(buffers.channels(), ["party", "guild"])
+        self.assertEqual(buffers.render(snapshot)[0]["content"], "16:00 | [Eve] hi")
+
+    def test_reading_block_size_does_not_touch_channels(self):
+        buffers = ChannelContextBuffers(strategy="fixed", context_length=10, max_channels=2,
+                                        block_truncation_size="auto")
+        buffers.push(ContextEntry("gg", at(17, 0), "Frank", channel="party"))
+        buffers.push(ContextEntry("o/", at(17, 1), "Grace", channel="guild"))
+
+        self.assertEqual(buffers.block_size, 5)
+        self.assertEqual(buffers.channels(), ["party", "guild"])
+
+    def test_snapshot_from_an_evicted_channel_is_not_confused_with_its_successor(self):
+        buffers = ChannelContextBuffers(strategy="fixed", context_length=10, max_channels=2)
+        buffers.push(ContextEntry("old conversation", at(18, 0), "Judy", channel="dm:judy"))
+        snapshot = buffers.snapshot("dm:judy")
+        buffers.push(ContextEntry("gg", at(18, 1), "Frank", channel="party"))
+        buffers.push(ContextEntry("o/", at(18, 2), "Grace", channel="guild"))
+
+        # 同名频道重建：新缓冲区的第一次变更不能与旧快照的版本号相同
+        buffers.push(ContextEntry("new conversation", at(18, 3), "Judy", channel="dm:judy"))
+        self.assertEqual(buffers.get_context_messages("dm:judy")[0]["content"],
+                         "18:03 | [Judy] new conversation")
+        self.assertEqual(buffers.render(snapshot)[0]["content"], "18:00 | [Judy] old conversation")
+
+        buffers.clear()
+        buffers.push(ContextEntry("after clear", at(18, 4), "Judy", channel="dm:judy"))
+        buffers.get_context_messages("dm:judy")
+        self.assertEqual(buffers.render(snapshot)[0]["content"], "18:00 | [Judy] old conversation")
+
+    def test_single_stream_when_disabled(self):
+        buffers = ChannelContextBuffers(strategy="fixed", context_length=10, per_channel=False)
+        buffers.push(ContextEntry("a", at(17, 0), "Heidi", channel="party"))
+        buffers.push(ContextEntry("b", at(17, 1), "Ivan"))
+
+        self.assertEqual(buffers.channels(), ["public"])
+        self.assertIs(buffers.get_context_messages("party"), buffers.get_context_messages())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,77 @@
+import threading
+import time
+import unittest
+from datetime import datetime
+
+from modless_chat_trans.context_buffer import ChannelContextBuffers, ContextBuffer, ContextEntry
+from modless_chat_trans.context_summarizer import ContextSummarizer
+
+
+def at(minute: int) -> float:
+    return datetime(2025, 1, 1, 18, minute).timestamp()
+
+
+def wait_for(predicate, timeout: float = 2.0) -> bool:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+class ContextSummarizerTests(unittest.TestCase):
+    def test_evicted_lines_become_a_summary_ahead_of_history(self):
+        calls = []
+
+        def summarize(previous, lines):
+            calls.append((previous, lines))
+            return f"{len(lines)} earlier lines"
+
+        summarizer = ContextSummarizer(summarize, min_interval=0, idle_seconds=0)
+        buffers = ChannelContextBuffers(strategy="fixed", context_length=2)
+        buffers.set_on_push(summarizer.observe)
+        for minute in range(3):
+            buffers.push(ContextEntry(f"m{minute}", at(minute), "Alice"))
+
+        self.assertTrue(wait_for(lambda: summarizer.refreshes == 1))
+        self.assertEqual(calls, [("", ["18:00 | [Alice] m0"])])
+        self.assertEqual(buffers.get_context_messages()[0]["content"],
+                         "[Summary of earlier messages] 1 earlier lines\n18:01 | [Alice] m1\n18:02 | [Alice] m2")
+        summarizer.close()
+
+    def test_refreshes_wait_for_idle_and_interval(self):
+        started = threading.Event()
+
+        def summarize(previous, lines):
+            started.set()
+            return "summary"
+
+        summarizer = ContextSummarizer(summarize, min_interval=60, idle_seconds=0.2)
+        buffer = ContextBuffer(strategy="fixed", context_length=1)
+        buffer.on_push = summarizer.observe
+        buffer.push(ContextEntry("a", at(0)))
+        buffer.push(ContextEntry("b", at(1)))
+
+        self.assertFalse(started.wait(0.1))
+        self.assertTrue(started.wait(1.0))
+        self.assertTrue(wait_for(lambda: summarizer.refreshes == 1))
+
+        # 刷新间隔内新剔除的记录留待下一次合并
+        buffer.push(ContextEntry("c", at(2)))
+        time.sleep(0.4)
+        self.assertEqual(summarizer.refreshes, 1)
+        summarizer.close()
+
+    def test_summary_from_a_previous_conversation_is_dropped(self):
+        buffer = ContextBuffer(strategy="fixed", context_length=5)
+        buffer.push(ContextEntry("hello", at(0)))
+        generation, _ = buffer.summary_state()
+        buffer.clear()
+
+        self.assertFalse(buffer.set_summary("stale", generation))
+        self.assertEqual(buffer.get_context_messages(), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
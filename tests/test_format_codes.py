@@ -0,0 +1,37 @@
+import unittest
+
+from modless_chat_trans.format_codes import normalize_formatting
+
+
+class FormatCodeTests(unittest.TestCase):
+    def test_leading_rank_tag_and_codes_are_stripped(self):
+        formatted = normalize_formatting("§b[MVP§c+§b] Steve§f joined the lobby!")
+
+        self.assertEqual(formatted.text, "Steve{0} joined the lobby!")
+        self.assertEqual(formatted.prefix, "§b[MVP§c+§b] ")
+        self.assertGreater(formatted.saved_tokens, 0)
+
+    def test_colour_variants_share_the_same_cache_key(self):
+        red = normalize_formatting("§cHello §fworld")
+        green = normalize_formatting("§aHello §eworld")
+
+        self.assertEqual(red.text, green.text)
+        self.assertEqual(red.restore("你好 {0}世界"), "§c你好 §f世界")
+        self.assertEqual(green.restore("你好 {0}世界"), "§a你好 §e世界")
+
+    def test_lost_and_invented_placeholders_are_dropped(self):
+        formatted = normalize_formatting("A §cB §dC")
+
+        self.assertEqual(formatted.text, "A {0}B {1}C")
+        self.assertEqual(formatted.restore("甲 乙{1} 丙 {5}{1}"), "甲 乙§d 丙 ")
+
+    def test_plain_text_and_existing_placeholders_are_untouched(self):
+        self.assertFalse(normalize_formatting("[Click here] to join").has_formatting)
+
+        formatted = normalize_formatting("{0} means §a zero")
+        self.assertEqual(formatted.text, "{0} means §a zero")
+        self.assertEqual(formatted.restore("{0} 表示 §a 零"), "{0} 表示 §a 零")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,78 @@
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from modless_chat_trans.http_pool import HttpPool
+
+
+class StubServer:
+    def __init__(self, failures: int = 0):
+        self.connections = 0
+        self.requests = 0
+        self.failures = failures
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def setup(self):
+                stub.connections += 1
+                super().setup()
+
+            def do_POST(self):
+                self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                stub.requests += 1
+                status = 503 if stub.failures > 0 else 200
+                stub.failures -= 1
+                body = b'{"ok": true}'
+                self.send_response(status)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/translate"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class HttpPoolTests(unittest.TestCase):
+    def test_connections_are_reused(self):
+        stub = StubServer()
+        pool = HttpPool()
+        for _ in range(5):
+            self.assertEqual(pool.post(stub.url, data={"q": "hi"}, timeout=5).json(), {"ok": True})
+        pool.close()
+        stub.close()
+
+        self.assertEqual(stub.requests, 5)
+        self.assertEqual(stub.connections, 1)
+
+    def test_without_keep_alive_each_request_connects(self):
+        stub = StubServer()
+        pool = HttpPool(keep_alive=False)
+        for _ in range(3):
+            pool.post(stub.url, data={"q": "hi"}, timeout=5)
+        stub.close()
+
+        self.assertEqual(stub.connections, 3)
+
+    def test_unavailable_responses_are_retried(self):
+        stub = StubServer(failures=1)
+        pool = HttpPool(retries=1, retry_backoff=0)
+        response = pool.post(stub.url, json={"q": "hi"}, timeout=5)
+        pool.close()
+        stub.close()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(stub.requests, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
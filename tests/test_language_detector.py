@@ -0,0 +1,52 @@
+import unittest
+
+from modless_chat_trans.language_detector import (
+    LanguageMemory, detect_language, language_matches, normalize_language,
+)
+
+
+class LanguageDetectorTests(unittest.TestCase):
+    def test_scripts_and_latin_languages(self):
+        self.assertEqual(detect_language("你好，大家在干什么").language, "zh-CN")
+        self.assertEqual(detect_language("這是什麼").language, "zh-TW")
+        self.assertEqual(detect_language("こんにちは元気ですか").language, "ja")
+        self.assertEqual(detect_language("привет как дела").language, "ru")
+        self.assertEqual(detect_language("hello everyone how are you").language, "en")
+        self.assertEqual(detect_language("je suis très content").language, "fr")
+
+    def test_short_messages_have_low_confidence(self):
+        self.assertLess(detect_language("ok").confidence, 0.6)
+        self.assertLess(detect_language("xD").confidence, 0.6)
+
+    def test_player_memory_resolves_short_messages(self):
+        memory = LanguageMemory()
+        for text in ("hello everyone how are you", "anyone want to team with me",
+                     "I think we should go to the nether now"):
+            memory.detect("Steve", text)
+
+        detection = memory.detect("Steve", "ok")
+
+        self.assertEqual(detection.language, "en")
+        self.assertTrue(detection.from_memory)
+        self.assertFalse(memory.detect("Alex", "ok").language)
+
+    def test_kanji_only_text_is_not_confidently_chinese(self):
+        # 全汉字的日文与中文无法区分，不应被当作中文跳过
+        self.assertLess(detect_language("東京駅到着").confidence, 0.6)
+        self.assertLess(detect_language("了解").confidence, 0.6)
+        self.assertGreaterEqual(detect_language("我们走吧").confidence, 0.6)
+
+        memory = LanguageMemory()
+        for text in ("今日は何をしますか", "一緒に行きましょう", "ありがとうございます"):
+            memory.detect("Taro", text)
+        self.assertLess(memory.detect("Taro", "了解").confidence, 0.6)
+
+    def test_configured_language_names_are_normalized(self):
+        self.assertEqual(normalize_language("Simplified Chinese"), "zh-CN")
+        self.assertEqual(normalize_language("en-US"), "en")
+        self.assertTrue(language_matches("zh-TW", "zh"))
+        self.assertFalse(language_matches("en", "es"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,126 @@
+import threading
+import time
+import unittest
+
+from modless_chat_trans import latency_tracker, translator
+from modless_chat_trans.latency_tracker import HedgeStats, LatencyTracker, LatencyWindow
+from modless_chat_trans.log_monitor import OrderedProcessor
+from modless_chat_trans.translator import Translator
+
+
+def make_translator(deadline=5.0):
+    instance = Translator.__new__(Translator)
+    instance.timeout = deadline
+    instance.translation_deadline = deadline
+    return instance
+
+
+def answer(text, delay=0.0, error=None):
+    def call(timeout):
+        time.sleep(delay)
+        if error:
+            raise RuntimeError(error)
+        return {"translated": text}
+
+    return call
+
+
+class LatencyTrackerTests(unittest.TestCase):
+    def test_percentile(self):
+        window = LatencyWindow(100)
+        self.assertIsNone(window.percentile(0.9))
+        for value in range(1, 101):
+            window.add(value / 100)
+        self.assertEqual(window.percentile(0.9), 0.9)
+        self.assertEqual(window.percentile(0.5), 0.5)
+        self.assertEqual(window.percentile(1.0), 1.0)
+
+    def test_hedge_delay_is_clamped(self):
+        tracker = LatencyTracker()
+        # 样本不足时使用上限
+        tracker.record("fast", 0.01)
+        self.assertEqual(tracker.hedge_delay("fast"), latency_tracker.HEDGE_MAX_DELAY)
+
+        for _ in range(LatencyTracker.MIN_SAMPLES):
+            tracker.record("fast", 0.01)
+            tracker.record("medium", 1.2)
+            tracker.record("slow", 30)
+        self.assertEqual(tracker.hedge_delay("fast"), latency_tracker.HEDGE_MIN_DELAY)
+        self.assertEqual(tracker.hedge_delay("medium"), 1.2)
+        self.assertEqual(tracker.hedge_delay("slow"), latency_tracker.HEDGE_MAX_DELAY)
+
+
+class HedgeTests(unittest.TestCase):
+    def setUp(self):
+        self.original = translator.llm_latency, translator.hedge_stats
+        translator.llm_latency, translator.hedge_stats = LatencyTracker(), HedgeStats()
+        for _ in range(LatencyTracker.MIN_SAMPLES):
+            translator.llm_latency.record("primary", 0.1)
+
+    def tearDown(self):
+        translator.llm_latency, translator.hedge_stats = self.original
+
+    def hedge(self, primary, fallback, deadline=5.0):
+        instance = make_translator(deadline)
+        return instance._hedge_primary_fallback(primary, fallback, "primary", time.monotonic() + deadline)
+
+    def test_fast_primary_is_not_hedged(self):
+        result = self.hedge(answer("primary", 0.05), answer("fallback"))
+        self.assertEqual(result["translated"], "primary")
+        self.assertEqual(translator.hedge_stats.snapshot()["hedged"], 0)
+
+    def test_slow_primary_is_hedged(self):
+        result = self.hedge(answer("primary", 2.0), answer("fallback", 0.05))
+        self.assertEqual(result["translated"], "fallback")
+        stats = translator.hedge_stats.snapshot()
+        self.assertEqual((stats["hedged"], stats["fallback_wins"]), (1, 1))
+        self.assertLess(stats["served_p99"], 1.0)
+
+    def test_failed_primary_hedges_immediately(self):
+        started = time.monotonic()
+        result = self.hedge(answer("primary", error="boom"), answer("fallback"))
+        self.assertEqual(result["translated"], "fallback")
+        self.assertLess(time.monotonic() - started, 0.3)
+
+    def test_both_failures_are_reported(self):
+        with self.assertRaisesRegex(Exception, "primary: boom.*fallback: bust"):
+            self.hedge(answer("primary", error="boom"), answer("fallback", 0.05, error="bust"))
+
+    def occupy_pool(self, count):
+        release = threading.Event()
+        self.addCleanup(release.set)
+        for _ in range(count):
+            translator._submit_request(release.wait, 5)
+        return release
+
+    def test_leftover_requests_do_not_delay_new_ones(self):
+        # 每个翻译线程都留下一对落败的请求（在后台运行到超时为止）
+        translator._get_request_pool()
+        self.occupy_pool(OrderedProcessor.MAX_WORKERS * 2)
+        submitted = time.monotonic()
+        started = []
+
+        def primary(timeout):
+            started.append(time.monotonic())
+            return {"translated": "primary"}
+
+        self.assertEqual(self.hedge(primary, answer("fallback"))["translated"], "primary")
+        self.assertLess(started[0] - submitted, 0.1)
+
+    def test_saturated_pool_falls_back_to_sequential_calls(self):
+        translator._get_request_pool()
+        self.occupy_pool(translator._request_pool_size)
+        self.assertFalse(translator._request_pool_has_room(2))
+
+        started = time.monotonic()
+        result = self.hedge(answer("primary", error="boom"), answer("fallback"))
+        self.assertEqual(result["translated"], "fallback")
+        self.assertLess(time.monotonic() - started, 0.3)
+
+    def test_deadline(self):
+        with self.assertRaises(TimeoutError):
+            self.hedge(answer("primary", 1.0), answer("fallback", 1.0), deadline=0.5)
+
+
+if __name__ == "__main__":
+    unittest.main()
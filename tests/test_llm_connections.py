@@ -0,0 +1,96 @@
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from modless_chat_trans.llm_connections import LLMConnections
+
+
+class StubServer:
+    def __init__(self):
+        self.connections = 0
+        self.heads = 0
+        self.posts = 0
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def setup(self):
+                stub.connections += 1
+                super().setup()
+
+            def do_HEAD(self):
+                stub.heads += 1
+                self.send_response(404)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+
+            def do_POST(self):
+                self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                stub.posts += 1
+                body = b'{"ok": true}'
+                self.send_response(200)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class LLMConnectionsTests(unittest.TestCase):
+    def test_warm_connection_is_reused(self):
+        stub = StubServer()
+        connections = LLMConnections(http2=False, keepalive_interval=0)
+        self.assertTrue(connections.warm("Anthropic", stub.url))
+
+        handler = connections.client_kwargs("Anthropic", stub.url)["client"]
+        for _ in range(3):
+            handler.client.post(f"{stub.url}/v1/messages", json={"q": "hi"})
+        connections.close()
+        stub.close()
+
+        self.assertEqual(stub.heads, 1)
+        self.assertEqual(stub.posts, 3)
+        self.assertEqual(stub.connections, 1)
+
+    def test_client_kwargs_by_provider(self):
+        import litellm
+
+        connections = LLMConnections(http2=False, keepalive_interval=0)
+        first = connections.client_kwargs("Anthropic")
+        self.assertIs(first["client"], connections.client_kwargs("Anthropic")["client"])
+        # OpenAI SDK 路径通过 litellm.client_session 生效，不传 client
+        self.assertEqual(connections.client_kwargs("OpenAI"), {})
+        self.assertIsNotNone(litellm.client_session)
+        connections.close()
+        self.assertIsNone(litellm.client_session)
+
+    def test_unreachable_endpoint_is_reported(self):
+        connections = LLMConnections(http2=False, keepalive_interval=0)
+        self.assertFalse(connections.warm("Anthropic", "http://127.0.0.1:1"))
+        connections.close()
+
+    def test_idle_connections_are_kept_alive(self):
+        stub = StubServer()
+        connections = LLMConnections(http2=False, keepalive_interval=0.1)
+        connections.prewarm([("DeepSeek", stub.url)])
+        time.sleep(0.6)
+        connections.close()
+        stub.close()
+
+        self.assertGreaterEqual(stub.heads, 3)
+        self.assertEqual(stub.connections, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
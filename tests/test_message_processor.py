@@ -0,0 +1,139 @@
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+from diskcache import Cache
+
+import modless_chat_trans.file_utils as file_utils
+from modless_chat_trans.cache_backends import DbmCache
+import modless_chat_trans.message_processor as processor
+from modless_chat_trans.template_miner import TemplateMiner
+from modless_chat_trans.translation_cache import TranslationCache
+from modless_chat_trans.translator import MessageType
+
+
+class UntranslatableTests(unittest.TestCase):
+    def test_messages_without_words(self):
+        for text in ("", "§a§l", "123 -45 678", ":) <3 !!!", "https://example.com/a", "www.hypixel.net"):
+            self.assertTrue(processor.is_untranslatable(text), text)
+
+    def test_known_players(self):
+        processor.remember_player("Technoblade")
+        self.assertTrue(processor.is_untranslatable("@technoblade!"))
+        self.assertFalse(processor.is_untranslatable("technoblade is here"))
+
+    def test_single_player_name_that_is_a_word(self):
+        processor.remember_player("Thanks")
+        processor.remember_player("Steve_1")
+        self.assertFalse(processor.is_untranslatable("Thanks!"))
+        self.assertTrue(processor.is_untranslatable("@Thanks"))
+        self.assertTrue(processor.is_untranslatable("steve_1"))
+
+    def test_keyboard_mash(self):
+        for word in ("sdfghj", "asdasd", "qwerty", "jkjkjk"):
+            self.assertTrue(processor._is_keyboard_mash(word), word)
+        for word in ("hello", "jkjk", "asd", "trade", "banana"):
+            self.assertFalse(processor._is_keyboard_mash(word), word)
+        self.assertTrue(processor.is_untranslatable("asdasd"))
+        self.assertFalse(processor.is_untranslatable("anyone want to trade?"))
+
+
+class NegativeCacheTests(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.original = file_utils._negative_cache
+        file_utils._negative_cache = Cache(self.directory)
+
+    def tearDown(self):
+        processor._load_negative_cache("")
+        file_utils._negative_cache.close()
+        file_utils._negative_cache = self.original
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def test_entries_are_kept_per_namespace(self):
+        processor._load_negative_cache("english>chinese|openai:gpt-4o|1a2b")
+        processor.remember_untranslatable("GG  WP")
+        self.assertTrue(processor.is_negative_cached("gg wp"))
+
+        # 切换翻译服务后不再直通
+        processor._load_negative_cache("english>chinese|deepl|")
+        self.assertFalse(processor.is_negative_cached("gg wp"))
+
+        # 切换回来时从磁盘载入
+        processor._load_negative_cache("english>chinese|openai:gpt-4o|1a2b")
+        self.assertTrue(processor.is_negative_cached("gg wp"))
+
+    def test_entries_expire(self):
+        processor._load_negative_cache("ns")
+        processor.remember_untranslatable("lol")
+        key = processor._negative_key("lol")
+        self.assertIsNotNone(file_utils._negative_cache.get(key, expire_time=True)[1])
+
+        processor._negative_keys[key] = time.time() - 1
+        self.assertFalse(processor.is_negative_cached("lol"))
+        processor.remember_untranslatable("lol")
+        self.assertTrue(processor.is_negative_cached("lol"))
+
+    def test_backend_without_sql(self):
+        file_utils._negative_cache.close()
+        file_utils._negative_cache = DbmCache(os.path.join(self.directory, "dbm"))
+        processor._load_negative_cache("ns")
+        processor.remember_untranslatable("gg")
+
+        processor._load_negative_cache("other")
+        self.assertFalse(processor.is_negative_cached("gg"))
+        processor._load_negative_cache("ns")
+        self.assertTrue(processor.is_negative_cached("gg"))
+
+
+class FailingTemplateTranslator:
+    """骨架请求失败、整句请求成功的翻译器"""
+
+    def __init__(self):
+        self.requests = []
+
+    def cache_namespace(self, source_language, target_language):
+        return "ns"
+
+    def translate_with_context(self, text, **kwargs):
+        self.requests.append(text)
+        if "{{" in text:
+            raise TimeoutError("skeleton request timed out")
+        return {"result": f"<{text}>", "usage": {}}
+
+
+class TemplateTranslationTests(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.disk = Cache(self.directory)
+        self.originals = processor.translation_cache, processor.template_miner
+        processor.translation_cache = TranslationCache(self.disk, memory_size=0)
+        processor.template_miner = TemplateMiner(min_occurrences=1)
+
+    def tearDown(self):
+        processor.translation_cache.close()
+        processor.translation_cache, processor.template_miner = self.originals
+        self.disk.close()
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def translate(self, translator, text):
+        prepared = processor.PreparedMessage(name="", original=text, message_type=MessageType.SYSTEM)
+        return processor.translate_prepared(prepared, translator, "English", "Chinese")
+
+    def test_failed_skeleton_falls_back_to_the_message(self):
+        translator = FailingTemplateTranslator()
+
+        _, translated, _ = self.translate(translator, "Game starts in 7 seconds")
+
+        self.assertEqual(translated, "<Game starts in 7 seconds>")
+        self.assertEqual(translator.requests, ["Game starts in {{v1}} seconds", "Game starts in 7 seconds"])
+        # 骨架已被拒绝，之后的变体不再请求骨架
+        translator.requests.clear()
+        self.translate(translator, "Game starts in 5 seconds")
+        self.assertEqual(translator.requests, ["Game starts in 5 seconds"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,122 @@
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+from modless_chat_trans.config import ServiceType
+from modless_chat_trans.translator import (
+    MessageType, TranslationMode, Translator, _llm_key, cached_token_share, circuit_breakers,
+)
+
+HISTORY = "12:00 | [Steve] hi\n\n12:01 | [Alex] anyone want to trade?"
+
+
+def make_translator(provider="OpenAI", model="gpt-4o-mini"):
+    config = SimpleNamespace(
+        service_type=ServiceType.LLM,
+        llm=SimpleNamespace(provider=provider, model=model, api_key="key", api_base=None,
+                            deep_translate=False, max_tokens=256),
+        fallback_llm=None,
+    )
+    return Translator(config, {})
+
+
+def fake_response(finish_reason):
+    return SimpleNamespace(choices=[SimpleNamespace(finish_reason=finish_reason)])
+
+
+def flatten(message):
+    content = message["content"]
+    return content if isinstance(content, str) else "".join(block["text"] for block in content)
+
+
+class PromptLayoutTests(unittest.TestCase):
+    def test_system_prompts_are_memoised(self):
+        translator = make_translator()
+        first = translator._build_system_prompt(TranslationMode.NORMAL, MessageType.PLAYER, True)
+        self.assertIs(first, translator._build_system_prompt(TranslationMode.NORMAL, MessageType.PLAYER, True))
+        self.assertEqual(first, translator._compose_system_prompt(TranslationMode.NORMAL, MessageType.PLAYER, True))
+
+    def test_history_comes_before_the_request(self):
+        translator = make_translator()
+        messages = translator._prompt_messages("system", HISTORY, "Translate: hello")
+        self.assertEqual(messages[0], {"role": "system", "content": "system"})
+        self.assertEqual(
+            messages[1]["content"],
+            f"=== Recent Chat History ===\n{HISTORY}\n=== End of History ===\n\n---\n\nTranslate: hello",
+        )
+
+    def test_cache_hints_keep_the_same_text(self):
+        translator = make_translator("Anthropic", "claude-haiku-4-5")
+        self.assertTrue(translator._prompt_cache_hints("Anthropic", "claude-haiku-4-5"))
+        self.assertFalse(translator._prompt_cache_hints("OpenAI", "gpt-4o-mini"))
+
+        plain = translator._prompt_messages("system", HISTORY, "Translate: hello")
+        hinted = translator._prompt_messages("system", HISTORY, "Translate: hello", cache_hints=True)
+        self.assertEqual([flatten(m) for m in hinted], [flatten(m) for m in plain])
+
+        self.assertIn("cache_control", hinted[0]["content"][-1])
+        blocks = hinted[1]["content"]
+        # 每行历史一个内容块（空行并入上一块），断点在历史末尾，请求部分不缓存
+        self.assertEqual(len(blocks), 3)
+        self.assertIn("cache_control", blocks[-2])
+        self.assertNotIn("cache_control", blocks[-1])
+        self.assertTrue(all(block["text"].strip() for block in blocks))
+
+    def test_cached_token_share(self):
+        self.assertIsNone(cached_token_share(None))
+        self.assertEqual(cached_token_share({"prompt_tokens": 200, "prompt_tokens_details": {"cached_tokens": 150}}),
+                         0.75)
+        self.assertEqual(cached_token_share({"prompt_tokens": 100, "cache_read_input_tokens": 10}), 0.1)
+        self.assertEqual(cached_token_share({"prompt_tokens": 100}), 0)
+
+
+class TokenBudgetRetryTests(unittest.TestCase):
+    def test_truncated_response_is_retried_with_the_cap(self):
+        calls = []
+
+        def complete(params):
+            calls.append(params["max_tokens"])
+            return fake_response("length" if len(calls) == 1 else "stop")
+
+        response = Translator._complete_within_budget(complete, {"max_tokens": 40, "timeout": 10}, 4096)
+        self.assertEqual(calls, [40, 4096])
+        self.assertEqual(response.choices[0].finish_reason, "stop")
+
+    def test_no_retry_at_the_cap_or_when_complete(self):
+        calls = []
+
+        def complete(params):
+            calls.append(params["max_tokens"])
+            return fake_response("length")
+
+        Translator._complete_within_budget(complete, {"max_tokens": 4096, "timeout": 10}, 4096)
+        self.assertEqual(calls, [4096])
+        Translator._complete_within_budget(lambda params: fake_response("stop"), {"max_tokens": 40, "timeout": 10},
+                                           4096)
+
+    def test_summaries_use_the_translation_request_parameters(self):
+        translator = make_translator("OpenRouter", "google/gemini-3-pro-preview:price")
+        response = SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=" summary "))])
+        with mock.patch("modless_chat_trans.translator.litellm") as litellm:
+            litellm.completion.return_value = response
+            self.assertEqual(translator.summarize_context("", ["12:00 | [Steve] hi"], 120), "summary")
+
+        params = litellm.completion.call_args.kwargs
+        self.assertEqual(params["model"], "openrouter/google/gemini-3-pro-preview")
+        self.assertEqual(params["extra_body"], {"reasoning": {"effort": "minimal"}, "provider": {"sort": "price"}})
+        # 推理模型按配置的上限请求
+        self.assertEqual(params["max_tokens"], 256)
+
+    def test_summaries_respect_the_circuit_breaker(self):
+        translator = make_translator("OpenAI", "gpt-4o-summary-test")
+        breaker = circuit_breakers.get(_llm_key("OpenAI", "gpt-4o-summary-test"))
+        for _ in range(breaker.TIMEOUT_STREAK):
+            breaker.record_failure(timeout=True)
+        with mock.patch("modless_chat_trans.translator.litellm") as litellm:
+            with self.assertRaises(RuntimeError):
+                translator.summarize_context("", ["12:00 | [Steve] hi"], 120)
+        litellm.completion.assert_not_called()
+
+
+if __name__ == "__main__":
+    unittest.main()
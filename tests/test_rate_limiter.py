@@ -0,0 +1,171 @@
+import os
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+
+os.environ.setdefault("LITELLM_LOCAL_MODEL_COST_MAP", "True")
+
+from modless_chat_trans.http_pool import HttpPool
+from modless_chat_trans.rate_limiter import RateLimiter, RateLimiters, RateLimitTimeout, parse_reset
+from modless_chat_trans.translator import Translator
+
+
+def fake_response(total_tokens=10, headers=None):
+    return SimpleNamespace(usage=SimpleNamespace(total_tokens=total_tokens),
+                           _hidden_params={"additional_headers": headers or {}})
+
+
+def rate_limit_error(headers):
+    import httpx
+    import litellm
+
+    request = httpx.Request("POST", "https://api.openai.com/v1/chat/completions")
+    return litellm.RateLimitError("slow down", "openai", "gpt-4o-mini",
+                                  response=httpx.Response(429, headers=headers, request=request))
+
+
+class ParseResetTests(unittest.TestCase):
+    def test_formats(self):
+        self.assertEqual(parse_reset("1.5"), 1.5)
+        self.assertEqual(parse_reset("6m0s"), 360)
+        self.assertAlmostEqual(parse_reset("1m2.5s"), 62.5)
+        self.assertAlmostEqual(parse_reset("20ms"), 0.02)
+        self.assertAlmostEqual(parse_reset("2030-01-01T00:01:00Z", now=1893456000), 60)
+        self.assertAlmostEqual(parse_reset("Tue, 01 Jan 2030 00:00:30 GMT", now=1893456000), 30)
+        self.assertIsNone(parse_reset("soon"))
+
+
+class RateLimiterTests(unittest.TestCase):
+    def test_requests_queue_within_the_deadline(self):
+        limiter = RateLimiter("OpenAI#test", rpm=600)
+        for _ in range(600):
+            self.assertEqual(limiter.acquire(), 0)
+        started = time.monotonic()
+        self.assertGreater(limiter.acquire(deadline=time.monotonic() + 1), 0)
+        self.assertGreaterEqual(time.monotonic() - started, 0.05)
+        # 下一个额度超出截止时刻：不排队、不占用额度
+        with self.assertRaises(RateLimitTimeout):
+            limiter.acquire(deadline=time.monotonic() + 0.01)
+        stats = limiter.snapshot()
+        self.assertEqual((stats["queued"], stats["timed_out"]), (1, 1))
+
+    def test_retry_after_pauses_requests(self):
+        limiter = RateLimiter("DeepL")
+        self.assertEqual(limiter.acquire(), 0)
+        limiter.observe({"Retry-After-Ms": "150"}, rate_limited=True)
+        with self.assertRaises(RateLimitTimeout):
+            limiter.acquire(deadline=time.monotonic() + 0.05)
+        self.assertGreater(limiter.acquire(deadline=time.monotonic() + 1), 0.05)
+        self.assertEqual(limiter.snapshot()["rate_limited"], 1)
+
+    def test_limits_are_learned_from_headers(self):
+        limiter = RateLimiter("OpenAI#test", rpm=1000)
+        limiter.observe({
+            "llm_provider-x-ratelimit-limit-requests": "60",
+            "llm_provider-x-ratelimit-remaining-requests": "0",
+            "llm_provider-x-ratelimit-reset-requests": "100ms",
+            "x-ratelimit-limit-tokens": "90000",
+        })
+        stats = limiter.snapshot()
+        self.assertEqual((stats["rpm"], stats["tpm"]), (60, 90000))
+        self.assertGreater(stats["paused_for"], 0)
+
+    def test_tokens_are_settled(self):
+        limiter = RateLimiter("Anthropic#test", tpm=1000)
+        limiter.acquire(tokens=900)
+        limiter.settle(900, 100)
+        self.assertEqual(limiter.acquire(tokens=900, deadline=time.monotonic() + 0.01), 0)
+
+    def test_limiters_by_provider_and_key(self):
+        limiters = RateLimiters()
+        first = limiters.get("OpenAI", "sk-one", rpm=60)
+        self.assertIs(first, limiters.get("OpenAI", "sk-one", rpm=60))
+        self.assertIsNot(first, limiters.get("OpenAI", "sk-two", rpm=60))
+        self.assertNotIn("sk-one", first.name)
+        limiters.get("OpenAI", "sk-one", rpm=30)
+        self.assertEqual(first.snapshot()["rpm"], 30)
+
+    def test_differing_configurations_keep_the_strictest_bucket(self):
+        limiters = RateLimiters()
+        primary = limiters.get("OpenAI", "sk-one", rpm=60)
+        for _ in range(60):
+            primary.acquire()
+        # 备用模型（rpm = 0）与摘要使用同一 Key：不放宽限额，也不重建已耗尽的令牌桶
+        self.assertIs(limiters.get("OpenAI", "sk-one", rpm=0, tpm=5000), primary)
+        self.assertIs(limiters.get("OpenAI", "sk-one", rpm=60), primary)
+        stats = primary.snapshot()
+        self.assertEqual((stats["rpm"], stats["tpm"]), (60, 5000))
+        with self.assertRaises(RateLimitTimeout):
+            primary.acquire(deadline=time.monotonic() + 0.01)
+
+
+class RateLimitedCompletionTests(unittest.TestCase):
+    def test_429_is_retried_after_the_pause(self):
+        limiter = RateLimiter("OpenAI#test", tpm=10000)
+        attempts = []
+        # 在计时之前构造异常：首次导入 litellm 可能耗时数秒，会吃掉请求的超时
+        error = rate_limit_error({"retry-after-ms": "100"})
+
+        def send(params):
+            attempts.append(params["timeout"])
+            if len(attempts) == 1:
+                raise error
+            return fake_response(total_tokens=50)
+
+        started = time.monotonic()
+        params = {"messages": [{"role": "user", "content": "hello"}], "max_tokens": 100, "timeout": 5}
+        Translator._complete_rate_limited(send, params, limiter)
+        self.assertEqual(len(attempts), 2)
+        self.assertGreaterEqual(time.monotonic() - started, 0.1)
+        self.assertLess(attempts[1], 5)
+
+    def test_pause_past_the_timeout_gives_up(self):
+        import litellm
+
+        limiter = RateLimiter("OpenAI#test")
+
+        def send(params):
+            raise rate_limit_error({"retry-after": "30"})
+
+        params = {"messages": [{"role": "user", "content": "hello"}], "max_tokens": 100, "timeout": 1}
+        with self.assertRaises((RateLimitTimeout, litellm.RateLimitError)):
+            Translator._complete_rate_limited(send, params, limiter)
+
+
+class HttpPoolRateLimitTests(unittest.TestCase):
+    def test_retry_after_is_honoured_per_host(self):
+        hits = []
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                hits.append(time.monotonic())
+                status = 429 if len(hits) == 1 else 200
+                self.send_response(status)
+                if status == 429:
+                    self.send_header("Retry-After", "0.2")
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+
+            def log_message(self, *args):
+                pass
+
+        server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        url = f"http://127.0.0.1:{server.server_address[1]}/translate"
+        pool = HttpPool(retries=0)
+        try:
+            self.assertEqual(pool.get(url, timeout=2).status_code, 429)
+            self.assertEqual(pool.get(url, timeout=2).status_code, 200)
+        finally:
+            pool.close()
+            server.shutdown()
+            server.server_close()
+        self.assertGreaterEqual(hits[1] - hits[0], 0.2)
+
+
+if __name__ == "__main__":
+    unittest.main()
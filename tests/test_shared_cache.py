@@ -0,0 +1,90 @@
+import shutil
+import tempfile
+import unittest
+
+from diskcache import Cache
+
+from modless_chat_trans import shared_cache
+from modless_chat_trans.shared_cache import SharedCacheClient, create_shared_cache_app, start_shared_cache_server
+from modless_chat_trans.translation_cache import TranslationCache, make_key
+
+
+class SharedCacheServerTests(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.store = Cache(self.directory)
+        self.client = create_shared_cache_app(self.store, token="secret").test_client()
+        self.headers = {"X-MCT-Token": "secret"}
+
+    def tearDown(self):
+        self.store.close()
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def test_store_then_lookup_is_isolated_by_namespace(self):
+        self.client.post("/store", json={"entries": [["en>zh-cn", "hello", "你好"]]}, headers=self.headers)
+
+        response = self.client.post("/lookup", json={"keys": [["en>zh-cn", "hello"], ["en>ja", "hello"]]},
+                                    headers=self.headers)
+
+        self.assertEqual(response.get_json()["values"], ["你好", None])
+        self.assertEqual(self.store.get(make_key("en>zh-cn", "hello")), "你好")
+
+    def test_store_does_not_overwrite_existing_entries(self):
+        self.store.set(make_key("en>zh-cn", "hello"), "你好", tag="en>zh-cn")
+        response = self.client.post("/store", json={"entries": [["en>zh-cn", "hello", "poisoned"]]},
+                                    headers=self.headers)
+
+        self.assertEqual(response.get_json()["stored"], 0)
+        self.assertEqual(self.store.get(make_key("en>zh-cn", "hello")), "你好")
+
+    def test_peer_entries_go_through_the_memory_tier(self):
+        cache = TranslationCache(self.store)
+        cache.set("en>zh-cn", "hello", "你好")
+        client = create_shared_cache_app(self.store, token="secret", memory_tier=cache).test_client()
+        response = client.post("/store", json={"entries": [["en>zh-cn", "hello", "poisoned"],
+                                                           ["en>zh-cn", "bye", "再见"]]}, headers=self.headers)
+
+        self.assertEqual(response.get_json()["stored"], 1)
+        self.assertEqual(cache.get("en>zh-cn", "hello"), "你好")
+        self.assertEqual(cache.get("en>zh-cn", "bye"), "再见")
+        cache.close()
+
+    def test_server_without_token_listens_on_loopback(self):
+        server = start_shared_cache_server(self.store, 0, token="")
+        try:
+            self.assertEqual(server.host, "127.0.0.1")
+        finally:
+            server.shutdown()
+            shared_cache._server = None
+
+    def test_token_and_payload_are_checked(self):
+        self.assertEqual(self.client.get("/health").status_code, 403)
+        self.assertEqual(self.client.post("/lookup", json={"keys": [["only-one"]]}, headers=self.headers).status_code,
+                         400)
+
+
+class SharedCacheClientTests(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.disk = Cache(self.directory)
+        self.cache = TranslationCache(self.disk)
+
+    def tearDown(self):
+        self.cache.close()
+        self.disk.close()
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def test_unreachable_service_falls_back_to_local_cache(self):
+        client = SharedCacheClient("http://127.0.0.1:9", timeout=0.2)
+        self.cache.shared = client
+
+        self.assertIsNone(self.cache.get("ns", "hello"))
+        self.assertFalse(client.available)
+        self.cache.set("ns", "hello", "你好")
+
+        self.assertEqual(self.cache.get("ns", "hello"), "你好")
+        self.assertEqual(client.flush(), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,46 @@
+import os
+import unittest
+
+os.environ.setdefault("LITELLM_LOCAL_MODEL_COST_MAP", "True")
+
+from modless_chat_trans import web_display
+from modless_chat_trans.translator import Translator
+
+
+class StreamCompletionTests(unittest.TestCase):
+    def test_partials_are_prefixes_and_response_is_complete(self):
+        partials = []
+        response = Translator._stream_completion({
+            "model": "openai/gpt-4o",
+            "messages": [{"role": "user", "content": "hi"}],
+            "api_key": "test",
+            "timeout": 10,
+            "mock_response": "你好，世界 hello there",
+        }, partials.append)
+
+        self.assertGreater(len(partials), 1)
+        for shorter, longer in zip(partials, partials[1:]):
+            self.assertTrue(longer.startswith(shorter))
+        self.assertEqual(partials[-1], "你好，世界 hello there")
+        self.assertEqual(response.choices[0].message.content, "你好，世界 hello there")
+        self.assertTrue(response.model_dump()["usage"]["total_tokens"])
+
+
+class UpdateSlotTests(unittest.TestCase):
+    def test_partial_text_is_kept_until_the_slot_is_filled(self):
+        slot_id = web_display.allocate_slot(name="Steve")
+        web_display.update_slot(slot_id, "你")
+        web_display.update_slot(slot_id, "你好")
+        record = web_display.messages_by_id[slot_id]
+        self.assertEqual(record["partial"], "你好")
+        self.assertEqual(record["partial_revision"], 2)
+        self.assertTrue(record["pending"])
+
+        web_display.fill_slot(slot_id, "Steve", "你好！", {})
+        web_display.update_slot(slot_id, "迟到")
+        self.assertEqual(record["message"], "你好！")
+        self.assertEqual(record["partial_revision"], 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
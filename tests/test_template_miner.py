@@ -0,0 +1,66 @@
+import unittest
+
+from modless_chat_trans.template_miner import TemplateMiner, fill_template
+
+
+class TemplateMinerTests(unittest.TestCase):
+    def test_numbers_and_player_names_become_variables(self):
+        miner = TemplateMiner(min_occurrences=2, is_known_name=lambda name: name in ("PlayerX", "Bob"))
+
+        first = miner.observe("PlayerX has joined (5/12)!")
+        second = miner.observe("Bob has joined (6/12)!")
+
+        self.assertEqual(first.skeleton, "{{v1}} has joined ({{v2}}/{{v3}})!")
+        self.assertEqual(second.skeleton, "{{v1}} has joined ({{v2}}/{{v3}})!")
+        self.assertEqual(second.values, {"v1": "Bob", "v2": "6", "v3": "12"})
+        self.assertTrue(miner.is_ready(second))
+
+    def test_lowercase_words_are_not_merged_as_names(self):
+        miner = TemplateMiner()
+
+        miner.observe("Bob has left")
+
+        self.assertIsNone(miner.observe("Bob has quit"))
+
+    def test_capitalized_words_are_not_merged_as_names(self):
+        miner = TemplateMiner()
+
+        miner.observe("Red team wins in 5 rounds")
+
+        self.assertEqual(miner.observe("Blue team wins in 5 rounds").skeleton, "Blue team wins in {{v1}} rounds")
+        self.assertEqual(miner.observe("Blue team wins in 7 rounds").occurrences, 2)
+
+    def test_coordinates_are_a_single_variable(self):
+        candidate = TemplateMiner().observe("Teleported to 100, 64, -20")
+
+        self.assertEqual(candidate.skeleton, "Teleported to {{v1}}")
+        self.assertEqual(candidate.values, {"v1": "100, 64, -20"})
+
+    def test_rejected_skeleton_is_never_ready(self):
+        miner = TemplateMiner(min_occurrences=1)
+        candidate = miner.observe("Game starts in 7 seconds")
+
+        miner.reject(candidate.skeleton)
+
+        self.assertFalse(miner.is_ready(miner.observe("Game starts in 5 seconds")))
+
+    def test_rejected_skeletons_are_bounded(self):
+        miner = TemplateMiner(min_occurrences=1)
+        miner.MAX_REJECTED = 2
+        kept = miner.observe("Game starts in 7 seconds")
+        miner.reject(kept.skeleton)
+        miner.reject("first {{v1}}")
+        miner.is_ready(kept)  # 最近用到的骨架保留
+        miner.reject("second {{v1}}")
+
+        self.assertEqual(list(miner._rejected), [kept.skeleton, "second {{v1}}"])
+
+    def test_fill_template_requires_every_variable(self):
+        values = {"v1": "Bob", "v2": "6"}
+
+        self.assertEqual(fill_template("{{v1}} 加入 ({{v2}})", values), "Bob 加入 (6)")
+        self.assertIsNone(fill_template("{{v1}} 加入", values))
+
+
+if __name__ == "__main__":
+    unittest.main()
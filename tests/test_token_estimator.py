@@ -0,0 +1,55 @@
+import unittest
+
+from modless_chat_trans.token_estimator import (
+    MIN_OUTPUT_TOKENS, TruncationStats, estimate_tokens, expansion_ratio, output_token_budget,
+)
+
+
+class TokenEstimatorTests(unittest.TestCase):
+    def test_empty_text_has_no_tokens(self):
+        self.assertEqual(estimate_tokens(""), 0)
+        self.assertEqual(estimate_tokens("   "), 0)
+
+    def test_short_words_count_as_one_token(self):
+        self.assertEqual(estimate_tokens("gg"), 1)
+        self.assertEqual(estimate_tokens("hello world"), 2)
+
+    def test_scripts_are_weighted_differently(self):
+        self.assertEqual(estimate_tokens("12345678"), 3)
+        self.assertEqual(estimate_tokens("你好世界"), 5)
+        self.assertEqual(estimate_tokens("こんにちは"), 5)
+        self.assertEqual(estimate_tokens("Привет"), 2)
+        self.assertEqual(estimate_tokens("gg 😀"), 3)
+
+    def test_longer_text_scales(self):
+        line = "anyone wanna duel in the lobby?"
+        self.assertGreater(estimate_tokens(line * 10), estimate_tokens(line) * 9)
+
+
+class OutputBudgetTests(unittest.TestCase):
+    def test_expansion_ratio_by_target_language(self):
+        self.assertEqual(expansion_ratio("Simplified Chinese"), expansion_ratio("zh"))
+        self.assertGreater(expansion_ratio("Thai"), expansion_ratio("English"))
+        self.assertGreater(expansion_ratio("Klingon"), 1)
+
+    def test_budget_scales_with_input_and_respects_cap(self):
+        short = output_token_budget("gg", "Simplified Chinese", 4096)
+        long = output_token_budget("anyone wanna duel in the lobby? " * 20, "Simplified Chinese", 4096)
+        self.assertGreaterEqual(short, MIN_OUTPUT_TOKENS)
+        self.assertLess(short, 64)
+        self.assertGreater(long, short * 5)
+        self.assertEqual(output_token_budget("hello " * 1000, "Japanese", 256), 256)
+        self.assertEqual(output_token_budget("gg", "Simplified Chinese", 4096, overhead=400) - short, 400)
+
+    def test_truncation_rate(self):
+        stats = TruncationStats()
+        self.assertIsNone(stats.rate)
+        for _ in range(3):
+            stats.record()
+        stats.record(truncated=True, recovered=True)
+        self.assertEqual(stats.rate, 0.25)
+        self.assertEqual(stats.snapshot()["recovered"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,124 @@
+import tempfile
+import unittest
+
+from diskcache import Cache
+
+from modless_chat_trans.translation_cache import TranslationCache, make_key
+
+ZH = "english>simplified chinese|openai:gpt-4o|00000000"
+JA = "english>japanese|openai:gpt-4o|00000000"
+
+
+class TranslationCacheTests(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.disk = Cache(self.directory.name, eviction_policy="least-frequently-used")
+        self.caches = []
+
+    def tearDown(self):
+        for cache in self.caches:
+            cache.close()
+        self.disk.close()
+        self.directory.cleanup()
+
+    def make_cache(self, **kwargs):
+        cache = TranslationCache(self.disk, **kwargs)
+        self.caches.append(cache)
+        return cache
+
+    def access_count(self, key):
+        return self.disk._sql("SELECT access_count FROM Cache WHERE key = ?", (make_key(ZH, key),)).fetchone()[0]
+
+    def test_memory_hits_do_not_read_disk_until_flushed(self):
+        cache = self.make_cache(memory_size=2)
+        cache.set(ZH, "hello", "你好")
+
+        for _ in range(3):
+            self.assertEqual(cache.get(ZH, "hello"), "你好")
+
+        self.assertEqual(cache.stats()["memory"]["hits"], 3)
+        cache.flush_writes()
+        self.assertEqual(self.access_count("hello"), 0)
+        cache.flush_access_counts()
+        self.assertEqual(self.access_count("hello"), 3)
+
+    def test_access_counts_are_handed_to_the_writer(self):
+        cache = self.make_cache(memory_size=2)
+        cache.ACCESS_FLUSH_THRESHOLD = 2
+        cache.set(ZH, "hello", "你好")
+        cache.flush_writes()
+        cache.flush_writes = lambda: self.fail("memory hits must not wait for the write queue")
+
+        for _ in range(2):
+            self.assertEqual(cache.get(ZH, "hello"), "你好")
+
+        del cache.flush_writes
+        cache.flush_writes()
+        self.assertEqual(self.access_count("hello"), 2)
+
+    def test_lru_eviction_falls_back_to_disk(self):
+        cache = self.make_cache(memory_size=1)
+        cache.set(ZH, "a", "甲")
+        cache.set(ZH, "b", "乙")
+        cache.flush_writes()
+
+        self.assertEqual(cache.get(ZH, "a"), "甲")
+        self.assertIsNone(cache.get(ZH, "missing"))
+
+        stats = cache.stats()
+        self.assertEqual(stats["disk"]["hits"], 1)
+        self.assertEqual(stats["disk"]["misses"], 1)
+
+    def test_warm_loads_most_accessed_entries(self):
+        for key in ("cold", "warm", "hot"):
+            self.disk.set(make_key(ZH, key), key.upper(), tag=ZH)
+        for key, reads in (("warm", 1), ("hot", 3)):
+            for _ in range(reads):
+                self.disk.get(make_key(ZH, key))
+
+        cache = self.make_cache(memory_size=8)
+        self.assertEqual(cache.warm(2, ZH), 2)
+
+        self.assertEqual(cache.get(ZH, "hot"), "HOT")
+        self.assertEqual(cache.stats()["memory"]["entries"], 2)
+        self.assertEqual(cache.stats()["memory"]["hits"], 1)
+
+    def test_warm_counts_only_admitted_entries(self):
+        self.disk.set(make_key(ZH, "text"), "TEXT", tag=ZH)
+        self.disk.set(make_key(ZH, "blob"), b"\x00\x01", tag=ZH)
+
+        cache = self.make_cache(memory_size=8)
+        self.assertEqual(cache.warm(8, ZH), 1)
+        self.assertEqual(cache.stats()["memory"]["entries"], 1)
+
+    def test_writes_are_visible_before_they_reach_disk(self):
+        cache = self.make_cache(memory_size=0)
+        cache.set(ZH, "hello", "你好")
+
+        self.assertEqual(cache.get(ZH, "hello"), "你好")
+        cache.close()
+        self.assertEqual(self.disk.get(make_key(ZH, "hello")), "你好")
+
+    def test_namespaces_are_isolated_and_evicted_separately(self):
+        cache = self.make_cache()
+        cache.set(ZH, "hello", "你好")
+        cache.set(JA, "hello", "こんにちは")
+
+        self.assertEqual(cache.get(JA, "hello"), "こんにちは")
+        self.assertEqual(cache.evict_namespace(JA), 1)
+        self.assertIsNone(cache.get(JA, "hello"))
+        self.assertEqual(cache.get(ZH, "hello"), "你好")
+        self.assertEqual(cache.namespaces()[ZH]["entries"], 1)
+
+    def test_legacy_entries_are_adopted_once(self):
+        self.disk["hello"] = "你好"
+        cache = self.make_cache()
+
+        self.assertEqual(cache.adopt_legacy_entries(ZH), 1)
+        self.assertEqual(cache.adopt_legacy_entries(JA), 0)
+        self.assertEqual(cache.get(ZH, "hello"), "你好")
+        self.assertIsNone(cache.get(JA, "hello"))
+
+
+if __name__ == "__main__":
+    unittest.main()
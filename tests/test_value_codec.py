@@ -0,0 +1,64 @@
+import shutil
+import tempfile
+import unittest
+
+from diskcache import Cache
+
+from modless_chat_trans.translation_cache import TranslationCache, make_key
+from modless_chat_trans.value_codec import ValueCodec
+
+SAMPLES = [f"玩家 Player{i} 加入了游戏（{i % 16}/16）" for i in range(200)] + ["欢迎来到服务器！"] * 50
+
+
+class ValueCodecTests(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def test_dictionary_round_trip_is_smaller(self):
+        codec = ValueCodec(self.directory)
+        dict_id = codec.train(SAMPLES, "zlib", 4096)
+        text = "玩家 Player999 加入了游戏（3/16）"
+
+        encoded = codec.encode(text)
+
+        self.assertEqual(dict_id, 1)
+        self.assertIsInstance(encoded, bytes)
+        self.assertLess(len(encoded), len(text.encode("utf-8")))
+        self.assertEqual(codec.decode(encoded), text)
+        # 其他实例从磁盘加载同一版本的字典
+        self.assertEqual(ValueCodec(self.directory).decode(encoded), text)
+
+    def test_plain_and_unknown_values(self):
+        codec = ValueCodec(self.directory)
+        other = ValueCodec(tempfile.mkdtemp(dir=self.directory))
+        other.train(SAMPLES, "zlib", 4096)
+        other.train(SAMPLES, "zlib", 4096)
+
+        self.assertEqual(codec.encode("你好"), "你好")
+        self.assertEqual(codec.decode("你好"), "你好")
+        self.assertIsNone(codec.decode(other.encode(SAMPLES[0])))
+
+    def test_translation_cache_compresses_and_recompresses(self):
+        disk = Cache(self.directory)
+        cache = TranslationCache(disk, memory_size=0)
+        for i, sample in enumerate(SAMPLES):
+            disk.set(make_key("ns", str(i)), sample, tag="ns")
+
+        self.assertEqual(cache.enable_compression("zlib", 4096, min_samples=100), 1)
+        cache.set("ns", "new", SAMPLES[3])
+        cache.flush_writes()
+        rowid, scanned, rewritten = cache.recompress(0, 1000)
+
+        self.assertIsInstance(disk.get(make_key("ns", "new")), bytes)
+        self.assertEqual((scanned, rewritten), (len(SAMPLES), len(SAMPLES)))
+        self.assertEqual(cache.get("ns", "0"), SAMPLES[0])
+        self.assertEqual(cache.get("ns", "new"), SAMPLES[3])
+        cache.close()
+        disk.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+翻译缓存磁盘层基准测试：比较各 SQLite 调优方案与 dbm 后端的读写延迟。
+
+在指定目录（默认系统临时目录；测试机械硬盘时请指定该盘上的目录）中为每个方案创建独立缓存，
+逐条写入（每条一个事务，与后台写入线程的最坏情况相同）和随机读取，输出 p50 / p99 延迟。
+
+用法（从项目根目录运行）：
+    python tools/benchmark_cache_backends.py [--rows 20000] [--directory D:/tmp]
+"""
+
+import argparse
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+SCRIPT_DIR = Path(__file__).parent.resolve()
+sys.path.insert(0, str(SCRIPT_DIR.parent / "src"))
+
+from modless_chat_trans.cache_backends import PROFILES, open_cache_backend  # noqa: E402
+from modless_chat_trans.translation_cache import make_key  # noqa: E402
+
+NAMESPACE = "en>zh-cn|openai:gpt-4o|0123abcd"
+
+
+def percentile(samples: list, fraction: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def measure(cache, rows: int) -> dict:
+    keys = [make_key(NAMESPACE, f"<Player{i % 997}> message number {i}") for i in range(rows)]
+    store = []
+    for i, key in enumerate(keys):
+        started = time.perf_counter()
+        cache.set(key, f"第 {i} 条译文", tag=NAMESPACE)
+        store.append(time.perf_counter() - started)
+
+    lookup = []
+    for key in random.sample(keys, min(rows, 20000)):
+        started = time.perf_counter()
+        cache.get(key)
+        lookup.append(time.perf_counter() - started)
+    return {
+        "store_p50": percentile(store, 0.5), "store_p99": percentile(store, 0.99),
+        "lookup_p50": percentile(lookup, 0.5), "lookup_p99": percentile(lookup, 0.99),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--directory", default=None, help="在该目录下创建测试缓存")
+    args = parser.parse_args()
+
+    root = tempfile.mkdtemp(prefix="mct-bench-", dir=args.directory)
+    candidates = [(f"diskcache/{name}", {"profile": name}) for name in PROFILES] + [("dbm", {"backend": "dbm"})]
+    try:
+        print(f"{'后端/方案':<24}{'写入 p50':>12}{'写入 p99':>12}{'读取 p50':>12}{'读取 p99':>12}（微秒）")
+        for label, options in candidates:
+            cache = open_cache_backend(directory=os.path.join(root, label.replace("/", "-")), **options)
+            result = measure(cache, args.rows)
+            cache.close()
+            print(f"{label:<24}" + "".join(f"{result[k] * 1e6:>12.1f}"
+                                           for k in ("store_p50", "store_p99", "lookup_p50", "lookup_p99")))
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+翻译缓存值压缩基准测试：比较各压缩方式下的存储大小与每次读取的解码耗时。
+
+默认使用合成的聊天译文；指定 --cache 时从已有缓存目录（只读）抽取译文作为样本，结果更接近实际。
+样本的前一半用于训练字典，后一半用于测量（避免字典"见过"被测数据）。
+
+用法（从项目根目录运行）：
+    python tools/benchmark_cache_compression.py [--cache mct-cache] [--samples 20000]
+"""
+
+import argparse
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+SCRIPT_DIR = Path(__file__).parent.resolve()
+sys.path.insert(0, str(SCRIPT_DIR.parent / "src"))
+
+from diskcache import Cache  # noqa: E402
+
+from modless_chat_trans.value_codec import ValueCodec, available_method  # noqa: E402
+
+_PHRASES = ["有人要组队吗", "我在主城等你", "这个服务器延迟好高", "谁有多余的钻石", "小心后面有苦力怕",
+            "明天几点上线", "刚才那局打得不错", "我去挖矿了", "基地在坐标附近", "有人会做红石电路吗"]
+
+
+def synthetic(count: int) -> list:
+    rng = random.Random(0)
+    samples = []
+    for i in range(count):
+        kind = rng.random()
+        if kind < 0.3:
+            samples.append(f"玩家 Player{rng.randint(1, 5000)} 加入了游戏（{rng.randint(1, 16)}/16）")
+        elif kind < 0.5:
+            samples.append(f"你击杀了 Player{rng.randint(1, 5000)}，获得 {rng.randint(1, 50)} 金币")
+        else:
+            samples.append("，".join(rng.sample(_PHRASES, rng.randint(1, 3))) + rng.choice(["", "！", "？", "~"]))
+    return samples
+
+
+def from_cache(directory: str, count: int) -> list:
+    cache = Cache(directory)
+    codec = ValueCodec(directory)
+    rows = cache._sql('SELECT value FROM Cache WHERE raw = 1 AND mode = 1 AND tag IS NOT NULL LIMIT ?',
+                      (count,)).fetchall()
+    cache.close()
+    return [value for value in (codec.decode(row[0]) for row in rows) if isinstance(value, str)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cache", default=None, help="从该缓存目录抽取样本")
+    parser.add_argument("--samples", type=int, default=20000)
+    parser.add_argument("--dict-size-kb", type=int, default=16)
+    args = parser.parse_args()
+
+    samples = from_cache(args.cache, args.samples) if args.cache else synthetic(args.samples)
+    random.Random(1).shuffle(samples)
+    train, test = samples[:len(samples) // 2], samples[len(samples) // 2:]
+    raw_size = sum(len(text.encode("utf-8")) for text in test)
+    print(f"样本 {len(samples)} 条（训练 {len(train)}，测量 {len(test)}），"
+          f"明文平均 {raw_size / len(test):.1f} 字节/条")
+
+    methods = sorted({available_method("zstd"), "zlib"})
+    print(f"{'方式':<10}{'平均字节/条':>12}{'压缩率':>10}{'编码 µs':>10}{'解码 µs':>10}")
+    for method in methods:
+        with tempfile.TemporaryDirectory(prefix="mct-bench-") as directory:
+            codec = ValueCodec(directory)
+            codec.train(train, method, args.dict_size_kb * 1024)
+        started = time.perf_counter()
+        encoded = [codec.encode(text) for text in test]
+        encode_cost = (time.perf_counter() - started) / len(test)
+        size = sum(len(value) if isinstance(value, bytes) else len(value.encode("utf-8")) for value in encoded)
+        started = time.perf_counter()
+        for value in encoded:
+            codec.decode(value)
+        decode_cost = (time.perf_counter() - started) / len(test)
+        print(f"{method:<10}{size / len(test):>12.1f}{size / raw_size:>10.0%}"
+              f"{encode_cost * 1e6:>10.1f}{decode_cost * 1e6:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+翻译缓存导出/导入基准测试：在临时目录中生成合成缓存，测量导出和导入的每秒条目数。
+
+用法（从项目根目录运行）：
+    python tools/benchmark_cache_transfer.py [条目数] [--compression zstd|gzip]
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+SCRIPT_DIR = Path(__file__).parent.resolve()
+sys.path.insert(0, str(SCRIPT_DIR.parent / "src"))
+
+from diskcache import Cache  # noqa: E402
+
+from modless_chat_trans.cache_transfer import export_cache, import_cache, preferred_compression  # noqa: E402
+from modless_chat_trans.translation_cache import make_key  # noqa: E402
+
+
+def fill(cache: Cache, rows: int) -> None:
+    namespaces = ["en>zh-cn|openai:gpt-4o|0123abcd", "en>ja|google:translate|89abcdef"]
+    batch = 5000
+    for start in range(0, rows, batch):
+        with cache.transact():
+            for i in range(start, min(rows, start + batch)):
+                namespace = namespaces[i % len(namespaces)]
+                cache.set(make_key(namespace, f"<Player{i % 997}> message number {i} from the benchmark"),
+                          f"第 {i} 条基准测试译文", tag=namespace)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("rows", nargs="?", type=int, default=200_000)
+    parser.add_argument("--compression", choices=("zstd", "gzip"), default=None)
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp(prefix="mct-bench-")
+    try:
+        source = Cache(os.path.join(directory, "source"), eviction_policy="least-frequently-used")
+        target = Cache(os.path.join(directory, "target"), eviction_policy="least-frequently-used")
+        started = time.monotonic()
+        fill(source, args.rows)
+        print(f"生成 {args.rows} 条合成缓存：{time.monotonic() - started:.1f} 秒")
+
+        compression = args.compression or preferred_compression()
+        path = os.path.join(directory, "export.jsonl" + (".zst" if compression == "zstd" else ".gz"))
+        exported = export_cache(source, path, compression=compression)
+        size = os.path.getsize(path)
+        print(f"导出（{compression}）：{exported.rows_per_second:,.0f} 条/秒，文件 {size / 1024 / 1024:.1f} MiB "
+              f"（{size / max(1, exported.rows):.1f} 字节/条）")
+
+        imported = import_cache(target, path)
+        print(f"导入（新库）：{imported.rows_per_second:,.0f} 条/秒")
+        merged = import_cache(target, path, policy="most-read")
+        print(f"导入（全部冲突，most-read）：{merged.rows_per_second:,.0f} 条/秒")
+        source.close()
+        target.close()
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
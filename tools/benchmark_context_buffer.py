@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+ContextBuffer 微基准：比较每次调用都重新渲染整段历史（旧实现）与 push 时渲染、变更前复用（当前实现）
+的 get_context_messages 耗时，覆盖上下文长度 10 / 100 / 1000。
+
+- 稳定读取：历史不变时连续读取（多个翻译线程读取同一份上下文）
+- 追加后读取：每 push 一条读取一次（消息流的最坏情况）
+
+用法（从项目根目录运行）：
+    python tools/benchmark_context_buffer.py
+"""
+
+import sys
+import time
+import timeit
+from datetime import datetime
+from pathlib import Path
+
+SCRIPT_DIR = Path(__file__).parent.resolve()
+sys.path.insert(0, str(SCRIPT_DIR.parent / "src"))
+
+from modless_chat_trans.context_buffer import ContextBuffer, ContextEntry  # noqa: E402
+
+
+def rebuild(buffer: ContextBuffer) -> list:
+    """旧实现：每次调用都格式化时间并拼接全部历史"""
+    lines = []
+    for entry in buffer.snapshot().entries():
+        time_str = datetime.fromtimestamp(entry.timestamp).strftime("%H:%M")
+        name = entry.player_name if entry.player_name else "[SYSTEM]"
+        lines.append(f"{time_str} | [{name}] {entry.original}")
+    return [{"role": "user", "content": "\n".join(lines)}]
+
+
+def filled(length: int) -> ContextBuffer:
+    buffer = ContextBuffer(strategy="fixed", context_length=length)
+    now = time.time()
+    for i in range(length):
+        buffer.push(ContextEntry(f"message number {i} with some chat text", now + i, f"Player{i % 20}"))
+    return buffer
+
+
+def per_call(func, number: int) -> float:
+    return min(timeit.repeat(func, number=number, repeat=5)) / number * 1e6
+
+
+def main():
+    print(f"{'长度':>6}{'旧 稳定读取':>14}{'新 稳定读取':>14}{'旧 追加后读取':>16}{'新 追加后读取':>16}（微秒/次）")
+    for length in (10, 100, 1000):
+        number = max(10, 20000 // length)
+        buffer = filled(length)
+        old_steady = per_call(lambda: rebuild(buffer), number)
+        new_steady = per_call(buffer.get_context_messages, number)
+
+        counter = iter(range(10 ** 9))
+
+        def push_then(read):
+            i = next(counter)
+            buffer.push(ContextEntry(f"message number {i} with some chat text", time.time(), f"Player{i % 20}"))
+            read(buffer)
+
+        old_append = per_call(lambda: push_then(rebuild), number)
+        new_append = per_call(lambda: push_then(ContextBuffer.get_context_messages), number)
+        print(f"{length:>6}{old_steady:>14.1f}{new_steady:>14.2f}{old_append:>16.1f}{new_append:>16.1f}")
+
+
+if __name__ == "__main__":
+    main()
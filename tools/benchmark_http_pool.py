@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+HTTP 连接池基准：对本地 HTTPS 桩服务连续发送翻译请求，比较 requests.post（每次新建连接）
+与 http_pool.HttpPool（保持连接）的单次请求延迟。
+
+桩服务使用临时生成的自签名证书；--rtt 模拟网络往返时间：新连接额外等待 2 个 RTT（TCP + TLS 握手），
+每个请求等待 1 个 RTT。
+
+用法（从项目根目录运行）：
+    python tools/benchmark_http_pool.py [--requests 200] [--threads 4] [--rtt 0]
+"""
+
+import argparse
+import datetime
+import json
+import os
+import ssl
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+SCRIPT_DIR = Path(__file__).parent.resolve()
+sys.path.insert(0, str(SCRIPT_DIR.parent / "src"))
+
+import requests  # noqa: E402
+
+from modless_chat_trans.http_pool import HttpPool  # noqa: E402
+from modless_chat_trans.logger import logger  # noqa: E402
+
+
+def make_certificate(directory: str) -> tuple[str, str]:
+    """生成 localhost 的自签名证书，返回 (证书路径, 私钥路径)"""
+    from cryptography import x509
+    from cryptography.hazmat.primitives import hashes, serialization
+    from cryptography.hazmat.primitives.asymmetric import ec
+    from cryptography.x509.oid import NameOID
+
+    key = ec.generate_private_key(ec.SECP256R1())
+    name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, "localhost")])
+    now = datetime.datetime.now(datetime.timezone.utc)
+    certificate = (
+        x509.CertificateBuilder()
+        .subject_name(name).issuer_name(name)
+        .public_key(key.public_key())
+        .serial_number(x509.random_serial_number())
+        .not_valid_before(now - datetime.timedelta(minutes=5))
+        .not_valid_after(now + datetime.timedelta(days=1))
+        .add_extension(x509.SubjectAlternativeName([x509.DNSName("localhost")]), critical=False)
+        .add_extension(x509.BasicConstraints(ca=True, path_length=None), critical=True)
+        .sign(key, hashes.SHA256())
+    )
+    cert_path = os.path.join(directory, "stub.crt")
+    key_path = os.path.join(directory, "stub.key")
+    with open(cert_path, "wb") as f:
+        f.write(certificate.public_bytes(serialization.Encoding.PEM))
+    with open(key_path, "wb") as f:
+        f.write(key.private_bytes(serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8,
+                                  serialization.NoEncryption()))
+    return cert_path, key_path
+
+
+def start_stub(cert_path: str, key_path: str, rtt: float) -> ThreadingHTTPServer:
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        disable_nagle_algorithm = True
+
+        def setup(self):
+            time.sleep(2 * rtt)
+            super().setup()
+
+        def do_POST(self):
+            self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            time.sleep(rtt)
+            body = json.dumps({"translations": [{"text": "你好"}]}).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("localhost", 0), Handler)
+    context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+    context.load_cert_chain(cert_path, key_path)
+    # 握手推迟到处理线程（首次读取时），避免在 accept 线程中串行握手
+    server.socket = context.wrap_socket(server.socket, server_side=True, do_handshake_on_connect=False)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def run(http, url: str, cert_path: str, count: int, threads: int) -> list[float]:
+    def one(_):
+        started = time.perf_counter()
+        response = http.post(url, data={"text": "hello", "target_lang": "ZH"}, verify=cert_path, timeout=10)
+        response.raise_for_status()
+        return (time.perf_counter() - started) * 1000
+
+    with ThreadPoolExecutor(threads) as executor:
+        return list(executor.map(one, range(count)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="HTTP connection pool benchmark")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--threads", type=int, default=4)
+    parser.add_argument("--rtt", type=float, default=0.0, help="模拟的网络往返时间（毫秒）")
+    args = parser.parse_args()
+    logger.disable("modless_chat_trans")
+
+    with tempfile.TemporaryDirectory() as directory:
+        cert_path, key_path = make_certificate(directory)
+        server = start_stub(cert_path, key_path, args.rtt / 1000)
+        url = f"https://localhost:{server.server_address[1]}/v2/translate"
+
+        pool = HttpPool(pool_size=args.threads)
+        results = {
+            "requests.post（无连接池）": run(requests, url, cert_path, args.requests, args.threads),
+            "HttpPool（保持连接）": run(pool, url, cert_path, args.requests, args.threads),
+        }
+        pool.close()
+        server.shutdown()
+
+    print(f"{args.requests} 个请求，{args.threads} 个线程，模拟 RTT {args.rtt:g} ms")
+    for name, latencies in results.items():
+        latencies.sort()
+        p95 = latencies[int(len(latencies) * 0.95) - 1]
+        print(f"{name:<24} 平均 {statistics.mean(latencies):7.2f} ms   中位数 {statistics.median(latencies):7.2f} ms"
+              f"   P95 {p95:7.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
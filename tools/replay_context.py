@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+上下文回放：把一段聊天日志按实际处理顺序（push 原文后取快照）分别送入单一上下文与分频道上下文，
+比较每条消息带上的上下文长度（token 数由 token_estimator 估算）。
+
+不指定日志文件时使用内置的模拟 Hypixel 会话：公屏刷屏为主，穿插组队、公会与两位玩家的私信。
+
+用法（从项目根目录运行）：
+    python tools/replay_context.py [latest.log] [--length 10] [--timeout 120] [--block auto] [--tokens 0]
+"""
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+SCRIPT_DIR = Path(__file__).parent.resolve()
+sys.path.insert(0, str(SCRIPT_DIR.parent / "src"))
+
+from modless_chat_trans.context_buffer import ChannelContextBuffers, ContextEntry, extract_log_time  # noqa: E402
+from modless_chat_trans.logger import logger  # noqa: E402
+from modless_chat_trans.message_processor import detect_channel, parse_message  # noqa: E402
+from modless_chat_trans.token_estimator import estimate_tokens  # noqa: E402
+from modless_chat_trans.translator import MessageType  # noqa: E402
+
+_PUBLIC = ["anyone wanna duel?", "gg ez", "lf party bedwars 4v4", "selling enchanted diamonds cheap",
+           "who is the best player here", "lag??", "how do i get to the skyblock hub", "hi guys",
+           "/visit me for free stuff", "what is the best sword in skyblock"]
+_PARTY = ["ready?", "i'll take the left side", "someone buy wool pls", "warp us to the next game",
+          "rush mid after diamonds", "i'm going to rejoin"]
+_GUILD = ["welcome to the guild!", "guild quest is almost done", "who wants to do dungeons later?",
+          "remember the event on saturday"]
+_DM = ["hey, still want to trade?", "i can pay 2m for it", "deal, meet at the hub", "sorry, lagged out"]
+
+
+def synthetic_session(messages: int = 600, seed: int = 1) -> list[str]:
+    """生成模拟的 Hypixel 聊天日志行（约每 2 秒一条）"""
+    rng = random.Random(seed)
+    lines = []
+    clock = 20 * 3600
+    for _ in range(messages):
+        clock += rng.randint(1, 4)
+        stamp = time.strftime("%H:%M:%S", time.gmtime(clock))
+        roll = rng.random()
+        if roll < 0.65:
+            chat = f"[MVP+] Lobby{rng.randint(1, 40)}: {rng.choice(_PUBLIC)}"
+        elif roll < 0.80:
+            chat = f"Party > [VIP] Mate{rng.randint(1, 3)}: {rng.choice(_PARTY)}"
+        elif roll < 0.90:
+            chat = f"Guild > Member{rng.randint(1, 8)} [MEMBER]: {rng.choice(_GUILD)}"
+        else:
+            chat = f"From [MVP] Trader{rng.randint(1, 2)}: {rng.choice(_DM)}"
+        lines.append(f"[{stamp}] [Client thread/INFO]: [CHAT] {chat}")
+    return lines
+
+
+def tokens(messages: list) -> int:
+    return sum(estimate_tokens(message["content"]) for message in messages)
+
+
+def replay(lines: list[str], buffers: ChannelContextBuffers) -> tuple[int, float]:
+    """返回 (消息条数, 平均上下文 token 数)"""
+    total = count = 0
+    now = time.time()
+    for line in lines:
+        if "[CHAT]" not in line:
+            continue
+        name, content, msg_type = parse_message(line, "log")
+        if not content or msg_type == MessageType.SEND:
+            continue
+        channel = detect_channel(name, msg_type)
+        buffers.push(ContextEntry(content, extract_log_time(line, now), name or "", channel=channel))
+        total += tokens(buffers.render(buffers.snapshot(channel)))
+        count += 1
+    return count, total / count if count else 0.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("log", nargs="?", help="Minecraft 日志文件（默认使用模拟会话）")
+    parser.add_argument("--length", type=int, default=10)
+    parser.add_argument("--timeout", type=float, default=120.0)
+    parser.add_argument("--block", default="auto")
+    parser.add_argument("--tokens", type=int, default=0, help="历史的 token 预算（0 = 不限制）")
+    args = parser.parse_args()
+    logger.disable("modless_chat_trans")
+
+    if args.log:
+        with open(args.log, encoding="utf-8", errors="replace") as f:
+            lines = f.read().splitlines()
+    else:
+        lines = synthetic_session()
+
+    results = {}
+    for per_channel in (False, True):
+        buffers = ChannelContextBuffers("time_based", args.length, args.timeout, args.block,
+                                        per_channel=per_channel, context_tokens=args.tokens)
+        results[per_channel] = replay(lines, buffers)
+
+    count, single = results[False]
+    _, channel = results[True]
+    print(f"消息条数：{count}")
+    print(f"单一上下文  平均 {single:.1f} tokens/条")
+    print(f"分频道上下文 平均 {channel:.1f} tokens/条")
+    if single:
+        print(f"减少 {(1 - channel / single) * 100:.1f}%")
+
+
+if __name__ == "__main__":
+    main()